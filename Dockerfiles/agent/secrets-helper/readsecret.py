@@ -1,11 +1,47 @@
 #!/opt/datadog-agent/embedded/bin/python
 
 import argparse
+import ctypes
+import ctypes.util
 import json
 import os.path
+import socket
+import socketserver
+import struct
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 MAX_FILE_SIZE_BYTES = 1024
+# Secrets cached by the resident mode, the cache is emptied when full
+MAX_CACHED_SECRETS = 4096
+# Requests with more secrets than this are read concurrently
+CONCURRENT_READS_THRESHOLD = 16
+CONCURRENT_READS_WORKERS = 8
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_ISDIR = 0x40000000
+INOTIFY_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+INOTIFY_EVENT = struct.Struct("iIII")
 
 
 def list_secret_names(input_json):
@@ -21,17 +57,188 @@ def list_secret_names(input_json):
     return names
 
 
-def read_file(root_folder, filename):
+def secret_realpath(root_folder, filename):
     path = os.path.join(root_folder, filename)
     realpath = os.path.realpath(path)
 
     if not realpath.startswith(root_folder):
         raise ValueError(f"file {realpath} is outside of the specified folder {root_folder}")
 
+    return realpath
+
+
+def read_file(root_folder, filename):
+    realpath = secret_realpath(root_folder, filename)
+
     with open(realpath, "r") as f:
         return f.read(MAX_FILE_SIZE_BYTES)
 
 
+def resolve_secrets(secret_names, read):
+    """
+    Read the secrets with the given function, returning the output of the secrets protocol.
+    Large batches are read concurrently.
+    """
+
+    def resolve(name):
+        try:
+            return {"value": read(name)}
+        except (OSError, ValueError) as e:
+            return {"error": str(e)}
+
+    if len(secret_names) > CONCURRENT_READS_THRESHOLD:
+        with ThreadPoolExecutor(max_workers=CONCURRENT_READS_WORKERS) as executor:
+            results = list(executor.map(resolve, secret_names))
+    else:
+        results = [resolve(name) for name in secret_names]
+
+    return dict(zip(secret_names, results, strict=True))
+
+
+class SecretCache:
+    """
+    Contents of the secret files, keyed by the real path, inode and modification time of the file.
+
+    The containment of the path in the root folder is checked on every read, but the file is only read
+    again when it was replaced or modified. The cache is also emptied on any change in the root folder
+    reported by inotify, see SecretsWatcher.
+    """
+
+    def __init__(self, root_folder):
+        self.root_folder = root_folder
+        self.secrets = {}
+        self.lock = threading.Lock()
+
+    def read(self, filename):
+        realpath = secret_realpath(self.root_folder, filename)
+        stat = os.stat(realpath)
+        key = (realpath, stat.st_ino, stat.st_mtime_ns)
+
+        with self.lock:
+            contents = self.secrets.get(key)
+        if contents is not None:
+            return contents
+
+        with open(realpath) as f:
+            contents = f.read(MAX_FILE_SIZE_BYTES)
+        with self.lock:
+            if len(self.secrets) >= MAX_CACHED_SECRETS:
+                self.secrets.clear()
+            self.secrets[key] = contents
+        return contents
+
+    def clear(self):
+        with self.lock:
+            self.secrets.clear()
+
+
+class SecretsWatcher(threading.Thread):
+    """
+    Empty a secret cache whenever something changes below its root folder, using inotify.
+    """
+
+    def __init__(self, cache):
+        super().__init__(daemon=True)
+        self.cache = cache
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watch_folders()
+
+    def watch_folders(self):
+        # Watches are per folder, and adding a watch twice is harmless
+        for dirpath, _, _ in os.walk(self.cache.root_folder, followlinks=True):
+            self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), INOTIFY_MASK)
+
+    def run(self):
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except OSError:
+                return
+            self.cache.clear()
+
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size + length
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self.watch_folders()
+                    break
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SecretRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Serve a request of the secrets protocol: the client sends the JSON input and shuts down its side
+    of the connection, the JSON output is sent back. Invalid requests get no output.
+    """
+
+    def handle(self):
+        try:
+            secret_names = list_secret_names(self.rfile.read().decode())
+        except (ValueError, KeyError, UnicodeDecodeError) as e:
+            print(f'Cannot parse input: {e}', file=sys.stderr)
+            return
+
+        output = resolve_secrets(secret_names, self.server.cache.read)
+        self.wfile.write(json.dumps(output).encode())
+
+
+class SecretServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, root_folder):
+        self.cache = SecretCache(root_folder)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        # Only the user running the server can connect
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, SecretRequestHandler)
+        finally:
+            os.umask(umask)
+
+        try:
+            self.watcher = SecretsWatcher(self.cache)
+        except (OSError, AttributeError) as e:
+            # Without inotify, changes are still detected through the inode and modification time
+            print(
+                f'Cannot watch {root_folder}, secrets are only refreshed when their file changes: {e}', file=sys.stderr
+            )
+            self.watcher = None
+        else:
+            self.watcher.start()
+
+    def server_close(self):
+        super().server_close()
+        if self.watcher is not None:
+            self.watcher.close()
+
+
+def query_server(socket_path, input_json):
+    """
+    Send a request of the secrets protocol to a resident helper, returning its JSON output.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(input_json.encode())
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(64 * 1024)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    if not chunks:
+        raise ValueError("no output from the resident helper")
+    return b"".join(chunks).decode()
+
+
 def is_valid_folder(arg):
     if not os.path.isdir(arg):
         raise argparse.ArgumentTypeError(f'The folder {arg} does not exist')
@@ -59,19 +266,36 @@ if __name__ == '__main__':
         type=is_valid_folder,
     )
 
+    parser.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        help="stay resident and serve requests on this Unix socket, caching the secrets",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="SOCKET",
+        help="forward the request to a helper started with --serve, falling back to reading the files",
+    )
+
     args = parser.parse_args()
+    if args.serve:
+        with SecretServer(args.serve, args.root_folder) as server:
+            server.serve_forever()
+        sys.exit(0)
+
     input_json = sys.stdin.read()
     try:
         secret_names = list_secret_names(input_json)
     except ValueError as e:
         sys.exit('Cannot parse input: ' + str(e))
 
-    output = {}
-    for s in secret_names:
+    if args.socket:
         try:
-            contents = read_file(args.root_folder, s)
-            output[s] = {"value": contents}
-        except (ValueError, IOError) as e:
-            output[s] = {"error": str(e)}
+            print(query_server(args.socket, input_json))
+            sys.exit(0)
+        except (OSError, ValueError) as e:
+            print(f'Cannot query the resident helper, reading the files: {e}', file=sys.stderr)
+
+    output = resolve_secrets(secret_names, lambda s: read_file(args.root_folder, s))
 
     print(json.dumps(output))
@@ -1,12 +1,23 @@
 #!/usr/bin/env python
 
 import argparse
+import json
 import os
 import shutil
 import tempfile
+import threading
+import time
 import unittest
 
-from readsecret import is_valid_folder, list_secret_names, read_file
+from readsecret import (
+    SecretCache,
+    SecretServer,
+    is_valid_folder,
+    list_secret_names,
+    query_server,
+    read_file,
+    resolve_secrets,
+)
 
 
 class TestListSecretNames(unittest.TestCase):
@@ -93,5 +104,132 @@ class TestIsValidFolder(unittest.TestCase):
             is_valid_folder(foldername)
 
 
+class TestResolveSecrets(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="tmp-readsecret-test-")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+        self.folder = None
+
+    def test_batch(self):
+        names = [f"secret{i}" for i in range(100)]
+        for name in names[:50]:
+            with open(os.path.join(self.folder, name), "w") as f:
+                f.write(f"{name}_contents")
+
+        output = resolve_secrets(names + ["../outside"], lambda s: read_file(self.folder, s))
+        self.assertEqual(list(output), names + ["../outside"])
+        for name in names[:50]:
+            self.assertEqual(output[name], {"value": f"{name}_contents"})
+        for name in names[50:]:
+            self.assertIn("No such file or directory", output[name]["error"])
+        self.assertIn("outside of the specified folder", output["../outside"]["error"])
+
+
+class TestSecretCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="tmp-readsecret-test-")
+        self.cache = SecretCache(self.folder)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+        self.folder = None
+
+    def write(self, filename, contents, mtime=None):
+        path = os.path.join(self.folder, filename)
+        with open(path, "w") as f:
+            f.write(contents)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def test_path_escape(self):
+        with self.assertRaisesRegex(ValueError, "outside of the specified folder"):
+            self.cache.read("a/../../outside/file")
+
+    def test_file_not_found(self):
+        with self.assertRaisesRegex(IOError, "No such file or directory"):
+            self.cache.read("file/not/found")
+
+    def test_cached(self):
+        self.write("ok_file", "ok_contents", mtime=1000)
+        self.assertEqual(self.cache.read("ok_file"), "ok_contents")
+
+        # Same inode and modification time, the cached contents are returned
+        path = os.path.join(self.folder, "ok_file")
+        with open(path, "r+") as f:
+            f.write("ko")
+        os.utime(path, (1000, 1000))
+        self.assertEqual(self.cache.read("ok_file"), "ok_contents")
+
+        self.cache.clear()
+        self.assertEqual(self.cache.read("ok_file"), "ko_contents")
+
+    def test_modified(self):
+        self.write("ok_file", "ok_contents", mtime=1000)
+        self.assertEqual(self.cache.read("ok_file"), "ok_contents")
+        self.write("ok_file", "new_contents", mtime=2000)
+        self.assertEqual(self.cache.read("ok_file"), "new_contents")
+
+    def test_replaced(self):
+        self.write("ok_file", "ok_contents", mtime=1000)
+        self.assertEqual(self.cache.read("ok_file"), "ok_contents")
+        self.write("new_file", "new_contents", mtime=1000)
+        os.replace(os.path.join(self.folder, "new_file"), os.path.join(self.folder, "ok_file"))
+        self.assertEqual(self.cache.read("ok_file"), "new_contents")
+
+
+class TestSecretServer(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="tmp-readsecret-test-")
+        self.secrets = os.path.join(self.folder, "secrets")
+        os.mkdir(self.secrets)
+        self.socket_path = os.path.join(self.folder, "readsecret.sock")
+        self.server = SecretServer(self.socket_path, self.secrets)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.folder, True)
+        self.folder = None
+
+    def query(self, names):
+        return json.loads(query_server(self.socket_path, json.dumps({"version": "1.0", "secrets": names})))
+
+    def test_query(self):
+        with open(os.path.join(self.secrets, "ok_file"), "w") as f:
+            f.write("ok_contents")
+
+        output = self.query(["ok_file", "not_found", "../readsecret.sock"])
+        self.assertEqual(output["ok_file"], {"value": "ok_contents"})
+        self.assertIn("No such file or directory", output["not_found"]["error"])
+        self.assertIn("outside of the specified folder", output["../readsecret.sock"]["error"])
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+
+    def test_invalid_query(self):
+        with self.assertRaisesRegex(ValueError, "no output"):
+            query_server(self.socket_path, '{"version": "2.0"}')
+
+    @unittest.skipIf(not os.path.exists("/proc/sys/fs/inotify"), "inotify is not available")
+    def test_invalidation(self):
+        os.mkdir(os.path.join(self.secrets, "folder"))
+        path = os.path.join(self.secrets, "folder", "ok_file")
+        with open(path, "w") as f:
+            f.write("ok_contents")
+        os.utime(path, (1000, 1000))
+        self.assertEqual(self.query(["folder/ok_file"]), {"folder/ok_file": {"value": "ok_contents"}})
+
+        # Same inode and modification time, only inotify can tell the contents changed
+        with open(path, "r+") as f:
+            f.write("ko")
+        os.utime(path, (1000, 1000))
+        for _ in range(100):
+            if not self.server.cache.secrets:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.query(["folder/ok_file"]), {"folder/ok_file": {"value": "ko_contents"}})
+
+
 if __name__ == "__main__":
     unittest.main()
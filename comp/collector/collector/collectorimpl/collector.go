@@ -85,6 +85,7 @@ type provides struct {
 	StatusProvider   status.InformationProvider
 	MetadataProvider metadata.Provider
 	APIGetPyStatus   api.AgentEndpointProvider
+	APIGetPyProfile  api.AgentEndpointProvider
 	FlareProvider    flaretypes.Provider
 }
 
@@ -111,6 +112,7 @@ func newProvides(deps dependencies) provides {
 		StatusProvider:   status.NewInformationProvider(collectorStatus.Provider{}),
 		MetadataProvider: agentCheckMetadata,
 		APIGetPyStatus:   api.NewAgentEndpointProvider(getPythonStatus, "/py/status", "GET"),
+		APIGetPyProfile:  api.NewAgentEndpointProvider(c.getPythonProfile, "/py/profile", "GET"),
 		FlareProvider:    flaretypes.NewProvider(c.fillFlare),
 	}
 }
@@ -215,6 +217,7 @@ func (c *collectorImpl) stop(_ context.Context) error {
 		c.runner.Stop()
 		c.runner = nil
 	}
+	pkgCollector.StopPython()
 	c.state.Store(stopped)
 	return nil
 }
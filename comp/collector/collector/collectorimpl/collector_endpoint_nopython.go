@@ -15,3 +15,7 @@ import (
 func getPythonStatus(_ http.ResponseWriter, _ *http.Request) {
 	// nothing here when python disabled
 }
+
+func (*collectorImpl) getPythonProfile(w http.ResponseWriter, _ *http.Request) {
+	http.Error(w, "the python check profiler is not available", http.StatusNotFound)
+}
@@ -10,8 +10,12 @@ package collectorimpl
 
 import (
 	"encoding/json"
+	"fmt"
 	"net/http"
+	"strings"
+	"time"
 
+	"github.com/DataDog/datadog-agent/comp/collector/collector/collectorimpl/internal/middleware"
 	"github.com/DataDog/datadog-agent/pkg/collector/python"
 	"github.com/DataDog/datadog-agent/pkg/util/log"
 )
@@ -27,3 +31,60 @@ func getPythonStatus(w http.ResponseWriter, _ *http.Request) {
 	j, _ := json.Marshal(pyStats)
 	w.Write(j)
 }
+
+const (
+	defaultProfileDuration = 30 * time.Second
+	defaultProfileInterval = 10 * time.Millisecond
+)
+
+// getPythonProfile samples the stacks of the running Python checks for the `duration` of the request
+// (30s by default) every `interval` (10ms by default), and writes them as collapsed stacks rooted at
+// the ID of each check instance, ready to be rendered as a flame graph.
+func (c *collectorImpl) getPythonProfile(w http.ResponseWriter, r *http.Request) {
+	duration, interval := defaultProfileDuration, defaultProfileInterval
+	for name, value := range map[string]*time.Duration{"duration": &duration, "interval": &interval} {
+		if param := r.URL.Query().Get(name); param != "" {
+			d, err := time.ParseDuration(param)
+			if err != nil || d <= 0 {
+				http.Error(w, fmt.Sprintf("invalid %s %q", name, param), http.StatusBadRequest)
+				return
+			}
+			*value = d
+		}
+	}
+
+	if err := python.StartCheckProfiler(interval); err != nil {
+		log.Warnf("Error starting the python check profiler: %s", err)
+		http.Error(w, err.Error(), http.StatusInternalServerError)
+		return
+	}
+	select {
+	case <-time.After(duration):
+	case <-r.Context().Done():
+	}
+	python.StopCheckProfiler()
+
+	var profile strings.Builder
+	for _, ch := range c.GetChecks() {
+		if wrapper, ok := ch.(*middleware.CheckWrapper); ok {
+			ch = wrapper.Inner()
+		}
+		pyCheck, ok := ch.(*python.PythonCheck)
+		if !ok {
+			continue
+		}
+		stacks, err := pyCheck.Profile()
+		if err != nil {
+			log.Warnf("Error getting the profile of check %s: %s", ch.ID(), err)
+			continue
+		}
+		for _, stack := range strings.Split(strings.TrimSuffix(stacks, "\n"), "\n") {
+			if stack != "" {
+				fmt.Fprintf(&profile, "%s;%s\n", ch.ID(), stack)
+			}
+		}
+	}
+
+	w.Header().Set("Content-Type", "text/plain")
+	w.Write([]byte(profile.String()))
+}
@@ -137,3 +137,8 @@ func (c *CheckWrapper) GetDiagnoses() ([]diagnosis.Diagnosis, error) {
 	}
 	return c.inner.GetDiagnoses()
 }
+
+// Inner returns the wrapped check
+func (c *CheckWrapper) Inner() check.Check {
+	return c.inner
+}
@@ -30,4 +30,8 @@ type Component interface {
 
 	// SendLog allows integrations to send logs to any subscribers.
 	SendLog(log, integrationID string)
+
+	// SendLogs sends several logs to any subscribers, in order, and returns the number of logs
+	// accepted before the subscribers stopped keeping up.
+	SendLogs(logs []string, integrationID string) int
 }
@@ -7,10 +7,16 @@
 package integrationsimpl
 
 import (
+	"time"
+
 	"github.com/DataDog/datadog-agent/comp/core/autodiscovery/integration"
 	integrations "github.com/DataDog/datadog-agent/comp/logs/integrations/def"
 )
 
+// sendLogsTimeout is how long SendLogs waits for the subscriber to receive logs before giving up
+// on the rest of them
+const sendLogsTimeout = time.Second
+
 // Logsintegration is the integrations component implementation
 type Logsintegration struct {
 	logChan         chan integrations.IntegrationLog
@@ -45,6 +51,32 @@ func (li *Logsintegration) SendLog(log, integrationID string) {
 	li.logChan <- integrationLog
 }
 
+// SendLogs sends logs to any subscribers, and returns the number of logs sent
+// before the subscriber stopped receiving them for sendLogsTimeout.
+func (li *Logsintegration) SendLogs(logs []string, integrationID string) int {
+	timer := time.NewTimer(sendLogsTimeout)
+	defer timer.Stop()
+
+	for i, log := range logs {
+		integrationLog := integrations.IntegrationLog{
+			Log:           log,
+			IntegrationID: integrationID,
+		}
+
+		select {
+		case li.logChan <- integrationLog:
+		case <-timer.C:
+			return i
+		}
+		// the subscriber keeps up, give it time for the next log
+		if !timer.Stop() {
+			<-timer.C
+		}
+		timer.Reset(sendLogsTimeout)
+	}
+	return len(logs)
+}
+
 // Subscribe returns the channel that receives logs from integrations. Currently
 // the integrations component only supports one subscriber, but can be extended
 // later by making a new channel for any number of subscribers.
@@ -7,6 +7,7 @@ package integrationsimpl
 
 import (
 	"testing"
+	"time"
 
 	"github.com/stretchr/testify/assert"
 )
@@ -29,3 +30,40 @@ func TestSendandSubscribe(t *testing.T) {
 	assert.Equal(t, "test log", log.Log)
 	assert.Equal(t, "integration1", log.IntegrationID)
 }
+
+// TestSendLogs tests sending several logs through the integrations component.
+func TestSendLogs(t *testing.T) {
+	comp := NewLogsIntegration()
+
+	accepted := make(chan int)
+	go func() {
+		accepted <- comp.SendLogs([]string{"log1", "log2", "log3"}, "integration1")
+	}()
+
+	for _, expected := range []string{"log1", "log2", "log3"} {
+		log := <-comp.Subscribe()
+		assert.Equal(t, expected, log.Log)
+		assert.Equal(t, "integration1", log.IntegrationID)
+	}
+	assert.Equal(t, 3, <-accepted)
+}
+
+// TestSendLogsBackPressure tests that logs are rejected when the subscriber doesn't keep up.
+func TestSendLogsBackPressure(t *testing.T) {
+	comp := NewLogsIntegration()
+
+	accepted := make(chan int)
+	go func() {
+		accepted <- comp.SendLogs([]string{"log1", "log2", "log3"}, "integration1")
+	}()
+
+	log := <-comp.Subscribe()
+	assert.Equal(t, "log1", log.Log)
+
+	select {
+	case n := <-accepted:
+		assert.Equal(t, 1, n)
+	case <-time.After(10 * sendLogsTimeout):
+		t.Fatal("SendLogs didn't give up")
+	}
+}
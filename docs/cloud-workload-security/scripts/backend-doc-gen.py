@@ -1,5 +1,6 @@
 import argparse
 import json
+import sys
 from dataclasses import dataclass
 from typing import List
 
@@ -57,8 +58,16 @@ if __name__ == "__main__":
     parser.add_argument("--input", type=str, help="input json file generated by the json schema generator")
     parser.add_argument("--output", type=str, help="output file")
     parser.add_argument("--template", type=str, help="template")
+    parser.add_argument("--cache-dir", type=str, default=common.CACHE_DIR, help="directory of the rendering manifests")
+    parser.add_argument("--no-cache", action="store_true", help="render every section")
     args = parser.parse_args()
 
+    document = common.IncrementalDocument(
+        args.output, args.template, [args.input], cache_dir=None if args.no_cache else args.cache_dir
+    )
+    if document.up_to_date():
+        sys.exit(0)
+
     json_schema_file = open(args.input)
     json_top_node = json.load(json_schema_file)
     json_schema_file.close()
@@ -93,11 +102,11 @@ if __name__ == "__main__":
 
     presentable_json = presentable_top_node(json_top_node)
 
-    output_file = open(args.output, "w")
-    print(
-        common.fill_template(
-            args.template, event_schema=presentable_json, parameters=parameters, definitions=definitions
-        ),
-        file=output_file,
-    )
-    output_file.close()
+    # Each parameter and definition is a section of the document
+    fragments = {
+        "parameters": [document.fragment("backend/parameter.md", param=param) for param in parameters],
+        "definitions": [
+            document.fragment("backend/definition.md", **{"def": definition}) for definition in definitions
+        ],
+    }
+    document.write(event_schema=presentable_json, fragments=fragments)
@@ -1,13 +1,144 @@
+import dataclasses
+import hashlib
+import json
 import os
+import sys
 
-import jinja2
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates")
+# Manifests of the generated documents, see IncrementalDocument
+CACHE_DIR = os.path.expanduser("~/.cache/datadog-agent/cws-docs")
+MANIFEST_VERSION = 1
 
 
-def fill_template(template_name, **kwargs):
-    env = jinja2.Environment(
-        loader=jinja2.FileSystemLoader(os.path.join(os.path.dirname(__file__), "templates")),
+def environment(keep_trailing_newline=False):
+    # Imported here, so that up to date documents are checked without loading jinja
+    import jinja2
+
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
         autoescape=jinja2.select_autoescape(),
         trim_blocks=True,
+        keep_trailing_newline=keep_trailing_newline,
     )
-    templ = env.get_template(template_name)
+
+
+def fill_template(template_name, **kwargs):
+    templ = environment().get_template(template_name)
     return templ.render(**kwargs)
+
+
+def digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class IncrementalDocument:
+    """
+    Document generated from a template, in which each section (event type, property, ...) is a fragment rendered
+    by its own template.
+
+    The fragments of the last generation are kept in a manifest, by hash of their template and inputs, so that
+    only the sections whose inputs changed are rendered before stitching the document. When neither the inputs,
+    the templates nor the generator changed, and the document wasn't modified, nothing is rendered.
+    """
+
+    def __init__(self, output, template, inputs, cache_dir=CACHE_DIR):
+        self.output = output
+        self.template = template
+        self.manifest_path = None
+        if cache_dir:
+            name = f"{os.path.basename(output)}-{digest(os.path.abspath(output))[:16]}.json"
+            self.manifest_path = os.path.join(cache_dir, name)
+
+        self._templates = {}
+        for root, _, files in os.walk(TEMPLATES_DIR):
+            for file in files:
+                path = os.path.join(root, file)
+                self._templates[os.path.relpath(path, TEMPLATES_DIR).replace(os.sep, "/")] = _read_bytes(path)
+        # The generator script and this module build the contexts of the templates, any change renders everything
+        generator = getattr(sys.modules["__main__"], "__file__", None) or sys.argv[0]
+        self._code_digest = digest(_read_bytes(generator), _read_bytes(__file__))
+        self.inputs_digest = digest(
+            self._code_digest,
+            *(_read_bytes(path) for path in inputs),
+            *(f"{name}:{digest(source)}" for name, source in sorted(self._templates.items())),
+        )
+
+        self.manifest = self._load_manifest()
+        self.fragments = {}
+        self.rendered = 0
+        self._fragments_env = None
+
+    def _load_manifest(self):
+        if self.manifest_path and os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest
+        return {"fragments": {}}
+
+    def _output_digest(self):
+        if not os.path.exists(self.output):
+            return None
+        with open(self.output) as f:
+            return digest(f.read())
+
+    def up_to_date(self):
+        return (
+            self.manifest.get("inputs") == self.inputs_digest and self.manifest.get("output") == self._output_digest()
+        )
+
+    def fragment(self, template_name, **context):
+        """
+        Render a fragment template, or reuse its last rendering if its inputs didn't change.
+        The context values are dataclasses, or JSON serializable values.
+        """
+        inputs = {
+            key: dataclasses.asdict(value) if dataclasses.is_dataclass(value) else value
+            for key, value in context.items()
+        }
+        key = digest(
+            self._code_digest, template_name, self._templates[template_name], json.dumps(inputs, sort_keys=True)
+        )
+        text = self.manifest["fragments"].get(key)
+        if text is None:
+            if self._fragments_env is None:
+                # Fragments are parts of the document, their trailing newline is part of it
+                self._fragments_env = environment(keep_trailing_newline=True)
+            text = self._fragments_env.get_template(template_name).render(**context)
+            self.rendered += 1
+        self.fragments[key] = text
+        return text
+
+    def write(self, **kwargs):
+        """
+        Stitch the fragments with the document template, and save the manifest.
+        The document is only written if it changed.
+        """
+        content = fill_template(self.template, **kwargs) + "\n"
+        if self._output_digest() != digest(content):
+            with open(self.output, "w") as f:
+                f.write(content)
+
+        if self.manifest_path:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            with open(f"{self.manifest_path}.tmp", "w") as f:
+                json.dump(
+                    {
+                        "version": MANIFEST_VERSION,
+                        "inputs": self.inputs_digest,
+                        "output": digest(content),
+                        # Only the fragments of this document are kept, the stale ones are dropped
+                        "fragments": self.fragments,
+                    },
+                    f,
+                )
+            os.replace(f"{self.manifest_path}.tmp", self.manifest_path)
@@ -1,5 +1,6 @@
 import argparse
 import json
+import sys
 from dataclasses import dataclass
 from typing import List
 
@@ -102,8 +103,16 @@ if __name__ == "__main__":
     parser.add_argument("--input", type=str, help="input json file generated by the accessors generator")
     parser.add_argument("--output", type=str, help="output file")
     parser.add_argument("--template", type=str, help="template used for the generation")
+    parser.add_argument("--cache-dir", type=str, default=common.CACHE_DIR, help="directory of the rendering manifests")
+    parser.add_argument("--no-cache", action="store_true", help="render every section")
     args = parser.parse_args()
 
+    document = common.IncrementalDocument(
+        args.output, args.template, [args.input], cache_dir=None if args.no_cache else args.cache_dir
+    )
+    if document.up_to_date():
+        sys.exit(0)
+
     secl_json_file = open(args.input)
     json_top_node = json.load(secl_json_file)
     secl_json_file.close()
@@ -112,14 +121,13 @@ if __name__ == "__main__":
     properties_doc_list = build_properties_doc(json_top_node)
     constants_list = build_constants(json_top_node)
 
-    output_file = open(args.output, "w")
-    print(
-        common.fill_template(
-            args.template,
-            event_types=event_types,
-            constants_list=constants_list,
-            properties_doc_list=properties_doc_list,
-        ),
-        file=output_file,
-    )
-    output_file.close()
+    # Each event type, property and constants group is a section of the document
+    fragments = {
+        "triggers": [document.fragment("secl/trigger.md", event_type=event_type) for event_type in event_types],
+        "event_types": [document.fragment("secl/event_type.md", event_type=event_type) for event_type in event_types],
+        "properties_doc": [
+            document.fragment("secl/property_doc.md", property_doc=property_doc) for property_doc in properties_doc_list
+        ],
+        "constants": [document.fragment("secl/constants.md", constants=constants) for constants in constants_list],
+    }
+    document.write(fragments=fragments)
@@ -1,16 +1,212 @@
+"""
+Generate a corpus of random contexts for the collisions test of the context key generator.
+
+Each line has the format `<metric_name>,<tag1> <tag2> ...`. The corpus only depends on the seed and the
+generation parameters: it is generated by shards, each with its own random generator, and the shards are
+concatenated in order whatever the number of processes generating them.
+"""
+
+import argparse
+import gzip
 import random
-import uuid
-
-f = open("random_contexts.csv", "w")
-for _ in range(10000000):
-    uid = uuid.uuid4()
-    uid2 = uuid.uuid4()
-    f.write(str(uuid.uuid4()) + ",")
-
-    tags_count = random.randint(1, 4)
-    for i in range(tags_count):
-        f.write(str(uuid.uuid4()))
-        if i < tags_count - 1:
-            f.write(" ")
-    f.write("\n")
-f.close()
+import struct
+import sys
+from multiprocessing import Pool
+
+# Lines generated and written at once
+BLOCK_SIZE = 10000
+
+
+def parse_range(value):
+    """
+    Parse a MIN-MAX range, or a single value.
+    """
+    low, _, high = value.partition("-")
+    low, high = int(low), int(high or low)
+    if low < 1 or high < low:
+        raise argparse.ArgumentTypeError(f"invalid range {value}")
+    return low, high
+
+
+def sampler(rng, bounds, distribution):
+    """
+    Return a function drawing integers between the bounds, with the given distribution.
+    """
+    low, high = bounds
+    if low == high:
+        return lambda: low
+    if distribution == "uniform":
+        span = high - low + 1
+        return lambda: low + int(rng.random() * span)
+    if distribution == "geometric":
+        # Each value is half as likely as the previous one
+        return lambda: min(low + int(rng.expovariate(0.6931471805599453)), high)
+    raise ValueError(f"unknown distribution {distribution}")
+
+
+# Pools of metric names and tags of the process, by parameters
+_pools = {}
+
+
+def value_pool(seed, kind, cardinality, bounds, distribution):
+    """
+    Return the pool of `cardinality` metric names or tags, the same in every process.
+    """
+    key = (seed, kind, cardinality, bounds, distribution)
+    if key not in _pools:
+        rng = random.Random(f"{seed}:{kind}")
+        length = sampler(rng, bounds, distribution)
+        _pools[key] = [random_value(rng, length()) for _ in range(cardinality)]
+    return _pools[key]
+
+
+def random_value(rng, length):
+    return format(rng.getrandbits(4 * length), f"0{length}x")
+
+
+def encode_binary(name, tags):
+    """
+    Binary encoding of a context: u16 length-prefixed metric name, u8 tag count, u16 length-prefixed tags.
+    """
+    parts = [struct.pack("<H", len(name)), name.encode(), struct.pack("<B", len(tags))]
+    for tag in tags:
+        parts.append(struct.pack("<H", len(tag)))
+        parts.append(tag.encode())
+    return b"".join(parts)
+
+
+def generate_shard(params):
+    """
+    Generate the contexts of a shard, returned as a list of encoded blocks.
+    """
+    args, shard, count = params
+    rng = random.Random(f"{args.seed}:{shard}")
+    tags_count = sampler(rng, args.tags_count, args.tags_count_distribution)
+
+    names = tags = None
+    if args.cardinality:
+        names = value_pool(args.seed, "name", args.cardinality, (args.name_length,) * 2, "uniform")
+    if args.tag_cardinality:
+        tags = value_pool(args.seed, "tag", args.tag_cardinality, args.tag_length, args.tag_length_distribution)
+    tag_length = sampler(rng, args.tag_length, args.tag_length_distribution)
+
+    def new_context():
+        tag_count = tags_count()
+        if names and tags:
+            return rng.choice(names), [rng.choice(tags) for _ in range(tag_count)]
+
+        # Random values are drawn at once and sliced
+        lengths = [] if names else [args.name_length]
+        if not tags:
+            lengths.extend(tag_length() for _ in range(tag_count))
+        total = sum(lengths)
+        digits = format(rng.getrandbits(4 * total), f"0{total}x")
+        values = []
+        offset = 0
+        for length in lengths:
+            values.append(digits[offset : offset + length])
+            offset += length
+
+        name = rng.choice(names) if names else values.pop(0)
+        return name, [rng.choice(tags) for _ in range(tag_count)] if tags else values
+
+    contexts = []
+    blocks = []
+    block = []
+    for _ in range(count):
+        if contexts and rng.random() < args.duplicates:
+            context = rng.choice(contexts)
+        else:
+            context = new_context()
+            if args.duplicates:
+                contexts.append(context)
+        block.append(context)
+
+        if len(block) == BLOCK_SIZE:
+            blocks.append(encode_block(block, args.format))
+            block = []
+    if block:
+        blocks.append(encode_block(block, args.format))
+
+    return blocks
+
+
+def encode_block(contexts, output_format):
+    if output_format == "binary":
+        return b"".join(encode_binary(name, tags) for name, tags in contexts)
+    return "".join(f"{name},{' '.join(tags)}\n" for name, tags in contexts).encode()
+
+
+def open_output(path, compress):
+    """
+    Open the output, the standard output being wrapped instead of closed.
+    """
+    if path == "-":
+        if compress:
+            # Closing the gzip file writes its trailer but leaves the wrapped stream open
+            return gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb", compresslevel=1)
+        return open(sys.stdout.fileno(), "wb", buffering=1024 * 1024, closefd=False)
+    if compress:
+        return gzip.open(path, "wb", compresslevel=1)
+    return open(path, "wb", buffering=1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", default="random_contexts.csv", help="file to write, - for stdout")
+    parser.add_argument("-n", "--contexts", type=int, default=10000000, help="number of contexts to generate")
+    parser.add_argument("--seed", default="0", help="seed of the random generators")
+    parser.add_argument(
+        "--cardinality",
+        type=int,
+        default=0,
+        help="number of distinct metric names, 0 for a random name per context",
+    )
+    parser.add_argument("--name-length", type=int, default=32, help="length of the metric names")
+    parser.add_argument(
+        "--tag-cardinality",
+        type=int,
+        default=0,
+        help="number of distinct tags, 0 for random tags",
+    )
+    parser.add_argument("--tags-count", type=parse_range, default=(1, 4), help="number of tags per context, MIN-MAX")
+    parser.add_argument("--tags-count-distribution", choices=("uniform", "geometric"), default="uniform")
+    parser.add_argument("--tag-length", type=parse_range, default=(32, 32), help="length of the tags, MIN-MAX")
+    parser.add_argument("--tag-length-distribution", choices=("uniform", "geometric"), default="uniform")
+    parser.add_argument(
+        "--duplicates",
+        type=float,
+        default=0.0,
+        help="ratio of contexts repeating a previous context of their shard",
+    )
+    parser.add_argument("--format", choices=("csv", "binary"), default="csv", help="see encode_binary")
+    parser.add_argument("--compress", action="store_true", help="gzip the output")
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=100000,
+        help="contexts per shard, changing it changes the corpus",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of processes, all CPUs by default")
+    args = parser.parse_args()
+
+    if args.format == "binary":
+        # Limits of the length and count prefixes of encode_binary, checked before anything is written
+        if args.tags_count[1] > 0xFF:
+            parser.error("--tags-count can't exceed 255 with --format binary")
+        if args.name_length > 0xFFFF or args.tag_length[1] > 0xFFFF:
+            parser.error("--name-length and --tag-length can't exceed 65535 with --format binary")
+
+    shards = [
+        (args, shard, min(args.shard_size, args.contexts - start))
+        for shard, start in enumerate(range(0, args.contexts, args.shard_size))
+    ]
+
+    with open_output(args.output, args.compress) as output, Pool(args.jobs) as pool:
+        # imap keeps the order of the shards
+        for blocks in pool.imap(generate_shard, shards):
+            output.writelines(blocks)
+
+
+if __name__ == "__main__":
+    main()
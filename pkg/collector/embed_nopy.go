@@ -9,3 +9,6 @@ package collector
 
 // InitPython is a no-op when the build tag is not set
 func InitPython(_ ...string) {}
+
+// StopPython is a no-op when the build tag is not set
+func StopPython() {}
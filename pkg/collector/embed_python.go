@@ -30,6 +30,11 @@ func InitPython(paths ...string) {
 	}
 }
 
+// StopPython stops the periodic tasks of the embedded interpreter, and stores the data the python checks left pending
+func StopPython() {
+	python.StopPersistentCacheFlush()
+}
+
 func pySetup(paths ...string) (pythonVersion, pythonHome, pythonPath string) {
 	if err := python.Initialize(paths...); err != nil {
 		log.Errorf("Could not initialize Python: %s", err)
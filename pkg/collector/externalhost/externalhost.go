@@ -5,19 +5,38 @@
 
 package externalhost
 
-import "sync"
+import (
+	"sync"
+	"time"
+)
+
+// externalTagsTTL is how long the tags of a host stay in the payloads without being set again.
+// Python checks giving their ID to `set_external_tags` only set the hosts whose tags changed, and
+// every host again every 30 minutes, so the tags are kept across payloads instead of being cleared
+// on each collection. The hosts no check set for longer than this are dropped.
+const externalTagsTTL = time.Hour
 
-// hostname -> ExternalTags
-type externalHost map[string]ExternalTags
+// hostEntry holds the tags of a host for a source type, and when they were last set
+type hostEntry struct {
+	tags    []string
+	lastSet time.Time
+}
+
+// hostname -> hostEntry
+type externalHost map[string]hostEntry
 
 var (
 	// externalHostCache maps source_type -> externalHost
 	externalHostCache = make(map[string]externalHost)
 	cacheMutex        = &sync.Mutex{}
+
+	// timeNow is replaced in tests
+	timeNow = time.Now
 )
 
 // SetExternalTags adds external tags for a specific host and source type
-// to the cache.
+// to the cache. An empty list of tags clears the tags of the host for the
+// source type, it's only sent in the next payload.
 func SetExternalTags(hostname, sourceType string, tags []string) {
 	cacheMutex.Lock()
 	defer cacheMutex.Unlock()
@@ -27,7 +46,7 @@ func SetExternalTags(hostname, sourceType string, tags []string) {
 		externalHostCache[sourceType] = make(externalHost)
 	}
 
-	externalHostCache[sourceType][hostname] = ExternalTags{sourceType: tags}
+	externalHostCache[sourceType][hostname] = hostEntry{tags: tags, lastSet: timeNow()}
 }
 
 // GetPayload fills and return the external host tags metadata payload
@@ -35,15 +54,27 @@ func GetPayload() *Payload {
 	cacheMutex.Lock()
 	defer cacheMutex.Unlock()
 
+	now := timeNow()
 	payload := Payload{}
-	for _, extHost := range externalHostCache {
-		for hostname, tags := range extHost {
-			ht := hostTags{hostname, tags}
+	for sourceType, extHost := range externalHostCache {
+		for hostname, entry := range extHost {
+			if now.Sub(entry.lastSet) > externalTagsTTL {
+				delete(extHost, hostname)
+				continue
+			}
+
+			ht := hostTags{hostname, ExternalTags{sourceType: entry.tags}}
 			payload = append(payload, ht)
+
+			// the tags of the host are cleared once the payload is sent
+			if len(entry.tags) == 0 {
+				delete(extHost, hostname)
+			}
+		}
+		if len(extHost) == 0 {
+			delete(externalHostCache, sourceType)
 		}
 	}
 
-	// clear the cache
-	externalHostCache = make(map[string]externalHost)
 	return &payload
 }
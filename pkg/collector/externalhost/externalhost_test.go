@@ -7,11 +7,22 @@ package externalhost
 
 import (
 	"testing"
+	"time"
 
 	"github.com/stretchr/testify/assert"
 )
 
+func resetCache(t *testing.T) {
+	externalHostCache = make(map[string]externalHost)
+	t.Cleanup(func() {
+		externalHostCache = make(map[string]externalHost)
+		timeNow = time.Now
+	})
+}
+
 func TestGetPayload(t *testing.T) {
+	resetCache(t)
+
 	// empty cache, empty payload
 	p := *GetPayload()
 	assert.Len(t, p, 0)
@@ -28,7 +39,27 @@ func TestGetPayload(t *testing.T) {
 	hTags := p[0]
 	assert.Contains(t, hTags, host)
 	assert.Contains(t, hTags, eTags)
+}
+
+func TestGetPayloadKeepsTags(t *testing.T) {
+	resetCache(t)
+	now := time.Now()
+	timeNow = func() time.Time { return now }
+
+	SetExternalTags("localhost", "vsphere", []string{"foo"})
+	SetExternalTags("removed", "vsphere", []string{})
+
+	// checks only set the hosts whose tags changed, the others are still sent
+	for _, expected := range []Payload{
+		{{"localhost", ExternalTags{"vsphere": {"foo"}}}, {"removed", ExternalTags{"vsphere": {}}}},
+		{{"localhost", ExternalTags{"vsphere": {"foo"}}}},
+	} {
+		now = now.Add(10 * time.Minute)
+		assert.ElementsMatch(t, expected, *GetPayload())
+	}
 
-	// GetPayload is supposed to empty the cache
+	// hosts no check set anymore are dropped
+	now = now.Add(externalTagsTTL)
+	assert.Len(t, *GetPayload(), 0)
 	assert.Len(t, externalHostCache, 0)
 }
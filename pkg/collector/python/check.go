@@ -29,6 +29,7 @@ import (
 	pkgconfigsetup "github.com/DataDog/datadog-agent/pkg/config/setup"
 	"github.com/DataDog/datadog-agent/pkg/config/utils"
 	"github.com/DataDog/datadog-agent/pkg/diagnose/diagnosis"
+	"github.com/DataDog/datadog-agent/pkg/telemetry"
 	"github.com/DataDog/datadog-agent/pkg/util/log"
 )
 
@@ -47,6 +48,17 @@ const (
 	skipInstanceErrorPattern = "The integration refused to load the check configuration, it may be too old or too new."
 )
 
+var (
+	tlmCheckCPUTime = telemetry.NewCounter("python_check", "cpu_time_ns",
+		[]string{"check_name"}, "CPU time used by the thread running the python check, in nanoseconds")
+	tlmCheckWallTime = telemetry.NewCounter("python_check", "wall_time_ns",
+		[]string{"check_name"}, "Time spent running the python check, in nanoseconds")
+	tlmCheckAllocatedBytes = telemetry.NewCounter("python_check", "allocated_bytes",
+		[]string{"check_name"}, "Bytes allocated by the python interpreter while running the check")
+	tlmCheckFreedBytes = telemetry.NewCounter("python_check", "freed_bytes",
+		[]string{"check_name"}, "Bytes freed by the python interpreter while running the check")
+)
+
 // PythonCheck represents a Python check, implements `Check` interface
 //
 //nolint:revive // TODO(AML) Fix revive linter
@@ -118,6 +130,8 @@ func (c *PythonCheck) runCheckImpl(commitMetrics bool) error {
 	// grab the warnings and add them to the struct
 	c.lastWarnings = c.getPythonWarnings(gstate)
 
+	c.recordRunStats()
+
 	checkErrStr := C.GoString(cResult)
 	if checkErrStr == "" {
 		return nil
@@ -233,6 +247,25 @@ func (c *PythonCheck) getPythonWarnings(gstate *stickyLock) []error {
 	return warnings
 }
 
+// recordRunStats reports the resources used by the last run of the python check
+func (c *PythonCheck) recordRunStats() {
+	/**
+	This function is run with the GIL locked by runCheck
+	**/
+
+	var s C.check_run_stats_t
+	if C.get_check_run_stats(rtloader, c.instance, &s) == 0 {
+		return
+	}
+
+	tlmCheckCPUTime.Add(float64(s.cpu_time_ns), c.ModuleName)
+	tlmCheckWallTime.Add(float64(s.wall_time_ns), c.ModuleName)
+	tlmCheckAllocatedBytes.Add(float64(s.alloc), c.ModuleName)
+	tlmCheckFreedBytes.Add(float64(s.freed), c.ModuleName)
+	log.Debugf("Python check %s (id: '%s') ran in %s, using %s of CPU time and allocating %d bytes (%d freed)",
+		c.ModuleName, c.id, time.Duration(s.wall_time_ns), time.Duration(s.cpu_time_ns), s.alloc, s.freed)
+}
+
 // Configure the Python check from YAML data
 //
 //nolint:revive // TODO(AML) Fix revive linter
@@ -400,6 +433,25 @@ func (c *PythonCheck) GetDiagnoses() ([]diagnosis.Diagnosis, error) {
 	return diagnoses, nil
 }
 
+// Profile returns the stacks sampled by the check profiler while the check was running, since the
+// previous call. Each line holds a `;`-separated stack followed by its number of samples, the
+// format expected by flame graph tools. See StartCheckProfiler.
+func (c *PythonCheck) Profile() (string, error) {
+	gstate, err := newStickyLock()
+	if err != nil {
+		return "", err
+	}
+	defer gstate.unlock()
+
+	profile := C.get_check_profile(rtloader, c.instance)
+	if profile == nil {
+		return "", nil
+	}
+	defer C.rtloader_free(rtloader, unsafe.Pointer(profile))
+
+	return C.GoString(profile), nil
+}
+
 // pythonCheckFinalizer is a finalizer that decreases the reference count on the PyObject refs owned
 // by the PythonCheck.
 func pythonCheckFinalizer(c *PythonCheck) {
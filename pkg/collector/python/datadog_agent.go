@@ -9,6 +9,7 @@ package python
 
 import (
 	"context"
+	"encoding/binary"
 	"encoding/json"
 	"sync"
 	"unsafe"
@@ -126,6 +127,37 @@ func GetConfig(key *C.char, yamlPayload **C.char) {
 	*yamlPayload = TrackedCString(string(data))
 }
 
+// GetConfigMany returns the values of several keys from the agent configuration, as a YAML
+// mapping of the keys that are set to their value.
+// Indirectly used by the C function `get_config_many` that's mapped to `datadog_agent.get_config_many`.
+//
+//export GetConfigMany
+func GetConfigMany(keys **C.char, yamlPayload **C.char) {
+	values := map[string]interface{}{}
+
+	pStart := unsafe.Pointer(keys)
+	size := unsafe.Sizeof(*keys)
+	for i := 0; ; i++ {
+		pKey := *(**C.char)(unsafe.Pointer(uintptr(pStart) + size*uintptr(i)))
+		if pKey == nil {
+			break
+		}
+		goKey := C.GoString(pKey)
+		if pkgconfigsetup.Datadog().IsSet(goKey) {
+			values[goKey] = pkgconfigsetup.Datadog().Get(goKey)
+		}
+	}
+
+	data, err := yaml.Marshal(values)
+	if err != nil {
+		log.Errorf("could not convert configuration values to YAML: %s", err)
+		*yamlPayload = nil
+		return
+	}
+	// yaml Payload will be free by rtloader when it's done with it
+	*yamlPayload = TrackedCString(string(data))
+}
+
 // LogMessage logs a message from python through the agent logger (see
 // https://docs.python.org/2.7/library/logging.html#logging-levels)
 //
@@ -176,6 +208,17 @@ func SetExternalTags(hostname *C.char, sourceType *C.char, tags **C.char) {
 	externalhost.SetExternalTags(hname, stype, tagsStrings)
 }
 
+// SetExternalTagsMany adds the tags of several hostnames to the External Host Tags metadata
+// provider cache. An empty list of tags removes the tags of the hostname for the source type.
+// Indirectly used by the C function `set_external_tags` that's mapped to `datadog_agent.set_external_tags`.
+//
+//export SetExternalTagsMany
+func SetExternalTagsMany(externalTags *C.external_tags_t, externalTagsLen C.int) {
+	for _, entry := range unsafe.Slice(externalTags, int(externalTagsLen)) {
+		externalhost.SetExternalTags(C.GoString(entry.hostname), C.GoString(entry.source_type), cStringArrayToSlice(entry.tags))
+	}
+}
+
 // SetCheckMetadata updates a metadata value for one check instance in the cache.
 // Indirectly used by the C function `set_check_metadata` that's mapped to `datadog_agent.set_check_metadata`.
 //
@@ -200,6 +243,25 @@ func WritePersistentCache(key, value *C.char) {
 	persistentcache.Write(keyName, val) //nolint:errcheck
 }
 
+// WritePersistentCacheMany stores several values for one or more check instances.
+// Indirectly used by the C function `flush_persistent_cache` that stores in batches the values
+// written with `datadog_agent.write_persistent_cache`.
+//
+//export WritePersistentCacheMany
+func WritePersistentCacheMany(keys, values **C.char) {
+	pKeys := unsafe.Pointer(keys)
+	pValues := unsafe.Pointer(values)
+	size := unsafe.Sizeof(*keys)
+	for i := 0; ; i++ {
+		pKey := *(**C.char)(unsafe.Pointer(uintptr(pKeys) + size*uintptr(i)))
+		if pKey == nil {
+			break
+		}
+		pValue := *(**C.char)(unsafe.Pointer(uintptr(pValues) + size*uintptr(i)))
+		persistentcache.Write(C.GoString(pKey), C.GoString(pValue)) //nolint:errcheck
+	}
+}
+
 // ReadPersistentCache retrieves a value for one check instance
 // Indirectly used by the C function `read_persistent_cache` that's mapped to `datadog_agent.read_persistent_cache`.
 //
@@ -236,12 +298,42 @@ func SendLog(logLine, checkID *C.char) {
 	lr.SendLog(line, cid)
 }
 
+// SendLogs submits several logs for one check instance, and returns the number of logs accepted by the logs
+// pipeline. The logs are packed in records, each one prefixed by its length as a native-endian uint32.
+// Indirectly used by the C function `send_logs` that's mapped to `datadog_agent.send_logs`.
+//
+//export SendLogs
+func SendLogs(records *C.char, recordsSize C.size_t, checkID *C.char) C.int {
+	cc, err := getCheckContext()
+	if err != nil {
+		log.Errorf("Log submission failed: %s", err)
+		return 0
+	}
+
+	lr, ok := cc.logReceiver.Get()
+	if !ok {
+		log.Error("Log submission failed: no receiver")
+		return 0
+	}
+
+	buf := unsafe.Slice((*byte)(unsafe.Pointer(records)), int(recordsSize))
+	lines := []string{}
+	for len(buf) >= 4 {
+		size := binary.NativeEndian.Uint32(buf)
+		lines = append(lines, string(buf[4:4+size]))
+		buf = buf[4+size:]
+	}
+
+	return C.int(lr.SendLogs(lines, C.GoString(checkID)))
+}
+
 var (
-	// one obfuscator instance is shared across all python checks. It is not threadsafe but that is ok because
-	// the GIL is always locked when calling c code from python which means that the exported functions in this file
-	// will only ever be called by one goroutine at a time
+	// one obfuscator instance is shared across all python checks. It is not threadsafe: the GIL is locked when
+	// calling most of the c code from python, but `obfuscate_sql_batch` releases it, so every use of the obfuscator
+	// holds obfuscatorLock
 	obfuscator       *obfuscate.Obfuscator
 	obfuscatorLoader sync.Once
+	obfuscatorLock   sync.Mutex
 )
 
 // lazyInitObfuscator initializes the obfuscator the first time it is used. We can't initialize during the package init
@@ -322,11 +414,35 @@ type sqlConfig struct {
 	KeepIdentifierQuotation bool `json:"keep_identifier_quotation"`
 }
 
+// obfuscateConfig returns the configuration of the obfuscator matching these options.
+func (c *sqlConfig) obfuscateConfig() *obfuscate.SQLConfig {
+	return &obfuscate.SQLConfig{
+		DBMS:                          c.DBMS,
+		TableNames:                    c.TableNames,
+		CollectCommands:               c.CollectCommands,
+		CollectComments:               c.CollectComments,
+		CollectProcedures:             c.CollectProcedures,
+		ReplaceDigits:                 c.ReplaceDigits,
+		KeepSQLAlias:                  c.KeepSQLAlias,
+		DollarQuotedFunc:              c.DollarQuotedFunc,
+		ObfuscationMode:               c.ObfuscationMode,
+		RemoveSpaceBetweenParentheses: c.RemoveSpaceBetweenParentheses,
+		KeepNull:                      c.KeepNull,
+		KeepBoolean:                   c.KeepBoolean,
+		KeepPositionalParameter:       c.KeepPositionalParameter,
+		KeepTrailingSemicolon:         c.KeepTrailingSemicolon,
+		KeepIdentifierQuotation:       c.KeepIdentifierQuotation,
+	}
+}
+
 // ObfuscateSQL obfuscates & normalizes the provided SQL query, writing the error into errResult if the operation
 // fails. An optional configuration may be passed to change the behavior of the obfuscator.
 //
 //export ObfuscateSQL
 func ObfuscateSQL(rawQuery, opts *C.char, errResult **C.char) *C.char {
+	obfuscatorLock.Lock()
+	defer obfuscatorLock.Unlock()
+
 	optStr := C.GoString(opts)
 	if optStr == "" {
 		// ensure we have a valid JSON string before unmarshalling
@@ -338,23 +454,7 @@ func ObfuscateSQL(rawQuery, opts *C.char, errResult **C.char) *C.char {
 		*errResult = TrackedCString(err.Error())
 	}
 	s := C.GoString(rawQuery)
-	obfuscatedQuery, err := lazyInitObfuscator().ObfuscateSQLStringWithOptions(s, &obfuscate.SQLConfig{
-		DBMS:                          sqlOpts.DBMS,
-		TableNames:                    sqlOpts.TableNames,
-		CollectCommands:               sqlOpts.CollectCommands,
-		CollectComments:               sqlOpts.CollectComments,
-		CollectProcedures:             sqlOpts.CollectProcedures,
-		ReplaceDigits:                 sqlOpts.ReplaceDigits,
-		KeepSQLAlias:                  sqlOpts.KeepSQLAlias,
-		DollarQuotedFunc:              sqlOpts.DollarQuotedFunc,
-		ObfuscationMode:               sqlOpts.ObfuscationMode,
-		RemoveSpaceBetweenParentheses: sqlOpts.RemoveSpaceBetweenParentheses,
-		KeepNull:                      sqlOpts.KeepNull,
-		KeepBoolean:                   sqlOpts.KeepBoolean,
-		KeepPositionalParameter:       sqlOpts.KeepPositionalParameter,
-		KeepTrailingSemicolon:         sqlOpts.KeepTrailingSemicolon,
-		KeepIdentifierQuotation:       sqlOpts.KeepIdentifierQuotation,
-	})
+	obfuscatedQuery, err := lazyInitObfuscator().ObfuscateSQLStringWithOptions(s, sqlOpts.obfuscateConfig())
 	if err != nil {
 		// memory will be freed by caller
 		*errResult = TrackedCString(err.Error())
@@ -374,11 +474,55 @@ func ObfuscateSQL(rawQuery, opts *C.char, errResult **C.char) *C.char {
 	return TrackedCString(obfuscatedQuery.Query)
 }
 
+// ObfuscateSQLMany obfuscates & normalizes several SQL queries with the same options, filling the
+// result of each query in results. errResult is set, and results are left empty, if the options are invalid.
+// Indirectly used by the C function `obfuscate_sql_batch` that's mapped to `datadog_agent.obfuscate_sql_batch`.
+//
+//export ObfuscateSQLMany
+func ObfuscateSQLMany(rawQueries **C.char, opts *C.char, results *C.sql_obfuscation_t, errResult **C.char) {
+	obfuscatorLock.Lock()
+	defer obfuscatorLock.Unlock()
+
+	optStr := C.GoString(opts)
+	if optStr == "" {
+		// ensure we have a valid JSON string before unmarshalling
+		optStr = "{}"
+	}
+	var sqlOpts sqlConfig
+	if err := json.Unmarshal([]byte(optStr), &sqlOpts); err != nil {
+		// memory will be freed by caller
+		*errResult = TrackedCString(err.Error())
+		return
+	}
+	config := sqlOpts.obfuscateConfig()
+	obfuscator := lazyInitObfuscator()
+
+	result := results
+	forEachCString(rawQueries, func(rawQuery *C.char) {
+		// memory will be freed by caller
+		obfuscatedQuery, err := obfuscator.ObfuscateSQLStringWithOptions(C.GoString(rawQuery), config)
+		if err != nil {
+			result.error = TrackedCString(err.Error())
+		} else {
+			result.query = TrackedCString(obfuscatedQuery.Query)
+			result.size = C.int64_t(obfuscatedQuery.Metadata.Size)
+			result.tables_csv = TrackedCString(obfuscatedQuery.Metadata.TablesCSV)
+			result.commands = trackedCStringArray(obfuscatedQuery.Metadata.Commands)
+			result.comments = trackedCStringArray(obfuscatedQuery.Metadata.Comments)
+			result.procedures = trackedCStringArray(obfuscatedQuery.Metadata.Procedures)
+		}
+		result = (*C.sql_obfuscation_t)(unsafe.Add(unsafe.Pointer(result), unsafe.Sizeof(*result)))
+	})
+}
+
 // ObfuscateSQLExecPlan obfuscates the provided json query execution plan, writing the error into errResult if the
 // operation fails
 //
 //export ObfuscateSQLExecPlan
 func ObfuscateSQLExecPlan(jsonPlan *C.char, normalize C.bool, errResult **C.char) *C.char {
+	obfuscatorLock.Lock()
+	defer obfuscatorLock.Unlock()
+
 	obfuscatedJSONPlan, err := lazyInitObfuscator().ObfuscateSQLExecPlan(
 		C.GoString(jsonPlan),
 		bool(normalize),
@@ -593,6 +737,9 @@ func getProcessStartTime() float64 {
 //
 //export ObfuscateMongoDBString
 func ObfuscateMongoDBString(cmd *C.char, errResult **C.char) *C.char {
+	obfuscatorLock.Lock()
+	defer obfuscatorLock.Unlock()
+
 	if C.GoString(cmd) == "" {
 		// memory will be freed by caller
 		*errResult = TrackedCString("Empty MongoDB command")
@@ -31,6 +31,18 @@ func TestGetConfig(t *testing.T) {
 	testGetConfig(t)
 }
 
+func TestGetConfigMany(t *testing.T) {
+	testGetConfigMany(t)
+}
+
+func TestWritePersistentCacheMany(t *testing.T) {
+	testWritePersistentCacheMany(t)
+}
+
 func TestSetExternalTags(t *testing.T) {
 	testSetExternalTags(t)
 }
+
+func TestSetExternalTagsMany(t *testing.T) {
+	testSetExternalTagsMany(t)
+}
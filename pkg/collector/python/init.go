@@ -83,17 +83,22 @@ void initLogger(rtloader_t *rtloader) {
 
 void GetClusterName(char **);
 void GetConfig(char*, char **);
+void GetConfigMany(char **, char **);
 void GetHostname(char **);
 void GetHostTags(char **);
 void GetVersion(char **);
 void Headers(char **);
 char * ReadPersistentCache(char *);
 void SendLog(char *, char *);
+int SendLogs(char *, size_t, char *);
 void SetCheckMetadata(char *, char *, char *);
 void SetExternalTags(char *, char *, char **);
+void SetExternalTagsMany(external_tags_t *, int);
 void WritePersistentCache(char *, char *);
+void WritePersistentCacheMany(char **, char **);
 bool TracemallocEnabled();
 char* ObfuscateSQL(char *, char *, char **);
+void ObfuscateSQLMany(char **, char *, sql_obfuscation_t *, char **);
 char* ObfuscateSQLExecPlan(char *, bool, char **);
 double getProcessStartTime();
 char* ObfuscateMongoDBString(char *, char **);
@@ -101,17 +106,22 @@ char* ObfuscateMongoDBString(char *, char **);
 void initDatadogAgentModule(rtloader_t *rtloader) {
 	set_get_clustername_cb(rtloader, GetClusterName);
 	set_get_config_cb(rtloader, GetConfig);
+	set_get_config_many_cb(rtloader, GetConfigMany);
 	set_get_hostname_cb(rtloader, GetHostname);
 	set_get_host_tags_cb(rtloader, GetHostTags);
 	set_get_version_cb(rtloader, GetVersion);
 	set_headers_cb(rtloader, Headers);
 	set_send_log_cb(rtloader, SendLog);
+	set_send_logs_cb(rtloader, SendLogs);
 	set_set_check_metadata_cb(rtloader, SetCheckMetadata);
 	set_set_external_tags_cb(rtloader, SetExternalTags);
+	set_set_external_tags_many_cb(rtloader, SetExternalTagsMany);
 	set_write_persistent_cache_cb(rtloader, WritePersistentCache);
 	set_read_persistent_cache_cb(rtloader, ReadPersistentCache);
+	set_write_persistent_cache_many_cb(rtloader, WritePersistentCacheMany);
 	set_tracemalloc_enabled_cb(rtloader, TracemallocEnabled);
 	set_obfuscate_sql_cb(rtloader, ObfuscateSQL);
+	set_obfuscate_sql_many_cb(rtloader, ObfuscateSQLMany);
 	set_obfuscate_sql_exec_plan_cb(rtloader, ObfuscateSQLExecPlan);
 	set_get_process_start_time_cb(rtloader, getProcessStartTime);
 	set_obfuscate_mongodb_string_cb(rtloader, ObfuscateMongoDBString);
@@ -140,9 +150,15 @@ void initAggregatorModule(rtloader_t *rtloader) {
 //
 
 void GetSubprocessOutput(char **, char **, char **, char **, int*, char **);
+long StartSubprocessStream(char **, char **, double, char **);
+int ReadSubprocessStream(long, char *, int, char **);
+int CloseSubprocessStream(long, char **, int *);
 
 void initUtilModule(rtloader_t *rtloader) {
 	set_get_subprocess_output_cb(rtloader, GetSubprocessOutput);
+	set_start_subprocess_stream_cb(rtloader, StartSubprocessStream);
+	set_read_subprocess_stream_cb(rtloader, ReadSubprocessStream);
+	set_close_subprocess_stream_cb(rtloader, CloseSubprocessStream);
 }
 
 //
@@ -223,8 +239,16 @@ var (
 	pyInitLock    sync.RWMutex
 	pyDestroyLock sync.RWMutex
 	pyInitErrors  []string
+
+	// persistentCacheFlushLock prevents concurrent flushes, the periodic one and the one at shutdown
+	persistentCacheFlushLock sync.Mutex
+	// persistentCacheFlushDone stops the periodic flush, it's nil when the flush isn't running
+	persistentCacheFlushDone chan struct{}
 )
 
+// persistentCacheFlushInterval is how often the values queued by `write_persistent_cache` are stored
+const persistentCacheFlushInterval = 10 * time.Second
+
 func init() {
 	pyInitErrors = []string{}
 
@@ -453,6 +477,14 @@ func Initialize(paths ...string) error {
 		return addExpvarPythonInitErrors(err)
 	}
 
+	// Spare check instances for the configurations scheduled again
+	C.set_check_pool_size(rtloader, C.int(pkgconfigsetup.Datadog().GetInt("python_check_pool_size")))
+
+	// The configuration values cached by `datadog_agent.get_config` are collected again after any change
+	pkgconfigsetup.Datadog().OnUpdate(func(string, any, any) {
+		C.bump_config_generation(rtloader)
+	})
+
 	// Lock the GIL
 	glock, err := newStickyLock()
 	if err != nil {
@@ -476,9 +508,66 @@ func Initialize(paths ...string) error {
 
 	sendTelemetry(pythonVersion)
 
+	// The values written by `datadog_agent.write_persistent_cache` are stored in batches
+	startPersistentCacheFlush()
+
 	return nil
 }
 
+// startPersistentCacheFlush periodically flushes the persistent cache, until StopPersistentCacheFlush is called
+func startPersistentCacheFlush() {
+	persistentCacheFlushLock.Lock()
+	defer persistentCacheFlushLock.Unlock()
+
+	if persistentCacheFlushDone != nil {
+		return
+	}
+	done := make(chan struct{})
+	persistentCacheFlushDone = done
+
+	ticker := time.NewTicker(persistentCacheFlushInterval)
+	go func() {
+		defer ticker.Stop()
+		for {
+			select {
+			case <-ticker.C:
+				FlushPersistentCache()
+			case <-done:
+				return
+			}
+		}
+	}()
+}
+
+// StopPersistentCacheFlush stops the periodic flush of the persistent cache, and stores the values
+// still queued in rtloader.
+func StopPersistentCacheFlush() {
+	persistentCacheFlushLock.Lock()
+	if persistentCacheFlushDone != nil {
+		close(persistentCacheFlushDone)
+		persistentCacheFlushDone = nil
+	}
+	persistentCacheFlushLock.Unlock()
+
+	FlushPersistentCache()
+}
+
+// FlushPersistentCache stores the values written by the python checks with
+// `datadog_agent.write_persistent_cache` that are still queued in rtloader.
+func FlushPersistentCache() {
+	persistentCacheFlushLock.Lock()
+	defer persistentCacheFlushLock.Unlock()
+
+	glock, err := newStickyLock()
+	if err != nil {
+		log.Debugf("Could not flush the python persistent cache: %s", err)
+		return
+	}
+	defer glock.unlock()
+
+	C.flush_persistent_cache(rtloader)
+}
+
 // GetRtLoader returns the underlying rtloader_t struct. This is meant for testing and
 // tooling, use the rtloader_t struct at your own risk
 func GetRtLoader() *C.rtloader_t {
@@ -25,6 +25,8 @@ import (
 #cgo !windows LDFLAGS: -ldatadog-agent-rtloader -ldl
 #cgo windows LDFLAGS: -ldatadog-agent-rtloader -lstdc++ -static
 
+#include <stdlib.h>
+
 #include "datadog_agent_rtloader.h"
 #include "rtloader_mem.h"
 */
@@ -124,3 +126,23 @@ func TrackedCString(str string) *C.char {
 
 	return cstr
 }
+
+// trackedCStringArray converts a slice of Go strings to a NULL-terminated array of C strings,
+// to be freed by rtloader along with each string. A nil slice is converted to NULL.
+func trackedCStringArray(strs []string) **C.char {
+	if strs == nil {
+		return nil
+	}
+	size := C.size_t(unsafe.Sizeof((*C.char)(nil))) * C.size_t(len(strs)+1)
+	cArray := (**C.char)(C.malloc(size))
+	if pkgconfigsetup.Datadog().GetBool("memtrack_enabled") {
+		MemoryTracker(unsafe.Pointer(cArray), size, C.DATADOG_AGENT_RTLOADER_ALLOCATION)
+	}
+
+	items := unsafe.Slice(cArray, len(strs)+1)
+	for i, str := range strs {
+		items[i] = TrackedCString(str)
+	}
+	items[len(strs)] = nil
+	return cArray
+}
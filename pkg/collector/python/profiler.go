@@ -0,0 +1,59 @@
+// Unless explicitly stated otherwise all files in this repository are licensed
+// under the Apache License Version 2.0.
+// This product includes software developed at Datadog (https://www.datadoghq.com/).
+// Copyright 2016-present Datadog, Inc.
+
+//go:build python
+
+package python
+
+import (
+	"errors"
+	"fmt"
+	"sync"
+	"time"
+)
+
+/*
+#include "datadog_agent_rtloader.h"
+*/
+import "C"
+
+// profilerMux serializes the calls starting and stopping the check profiler
+var profilerMux sync.Mutex
+
+// StartCheckProfiler starts sampling the stacks of the running Python checks every interval.
+// The samples are collected per check with PythonCheck.Profile.
+func StartCheckProfiler(interval time.Duration) error {
+	if rtloader == nil {
+		return errors.New("python is not initialized")
+	}
+	if interval < time.Millisecond {
+		return fmt.Errorf("invalid sampling interval %s, it must be at least 1ms", interval)
+	}
+
+	profilerMux.Lock()
+	defer profilerMux.Unlock()
+
+	// The GIL must not be held, the profiler thread takes it to sample the stacks
+	if C.start_check_profiler(rtloader, C.int(interval.Milliseconds())) == 0 {
+		if err := getRtLoaderError(); err != nil {
+			return err
+		}
+		return errors.New("the python check profiler is not available")
+	}
+	return nil
+}
+
+// StopCheckProfiler stops sampling the stacks of the running Python checks. The samples
+// already taken can still be collected.
+func StopCheckProfiler() {
+	if rtloader == nil {
+		return
+	}
+
+	profilerMux.Lock()
+	defer profilerMux.Unlock()
+
+	C.stop_check_profiler(rtloader)
+}
@@ -59,6 +59,19 @@ char **get_checks_warnings(rtloader_t *s, rtloader_pyobject_t *check) {
 	return get_checks_warnings_return;
 }
 
+int get_check_run_stats_calls = 0;
+int get_check_run_stats(rtloader_t *s, rtloader_pyobject_t *check, check_run_stats_t *stats) {
+	get_check_run_stats_calls++;
+	return 0;
+}
+
+char *get_check_profile_return = NULL;
+int get_check_profile_calls = 0;
+char *get_check_profile(rtloader_t *s, rtloader_pyobject_t *check) {
+	get_check_profile_calls++;
+	return get_check_profile_return;
+}
+
 int has_error_calls = 0;
 int has_error_return = 0;
 int has_error(const rtloader_t *s) {
@@ -165,6 +178,7 @@ void reset_check_mock() {
 	rtloader_decref_calls = 0;
 	get_checks_warnings_return = NULL;
 	get_checks_warnings_calls = 0;
+	get_check_run_stats_calls = 0;
 	has_error_calls = 0;
 	has_error_return = 0;
 	get_error_calls = 0;
@@ -196,6 +210,9 @@ void reset_check_mock() {
 
 	get_check_diagnoses_return = NULL;
 	get_check_diagnoses_calls = 0;
+
+	get_check_profile_return = NULL;
+	get_check_profile_calls = 0;
 }
 */
 import "C"
@@ -222,6 +239,7 @@ func testRunCheck(t *testing.T) {
 	assert.Equal(t, C.int(1), C.gil_unlocked_calls)
 	assert.Equal(t, C.int(1), C.run_check_calls)
 	assert.Equal(t, C.int(1), C.get_checks_warnings_calls)
+	assert.Equal(t, C.int(1), C.get_check_run_stats_calls)
 
 	assert.Equal(t, check.instance, C.run_check_instance)
 	assert.Equal(t, check.lastWarnings, []error{fmt.Errorf("warn1"), fmt.Errorf("warn2")})
@@ -692,3 +710,30 @@ func NewPythonFakeCheck(senderManager sender.SenderManager) (*PythonCheck, error
 
 	return c, err
 }
+
+func testGetProfile(t *testing.T) {
+	C.reset_check_mock()
+
+	rtloader = newMockRtLoaderPtr()
+	defer func() { rtloader = nil }()
+
+	check, err := NewPythonFakeCheck(aggregator.NewNoOpSenderManager())
+	if !assert.Nil(t, err) {
+		return
+	}
+
+	check.instance = newMockPyObjectPtr()
+
+	// no sample
+	profile, err := check.Profile()
+	assert.Nil(t, err)
+	assert.Equal(t, "", profile)
+
+	frees := C.rtloader_free_calls
+	C.get_check_profile_return = C.CString("run (check.py:10);busy (check.py:20) 42\n")
+	profile, err = check.Profile()
+	assert.Nil(t, err)
+	assert.Equal(t, "run (check.py:10);busy (check.py:20) 42\n", profile)
+	assert.Equal(t, C.int(2), C.get_check_profile_calls)
+	assert.Equal(t, frees+1, C.rtloader_free_calls)
+}
@@ -16,6 +16,8 @@ import (
 	yaml "gopkg.in/yaml.v2"
 
 	"github.com/DataDog/datadog-agent/pkg/collector/externalhost"
+	configmock "github.com/DataDog/datadog-agent/pkg/config/mock"
+	"github.com/DataDog/datadog-agent/pkg/persistentcache"
 	"github.com/DataDog/datadog-agent/pkg/util"
 	"github.com/DataDog/datadog-agent/pkg/util/hostname"
 	"github.com/DataDog/datadog-agent/pkg/util/kubernetes/clustername"
@@ -71,6 +73,36 @@ func testGetConfig(t *testing.T) {
 	assert.Equal(t, "5001\n", C.GoString(config))
 }
 
+func testGetConfigMany(t *testing.T) {
+	var config *C.char
+
+	keys := []*C.char{C.CString("cmd_port"), C.CString("does not exist"), nil}
+	GetConfigMany(&keys[0], &config)
+	require.NotNil(t, config)
+	assert.Equal(t, "cmd_port: 5001\n", C.GoString(config))
+
+	keys = []*C.char{C.CString("does not exist"), nil}
+	GetConfigMany(&keys[0], &config)
+	require.NotNil(t, config)
+	assert.Equal(t, "{}\n", C.GoString(config))
+}
+
+func testWritePersistentCacheMany(t *testing.T) {
+	mockConfig := configmock.New(t)
+	mockConfig.SetWithoutSource("run_path", t.TempDir())
+
+	keys := []*C.char{C.CString("check:key1"), C.CString("check:key2"), nil}
+	values := []*C.char{C.CString("value1"), C.CString("value2"), nil}
+	WritePersistentCacheMany(&keys[0], &values[0])
+
+	value, err := persistentcache.Read("check:key1")
+	require.NoError(t, err)
+	assert.Equal(t, "value1", value)
+	value, err = persistentcache.Read("check:key2")
+	require.NoError(t, err)
+	assert.Equal(t, "value2", value)
+}
+
 func testSetExternalTags(t *testing.T) {
 	ctags := []*C.char{C.CString("tag1"), C.CString("tag2"), nil}
 
@@ -84,3 +116,27 @@ func testSetExternalTags(t *testing.T) {
 		"- - test_hostname\n  - test_source_type:\n    - tag1\n    - tag2\n",
 		string(yamlPayload))
 }
+
+func testSetExternalTagsMany(t *testing.T) {
+	ctags := []*C.char{C.CString("tag1"), C.CString("tag2"), nil}
+	cremoved := []*C.char{nil}
+	entries := []C.external_tags_t{
+		{hostname: C.CString("test_hostname"), source_type: C.CString("test_source_type"), tags: &ctags[0]},
+		{hostname: C.CString("test_hostname2"), source_type: C.CString("test_source_type"), tags: &cremoved[0]},
+	}
+
+	SetExternalTagsMany(&entries[0], C.int(len(entries)))
+
+	payload := externalhost.GetPayload()
+	require.NotNil(t, payload)
+	require.Len(t, *payload, 2)
+
+	tags := map[string]externalhost.ExternalTags{}
+	for _, hostTags := range *payload {
+		tags[hostTags[0].(string)] = hostTags[1].(externalhost.ExternalTags)
+	}
+	assert.Equal(t, map[string]externalhost.ExternalTags{
+		"test_hostname":  {"test_source_type": {"tag1", "tag2"}},
+		"test_hostname2": {"test_source_type": {}},
+	}, tags)
+}
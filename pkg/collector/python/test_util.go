@@ -8,11 +8,17 @@
 package python
 
 import (
+	"runtime"
 	"testing"
+	"unsafe"
 
 	"github.com/stretchr/testify/assert"
+	"github.com/stretchr/testify/require"
 )
 
+/*
+#include <stdlib.h>
+*/
 import "C"
 
 func testGetSubprocessOutputEmptyArgs(t *testing.T) {
@@ -76,3 +82,98 @@ func testGetSubprocessOutputError(t *testing.T) {
 	assert.NotEqual(t, C.int(0), cRetCode)
 	assert.Nil(t, exception)
 }
+
+// readSubprocessStream reads the whole output of a subprocess stream in chunks of chunkSize bytes
+func readSubprocessStream(t *testing.T, id C.long, chunkSize int) []byte {
+	buffer := (*C.char)(C.malloc(C.size_t(chunkSize)))
+	defer C.free(unsafe.Pointer(buffer))
+
+	var output []byte
+	for {
+		var exception *C.char
+		n := ReadSubprocessStream(id, buffer, C.int(chunkSize), &exception)
+		require.Nil(t, exception)
+		require.LessOrEqual(t, int(n), chunkSize)
+		if n == 0 {
+			return output
+		}
+		output = append(output, C.GoBytes(unsafe.Pointer(buffer), n)...)
+	}
+}
+
+func testSubprocessStream(t *testing.T) {
+	if runtime.GOOS == "windows" {
+		t.Skip("requires /bin/sh")
+	}
+
+	// ~200KB of output
+	argv := []*C.char{C.CString("/bin/sh"), C.CString("-c"), C.CString("i=0; while [ $i -lt 20000 ]; do echo line $i; i=$((i+1)); done; echo done >&2; exit 3"), nil}
+	var exception *C.char
+
+	id := StartSubprocessStream(&argv[0], nil, 0, &exception)
+	require.Nil(t, exception)
+
+	output := readSubprocessStream(t, id, 4096)
+	assert.Len(t, output, 208890)
+	assert.Equal(t, "line 0\n", string(output[:7]))
+
+	var cStderr *C.char
+	var cRetCode C.int
+	assert.Equal(t, C.int(0), CloseSubprocessStream(id, &cStderr, &cRetCode))
+	assert.Equal(t, "done\n", C.GoString(cStderr))
+	assert.Equal(t, C.int(3), cRetCode)
+
+	// the stream is forgotten once closed
+	var buffer C.char
+	assert.Equal(t, C.int(-1), ReadSubprocessStream(id, &buffer, 1, &exception))
+	assert.NotNil(t, exception)
+}
+
+func testSubprocessStreamTimeout(t *testing.T) {
+	if runtime.GOOS == "windows" {
+		t.Skip("requires /bin/sh")
+	}
+
+	argv := []*C.char{C.CString("/bin/sh"), C.CString("-c"), C.CString("echo start; sleep 30"), nil}
+	var exception *C.char
+
+	id := StartSubprocessStream(&argv[0], nil, 0.5, &exception)
+	require.Nil(t, exception)
+
+	assert.Equal(t, "start\n", string(readSubprocessStream(t, id, 4096)))
+
+	var cStderr *C.char
+	var cRetCode C.int
+	assert.Equal(t, C.int(1), CloseSubprocessStream(id, &cStderr, &cRetCode))
+	assert.NotEqual(t, C.int(0), cRetCode)
+}
+
+func testSubprocessStreamClose(t *testing.T) {
+	if runtime.GOOS == "windows" {
+		t.Skip("requires /bin/sh")
+	}
+
+	// never ends on its own
+	argv := []*C.char{C.CString("/bin/sh"), C.CString("-c"), C.CString("while true; do echo y; done"), nil}
+	var exception *C.char
+
+	id := StartSubprocessStream(&argv[0], nil, 0, &exception)
+	require.Nil(t, exception)
+
+	buffer := (*C.char)(C.malloc(16))
+	defer C.free(unsafe.Pointer(buffer))
+	assert.Greater(t, ReadSubprocessStream(id, buffer, 16, &exception), C.int(0))
+
+	var cStderr *C.char
+	var cRetCode C.int
+	assert.Equal(t, C.int(0), CloseSubprocessStream(id, &cStderr, &cRetCode))
+	assert.NotEqual(t, C.int(0), cRetCode)
+}
+
+func testSubprocessStreamUnknownBin(t *testing.T) {
+	argv := []*C.char{C.CString("unknown_command"), nil}
+	var exception *C.char
+
+	StartSubprocessStream(&argv[0], nil, 0, &exception)
+	assert.NotNil(t, exception)
+}
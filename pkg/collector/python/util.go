@@ -15,11 +15,17 @@ package python
 import "C"
 
 import (
+	"bytes"
+	"context"
+	"errors"
 	"fmt"
 	"io"
+	"os"
 	"os/exec"
 	"sync"
 	"syscall"
+	"time"
+	"unsafe"
 )
 
 // GetSubprocessOutput runs the subprocess and returns the output
@@ -77,15 +83,180 @@ func GetSubprocessOutput(argv **C.char, env **C.char, cStdout **C.char, cStderr
 	// Wait for the pipes to be closed *before* waiting for the cmd to exit, as per os.exec docs
 	wg.Wait()
 
-	retCode := 0
-	err = cmd.Wait()
+	retCode := exitCode(cmd.Wait())
+
+	*cStdout = TrackedCString(string(output))
+	*cStderr = TrackedCString(string(outputErr))
+	*cRetCode = C.int(retCode)
+}
+
+// subprocessStreamWaitDelay bounds the time spent waiting for the output of a stream subprocess
+// once it's killed, in case it was inherited by some of its children
+const subprocessStreamWaitDelay = time.Second
+
+// subprocessStream is a subprocess started by `_util.subprocess_stream`, its output is read by
+// rtloader as it is produced.
+type subprocessStream struct {
+	mu       sync.Mutex
+	ctx      context.Context
+	cancel   context.CancelFunc
+	cmd      *exec.Cmd
+	stdout   io.ReadCloser
+	stderr   bytes.Buffer
+	eof      bool
+	timedOut bool
+}
+
+var (
+	subprocessStreamsLock  sync.Mutex
+	subprocessStreams      = map[C.long]*subprocessStream{}
+	subprocessStreamLastID C.long
+)
+
+func getSubprocessStream(id C.long) *subprocessStream {
+	subprocessStreamsLock.Lock()
+	defer subprocessStreamsLock.Unlock()
+
+	return subprocessStreams[id]
+}
+
+// exitCode returns the exit code of a subprocess from the error returned by `cmd.Wait`
+func exitCode(err error) int {
 	if exiterr, ok := err.(*exec.ExitError); ok {
 		if status, ok := exiterr.Sys().(syscall.WaitStatus); ok {
-			retCode = status.ExitStatus()
+			return status.ExitStatus()
 		}
 	}
+	return 0
+}
 
-	*cStdout = TrackedCString(string(output))
-	*cStderr = TrackedCString(string(outputErr))
-	*cRetCode = C.int(retCode)
+// StartSubprocessStream starts the subprocess and returns the identifier of its stream
+// Indirectly used by the C function `subprocess_stream` that's mapped to `_util.subprocess_stream`.
+//
+//export StartSubprocessStream
+func StartSubprocessStream(argv **C.char, env **C.char, timeout C.double, exception **C.char) C.long {
+	subprocessArgs := cStringArrayToSlice(argv)
+	// this should never happen as this case is filtered by rtloader
+	if len(subprocessArgs) == 0 {
+		*exception = TrackedCString("invalid command: empty list")
+		return 0
+	}
+
+	ctx, _ := GetSubprocessContextCancel()
+	var cancel context.CancelFunc
+	if timeout > 0 {
+		ctx, cancel = context.WithTimeout(ctx, time.Duration(float64(timeout)*float64(time.Second)))
+	} else {
+		ctx, cancel = context.WithCancel(ctx)
+	}
+
+	stream := &subprocessStream{ctx: ctx, cancel: cancel}
+	stream.cmd = exec.CommandContext(ctx, subprocessArgs[0], subprocessArgs[1:]...)
+	stream.cmd.Stderr = &stream.stderr
+	stream.cmd.WaitDelay = subprocessStreamWaitDelay
+
+	subprocessEnv := cStringArrayToSlice(env)
+	if len(subprocessEnv) != 0 {
+		stream.cmd.Env = subprocessEnv
+	}
+
+	stdout, err := stream.cmd.StdoutPipe()
+	if err != nil {
+		cancel()
+		*exception = TrackedCString(fmt.Sprintf("internal error creating stdout pipe: %v", err))
+		return 0
+	}
+	stream.stdout = stdout
+
+	if err := stream.cmd.Start(); err != nil {
+		cancel()
+		*exception = TrackedCString(fmt.Sprintf("internal error starting subprocess: %v", err))
+		return 0
+	}
+
+	// Stop reading at the deadline even if the output was inherited by a child of the subprocess,
+	// which isn't killed with it. Deadlines aren't supported on every platform, the subprocess
+	// being killed is then the only way for the read to return.
+	if deadline, ok := ctx.Deadline(); ok {
+		if f, ok := stdout.(*os.File); ok {
+			_ = f.SetReadDeadline(deadline)
+		}
+	}
+
+	subprocessStreamsLock.Lock()
+	defer subprocessStreamsLock.Unlock()
+
+	subprocessStreamLastID++
+	subprocessStreams[subprocessStreamLastID] = stream
+	return subprocessStreamLastID
+}
+
+// ReadSubprocessStream reads the next chunk of output of a subprocess into the buffer, and returns
+// its size, or 0 once the output is exhausted or the subprocess reached its deadline.
+// Indirectly used by the C function `subprocess_stream` that's mapped to `_util.subprocess_stream`.
+//
+//export ReadSubprocessStream
+func ReadSubprocessStream(id C.long, buffer *C.char, bufferSize C.int, exception **C.char) C.int {
+	stream := getSubprocessStream(id)
+	if stream == nil {
+		*exception = TrackedCString(fmt.Sprintf("unknown subprocess stream %d", id))
+		return -1
+	}
+
+	stream.mu.Lock()
+	defer stream.mu.Unlock()
+
+	if stream.eof {
+		return 0
+	}
+
+	output := unsafe.Slice((*byte)(unsafe.Pointer(buffer)), int(bufferSize))
+	for {
+		n, err := stream.stdout.Read(output)
+		if n > 0 {
+			// the error, if any, is returned again by the next read
+			return C.int(n)
+		}
+		if err != nil {
+			stream.eof = true
+			stream.timedOut = errors.Is(err, os.ErrDeadlineExceeded) || errors.Is(stream.ctx.Err(), context.DeadlineExceeded)
+			return 0
+		}
+	}
+}
+
+// CloseSubprocessStream waits for a subprocess, killing it if its output wasn't read entirely, and
+// returns whether it reached its deadline.
+// Indirectly used by the C function `subprocess_stream` that's mapped to `_util.subprocess_stream`.
+//
+//export CloseSubprocessStream
+func CloseSubprocessStream(id C.long, cStderr **C.char, cRetCode *C.int) C.int {
+	subprocessStreamsLock.Lock()
+	stream := subprocessStreams[id]
+	delete(subprocessStreams, id)
+	subprocessStreamsLock.Unlock()
+
+	if stream == nil {
+		return 0
+	}
+
+	stream.mu.Lock()
+	defer stream.mu.Unlock()
+
+	if !stream.eof {
+		stream.timedOut = errors.Is(stream.ctx.Err(), context.DeadlineExceeded)
+		// children of the subprocess writing to the same output aren't killed with it,
+		// closing the output first makes their next write fail
+		stream.stdout.Close()
+		stream.cancel()
+	}
+	err := stream.cmd.Wait()
+	stream.cancel()
+
+	*cStderr = TrackedCString(stream.stderr.String())
+	*cRetCode = C.int(exitCode(err))
+	if stream.timedOut {
+		return 1
+	}
+	return 0
 }
@@ -30,3 +30,19 @@ func TestGetSubprocessOutputError(t *testing.T) {
 func TestGetSubprocessOutputEnv(t *testing.T) {
 	testGetSubprocessOutputEnv(t)
 }
+
+func TestSubprocessStream(t *testing.T) {
+	testSubprocessStream(t)
+}
+
+func TestSubprocessStreamTimeout(t *testing.T) {
+	testSubprocessStreamTimeout(t)
+}
+
+func TestSubprocessStreamClose(t *testing.T) {
+	testSubprocessStreamClose(t)
+}
+
+func TestSubprocessStreamUnknownBin(t *testing.T) {
+	testSubprocessStreamUnknownBin(t)
+}
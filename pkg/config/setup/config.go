@@ -296,6 +296,10 @@ func InitConfig(config pkgconfigmodel.Config) {
 	// library support will not work reliably in those environments)
 	config.BindEnvAndSetDefault("allow_python_path_heuristics_failure", false)
 
+	// Number of spare instances rtloader constructs ahead of time for each Python check
+	// configuration that is scheduled again, e.g. by autodiscovery. 0 disables the pool.
+	config.BindEnvAndSetDefault("python_check_pool_size", 0)
+
 	// if/when the default is changed to true, make the default platform
 	// dependent; default should remain false on Windows to maintain backward
 	// compatibility with Agent5 behavior/win
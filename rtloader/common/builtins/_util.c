@@ -8,22 +8,49 @@
 #include "stringutils.h"
 
 #include <stdio.h>
+#include <structmember.h>
 
 // must be set by the caller
 static cb_get_subprocess_output_t cb_get_subprocess_output = NULL;
+static cb_start_subprocess_stream_t cb_start_subprocess_stream = NULL;
+static cb_read_subprocess_stream_t cb_read_subprocess_stream = NULL;
+static cb_close_subprocess_stream_t cb_close_subprocess_stream = NULL;
+
+// default size of the chunks yielded by `subprocess_stream`
+#define SUBPROCESS_STREAM_CHUNK_SIZE 65536
 
 static PyObject *subprocess_output(PyObject *self, PyObject *args, PyObject *kw);
+static PyObject *subprocess_stream(PyObject *self, PyObject *args, PyObject *kw);
+static PyTypeObject SubprocessStreamType;
 
 // Exceptions
 
 /*! \fn void addSubprocessException(PyObject *m)
-    \brief Adds a custom SubprocessOutputEmptyError exception to the module passed as parameter.
-    \param m A PyObject* pointer to the module we wish to register the exception with.
+    \brief Adds the custom SubprocessOutputEmptyError and SubprocessTimeoutError exceptions to
+    the module passed as parameter.
+    \param m A PyObject* pointer to the module we wish to register the exceptions with.
 */
 void addSubprocessException(PyObject *m)
 {
     PyObject *SubprocessOutputEmptyError = PyErr_NewException(_SUBPROCESS_OUTPUT_ERROR_NS_NAME, NULL, NULL);
     PyModule_AddObject(m, _SUBPROCESS_OUTPUT_ERROR_NAME, SubprocessOutputEmptyError);
+    PyObject *SubprocessTimeoutError = PyErr_NewException(_SUBPROCESS_TIMEOUT_ERROR_NS_NAME, NULL, NULL);
+    PyModule_AddObject(m, _SUBPROCESS_TIMEOUT_ERROR_NAME, SubprocessTimeoutError);
+}
+
+/*! \fn void addSubprocessStreamType(PyObject *m)
+    \brief Adds the SubprocessStream type, returned by `subprocess_stream`, to the module passed
+    as parameter.
+    \param m A PyObject* pointer to the module we wish to register the type with.
+*/
+static void addSubprocessStreamType(PyObject *m)
+{
+    if (PyType_Ready(&SubprocessStreamType) < 0) {
+        PyErr_Clear();
+        return;
+    }
+    Py_INCREF(&SubprocessStreamType);
+    PyModule_AddObject(m, _SUBPROCESS_STREAM_NAME, (PyObject *)&SubprocessStreamType);
 }
 
 static PyMethodDef methods[] = {
@@ -31,6 +58,8 @@ static PyMethodDef methods[] = {
       "Exec a process and return the output." },
     { "get_subprocess_output", (PyCFunction)subprocess_output, METH_VARARGS | METH_KEYWORDS,
       "Exec a process and return the output." },
+    { "subprocess_stream", (PyCFunction)subprocess_stream, METH_VARARGS | METH_KEYWORDS,
+      "Exec a process and iterate over its output." },
     { NULL, NULL } // guards
 };
 
@@ -41,6 +70,7 @@ PyMODINIT_FUNC PyInit__util(void)
 {
     PyObject *m = PyModule_Create(&module_def);
     addSubprocessException(m);
+    addSubprocessStreamType(m);
     return m;
 }
 #elif defined(DATADOG_AGENT_TWO)
@@ -51,6 +81,7 @@ void Py2_init__util()
 {
     module = Py_InitModule(_UTIL_MODULE_NAME, methods);
     addSubprocessException(module);
+    addSubprocessStreamType(module);
 }
 #endif
 
@@ -59,14 +90,31 @@ void _set_get_subprocess_output_cb(cb_get_subprocess_output_t cb)
     cb_get_subprocess_output = cb;
 }
 
-/*! \fn void raiseEmptyOutputError()
-    \brief sets the SubprocessOutputEmptyError exception as the interpreter error.
+void _set_start_subprocess_stream_cb(cb_start_subprocess_stream_t cb)
+{
+    cb_start_subprocess_stream = cb;
+}
+
+void _set_read_subprocess_stream_cb(cb_read_subprocess_stream_t cb)
+{
+    cb_read_subprocess_stream = cb;
+}
+
+void _set_close_subprocess_stream_cb(cb_close_subprocess_stream_t cb)
+{
+    cb_close_subprocess_stream = cb;
+}
+
+/*! \fn void raiseUtilError(const char *name, const char *message)
+    \brief sets an exception defined in the _util module as the interpreter error.
+    \param name The name of the exception class in the _util module.
+    \param message The message of the exception.
 
     If everything goes well the exception error will be set in the interpreter.
     Otherwise, if the module or the exception class are not found, the relevant
     error will be set in the interpreter instead.
 */
-static void raiseEmptyOutputError()
+static void raiseUtilError(const char *name, const char *message)
 {
     PyObject *utilModule = PyImport_ImportModule(_UTIL_MODULE_NAME);
     if (utilModule == NULL) {
@@ -74,18 +122,174 @@ static void raiseEmptyOutputError()
         return;
     }
 
-    PyObject *excClass = PyObject_GetAttrString(utilModule, _SUBPROCESS_OUTPUT_ERROR_NAME);
+    PyObject *excClass = PyObject_GetAttrString(utilModule, name);
     if (excClass == NULL) {
         Py_DecRef(utilModule);
-        PyErr_SetString(PyExc_TypeError, "no attribute '" _SUBPROCESS_OUTPUT_ERROR_NS_NAME "' found");
+        PyErr_Format(PyExc_TypeError, "no attribute '" _UTIL_MODULE_NAME _DOT "%s' found", name);
         return;
     }
 
-    PyErr_SetString(excClass, "get_subprocess_output expected output but had none.");
+    PyErr_SetString(excClass, message);
     Py_DecRef(excClass);
     Py_DecRef(utilModule);
 }
 
+/*! \fn void raiseEmptyOutputError()
+    \brief sets the SubprocessOutputEmptyError exception as the interpreter error.
+*/
+static void raiseEmptyOutputError()
+{
+    raiseUtilError(_SUBPROCESS_OUTPUT_ERROR_NAME, "get_subprocess_output expected output but had none.");
+}
+
+/*! \fn void free_subprocess_strings(char **strings)
+    \brief Frees a NULL-terminated array of strings built by `as_subprocess_args` or
+    `as_subprocess_env`.
+    \param strings The array to free, can be NULL.
+*/
+static void free_subprocess_strings(char **strings)
+{
+    if (strings == NULL) {
+        return;
+    }
+    int i;
+    for (i = 0; strings[i]; i++) {
+        _free(strings[i]);
+    }
+    _free(strings);
+}
+
+/*! \fn char **as_subprocess_args(PyObject *cmd_args)
+    \brief Converts the command of a subprocess to a NULL-terminated array of C-strings.
+    \param cmd_args A PyObject* pointer to the python list of arguments.
+    \return The array, to be freed with `free_subprocess_strings`, or NULL if an exception is
+    raised.
+*/
+static char **as_subprocess_args(PyObject *cmd_args)
+{
+    int i;
+    int subprocess_args_sz = 0;
+    char **args = NULL;
+
+    if (!PyList_Check(cmd_args)) {
+        PyErr_SetString(PyExc_TypeError, "command args is not a list");
+        return NULL;
+    }
+
+    // We already PyList_Check cmd_args, so PyList_Size won't fail and return -1
+    subprocess_args_sz = PyList_Size(cmd_args);
+    if (subprocess_args_sz == 0) {
+        PyErr_SetString(PyExc_TypeError, "invalid command: empty list");
+        return NULL;
+    }
+
+    if (!(args = (char **)_malloc(sizeof(*args) * (subprocess_args_sz + 1)))) {
+        PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
+        return NULL;
+    }
+
+    // init to NULL for safety - could use memset, but this is safer.
+    for (i = 0; i <= subprocess_args_sz; i++) {
+        args[i] = NULL;
+    }
+
+    for (i = 0; i < subprocess_args_sz; i++) {
+        char *subprocess_arg = as_string(PyList_GetItem(cmd_args, i));
+
+        if (subprocess_arg == NULL) {
+            PyErr_SetString(PyExc_TypeError, "command argument must be valid strings");
+            free_subprocess_strings(args);
+            return NULL;
+        }
+
+        args[i] = subprocess_arg;
+    }
+
+    return args;
+}
+
+/*! \fn int as_subprocess_env(PyObject *cmd_env, char ***env)
+    \brief Converts the environment of a subprocess to a NULL-terminated array of "key=value"
+    C-strings.
+    \param cmd_env A PyObject* pointer to the python dict of environment variables, can be
+    NULL or None.
+    \param env The address where the array is stored, to be freed with
+    `free_subprocess_strings`. It's left to NULL when the environment is empty.
+    \return 0 on success, -1 if an exception is raised.
+*/
+static int as_subprocess_env(PyObject *cmd_env, char ***env)
+{
+    int i;
+    int subprocess_env_sz = 0;
+    char **subprocess_env = NULL;
+
+    *env = NULL;
+    if (cmd_env == NULL || cmd_env == Py_None) {
+        return 0;
+    }
+
+    if (!PyDict_Check(cmd_env)) {
+        PyErr_SetString(PyExc_TypeError, "env is not a dict");
+        return -1;
+    }
+
+    subprocess_env_sz = PyDict_Size(cmd_env);
+    if (subprocess_env_sz == 0) {
+        return 0;
+    }
+
+    if (!(subprocess_env = (char **)_malloc(sizeof(*subprocess_env) * (subprocess_env_sz + 1)))) {
+        PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
+        return -1;
+    }
+
+    for (i = 0; i <= subprocess_env_sz; i++) {
+        subprocess_env[i] = NULL;
+    }
+
+    Py_ssize_t pos = 0;
+    PyObject *key = NULL, *value = NULL;
+    for (i = 0; i < subprocess_env_sz && PyDict_Next(cmd_env, &pos, &key, &value); i++) {
+
+        char *env_key = as_string(key);
+        if (env_key == NULL) {
+            PyErr_SetString(PyExc_TypeError, "env key is not a string");
+            goto error;
+        }
+
+        char *env_value = as_string(value);
+        if (env_value == NULL) {
+            PyErr_SetString(PyExc_TypeError, "env value is not a string");
+            _free(env_key);
+            goto error;
+        }
+
+        char *env_var = (char *)_malloc((strlen(env_key) + 1 + strlen(env_value) + 1) * sizeof(*env_var));
+        if (env_var == NULL) {
+            PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
+            _free(env_key);
+            _free(env_value);
+            goto error;
+        }
+
+        strcpy(env_var, env_key);
+        strcat(env_var, "=");
+        strcat(env_var, env_value);
+
+        _free(env_key);
+        _free(env_value);
+
+        subprocess_env[i] = env_var;
+    }
+
+    *env = subprocess_env;
+    return 0;
+
+error:
+    free_subprocess_strings(subprocess_env);
+    return -1;
+}
+
 /*! \fn PyObject *subprocess_output(PyObject *self, PyObject *args)
     \brief This function implements the `_util.subprocess_output` _and_ `_util.get_subprocess_output`
     python method, allowing to execute a subprocess and collect its output.
@@ -106,11 +310,8 @@ static void raiseEmptyOutputError()
 */
 PyObject *subprocess_output(PyObject *self, PyObject *args, PyObject *kw)
 {
-    int i;
     int raise = 0;
     int ret_code = 0;
-    int subprocess_args_sz = 0;
-    int subprocess_env_sz = 0;
     char **subprocess_args = NULL;
     char **subprocess_env = NULL;
     char *c_stdout = NULL;
@@ -135,94 +336,14 @@ PyObject *subprocess_output(PyObject *self, PyObject *args, PyObject *kw)
         goto cleanup;
     }
 
-    if (!PyList_Check(cmd_args)) {
-        PyErr_SetString(PyExc_TypeError, "command args is not a list");
+    if (!(subprocess_args = as_subprocess_args(cmd_args))) {
         goto cleanup;
     }
 
-    // We already PyList_Check cmd_args, so PyList_Size won't fail and return -1
-    subprocess_args_sz = PyList_Size(cmd_args);
-    if (subprocess_args_sz == 0) {
-        PyErr_SetString(PyExc_TypeError, "invalid command: empty list");
-        goto cleanup;
-    }
-
-    if (!(subprocess_args = (char **)_malloc(sizeof(*subprocess_args) * (subprocess_args_sz + 1)))) {
-        PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
+    if (as_subprocess_env(cmd_env, &subprocess_env) < 0) {
         goto cleanup;
     }
 
-    // init to NULL for safety - could use memset, but this is safer.
-    for (i = 0; i <= subprocess_args_sz; i++) {
-        subprocess_args[i] = NULL;
-    }
-
-    for (i = 0; i < subprocess_args_sz; i++) {
-        char *subprocess_arg = as_string(PyList_GetItem(cmd_args, i));
-
-        if (subprocess_arg == NULL) {
-            PyErr_SetString(PyExc_TypeError, "command argument must be valid strings");
-            goto cleanup;
-        }
-
-        subprocess_args[i] = subprocess_arg;
-    }
-
-    if (cmd_env != NULL && cmd_env != Py_None) {
-        if (!PyDict_Check(cmd_env)) {
-            PyErr_SetString(PyExc_TypeError, "env is not a dict");
-            goto cleanup;
-        }
-
-        subprocess_env_sz = PyDict_Size(cmd_env);
-        if (subprocess_env_sz != 0) {
-
-            if (!(subprocess_env = (char **)_malloc(sizeof(*subprocess_env) * (subprocess_env_sz + 1)))) {
-                PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
-                goto cleanup;
-            }
-
-            for (i = 0; i <= subprocess_env_sz; i++) {
-                subprocess_env[i] = NULL;
-            }
-
-            Py_ssize_t pos = 0;
-            PyObject *key = NULL, *value = NULL;
-            for (i = 0; i < subprocess_env_sz && PyDict_Next(cmd_env, &pos, &key, &value); i++) {
-
-                char *env_key = as_string(key);
-                if (env_key == NULL) {
-                    PyErr_SetString(PyExc_TypeError, "env key is not a string");
-                    goto cleanup;
-                }
-
-                char *env_value = as_string(value);
-                if (env_value == NULL) {
-                    PyErr_SetString(PyExc_TypeError, "env value is not a string");
-                    _free(env_key);
-                    goto cleanup;
-                }
-
-                char *env = (char *)_malloc((strlen(env_key) + 1 + strlen(env_value) + 1) * sizeof(*env));
-                if (env == NULL) {
-                    PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
-                    _free(env_key);
-                    _free(env_value);
-                    goto cleanup;
-                }
-
-                strcpy(env, env_key);
-                strcat(env, "=");
-                strcat(env, env_value);
-
-                _free(env_key);
-                _free(env_value);
-
-                subprocess_env[i] = env;
-            }
-        }
-    }
-
     if (cmd_raise_on_empty != NULL && !PyBool_Check(cmd_raise_on_empty)) {
         PyErr_SetString(PyExc_TypeError, "bad raise_on_empty argument: should be bool");
         goto cleanup;
@@ -288,23 +409,289 @@ cleanup:
         cgo_free(exception);
     }
 
-    if (subprocess_args) {
-        for (i = 0; i <= subprocess_args_sz && subprocess_args[i]; i++) {
-            _free(subprocess_args[i]);
+    free_subprocess_strings(subprocess_args);
+    free_subprocess_strings(subprocess_env);
+
+    // Please note that if we get here we have a matching PyGILState_Ensure above, so we're safe.
+    PyGILState_Release(gstate);
+
+    // pyResult will be NULL in the face of error to raise the exception set by PyErr_SetString
+    return pyResult;
+}
+
+// SubprocessStream
+
+/*! \struct SubprocessStream
+    \brief The iterator returned by `_util.subprocess_stream`.
+
+    It only holds the identifier of the stream, the subprocess and its output are owned by
+    the rtloader caller until the stream is closed.
+*/
+typedef struct {
+    PyObject_HEAD
+    long id;
+    int chunk_size;
+    int closed;
+    PyObject *returncode;
+    PyObject *stderr_output;
+} SubprocessStream;
+
+/*! \fn int subprocess_stream_close_stream(SubprocessStream *self)
+    \brief Waits for the subprocess of the stream, killing it if its output wasn't exhausted,
+    and stores its exit code and error output in the stream.
+    \param self A SubprocessStream* pointer to the stream.
+    \return 1 if the subprocess reached its deadline, 0 otherwise, or -1 if an exception is
+    raised.
+
+    The GIL is released while waiting for the subprocess. Closing a closed stream is a no-op.
+*/
+static int subprocess_stream_close_stream(SubprocessStream *self)
+{
+    if (self->closed) {
+        return 0;
+    }
+    self->closed = 1;
+
+    int timed_out = 0;
+    int ret_code = 0;
+    char *c_stderr = NULL;
+
+    Py_BEGIN_ALLOW_THREADS
+    timed_out = cb_close_subprocess_stream(self->id, &c_stderr, &ret_code);
+    Py_END_ALLOW_THREADS
+
+    Py_CLEAR(self->returncode);
+    Py_CLEAR(self->stderr_output);
+#ifdef DATADOG_AGENT_THREE
+    self->returncode = PyLong_FromLong(ret_code);
+#else
+    self->returncode = PyInt_FromLong(ret_code);
+#endif
+    if (c_stderr) {
+        self->stderr_output = PyStringFromCString(c_stderr);
+        cgo_free(c_stderr);
+    } else {
+        Py_INCREF(Py_None);
+        self->stderr_output = Py_None;
+    }
+
+    if (self->returncode == NULL || self->stderr_output == NULL) {
+        return -1;
+    }
+    return timed_out;
+}
+
+static PyObject *subprocess_stream_next(SubprocessStream *self)
+{
+    if (self->closed) {
+        // stops the iteration
+        return NULL;
+    }
+
+    // new ref, filled in place while the GIL is released and shrunk to what was read
+    PyObject *chunk = PyBytes_FromStringAndSize(NULL, self->chunk_size);
+    if (chunk == NULL) {
+        return NULL;
+    }
+
+    int read = 0;
+    char *exception = NULL;
+    char *buffer = PyBytes_AS_STRING(chunk);
+
+    Py_BEGIN_ALLOW_THREADS
+    read = cb_read_subprocess_stream(self->id, buffer, self->chunk_size, &exception);
+    Py_END_ALLOW_THREADS
+
+    if (exception) {
+        Py_DECREF(chunk);
+        PyErr_SetString(PyExc_Exception, exception);
+        cgo_free(exception);
+        subprocess_stream_close_stream(self);
+        return NULL;
+    }
+
+    if (read > 0) {
+        if (read < self->chunk_size && _PyBytes_Resize(&chunk, read) < 0) {
+            return NULL;
         }
-        _free(subprocess_args);
+        return chunk;
     }
 
-    if (subprocess_env) {
-        for (i = 0; i <= subprocess_env_sz && subprocess_env[i]; i++) {
-            _free(subprocess_env[i]);
+    Py_DECREF(chunk);
+    if (subprocess_stream_close_stream(self) == 1) {
+        raiseUtilError(_SUBPROCESS_TIMEOUT_ERROR_NAME, "subprocess_stream: the subprocess reached its deadline.");
+    }
+    return NULL;
+}
+
+static PyObject *subprocess_stream_close(SubprocessStream *self, PyObject *args)
+{
+    if (subprocess_stream_close_stream(self) < 0) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static void subprocess_stream_dealloc(SubprocessStream *self)
+{
+    // don't leave the subprocess running, the error set by the caller, if any, is kept
+    PyObject *type, *value, *traceback;
+    PyErr_Fetch(&type, &value, &traceback);
+    if (subprocess_stream_close_stream(self) < 0) {
+        PyErr_Clear();
+    }
+    PyErr_Restore(type, value, traceback);
+
+    Py_XDECREF(self->returncode);
+    Py_XDECREF(self->stderr_output);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyMethodDef subprocess_stream_methods[] = {
+    { "close", (PyCFunction)subprocess_stream_close, METH_NOARGS,
+      "Wait for the process, killing it if its output wasn't read entirely." },
+    { NULL, NULL } // guards
+};
+
+static PyMemberDef subprocess_stream_members[] = {
+    { "returncode", T_OBJECT, offsetof(SubprocessStream, returncode), READONLY,
+      "Exit code of the process, None until the stream is closed." },
+    { "stderr", T_OBJECT, offsetof(SubprocessStream, stderr_output), READONLY,
+      "Error output of the process, None until the stream is closed." },
+    { NULL } // guards
+};
+
+static PyTypeObject SubprocessStreamType = {
+    PyVarObject_HEAD_INIT(NULL, 0) _SUBPROCESS_STREAM_NS_NAME, /* tp_name */
+    sizeof(SubprocessStream), /* tp_basicsize */
+    0, /* tp_itemsize */
+    (destructor)subprocess_stream_dealloc, /* tp_dealloc */
+    0, /* tp_print / tp_vectorcall_offset */
+    0, /* tp_getattr */
+    0, /* tp_setattr */
+    0, /* tp_compare / tp_as_async */
+    0, /* tp_repr */
+    0, /* tp_as_number */
+    0, /* tp_as_sequence */
+    0, /* tp_as_mapping */
+    0, /* tp_hash */
+    0, /* tp_call */
+    0, /* tp_str */
+    0, /* tp_getattro */
+    0, /* tp_setattro */
+    0, /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT, /* tp_flags */
+    "Output of a process, yielded in chunks as it is produced.", /* tp_doc */
+    0, /* tp_traverse */
+    0, /* tp_clear */
+    0, /* tp_richcompare */
+    0, /* tp_weaklistoffset */
+    PyObject_SelfIter, /* tp_iter */
+    (iternextfunc)subprocess_stream_next, /* tp_iternext */
+    subprocess_stream_methods, /* tp_methods */
+    subprocess_stream_members, /* tp_members */
+};
+
+/*! \fn PyObject *subprocess_stream(PyObject *self, PyObject *args, PyObject *kw)
+    \brief This function implements the `_util.subprocess_stream` python method, allowing to
+    execute a subprocess and iterate over its output as it is produced.
+    \param self A PyObject* pointer to the _util module.
+    \param args A PyObject* pointer to the args tuple with the desired subprocess commands, and
+    optionally an env dict, a chunk size and a timeout in seconds.
+    \param kw A PyObject* pointer to the kw dict with the optional arguments.
+    \return a PyObject * pointer to a `_util.SubprocessStream` iterator, or `None` if the
+    callbacks are unavailable.
+
+    Unlike `subprocess_output`, the output isn't buffered in go-land: the iterator yields the
+    stdout of the command in bytes chunks of at most `chunk_size` bytes, read with the GIL
+    released. Once the output is exhausted the `returncode` and `stderr` attributes of the
+    iterator are set. If the command is still running when the timeout expires, it's killed and
+    the iteration raises `_util.SubprocessTimeoutError` after the output read so far. Closing the
+    iterator, or dropping it, before the end of the output kills the command.
+*/
+static PyObject *subprocess_stream(PyObject *self, PyObject *args, PyObject *kw)
+{
+    int chunk_size = SUBPROCESS_STREAM_CHUNK_SIZE;
+    double timeout = 0;
+    long id = 0;
+    char **subprocess_args = NULL;
+    char **subprocess_env = NULL;
+    char *exception = NULL;
+    PyObject *cmd_args = NULL;
+    PyObject *cmd_env = NULL;
+    PyObject *cmd_timeout = NULL;
+    SubprocessStream *stream = NULL;
+
+    if (!cb_start_subprocess_stream || !cb_read_subprocess_stream || !cb_close_subprocess_stream) {
+        Py_RETURN_NONE;
+    }
+
+    static char *keywords[] = { "command", "env", "chunk_size", "timeout", NULL };
+    // The string after the ':' is used as the function name in error messages.
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "O|OiO:subprocess_stream", keywords, &cmd_args, &cmd_env, &chunk_size,
+                                     &cmd_timeout)) {
+        return NULL;
+    }
+
+    if (chunk_size <= 0) {
+        PyErr_SetString(PyExc_ValueError, "chunk_size must be positive");
+        return NULL;
+    }
+
+    if (cmd_timeout != NULL && cmd_timeout != Py_None) {
+        timeout = PyFloat_AsDouble(cmd_timeout);
+        if (timeout == -1 && PyErr_Occurred()) {
+            return NULL;
+        }
+        if (timeout <= 0) {
+            PyErr_SetString(PyExc_ValueError, "timeout must be positive");
+            return NULL;
         }
-        _free(subprocess_env);
     }
 
-    // Please note that if we get here we have a matching PyGILState_Ensure above, so we're safe.
-    PyGILState_Release(gstate);
+    if (!(subprocess_args = as_subprocess_args(cmd_args))) {
+        goto cleanup;
+    }
 
-    // pyResult will be NULL in the face of error to raise the exception set by PyErr_SetString
-    return pyResult;
+    if (as_subprocess_env(cmd_env, &subprocess_env) < 0) {
+        goto cleanup;
+    }
+
+    // Release the GIL so Python can execute other checks while Go starts the subprocess
+    Py_BEGIN_ALLOW_THREADS
+    id = cb_start_subprocess_stream(subprocess_args, subprocess_env, timeout, &exception);
+    Py_END_ALLOW_THREADS
+
+    if (exception) {
+        PyErr_SetString(PyExc_Exception, exception);
+        goto cleanup;
+    }
+
+    stream = PyObject_New(SubprocessStream, &SubprocessStreamType);
+    if (stream == NULL) {
+        // don't leave the subprocess running
+        char *c_stderr = NULL;
+        int ret_code = 0;
+        cb_close_subprocess_stream(id, &c_stderr, &ret_code);
+        if (c_stderr) {
+            cgo_free(c_stderr);
+        }
+        goto cleanup;
+    }
+    stream->id = id;
+    stream->chunk_size = chunk_size;
+    stream->closed = 0;
+    Py_INCREF(Py_None);
+    stream->returncode = Py_None;
+    Py_INCREF(Py_None);
+    stream->stderr_output = Py_None;
+
+cleanup:
+    if (exception) {
+        cgo_free(exception);
+    }
+    free_subprocess_strings(subprocess_args);
+    free_subprocess_strings(subprocess_env);
+
+    return (PyObject *)stream;
 }
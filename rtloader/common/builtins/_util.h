@@ -37,11 +37,43 @@
 
     The callback is expected to be provided by the rtloader caller - in go-context: CGO.
 */
+/*! \fn void _set_start_subprocess_stream_cb(cb_start_subprocess_stream_t)
+    \brief Sets a callback to be used by rtloader to start subprocess commands whose output
+    is read in chunks.
+    \param object A function pointer with cb_start_subprocess_stream_t prototype to the
+    callback function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It returns the identifier of the stream, passed to the read and close callbacks.
+*/
+/*! \fn void _set_read_subprocess_stream_cb(cb_read_subprocess_stream_t)
+    \brief Sets a callback to be used by rtloader to read the next chunk of output of a
+    subprocess.
+    \param object A function pointer with cb_read_subprocess_stream_t prototype to the
+    callback function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It returns the number of bytes read, 0 once the output is exhausted or the deadline of
+    the subprocess is reached.
+*/
+/*! \fn void _set_close_subprocess_stream_cb(cb_close_subprocess_stream_t)
+    \brief Sets a callback to be used by rtloader to wait for a subprocess, or kill it, and
+    collect its error output and exit code.
+    \param object A function pointer with cb_close_subprocess_stream_t prototype to the
+    callback function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It returns 1 if the subprocess reached its deadline, 0 otherwise.
+*/
 
 #define _DOT "."
 #define _UTIL_MODULE_NAME "_util"
 #define _SUBPROCESS_OUTPUT_ERROR_NAME "SubprocessOutputEmptyError"
 #define _SUBPROCESS_OUTPUT_ERROR_NS_NAME _UTIL_MODULE_NAME _DOT _SUBPROCESS_OUTPUT_ERROR_NAME
+#define _SUBPROCESS_TIMEOUT_ERROR_NAME "SubprocessTimeoutError"
+#define _SUBPROCESS_TIMEOUT_ERROR_NS_NAME _UTIL_MODULE_NAME _DOT _SUBPROCESS_TIMEOUT_ERROR_NAME
+#define _SUBPROCESS_STREAM_NAME "SubprocessStream"
+#define _SUBPROCESS_STREAM_NS_NAME _UTIL_MODULE_NAME _DOT _SUBPROCESS_STREAM_NAME
 
 // The keyword-only arguments separator ($) for PyArg_ParseTupleAndKeywords()
 // has been introduced in Python 3.3
@@ -63,6 +95,9 @@ void Py2_init__util();
 #endif
 
 void _set_get_subprocess_output_cb(cb_get_subprocess_output_t);
+void _set_start_subprocess_stream_cb(cb_start_subprocess_stream_t);
+void _set_read_subprocess_stream_cb(cb_read_subprocess_stream_t);
+void _set_close_subprocess_stream_cb(cb_close_subprocess_stream_t);
 #ifdef __cplusplus
 }
 #endif
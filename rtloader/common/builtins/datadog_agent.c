@@ -8,28 +8,66 @@
 #include "stringutils.h"
 
 #include <log.h>
+#include <time.h>
+
+// maximum number of values written by the checks kept to serve reads
+#define PERSISTENT_CACHE_MAX_VALUES 1024
+// number of pending writes triggering a flush
+#define PERSISTENT_CACHE_MAX_PENDING 256
+// maximum number of query obfuscations kept by `obfuscate_sql_batch`
+#define OBFUSCATED_SQL_CACHE_SIZE 4096
+// seconds after which `set_external_tags` sends the unchanged hosts of a check again
+#define EXTERNAL_TAGS_RESYNC_INTERVAL 1800
 
 // these must be set by the Agent
 static cb_get_clustername_t cb_get_clustername = NULL;
 static cb_get_config_t cb_get_config = NULL;
+static cb_get_config_many_t cb_get_config_many = NULL;
 static cb_get_hostname_t cb_get_hostname = NULL;
 static cb_get_host_tags_t cb_get_host_tags = NULL;
 static cb_tracemalloc_enabled_t cb_tracemalloc_enabled = NULL;
 static cb_get_version_t cb_get_version = NULL;
 static cb_headers_t cb_headers = NULL;
 static cb_send_log_t cb_send_log = NULL;
+static cb_send_logs_t cb_send_logs = NULL;
 static cb_set_check_metadata_t cb_set_check_metadata = NULL;
 static cb_set_external_tags_t cb_set_external_tags = NULL;
+static cb_set_external_tags_many_t cb_set_external_tags_many = NULL;
 static cb_write_persistent_cache_t cb_write_persistent_cache = NULL;
+static cb_write_persistent_cache_many_t cb_write_persistent_cache_many = NULL;
 static cb_read_persistent_cache_t cb_read_persistent_cache = NULL;
 static cb_obfuscate_sql_t cb_obfuscate_sql = NULL;
+static cb_obfuscate_sql_many_t cb_obfuscate_sql_many = NULL;
 static cb_obfuscate_sql_exec_plan_t cb_obfuscate_sql_exec_plan = NULL;
 static cb_get_process_start_time_t cb_get_process_start_time = NULL;
 static cb_obfuscate_mongodb_string_t cb_obfuscate_mongodb_string = NULL;
 
+// snapshot of the configuration values returned by `get_config`, keyed by config key. It
+// is only accessed with the GIL held, and dropped as soon as the agent bumps the config
+// generation, which may happen from any thread.
+static PyObject *config_snapshot = NULL;
+static unsigned long config_snapshot_generation = 0;
+static unsigned long config_generation = 0;
+
+// values written to the persistent cache by the checks, keyed by persistent cache key. The
+// pending ones are yet to be handed to the agent. Only accessed with the GIL held.
+static PyObject *persistent_cache = NULL;
+static PyObject *persistent_cache_pending = NULL;
+static int persistent_cache_flushing = 0;
+
+// results of `obfuscate_sql_batch`, keyed by (query, options) and ordered from the least
+// to the most recently used. Only accessed with the GIL held.
+static PyObject *obfuscated_sql_cache = NULL;
+
+// external tags last sent by `set_external_tags` for each check, keyed by check id. Values are
+// (time of the last full resync, {(source_type, hostname): hash of the tags}), the agent keeping
+// the tags of a host for each source type. Only accessed with the GIL held.
+static PyObject *external_tags_state = NULL;
+
 // forward declarations
 static PyObject *get_clustername(PyObject *self, PyObject *args);
 static PyObject *get_config(PyObject *self, PyObject *args);
+static PyObject *get_config_many(PyObject *self, PyObject *args);
 static PyObject *get_hostname(PyObject *self, PyObject *args);
 static PyObject *get_host_tags(PyObject *self, PyObject *args);
 static PyObject *tracemalloc_enabled(PyObject *self, PyObject *args);
@@ -37,11 +75,14 @@ static PyObject *get_version(PyObject *self, PyObject *args);
 static PyObject *headers(PyObject *self, PyObject *args, PyObject *kwargs);
 static PyObject *log_message(PyObject *self, PyObject *args);
 static PyObject *send_log(PyObject *self, PyObject *args);
+static PyObject *send_logs(PyObject *self, PyObject *args);
 static PyObject *set_check_metadata(PyObject *self, PyObject *args);
-static PyObject *set_external_tags(PyObject *self, PyObject *args);
+static PyObject *set_external_tags(PyObject *self, PyObject *args, PyObject *kwargs);
 static PyObject *write_persistent_cache(PyObject *self, PyObject *args);
+static PyObject *write_persistent_cache_many(PyObject *self, PyObject *args);
 static PyObject *read_persistent_cache(PyObject *self, PyObject *args);
 static PyObject *obfuscate_sql(PyObject *self, PyObject *args, PyObject *kwargs);
+static PyObject *obfuscate_sql_batch(PyObject *self, PyObject *args, PyObject *kwargs);
 static PyObject *obfuscate_sql_exec_plan(PyObject *self, PyObject *args, PyObject *kwargs);
 static PyObject *get_process_start_time(PyObject *self, PyObject *args, PyObject *kwargs);
 static PyObject *obfuscate_mongodb_string(PyObject *self, PyObject *args, PyObject *kwargs);
@@ -49,6 +90,7 @@ static PyObject *obfuscate_mongodb_string(PyObject *self, PyObject *args, PyObje
 static PyMethodDef methods[] = {
     { "get_clustername", get_clustername, METH_NOARGS, "Get the cluster name." },
     { "get_config", get_config, METH_VARARGS, "Get an Agent config item." },
+    { "get_config_many", get_config_many, METH_VARARGS, "Get several Agent config items." },
     { "get_hostname", get_hostname, METH_NOARGS, "Get the hostname." },
     { "get_host_tags", get_host_tags, METH_NOARGS, "Get the host tags." },
     { "tracemalloc_enabled", tracemalloc_enabled, METH_VARARGS, "Gets if tracemalloc is enabled." },
@@ -56,11 +98,15 @@ static PyMethodDef methods[] = {
     { "headers", (PyCFunction)headers, METH_VARARGS | METH_KEYWORDS, "Get standard set of HTTP headers." },
     { "log", log_message, METH_VARARGS, "Log a message through the agent logger." },
     { "send_log", send_log, METH_VARARGS, "Submit a log for Checks." },
+    { "send_logs", send_logs, METH_VARARGS, "Submit several logs for Checks." },
     { "set_check_metadata", set_check_metadata, METH_VARARGS, "Send metadata for Checks." },
-    { "set_external_tags", set_external_tags, METH_VARARGS, "Send external host tags." },
+    { "set_external_tags", (PyCFunction)set_external_tags, METH_VARARGS | METH_KEYWORDS, "Send external host tags." },
     { "write_persistent_cache", write_persistent_cache, METH_VARARGS, "Store a value for a given key." },
+    { "write_persistent_cache_many", write_persistent_cache_many, METH_VARARGS,
+      "Store the values for several keys." },
     { "read_persistent_cache", read_persistent_cache, METH_VARARGS, "Retrieve the value associated with a key." },
     { "obfuscate_sql", (PyCFunction)obfuscate_sql, METH_VARARGS|METH_KEYWORDS, "Obfuscate & normalize a SQL string." },
+    { "obfuscate_sql_batch", (PyCFunction)obfuscate_sql_batch, METH_VARARGS|METH_KEYWORDS, "Obfuscate & normalize several SQL strings." },
     { "obfuscate_sql_exec_plan", (PyCFunction)obfuscate_sql_exec_plan, METH_VARARGS|METH_KEYWORDS, "Obfuscate & normalize a SQL Execution Plan." },
     { "get_process_start_time", (PyCFunction)get_process_start_time, METH_NOARGS, "Get agent process startup time, in seconds since the epoch." },
     { "obfuscate_mongodb_string", (PyCFunction)obfuscate_mongodb_string, METH_VARARGS|METH_KEYWORDS, "Obfuscate & normalize a MongoDB command string." },
@@ -72,6 +118,12 @@ static struct PyModuleDef module_def = { PyModuleDef_HEAD_INIT, DATADOG_AGENT_MO
 
 PyMODINIT_FUNC PyInit_datadog_agent(void)
 {
+    // a snapshot left by a previous interpreter is not valid anymore
+    config_snapshot = NULL;
+    persistent_cache = NULL;
+    persistent_cache_pending = NULL;
+    obfuscated_sql_cache = NULL;
+    external_tags_state = NULL;
     return PyModule_Create(&module_def);
 }
 #elif defined(DATADOG_AGENT_TWO)
@@ -80,6 +132,12 @@ static PyObject *module;
 
 void Py2_init_datadog_agent()
 {
+    // a snapshot left by a previous interpreter is not valid anymore
+    config_snapshot = NULL;
+    persistent_cache = NULL;
+    persistent_cache_pending = NULL;
+    obfuscated_sql_cache = NULL;
+    external_tags_state = NULL;
     module = Py_InitModule(DATADOG_AGENT_MODULE_NAME, methods);
 }
 #endif
@@ -94,6 +152,16 @@ void _set_get_config_cb(cb_get_config_t cb)
     cb_get_config = cb;
 }
 
+void _set_get_config_many_cb(cb_get_config_many_t cb)
+{
+    cb_get_config_many = cb;
+}
+
+void _bump_config_generation(void)
+{
+    __sync_add_and_fetch(&config_generation, 1);
+}
+
 void _set_headers_cb(cb_headers_t cb)
 {
     cb_headers = cb;
@@ -119,6 +187,11 @@ void _set_send_log_cb(cb_send_log_t cb)
     cb_send_log = cb;
 }
 
+void _set_send_logs_cb(cb_send_logs_t cb)
+{
+    cb_send_logs = cb;
+}
+
 void _set_set_check_metadata_cb(cb_set_check_metadata_t cb)
 {
     cb_set_check_metadata = cb;
@@ -134,11 +207,21 @@ void _set_read_persistent_cache_cb(cb_read_persistent_cache_t cb)
     cb_read_persistent_cache = cb;
 }
 
+void _set_write_persistent_cache_many_cb(cb_write_persistent_cache_many_t cb)
+{
+    cb_write_persistent_cache_many = cb;
+}
+
 void _set_set_external_tags_cb(cb_set_external_tags_t cb)
 {
     cb_set_external_tags = cb;
 }
 
+void _set_set_external_tags_many_cb(cb_set_external_tags_many_t cb)
+{
+    cb_set_external_tags_many = cb;
+}
+
 void _set_tracemalloc_enabled_cb(cb_tracemalloc_enabled_t cb)
 {
     cb_tracemalloc_enabled = cb;
@@ -149,6 +232,11 @@ void _set_obfuscate_sql_cb(cb_obfuscate_sql_t cb)
     cb_obfuscate_sql = cb;
 }
 
+void _set_obfuscate_sql_many_cb(cb_obfuscate_sql_many_t cb)
+{
+    cb_obfuscate_sql_many = cb;
+}
+
 void _set_obfuscate_sql_exec_plan_cb(cb_obfuscate_sql_exec_plan_t cb)
 {
     cb_obfuscate_sql_exec_plan = cb;
@@ -194,6 +282,53 @@ PyObject *get_version(PyObject *self, PyObject *args)
     Py_RETURN_NONE;
 }
 
+/*! \fn PyObject *get_config_snapshot(void)
+    \brief Returns the snapshot of the configuration values already collected from the agent.
+    \return a PyObject * borrowed reference to the snapshot dictionary, or NULL if it could
+    not be allocated.
+
+    The snapshot is emptied when the config generation changed since it was filled. The
+    generation is read before calling the agent, so a value collected while the config
+    changes is dropped on the next call.
+*/
+static PyObject *get_config_snapshot(void)
+{
+    unsigned long generation = __sync_fetch_and_add(&config_generation, 0);
+
+    if (config_snapshot == NULL) {
+        config_snapshot = PyDict_New();
+    } else if (config_snapshot_generation != generation) {
+        PyDict_Clear(config_snapshot);
+    }
+    config_snapshot_generation = generation;
+
+    return config_snapshot;
+}
+
+/*! \fn PyObject *load_config(char *data)
+    \brief Decodes a configuration payload returned by the agent.
+    \param data The YAML C-string returned by the agent, it is freed by this function.
+    \return a PyObject * pointer to a new reference to the value, or NULL if the payload
+    couldn't be decoded. No python error is set.
+
+    The agent returns a NULL payload for the keys that aren't set, they're decoded to `None`.
+*/
+static PyObject *load_config(char *data)
+{
+    if (data == NULL) {
+        Py_RETURN_NONE;
+    }
+
+    // new ref
+    PyObject *value = from_yaml(data);
+    cgo_free(data);
+    if (value == NULL) {
+        // clear error set by `from_yaml`
+        PyErr_Clear();
+    }
+    return value;
+}
+
 /*! \fn PyObject *get_config(PyObject *self, PyObject *args)
     \brief This function implements the `datadog-agent.get_config` method, allowing
     to collect elements in the agent configuration, from the agent.
@@ -219,6 +354,10 @@ PyObject *get_version(PyObject *self, PyObject *args)
     YAML is used instead of JSON since the `json.load` return unicode for
     string, for python2, which would be a breaking change from the previous
     version of the agent.
+
+    Checks typically read the same keys on every run, so decoded values are kept in a
+    snapshot until the agent bumps the config generation with `_bump_config_generation()`,
+    and the callback is only called for keys missing from the snapshot.
 */
 PyObject *get_config(PyObject *self, PyObject *args)
 {
@@ -234,18 +373,176 @@ PyObject *get_config(PyObject *self, PyObject *args)
         return NULL;
     }
 
+    // borrowed ref
+    PyObject *snapshot = get_config_snapshot();
+    if (snapshot == NULL) {
+        return NULL;
+    }
+
+    // borrowed ref, no exception set if not present
+    PyObject *value = PyDict_GetItemString(snapshot, key);
+    if (value != NULL) {
+        return copy_containers(value);
+    }
+
     char *data = NULL;
     cb_get_config(key, &data);
 
-    // new ref
-    PyObject *value = from_yaml(data);
-    cgo_free(data);
+    value = load_config(data);
     if (value == NULL) {
-        // clear error set by `from_yaml`
+        Py_RETURN_NONE;
+    }
+    // not being able to store the value in the snapshot isn't an error for the caller
+    if (PyDict_SetItemString(snapshot, key, value) < 0) {
         PyErr_Clear();
+    }
+
+    PyObject *retval = copy_containers(value);
+    Py_DECREF(value);
+    return retval;
+}
+
+/*! \fn PyObject *get_config_many(PyObject *self, PyObject *args)
+    \brief This function implements the `datadog-agent.get_config_many` method, allowing
+    to collect several elements in the agent configuration at once.
+    \param self A PyObject* pointer to the `datadog_agent` module.
+    \param args A PyObject* pointer to a tuple containing a sequence of python strings.
+    \return a PyObject * pointer to a python dictionary mapping each key to the value
+    `get_config` would return for it. Or `None` if the callback is unavailable, or NULL
+    if an exception is raised.
+
+    This function is callable as the `datadog_agent.get_config_many` python method. The keys
+    missing from the config snapshot are collected with a single call to the
+    `cb_get_config_many()` callback, which returns a YAML mapping of the keys set in the agent
+    configuration to their value, decoded with a single `from_yaml()` call. If this callback
+    is not set, `cb_get_config()` is called for each missing key.
+*/
+static PyObject *get_config_many(PyObject *self, PyObject *args)
+{
+    // callback must be set
+    if (cb_get_config == NULL) {
         Py_RETURN_NONE;
     }
-    return value;
+
+    PyObject *keys = NULL;
+    // the reference count in the returned object is _not_ incremented
+    if (!PyArg_ParseTuple(args, "O", &keys)) {
+        return NULL;
+    }
+
+    // new ref
+    PyObject *keys_seq = PySequence_Fast(keys, "keys must be a sequence of strings");
+    if (keys_seq == NULL) {
+        return NULL;
+    }
+
+    int error = 1;
+    char **missing = NULL;
+    Py_ssize_t i, keys_len, missing_len = 0;
+    PyObject *values = NULL;
+    PyObject *retval = NULL;
+
+    // borrowed ref
+    PyObject *snapshot = get_config_snapshot();
+    if (snapshot == NULL) {
+        goto done;
+    }
+    retval = PyDict_New();
+    if (retval == NULL) {
+        goto done;
+    }
+
+    keys_len = PySequence_Fast_GET_SIZE(keys_seq);
+    if (!(missing = (char **)_malloc(sizeof(*missing) * (keys_len + 1)))) {
+        PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
+        goto done;
+    }
+
+    for (i = 0; i < keys_len; i++) {
+        char *key = as_string(PySequence_Fast_GET_ITEM(keys_seq, i));
+        if (key == NULL) {
+            PyErr_SetString(PyExc_TypeError, "keys must be a sequence of strings");
+            goto done;
+        }
+
+        // borrowed ref, no exception set if not present
+        PyObject *value = PyDict_GetItemString(snapshot, key);
+        if (value == NULL) {
+            missing[missing_len++] = key;
+            continue;
+        }
+
+        PyObject *value_copy = copy_containers(value);
+        int ret = value_copy == NULL ? -1 : PyDict_SetItemString(retval, key, value_copy);
+        Py_XDECREF(value_copy);
+        _free(key);
+        if (ret < 0) {
+            goto done;
+        }
+    }
+    missing[missing_len] = NULL;
+
+    if (missing_len > 0 && cb_get_config_many != NULL) {
+        char *data = NULL;
+        cb_get_config_many(missing, &data);
+
+        values = load_config(data);
+        // keys that aren't set are omitted from the mapping
+        if (values == Py_None) {
+            Py_DECREF(values);
+            values = PyDict_New();
+        } else if (values != NULL && !PyDict_Check(values)) {
+            Py_CLEAR(values);
+        }
+    }
+
+    for (i = 0; i < missing_len; i++) {
+        PyObject *value = NULL;
+        if (cb_get_config_many == NULL) {
+            char *data = NULL;
+            cb_get_config(missing[i], &data);
+            value = load_config(data);
+        } else if (values != NULL) {
+            // borrowed ref, no exception set if not present
+            value = PyDict_GetItemString(values, missing[i]);
+            value = value == NULL ? Py_None : value;
+            Py_INCREF(value);
+        }
+
+        if (value == NULL) {
+            // the payload couldn't be decoded, don't keep `None` in the snapshot
+            if (PyDict_SetItemString(retval, missing[i], Py_None) < 0) {
+                goto done;
+            }
+            continue;
+        }
+        if (PyDict_SetItemString(snapshot, missing[i], value) < 0) {
+            PyErr_Clear();
+        }
+
+        PyObject *value_copy = copy_containers(value);
+        int ret = value_copy == NULL ? -1 : PyDict_SetItemString(retval, missing[i], value_copy);
+        Py_XDECREF(value_copy);
+        Py_DECREF(value);
+        if (ret < 0) {
+            goto done;
+        }
+    }
+
+    error = 0;
+
+done:
+    for (i = 0; i < missing_len; i++) {
+        _free(missing[i]);
+    }
+    _free(missing);
+    Py_XDECREF(values);
+    Py_DECREF(keys_seq);
+    if (error) {
+        Py_XDECREF(retval);
+        return NULL;
+    }
+    return retval;
 }
 
 /*! \fn PyObject *headers(PyObject *self, PyObject *args, PyObject *kwargs)
@@ -492,6 +789,138 @@ static PyObject *send_log(PyObject *self, PyObject *args)
     Py_RETURN_NONE;
 }
 
+/*! \fn int log_record_data(PyObject *record, char **data, Py_ssize_t *size)
+    \brief Gets the UTF-8 encoded content of a log record, without copying it.
+    \param record A PyObject* pointer to the python string.
+    \param data Set to a pointer to the content, owned by the record.
+    \param size Set to the size of the content.
+    \return 0 on success, -1 if an exception is raised.
+*/
+static int log_record_data(PyObject *record, char **data, Py_ssize_t *size)
+{
+    if (PyBytes_Check(record)) {
+        return PyBytes_AsStringAndSize(record, data, size);
+    }
+    if (PyUnicode_Check(record)) {
+#ifdef DATADOG_AGENT_THREE
+        *data = (char *)PyUnicode_AsUTF8AndSize(record, size);
+        return *data == NULL ? -1 : 0;
+#else
+        // borrowed ref, kept by the unicode object, as done by the "s" format of PyArg_ParseTuple
+        PyObject *encoded = _PyUnicode_AsDefaultEncodedString(record, NULL);
+        return encoded == NULL ? -1 : PyString_AsStringAndSize(encoded, data, size);
+#endif
+    }
+
+    PyErr_SetString(PyExc_TypeError, "records must be a sequence of strings");
+    return -1;
+}
+
+/*! \fn PyObject *send_logs(PyObject *self, PyObject *args)
+    \brief This function implements the `datadog_agent.send_logs` method, sending
+    several logs for eventual submission.
+    \param self A PyObject* pointer to the `datadog_agent` module.
+    \param args A PyObject* pointer to a 2-ary tuple containing a sequence of log lines
+    and the unique ID of a check instance.
+    \return A PyObject* pointer to the number of log lines accepted by the agent, or `None`
+    if the callbacks are unavailable, or NULL if an exception is raised.
+
+    This function is callable as the `datadog_agent.send_logs` Python method. The log lines
+    are packed in a single buffer, each one prefixed by its length, and handed to the
+    `cb_send_logs()` callback without the GIL. The agent accepts the first lines until its
+    logs pipeline stops keeping up, the caller is expected to retry or drop the others. If
+    this callback is not set, `cb_send_log()` is called for each line.
+*/
+static PyObject *send_logs(PyObject *self, PyObject *args)
+{
+    // callback must be set
+    if (cb_send_logs == NULL && cb_send_log == NULL) {
+        Py_RETURN_NONE;
+    }
+
+    PyObject *records = NULL;
+    char *check_id = NULL;
+    // datadog_agent.send_logs(log_lines, check_id)
+    if (!PyArg_ParseTuple(args, "Os", &records, &check_id)) {
+        return NULL;
+    }
+
+    // a string is a sequence, but certainly not the one of records the caller meant
+    if (PyUnicode_Check(records) || PyBytes_Check(records)) {
+        PyErr_SetString(PyExc_TypeError, "records must be a sequence of strings");
+        return NULL;
+    }
+    // new ref
+    PyObject *records_seq = PySequence_Fast(records, "records must be a sequence of strings");
+    if (records_seq == NULL) {
+        return NULL;
+    }
+
+    PyObject *retval = NULL;
+    char *buffer = NULL, *data = NULL;
+    size_t buffer_size = 0;
+    Py_ssize_t i, size, records_len = PySequence_Fast_GET_SIZE(records_seq);
+    int accepted = 0;
+
+    if (cb_send_logs == NULL) {
+        for (i = 0; i < records_len; i++) {
+            if (log_record_data(PySequence_Fast_GET_ITEM(records_seq, i), &data, &size) < 0) {
+                goto done;
+            }
+        }
+        for (i = 0; i < records_len; i++) {
+            char *log_line = as_string(PySequence_Fast_GET_ITEM(records_seq, i));
+            if (log_line != NULL) {
+                cb_send_log(log_line, check_id);
+                accepted++;
+            }
+            _free(log_line);
+        }
+        retval = PyLong_FromLong(accepted);
+        goto done;
+    }
+
+    for (i = 0; i < records_len; i++) {
+        if (log_record_data(PySequence_Fast_GET_ITEM(records_seq, i), &data, &size) < 0) {
+            goto done;
+        }
+        if ((size_t)size > UINT32_MAX) {
+            PyErr_SetString(PyExc_ValueError, "log record too large");
+            goto done;
+        }
+        buffer_size += sizeof(uint32_t) + size;
+    }
+
+    if (records_len > 0) {
+        if (!(buffer = (char *)_malloc(buffer_size))) {
+            PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
+            goto done;
+        }
+
+        char *cursor = buffer;
+        for (i = 0; i < records_len; i++) {
+            // can't fail, the records were checked above
+            log_record_data(PySequence_Fast_GET_ITEM(records_seq, i), &data, &size);
+            uint32_t record_size = (uint32_t)size;
+            memcpy(cursor, &record_size, sizeof(record_size));
+            memcpy(cursor + sizeof(record_size), data, size);
+            cursor += sizeof(record_size) + size;
+        }
+
+        // check_id points to the tuple of arguments, which outlives the call
+        Py_BEGIN_ALLOW_THREADS
+        accepted = cb_send_logs(buffer, buffer_size, check_id);
+        Py_END_ALLOW_THREADS
+    }
+
+    retval = PyLong_FromLong(accepted);
+
+done:
+    _free(buffer);
+    Py_DECREF(records_seq);
+    return retval;
+}
+
 /*! \fn PyObject *set_check_metadata(PyObject *self, PyObject *args)
     \brief This function implements the `datadog_agent.set_check_metadata` method, updating
     the value in the cache.
@@ -527,6 +956,155 @@ static PyObject *set_check_metadata(PyObject *self, PyObject *args)
     Py_RETURN_NONE;
 }
 
+/*! \fn PyObject *persistent_cache_dict(PyObject **dict)
+    \brief Returns one of the dictionaries holding the persistent cache values written by
+    the checks, creating it if needed.
+    \param dict A pointer to the dictionary variable.
+    \return a PyObject * borrowed reference to the dictionary, or NULL if it could not be
+    allocated.
+*/
+static PyObject *persistent_cache_dict(PyObject **dict)
+{
+    if (*dict == NULL) {
+        *dict = PyDict_New();
+    }
+    return *dict;
+}
+
+/*! \fn int remember_persistent_cache(PyObject *key, PyObject *value)
+    \brief Keeps a value handed to the agent, to serve the reads of its key.
+    \param key A PyObject* pointer to the key.
+    \param value A PyObject* pointer to the python string value.
+    \return 0 on success, -1 if an exception is raised.
+
+    At most `PERSISTENT_CACHE_MAX_VALUES` values are kept, they're all dropped when the
+    limit is reached and read from the agent again.
+*/
+static int remember_persistent_cache(PyObject *key, PyObject *value)
+{
+    // borrowed ref
+    PyObject *values = persistent_cache_dict(&persistent_cache);
+    if (values == NULL) {
+        return -1;
+    }
+    if (PyDict_Size(values) >= PERSISTENT_CACHE_MAX_VALUES) {
+        PyDict_Clear(values);
+    }
+    return PyDict_SetItem(values, key, value);
+}
+
+/*! \fn void _flush_persistent_cache(void)
+    \brief Hands the pending persistent cache writes to the agent.
+
+    The pending values are handed to the `cb_write_persistent_cache_many()` callback at
+    once, without the GIL. The flush is skipped if another flush is in progress, as the
+    agent could otherwise store an outdated value last.
+*/
+void _flush_persistent_cache(void)
+{
+    if (persistent_cache_pending == NULL || PyDict_Size(persistent_cache_pending) == 0 || persistent_cache_flushing) {
+        return;
+    }
+
+    // writes done during the flush are queued to a new dictionary
+    PyObject *pending = persistent_cache_pending;
+    persistent_cache_pending = NULL;
+
+    Py_ssize_t i = 0, pos = 0, size = PyDict_Size(pending);
+    char **keys = NULL, **values = NULL;
+    if (!(keys = (char **)_malloc(sizeof(*keys) * (size + 1)))
+        || !(values = (char **)_malloc(sizeof(*values) * (size + 1)))) {
+        // keep the values for the next flush
+        _free(keys);
+        persistent_cache_pending = pending;
+        return;
+    }
+
+    PyObject *key = NULL, *value = NULL;
+    while (PyDict_Next(pending, &pos, &key, &value)) {
+        if (!(keys[i] = as_string(key))) {
+            continue;
+        }
+        if (!(values[i] = as_string(value))) {
+            _free(keys[i]);
+            continue;
+        }
+        if (remember_persistent_cache(key, value) < 0) {
+            PyErr_Clear();
+        }
+        i++;
+    }
+    keys[i] = NULL;
+    values[i] = NULL;
+    Py_DECREF(pending);
+
+    persistent_cache_flushing = 1;
+    Py_BEGIN_ALLOW_THREADS
+    if (cb_write_persistent_cache_many != NULL) {
+        cb_write_persistent_cache_many(keys, values);
+    } else if (cb_write_persistent_cache != NULL) {
+        for (i = 0; keys[i] != NULL; i++) {
+            cb_write_persistent_cache(keys[i], values[i]);
+        }
+    }
+    Py_END_ALLOW_THREADS
+    persistent_cache_flushing = 0;
+
+    for (i = 0; keys[i] != NULL; i++) {
+        _free(keys[i]);
+        _free(values[i]);
+    }
+    _free(keys);
+    _free(values);
+}
+
+/*! \fn int store_persistent_cache(char *key, char *value)
+    \brief Stores the value for a key in the persistent cache.
+    \param key A C-string with the key.
+    \param value A C-string with the value.
+    \return 0 on success, -1 if an exception is raised.
+
+    Without `cb_write_persistent_cache_many()` callback, the value is handed to the agent
+    with `cb_write_persistent_cache()` right away. Otherwise it is queued until the next
+    flush, and replaces the value queued for the same key if any.
+*/
+static int store_persistent_cache(char *key, char *value)
+{
+    int ret = -1;
+    PyObject *py_key = PyStringFromCString(key);
+    PyObject *py_value = PyStringFromCString(value);
+    if (py_key == NULL || py_value == NULL) {
+        goto done;
+    }
+
+    if (cb_write_persistent_cache_many == NULL) {
+        Py_BEGIN_ALLOW_THREADS
+        cb_write_persistent_cache(key, value);
+        Py_END_ALLOW_THREADS
+        ret = remember_persistent_cache(py_key, py_value);
+        goto done;
+    }
+
+    // borrowed ref
+    PyObject *pending = persistent_cache_dict(&persistent_cache_pending);
+    if (pending == NULL || PyDict_SetItem(pending, py_key, py_value) < 0) {
+        goto done;
+    }
+    // the queued value is the one to read from now on
+    if (persistent_cache != NULL && PyDict_DelItem(persistent_cache, py_key) < 0) {
+        PyErr_Clear();
+    }
+    if (PyDict_Size(pending) >= PERSISTENT_CACHE_MAX_PENDING) {
+        _flush_persistent_cache();
+    }
+    ret = 0;
+
+done:
+    Py_XDECREF(py_key);
+    Py_XDECREF(py_value);
+    return ret;
+}
+
 /*! \fn PyObject *write_persistent_cache(PyObject *self, PyObject *args)
     \brief This function implements the `datadog_agent.write_persistent_cache` method, storing
     the value for the key.
@@ -535,8 +1113,11 @@ static PyObject *set_check_metadata(PyObject *self, PyObject *args)
     \return A PyObject* pointer to `None`.
 
     This function is callable as the `datadog_agent.write_persistent_cache` Python method and
-    uses the `cb_write_persistent_cache()` callback to retrieve the value from the agent
+    uses the `cb_write_persistent_cache()` callback to store the value in the agent
     with CGO. If the callback has not been set `None` will be returned.
+
+    When the `cb_write_persistent_cache_many()` callback is set, the value is only queued:
+    the queued values are handed to the agent in a single call, on the next flush.
 */
 static PyObject *write_persistent_cache(PyObject *self, PyObject *args)
 {
@@ -552,9 +1133,55 @@ static PyObject *write_persistent_cache(PyObject *self, PyObject *args)
         return NULL;
     }
 
-    Py_BEGIN_ALLOW_THREADS
-    cb_write_persistent_cache(key, value);
-    Py_END_ALLOW_THREADS
+    if (store_persistent_cache(key, value) < 0) {
+        return NULL;
+    }
+
+    Py_RETURN_NONE;
+}
+
+/*! \fn PyObject *write_persistent_cache_many(PyObject *self, PyObject *args)
+    \brief This function implements the `datadog_agent.write_persistent_cache_many` method,
+    storing the values for several keys.
+    \param self A PyObject* pointer to the `datadog_agent` module.
+    \param args A PyObject* pointer to a tuple containing a dictionary of keys to values.
+    \return A PyObject* pointer to `None`, or NULL if an exception is raised.
+
+    This function is callable as the `datadog_agent.write_persistent_cache_many` Python method,
+    each value is stored as with `write_persistent_cache`. If the callback has not been set
+    `None` will be returned.
+*/
+static PyObject *write_persistent_cache_many(PyObject *self, PyObject *args)
+{
+    // callback must be set
+    if (cb_write_persistent_cache == NULL) {
+        Py_RETURN_NONE;
+    }
+
+    PyObject *items = NULL;
+
+    // datadog_agent.write_persistent_cache_many({key: value})
+    if (!PyArg_ParseTuple(args, "O!", &PyDict_Type, &items)) {
+        return NULL;
+    }
+
+    Py_ssize_t pos = 0;
+    PyObject *key = NULL, *value = NULL;
+    while (PyDict_Next(items, &pos, &key, &value)) {
+        char *key_str = as_string(key);
+        char *value_str = as_string(value);
+        int ret = -1;
+        if (key_str == NULL || value_str == NULL) {
+            PyErr_SetString(PyExc_TypeError, "keys and values must be strings");
+        } else {
+            ret = store_persistent_cache(key_str, value_str);
+        }
+        _free(key_str);
+        _free(value_str);
+        if (ret < 0) {
+            return NULL;
+        }
+    }
 
     Py_RETURN_NONE;
 }
@@ -569,6 +1196,9 @@ static PyObject *write_persistent_cache(PyObject *self, PyObject *args)
     This function is callable as the `datadog_agent.read_persistent_cache` Python method and
     uses the `cb_read_persistent_cache()` callback to retrieve the value from the agent
     with CGO. If the callback has not been set `None` will be returned.
+
+    The values written by this process, flushed or not, are returned without calling the
+    agent.
 */
 static PyObject *read_persistent_cache(PyObject *self, PyObject *args)
 {
@@ -584,6 +1214,19 @@ static PyObject *read_persistent_cache(PyObject *self, PyObject *args)
         return NULL;
     }
 
+    // borrowed refs, no exception set if not present
+    PyObject *value = NULL;
+    if (persistent_cache_pending != NULL) {
+        value = PyDict_GetItemString(persistent_cache_pending, key);
+    }
+    if (value == NULL && persistent_cache != NULL) {
+        value = PyDict_GetItemString(persistent_cache, key);
+    }
+    if (value != NULL) {
+        Py_INCREF(value);
+        return value;
+    }
+
     char *v = NULL;
     Py_BEGIN_ALLOW_THREADS
     v = cb_read_persistent_cache(key);
@@ -599,84 +1242,83 @@ static PyObject *read_persistent_cache(PyObject *self, PyObject *args)
     return retval;
 }
 
-/*! \fn PyObject *set_external_tags(PyObject *self, PyObject *args)
-    \brief This function implements the `datadog_agent.set_external_tags` method,
-    allowing to set additional external tags for hostnames.
-    \param self A PyObject* pointer to the `datadog_agent` module.
-    \param args A PyObject* pointer to a tuple containing a single positional argument
-    containing a list.
-    \return a PyObject * pointer to `None` if everything goes well, or `NULL` if an exception
-    is raised.
-
-    This function is callable as the `datadog_agent.set_external_tags` python method, it uses
-    the `cb_set_external_tags()` callback to set additional external tags for specific hostnames.
-    The argument expected is a list of 2-tuples, where the first element is the hostname, and
-    the second element is a dictionary with `source_type` as the key, and a list of tags for
-    said `source_type`. For instance: `[('hostname', {'source_type': ['tag1', 'tag2']})]`.
-    This function will iterate the python list, and call the `cb_set_external_tags` successively
-    for each element in the list.
-    If everything goes well `None` will be returned, otherwise an exception will be set in the
-    interpreter and NULL will be returned.
-
-    A few integrations such as vsphere or openstack require this functionality to add additional
-    tagging for their hosts.
+/*! \fn void free_external_tags_entry(external_tags_t *entry)
+    \brief Frees the strings of an external tags entry.
+    \param entry A pointer to the entry.
 */
-static PyObject *set_external_tags(PyObject *self, PyObject *args)
+static void free_external_tags_entry(external_tags_t *entry)
 {
-    PyObject *input_list = NULL;
-
-    // callback must be set
-    if (cb_set_external_tags == NULL) {
-        Py_RETURN_NONE;
+    int i;
+    for (i = 0; entry->tags[i]; i++) {
+        _free(entry->tags[i]);
     }
+    _free(entry->tags);
+    _free(entry->hostname);
+    _free(entry->source_type);
+}
 
-    PyGILState_STATE gstate = PyGILState_Ensure();
-
-    // function expects only one positional arg containing a list
-    // the reference count in the returned object (input list) is _not_
-    // incremented
-    if (!PyArg_ParseTuple(args, "O", &input_list)) {
-        PyGILState_Release(gstate);
-        return NULL;
+/*! \fn void free_external_tags(external_tags_t *external_tags, int external_tags_len)
+    \brief Frees an array of external tags and its entries.
+    \param external_tags The array to free, can be NULL.
+    \param external_tags_len The number of entries in the array.
+*/
+static void free_external_tags(external_tags_t *external_tags, int external_tags_len)
+{
+    if (external_tags == NULL) {
+        return;
     }
 
-    // if not a list, set an error
-    if (!PyList_Check(input_list)) {
-        PyErr_SetString(PyExc_TypeError, "tags must be a list");
-        PyGILState_Release(gstate);
-        return NULL;
+    int i;
+    for (i = 0; i < external_tags_len; i++) {
+        free_external_tags_entry(&external_tags[i]);
     }
+    _free(external_tags);
+}
 
-    int error = 0;
+/*! \fn int parse_external_tags(PyObject *input_list, external_tags_t *external_tags, PyObject **keys, int *external_tags_len)
+    \brief Converts the list passed to `set_external_tags` to an array of external tags.
+    \param input_list A PyObject* pointer to the python list.
+    \param external_tags The array filled with the entries, it must be large enough for every
+    element of the list.
+    \param keys The array filled with new references to the (source_type, hostname) tuple of each
+    entry, can be NULL.
+    \param external_tags_len The number of entries stored in the array.
+    \return 0 on success, -1 if an exception is raised. The entries converted before the error,
+    and their keys, are left in the arrays.
+
+    The elements with an empty dictionary are skipped, as well as the tags that aren't strings.
+*/
+static int parse_external_tags(PyObject *input_list, external_tags_t *external_tags, PyObject **keys,
+                               int *external_tags_len)
+{
     char *hostname = NULL;
     char *source_type = NULL;
     // We already PyList_Check input_list, so PyList_Size won't fail and return -1
     int input_len = PyList_Size(input_list);
     int i;
+
+    *external_tags_len = 0;
     for (i = 0; i < input_len; i++) {
         PyObject *tuple = PyList_GetItem(input_list, i);
 
         // list must contain only tuples in form ('hostname', {'source_type': ['tag1', 'tag2']},)
         if (!PyTuple_Check(tuple)) {
             PyErr_SetString(PyExc_TypeError, "external host tags list must contain only tuples");
-            error = 1;
-            goto done;
+            goto error;
         }
 
         // first elem is the hostname
         hostname = as_string(PyTuple_GetItem(tuple, 0));
         if (hostname == NULL) {
             PyErr_SetString(PyExc_TypeError, "hostname is not a valid string");
-            error = 1;
-            goto done;
+            goto error;
         }
 
         // second is a dictionary
         PyObject *dict = PyTuple_GetItem(tuple, 1);
         if (!PyDict_Check(dict)) {
             PyErr_SetString(PyExc_TypeError, "second elem of the host tags tuple must be a dict");
-            error = 1;
-            goto done;
+            goto error;
         }
 
         // dict contains only 1 key, if dict is empty don't do anything
@@ -692,24 +1334,28 @@ static PyObject *set_external_tags(PyObject *self, PyObject *args)
         source_type = as_string(key);
         if (source_type == NULL) {
             PyErr_SetString(PyExc_TypeError, "source_type is not a valid string");
-            error = 1;
-            goto done;
+            goto error;
         }
 
         if (!PyList_Check(value)) {
             PyErr_SetString(PyExc_TypeError, "dict value must be a list of tags");
-            error = 1;
-            goto done;
+            goto error;
+        }
+
+        // new ref
+        PyObject *state_key = NULL;
+        if (keys != NULL && (state_key = PyTuple_Pack(2, key, PyTuple_GetItem(tuple, 0))) == NULL) {
+            goto error;
         }
 
         // allocate an array of char* to store the tags we'll send to the Go function
         char **tags;
         // We already PyList_Check value, so PyList_Size won't fail and return -1
         int tags_len = PyList_Size(value);
-        if (!(tags = (char **)_malloc(sizeof(*tags) * tags_len + 1))) {
+        if (!(tags = (char **)_malloc(sizeof(*tags) * (tags_len + 1)))) {
+            Py_XDECREF(state_key);
             PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
-            error = 1;
-            goto done;
+            goto error;
         }
 
         // copy the list of tags into an array of char*
@@ -732,39 +1378,277 @@ static PyObject *set_external_tags(PyObject *self, PyObject *args)
         }
         tags[actual_size] = NULL;
 
-        cb_set_external_tags(hostname, source_type, tags);
+        external_tags[*external_tags_len].hostname = hostname;
+        external_tags[*external_tags_len].source_type = source_type;
+        external_tags[*external_tags_len].tags = tags;
+        if (keys != NULL) {
+            keys[*external_tags_len] = state_key;
+        }
+        (*external_tags_len)++;
+        hostname = NULL;
+        source_type = NULL;
+    }
+
+    return 0;
+
+error:
+    _free(hostname);
+    _free(source_type);
+    return -1;
+}
+
+/*! \fn unsigned long long external_tags_hash(external_tags_t *external_tags)
+    \brief Hashes the source type and tags of an entry, to know if they changed since they were
+    last sent.
+    \param external_tags A pointer to the entry.
+    \return The 64-bit FNV-1a hash of the strings, each one including its terminating NUL byte so
+    that moving a character from a tag to the next one changes the hash.
+*/
+static unsigned long long external_tags_hash(external_tags_t *external_tags)
+{
+    unsigned long long hash = 14695981039346656037ULL;
+    const char *s = external_tags->source_type;
+    int i = 0;
+
+    do {
+        do {
+            hash = (hash ^ (unsigned char)*s) * 1099511628211ULL;
+        } while (*s++);
+    } while ((s = external_tags->tags[i++]) != NULL);
+
+    return hash;
+}
+
+/*! \fn int diff_external_tags(PyObject *hosts, PyObject *new_hosts, int resync, external_tags_t *external_tags, PyObject **keys, int *external_tags_len)
+    \brief Keeps the entries whose tags changed since they were last sent, and adds an entry
+    removing the tags of the hosts that were sent last time but aren't anymore.
+    \param hosts A PyObject* pointer to the hosts last sent by the check, keyed by source type
+    and hostname, can be NULL.
+    \param new_hosts A PyObject* pointer to an empty dictionary, filled with the hosts of the
+    entries.
+    \param resync Set to keep every entry, unchanged or not.
+    \param external_tags The array of entries, it must be large enough to store an entry for
+    every host in `hosts` as well. The entries dropped are freed.
+    \param keys The (source_type, hostname) tuple of each entry.
+    \param external_tags_len The number of entries in the array, updated.
+    \return 0 on success, -1 if an exception is raised.
+*/
+static int diff_external_tags(PyObject *hosts, PyObject *new_hosts, int resync, external_tags_t *external_tags,
+                              PyObject **keys, int *external_tags_len)
+{
+    int i, kept = 0;
+
+    for (i = 0; i < *external_tags_len; i++) {
+        external_tags_t entry = external_tags[i];
+        unsigned long long hash = external_tags_hash(&entry);
 
-        // cleanup
-        for (j = 0; j < actual_size; j++) {
-            _free(tags[j]);
+        // borrowed ref, no exception set if not present
+        PyObject *last = hosts == NULL ? NULL : PyDict_GetItem(hosts, keys[i]);
+        int changed = last == NULL || PyLong_AsUnsignedLongLong(last) != hash;
+
+        // the state of the unchanged hosts is shared with the previous call
+        // new ref
+        PyObject *host = changed ? PyLong_FromUnsignedLongLong(hash) : last;
+        if (!changed) {
+            Py_INCREF(host);
+        }
+        int ret = host == NULL ? -1 : PyDict_SetItem(new_hosts, keys[i], host);
+        Py_XDECREF(host);
+        if (ret < 0) {
+            // the entries from the one that failed are still to be freed by the caller
+            for (; i < *external_tags_len; i++) {
+                external_tags[kept++] = external_tags[i];
+            }
+            *external_tags_len = kept;
+            return -1;
         }
-        _free(tags);
 
-        if (hostname) {
-            _free(hostname);
-            hostname = NULL;
+        if (changed || resync) {
+            external_tags[kept++] = entry;
+        } else {
+            free_external_tags_entry(&entry);
+        }
+    }
+    *external_tags_len = kept;
+
+    if (hosts == NULL) {
+        return 0;
+    }
+
+    // the hosts that aren't listed anymore have their tags removed
+    Py_ssize_t pos = 0;
+    PyObject *key = NULL, *last = NULL;
+    while (PyDict_Next(hosts, &pos, &key, &last)) {
+        if (PyDict_Contains(new_hosts, key)) {
+            continue;
         }
-        if (source_type) {
-            _free(source_type);
-            source_type = NULL;
+
+        external_tags_t *entry = &external_tags[*external_tags_len];
+        entry->hostname = as_string(PyTuple_GetItem(key, 1));
+        entry->source_type = as_string(PyTuple_GetItem(key, 0));
+        entry->tags = (char **)_malloc(sizeof(*entry->tags));
+        if (entry->hostname == NULL || entry->source_type == NULL || entry->tags == NULL) {
+            _free(entry->hostname);
+            _free(entry->source_type);
+            _free(entry->tags);
+            PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
+            return -1;
         }
+        entry->tags[0] = NULL;
+        (*external_tags_len)++;
     }
 
-done:
-    if (hostname) {
-        _free(hostname);
+    return 0;
+}
+
+/*! \fn PyObject *set_external_tags(PyObject *self, PyObject *args, PyObject *kwargs)
+    \brief This function implements the `datadog_agent.set_external_tags` method,
+    allowing to set additional external tags for hostnames.
+    \param self A PyObject* pointer to the `datadog_agent` module.
+    \param args A PyObject* pointer to a tuple containing a list, and optionally the id of
+    the check and a boolean full_resync flag.
+    \param kwargs A PyObject* pointer to a dictionary with the optional arguments.
+    \return a PyObject * pointer to `None` if everything goes well, or `NULL` if an exception
+    is raised.
+
+    This function is callable as the `datadog_agent.set_external_tags` python method, it uses
+    the `cb_set_external_tags_many()` callback, or the `cb_set_external_tags()` callback for each
+    host if it isn't set, to set additional external tags for specific hostnames.
+    The argument expected is a list of 2-tuples, where the first element is the hostname, and
+    the second element is a dictionary with `source_type` as the key, and a list of tags for
+    said `source_type`. For instance: `[('hostname', {'source_type': ['tag1', 'tag2']})]`.
+    If everything goes well `None` will be returned, otherwise an exception will be set in the
+    interpreter and NULL will be returned.
+
+    When the id of the check is given, only the hosts whose tags changed since the last call for
+    the same check are sent, along with an empty list of tags for the hosts that were sent
+    last time but aren't listed anymore. Every host is sent again when `full_resync` is set, or
+    if the last full resync of the check is older than `EXTERNAL_TAGS_RESYNC_INTERVAL` seconds,
+    in case the agent lost some of them.
+
+    A few integrations such as vsphere or openstack require this functionality to add additional
+    tagging for their hosts.
+*/
+static PyObject *set_external_tags(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    PyObject *input_list = NULL;
+    PyObject *full_resync = NULL;
+    char *check_id = NULL;
+
+    // callback must be set
+    if (cb_set_external_tags == NULL && cb_set_external_tags_many == NULL) {
+        Py_RETURN_NONE;
     }
-    if (source_type) {
-        _free(source_type);
+
+    // the reference count in the returned object (input list) is _not_ incremented
+    static char *kwlist[] = { "external_tags", "check_id", "full_resync", NULL };
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|zO:set_external_tags", kwlist, &input_list, &check_id,
+                                     &full_resync)) {
+        return NULL;
     }
-    PyGILState_Release(gstate);
+
+    // if not a list, set an error
+    if (!PyList_Check(input_list)) {
+        PyErr_SetString(PyExc_TypeError, "tags must be a list");
+        return NULL;
+    }
+
+    int error = 1;
+    int i, external_tags_len = 0, keys_len = 0;
+    int resync = full_resync != NULL && PyObject_IsTrue(full_resync) == 1;
+    long last_resync = 0, now = (long)time(NULL);
+    external_tags_t *external_tags = NULL;
+    PyObject **keys = NULL;
+    PyObject *hosts = NULL;
+    PyObject *new_hosts = NULL;
+    // We already PyList_Check input_list, so PyList_Size won't fail and return -1
+    Py_ssize_t capacity = PyList_Size(input_list);
+
+    if (check_id != NULL) {
+        if (external_tags_state == NULL && (external_tags_state = PyDict_New()) == NULL) {
+            goto done;
+        }
+        if ((new_hosts = PyDict_New()) == NULL) {
+            goto done;
+        }
+
+        // borrowed ref, no exception set if not present
+        PyObject *state = PyDict_GetItemString(external_tags_state, check_id);
+        if (state != NULL) {
+            last_resync = PyLong_AsLong(PyTuple_GetItem(state, 0));
+            hosts = PyTuple_GetItem(state, 1);
+            Py_INCREF(hosts);
+            capacity += PyDict_Size(hosts);
+        }
+        // resync when the clock went backwards as well
+        if (state == NULL || now - last_resync >= EXTERNAL_TAGS_RESYNC_INTERVAL || now < last_resync) {
+            resync = 1;
+        }
+    }
+
+    if (!(external_tags = (external_tags_t *)_malloc(sizeof(*external_tags) * (capacity + 1)))
+        || (new_hosts != NULL && !(keys = (PyObject **)_malloc(sizeof(*keys) * (capacity + 1))))) {
+        PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
+        goto done;
+    }
+
+    int parsed = parse_external_tags(input_list, external_tags, keys, &external_tags_len);
+    // the entries are dropped by diff_external_tags, not their keys
+    keys_len = keys == NULL ? 0 : external_tags_len;
+    if (parsed < 0) {
+        goto done;
+    }
+
+    if (new_hosts != NULL && diff_external_tags(hosts, new_hosts, resync, external_tags, keys, &external_tags_len) < 0) {
+        goto done;
+    }
+
+    if (external_tags_len > 0) {
+        if (cb_set_external_tags_many != NULL) {
+            Py_BEGIN_ALLOW_THREADS
+            cb_set_external_tags_many(external_tags, external_tags_len);
+            Py_END_ALLOW_THREADS
+        } else {
+            for (i = 0; i < external_tags_len; i++) {
+                cb_set_external_tags(external_tags[i].hostname, external_tags[i].source_type, external_tags[i].tags);
+            }
+        }
+    }
+
+    if (new_hosts != NULL) {
+        if (PyDict_Size(new_hosts) == 0) {
+            // forget about the checks that don't have any host left
+            if (PyDict_GetItemString(external_tags_state, check_id) != NULL
+                && PyDict_DelItemString(external_tags_state, check_id) < 0) {
+                goto done;
+            }
+        } else {
+            // new ref
+            PyObject *state = Py_BuildValue("(lO)", resync ? now : last_resync, new_hosts);
+            int ret = state == NULL ? -1 : PyDict_SetItemString(external_tags_state, check_id, state);
+            Py_XDECREF(state);
+            if (ret < 0) {
+                goto done;
+            }
+        }
+    }
+
+    error = 0;
+
+done:
+    free_external_tags(external_tags, external_tags_len);
+    for (i = 0; i < keys_len; i++) {
+        Py_DECREF(keys[i]);
+    }
+    _free(keys);
+    Py_XDECREF(hosts);
+    Py_XDECREF(new_hosts);
 
     // we need to return NULL to raise the exception set by PyErr_SetString
     if (error) {
         return NULL;
     }
     Py_RETURN_NONE;
-
 }
 
 /*! \fn PyObject *obfuscate_sql(PyObject *self, PyObject *args, PyObject *kwargs)
@@ -816,6 +1700,319 @@ static PyObject *obfuscate_sql(PyObject *self, PyObject *args, PyObject *kwargs)
     return retval;
 }
 
+/*! \fn PyObject *string_list(char **strings)
+    \brief Converts a NULL-terminated array of C strings to a python list.
+    \param strings The array, may be NULL.
+    \return a PyObject * pointer to a new reference to the list, `None` if the array is NULL
+    like a nil slice encoded to JSON by the agent, or NULL if an exception is raised.
+*/
+static PyObject *string_list(char **strings)
+{
+    if (strings == NULL) {
+        Py_RETURN_NONE;
+    }
+
+    PyObject *list = PyList_New(0);
+    if (list == NULL) {
+        return NULL;
+    }
+
+    int i;
+    for (i = 0; strings[i] != NULL; i++) {
+        PyObject *item = PyStringFromCString(strings[i]);
+        if (item == NULL || PyList_Append(list, item) < 0) {
+            Py_XDECREF(item);
+            Py_DECREF(list);
+            return NULL;
+        }
+        Py_DECREF(item);
+    }
+    return list;
+}
+
+/*! \fn void free_string_list(char **strings)
+    \brief Frees a NULL-terminated array of C strings allocated by the agent.
+    \param strings The array, may be NULL.
+*/
+static void free_string_list(char **strings)
+{
+    if (strings == NULL) {
+        return;
+    }
+
+    int i;
+    for (i = 0; strings[i] != NULL; i++) {
+        cgo_free(strings[i]);
+    }
+    cgo_free(strings);
+}
+
+/*! \fn PyObject *sql_obfuscation_result(sql_obfuscation_t *obfuscation)
+    \brief Converts the obfuscation of a query returned by the agent to a python dictionary.
+    \param obfuscation A sql_obfuscation_t * pointer to the obfuscation.
+    \return a PyObject * pointer to a new reference to the dictionary, or NULL if an exception
+    is raised.
+
+    A successful obfuscation is converted to the object `obfuscate_sql` returns as JSON with
+    the `return_json_metadata` option: `{"query": ..., "metadata": {"Size": ..., "tables_csv": ...,
+    "commands": [...], "comments": [...], "procedures": [...]}}`, the lists being `None` when the
+    agent has none. A failed one is converted to `{"error": message}`.
+*/
+static PyObject *sql_obfuscation_result(sql_obfuscation_t *obfuscation)
+{
+    if (obfuscation->error != NULL || obfuscation->query == NULL) {
+        // no error message and a null response. this should never happen so the go code is misbehaving
+        char *error = obfuscation->error ? obfuscation->error : "internal error: empty cb_obfuscate_sql_many response";
+        return Py_BuildValue("{s:s}", "error", error);
+    }
+
+    PyObject *commands = string_list(obfuscation->commands);
+    PyObject *comments = string_list(obfuscation->comments);
+    PyObject *procedures = string_list(obfuscation->procedures);
+    PyObject *retval = NULL;
+    if (commands != NULL && comments != NULL && procedures != NULL) {
+        retval = Py_BuildValue("{s:s, s:{s:L, s:s, s:O, s:O, s:O}}", "query", obfuscation->query, "metadata", "Size",
+                               (long long)obfuscation->size, "tables_csv",
+                               obfuscation->tables_csv ? obfuscation->tables_csv : "", "commands", commands,
+                               "comments", comments, "procedures", procedures);
+    }
+    Py_XDECREF(commands);
+    Py_XDECREF(comments);
+    Py_XDECREF(procedures);
+    return retval;
+}
+
+/*! \fn int remember_obfuscated_sql(PyObject *key, PyObject *result)
+    \brief Keeps the obfuscation of a query in the `obfuscate_sql_batch` cache.
+    \param key A PyObject* pointer to the `(query, options)` key.
+    \param result A PyObject* pointer to the result of the obfuscation.
+    \return 0 on success, -1 if an exception is raised.
+
+    The least recently used results are evicted once the cache holds
+    `OBFUSCATED_SQL_CACHE_SIZE` of them.
+*/
+static int remember_obfuscated_sql(PyObject *key, PyObject *result)
+{
+    if (obfuscated_sql_cache == NULL && (obfuscated_sql_cache = PyDict_New()) == NULL) {
+        return -1;
+    }
+
+    while (PyDict_Size(obfuscated_sql_cache) >= OBFUSCATED_SQL_CACHE_SIZE) {
+        Py_ssize_t pos = 0;
+        PyObject *oldest = NULL, *value = NULL;
+        // dictionaries keep the insertion order, the first key is the least recently used
+        PyDict_Next(obfuscated_sql_cache, &pos, &oldest, &value);
+        if (PyDict_DelItem(obfuscated_sql_cache, oldest) < 0) {
+            return -1;
+        }
+    }
+    return PyDict_SetItem(obfuscated_sql_cache, key, result);
+}
+
+/*! \fn PyObject *lookup_obfuscated_sql(PyObject *key)
+    \brief Looks up the obfuscation of a query in the `obfuscate_sql_batch` cache.
+    \param key A PyObject* pointer to the `(query, options)` key.
+    \return a PyObject * pointer to a new reference to the result, or NULL if it isn't
+    cached. No python error is set.
+
+    The result becomes the most recently used one.
+*/
+static PyObject *lookup_obfuscated_sql(PyObject *key)
+{
+    if (obfuscated_sql_cache == NULL) {
+        return NULL;
+    }
+
+    // borrowed ref, no exception set if not present
+    PyObject *result = PyDict_GetItem(obfuscated_sql_cache, key);
+    if (result == NULL) {
+        return NULL;
+    }
+
+    // move the result to the end of the dictionary
+    Py_INCREF(result);
+    if (PyDict_DelItem(obfuscated_sql_cache, key) < 0 || PyDict_SetItem(obfuscated_sql_cache, key, result) < 0) {
+        PyErr_Clear();
+    }
+    return result;
+}
+
+/*! \fn PyObject *obfuscate_sql_batch(PyObject *self, PyObject *args, PyObject *kwargs)
+    \brief This function implements the `datadog_agent.obfuscate_sql_batch` method, obfuscating
+    several sql strings with the same options.
+    \param self A PyObject* pointer to the `datadog_agent` module.
+    \param args A PyObject* pointer to a tuple containing a sequence of python strings and
+    optionally the JSON options.
+    \param kwargs A PyObject* pointer to a map of key value pairs.
+    \return A PyObject* pointer to the list of the obfuscation results, in the order of the
+    queries. Or `None` if the callback is unavailable, or NULL if an exception is raised.
+
+    This function is callable as the `datadog_agent.obfuscate_sql_batch` Python method. Each
+    result is a dictionary, see `sql_obfuscation_result()`, so the caller doesn't have to parse
+    JSON. The results are cached by query and options: the queries missing from the cache are
+    handed to the `cb_obfuscate_sql_many()` callback at once, without the GIL, and the agent
+    parses the options once per call. The whole call fails if the options are invalid.
+
+    The query text is used as is in the cache key since whitespace matters in string literals
+    the obfuscator may keep.
+*/
+static PyObject *obfuscate_sql_batch(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    // callback must be set
+    if (cb_obfuscate_sql_many == NULL) {
+        Py_RETURN_NONE;
+    }
+
+    PyObject *queries = NULL;
+    char *options = NULL;
+    static char *kwlist[] = {"queries", "options", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|s", kwlist, &queries, &options)) {
+        return NULL;
+    }
+
+    // a string is a sequence, but certainly not the one of queries the caller meant
+    if (PyUnicode_Check(queries) || PyBytes_Check(queries)) {
+        PyErr_SetString(PyExc_TypeError, "queries must be a sequence of strings");
+        return NULL;
+    }
+    // new ref
+    PyObject *queries_seq = PySequence_Fast(queries, "queries must be a sequence of strings");
+    if (queries_seq == NULL) {
+        return NULL;
+    }
+
+    int error = 1;
+    char **missing = NULL;
+    char *error_message = NULL;
+    sql_obfuscation_t *obfuscations = NULL;
+    Py_ssize_t i, queries_len = PySequence_Fast_GET_SIZE(queries_seq), missing_len = 0;
+    PyObject *options_obj = NULL;
+    PyObject *keys = NULL;
+    PyObject *missing_keys = NULL;
+    PyObject *results = NULL;
+    PyObject *retval = NULL;
+
+    if (!(options_obj = PyStringFromCString(options ? options : "")) || !(keys = PyList_New(queries_len))
+        || !(missing_keys = PyList_New(0)) || !(results = PyDict_New()) || !(retval = PyList_New(queries_len))) {
+        goto done;
+    }
+    if (!(missing = (char **)_malloc(sizeof(*missing) * (queries_len + 1)))) {
+        PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
+        goto done;
+    }
+
+    for (i = 0; i < queries_len; i++) {
+        PyObject *query = PySequence_Fast_GET_ITEM(queries_seq, i);
+        if (!PyUnicode_Check(query) && !PyBytes_Check(query)) {
+            PyErr_SetString(PyExc_TypeError, "queries must be a sequence of strings");
+            goto done;
+        }
+
+        PyObject *key = PyTuple_Pack(2, query, options_obj);
+        if (key == NULL) {
+            goto done;
+        }
+        // steals the reference to key
+        PyList_SET_ITEM(keys, i, key);
+
+        PyObject *result = lookup_obfuscated_sql(key);
+        if (result != NULL) {
+            if (PyDict_SetItem(results, key, result) < 0) {
+                Py_DECREF(result);
+                goto done;
+            }
+            Py_DECREF(result);
+            continue;
+        }
+        // the same query may appear several times in the batch
+        int seen = PyDict_Contains(results, key);
+        if (seen < 0) {
+            goto done;
+        } else if (seen) {
+            continue;
+        }
+        if (!(missing[missing_len] = as_string(query))) {
+            PyErr_SetString(PyExc_TypeError, "queries must be a sequence of strings");
+            goto done;
+        }
+        missing_len++;
+        if (PyDict_SetItem(results, key, Py_None) < 0 || PyList_Append(missing_keys, key) < 0) {
+            goto done;
+        }
+    }
+    missing[missing_len] = NULL;
+
+    if (missing_len > 0) {
+        if (!(obfuscations = (sql_obfuscation_t *)_malloc(sizeof(*obfuscations) * missing_len))) {
+            PyErr_SetString(PyExc_MemoryError, "unable to allocate memory, bailing out");
+            goto done;
+        }
+        memset(obfuscations, 0, sizeof(*obfuscations) * missing_len);
+
+        Py_BEGIN_ALLOW_THREADS
+        cb_obfuscate_sql_many(missing, options, obfuscations, &error_message);
+        Py_END_ALLOW_THREADS
+
+        if (error_message != NULL) {
+            PyErr_SetString(PyExc_RuntimeError, error_message);
+            goto done;
+        }
+
+        for (i = 0; i < missing_len; i++) {
+            PyObject *key = PyList_GET_ITEM(missing_keys, i);
+            PyObject *result = sql_obfuscation_result(&obfuscations[i]);
+            if (result == NULL) {
+                goto done;
+            }
+            int ret = PyDict_SetItem(results, key, result) < 0 ? -1 : remember_obfuscated_sql(key, result);
+            Py_DECREF(result);
+            if (ret < 0) {
+                goto done;
+            }
+        }
+    }
+
+    for (i = 0; i < queries_len; i++) {
+        // borrowed ref
+        PyObject *result = PyDict_GetItem(results, PyList_GET_ITEM(keys, i));
+        // checks are free to modify the results they get
+        PyObject *result_copy = copy_containers(result);
+        if (result_copy == NULL) {
+            goto done;
+        }
+        // steals the reference to result_copy
+        PyList_SET_ITEM(retval, i, result_copy);
+    }
+
+    error = 0;
+
+done:
+    for (i = 0; i < missing_len; i++) {
+        _free(missing[i]);
+        if (obfuscations != NULL) {
+            cgo_free(obfuscations[i].query);
+            cgo_free(obfuscations[i].error);
+            cgo_free(obfuscations[i].tables_csv);
+            free_string_list(obfuscations[i].commands);
+            free_string_list(obfuscations[i].comments);
+            free_string_list(obfuscations[i].procedures);
+        }
+    }
+    _free(missing);
+    _free(obfuscations);
+    cgo_free(error_message);
+    Py_XDECREF(options_obj);
+    Py_XDECREF(keys);
+    Py_XDECREF(missing_keys);
+    Py_XDECREF(results);
+    Py_DECREF(queries_seq);
+    if (error) {
+        Py_XDECREF(retval);
+        return NULL;
+    }
+    return retval;
+}
+
 static PyObject *obfuscate_sql_exec_plan(PyObject *self, PyObject *args, PyObject *kwargs)
 {
     // callback must be set
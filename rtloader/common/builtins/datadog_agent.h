@@ -42,6 +42,20 @@
 
     The callback is expected to be provided by the rtloader caller - in go-context: CGO.
 */
+/*! \fn void _set_get_config_many_cb(cb_get_config_many_t)
+    \brief Sets a callback to be used by rtloader to collect several agent configuration
+    values at once.
+    \param object A function pointer with cb_get_config_many_t prototype to the
+    callback function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+*/
+/*! \fn void _bump_config_generation(void)
+    \brief Notifies rtloader that the agent configuration changed.
+
+    The configuration values cached by `get_config` and `get_config_many` are dropped on
+    their next call. This function can be called from any thread, without the GIL.
+*/
 /*! \fn void _set_headers_cb(cb_headers_t)
     \brief Sets a callback to be used by rtloader to collect the typical HTTP headers for
     agent requests.
@@ -82,6 +96,15 @@
 
     The callback is expected to be provided by the rtloader caller - in go-context: CGO.
 */
+/*! \fn void _set_send_logs_cb(cb_send_logs_t)
+    \brief Sets a callback to be used by rtloader to allow for submitting several logs at
+    once for a given check instance.
+    \param object A function pointer with cb_send_logs_t prototype to the callback
+    function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It's used by `datadog_agent.send_logs`.
+*/
 /*! \fn void _set_send_log_cb(cb_send_log_t)
     \brief Sets a callback to be used by rtloader to allow for submitting a log for a given
     check instance.
@@ -106,6 +129,15 @@
 
     The callback is expected to be provided by the rtloader caller - in go-context: CGO.
 */
+/*! \fn void _set_set_external_tags_many_cb(cb_set_external_tags_many_t)
+    \brief Sets a callback to be used by rtloader to allow setting external tags for several
+    hostnames at once.
+    \param object A function pointer with cb_set_external_tags_many_t prototype to the callback
+    function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It's used by `datadog_agent.set_external_tags`.
+*/
 /*! \fn PyObject *_public_headers(PyObject *self, PyObject *args, PyObject *kwargs);
     \brief Non-static entrypoint to the headers function; providing HTTP headers for agent
     requests.
@@ -135,6 +167,29 @@
 
     The callback is expected to be provided by the rtloader caller - in go-context: CGO.
 */
+/*! \fn void _set_write_persistent_cache_many_cb(cb_write_persistent_cache_many_t)
+    \brief Sets a callback to be used by rtloader to allow storing data for several check
+    instances at once.
+    \param object A function pointer with cb_write_persistent_cache_many_t prototype to the
+    callback function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    Once set, the values written with `write_persistent_cache` are queued and handed to this
+    callback by `_flush_persistent_cache`.
+*/
+/*! \fn void _flush_persistent_cache(void)
+    \brief Hands the queued persistent cache values to the agent.
+
+    The GIL must be held when calling this function.
+*/
+/*! \fn void _set_obfuscate_sql_many_cb(cb_obfuscate_sql_many_t)
+    \brief Sets a callback to be used by rtloader to obfuscate several SQL queries at once.
+    \param object A function pointer with cb_obfuscate_sql_many_t prototype to the
+    callback function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It's used by `datadog_agent.obfuscate_sql_batch`.
+*/
 
 #include <Python.h>
 #include <rtloader_types.h>
@@ -153,6 +208,8 @@ void Py2_init_datadog_agent();
 
 void _set_get_clustername_cb(cb_get_clustername_t);
 void _set_get_config_cb(cb_get_config_t);
+void _set_get_config_many_cb(cb_get_config_many_t);
+void _bump_config_generation(void);
 void _set_get_hostname_cb(cb_get_hostname_t);
 void _set_get_host_tags_cb(cb_get_host_tags_t);
 void _set_tracemalloc_enabled_cb(cb_tracemalloc_enabled_t);
@@ -160,11 +217,16 @@ void _set_get_version_cb(cb_get_version_t);
 void _set_headers_cb(cb_headers_t);
 void _set_log_cb(cb_log_t);
 void _set_send_log_cb(cb_send_log_t);
+void _set_send_logs_cb(cb_send_logs_t);
 void _set_set_check_metadata_cb(cb_set_check_metadata_t);
 void _set_set_external_tags_cb(cb_set_external_tags_t);
+void _set_set_external_tags_many_cb(cb_set_external_tags_many_t);
 void _set_write_persistent_cache_cb(cb_write_persistent_cache_t);
 void _set_read_persistent_cache_cb(cb_read_persistent_cache_t);
+void _set_write_persistent_cache_many_cb(cb_write_persistent_cache_many_t);
+void _flush_persistent_cache(void);
 void _set_obfuscate_sql_cb(cb_obfuscate_sql_t);
+void _set_obfuscate_sql_many_cb(cb_obfuscate_sql_many_t);
 void _set_obfuscate_sql_exec_plan_cb(cb_obfuscate_sql_exec_plan_t);
 void _set_get_process_start_time_cb(cb_get_process_start_time_t);
 void _set_obfuscate_mongodb_string_cb(cb_obfuscate_mongodb_string_t);
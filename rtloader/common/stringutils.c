@@ -174,3 +174,52 @@ done:
     Py_XDECREF(args);
     return retval;
 }
+
+PyObject *copy_containers(PyObject *value) {
+    if (PyDict_Check(value)) {
+        PyObject *copy = PyDict_New();
+        if (copy == NULL) {
+            return NULL;
+        }
+
+        Py_ssize_t pos = 0;
+        PyObject *key = NULL, *item = NULL;
+        while (PyDict_Next(value, &pos, &key, &item)) {
+            PyObject *item_copy = copy_containers(item);
+            if (item_copy == NULL || PyDict_SetItem(copy, key, item_copy) < 0) {
+                Py_XDECREF(item_copy);
+                Py_DECREF(copy);
+                return NULL;
+            }
+            Py_DECREF(item_copy);
+        }
+        return copy;
+    }
+
+    if (PyList_Check(value)) {
+        Py_ssize_t size = PyList_Size(value);
+        PyObject *copy = PyList_New(size);
+        if (copy == NULL) {
+            return NULL;
+        }
+
+        Py_ssize_t i;
+        for (i = 0; i < size; i++) {
+            PyObject *item_copy = copy_containers(PyList_GetItem(value, i));
+            if (item_copy == NULL) {
+                Py_DECREF(copy);
+                return NULL;
+            }
+            // steals the reference to item_copy
+            PyList_SetItem(copy, i, item_copy);
+        }
+        return copy;
+    }
+
+    if (PySet_Check(value)) {
+        return PySet_New(value);
+    }
+
+    Py_INCREF(value);
+    return value;
+}
@@ -54,6 +54,15 @@
     The returned C-string YAML representation is allocated by the function and should
     be subsequently freed by the caller.
 */
+/*! \fn PyObject *copy_containers(PyObject *object)
+    \brief Returns a copy of a Python object as loaded by `from_yaml`.
+    \param object The python object to copy.
+    \return PyObject * pointer to a new reference to the copy. In case of error, NULL will
+    be returned with an exception set on the interpreter.
+
+    Dictionaries, lists and sets are copied recursively. The other types returned by
+    `yaml.safe_load` are immutable, the copy shares them with the original object.
+*/
 /*! \def PyStringFromCString(x)
     \brief A macro that returns a Python string from C string x (char *).
 
@@ -72,6 +81,7 @@ int init_stringutils(void);
 char *as_string(PyObject *);
 PyObject *from_yaml(const char *);
 char *as_yaml(PyObject *);
+PyObject *copy_containers(PyObject *);
 
 #ifdef DATADOG_AGENT_THREE
 #    define PyStringFromCString(x) PyUnicode_FromString(x)
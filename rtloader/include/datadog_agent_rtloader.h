@@ -155,6 +155,20 @@ DATADOG_AGENT_RTLOADER_API int get_check(rtloader_t *rtloader, rtloader_pyobject
                                          const char *instance, const char *check_id, const char *check_name,
                                          rtloader_pyobject_t **check);
 
+/*! \fn void set_check_pool_size(rtloader_t *rtloader, int size)
+    \brief Sets the number of spare check instances `get_check` keeps for each check
+    configuration.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param size The number of spare instances, zero disables the pool.
+    \sa get_check
+
+    Once a configuration was used twice to create a check, up to `size` more instances are
+    constructed with it, so the next checks scheduled with the same configuration (e.g. by
+    autodiscovery when a pod is replaced) don't pay for the constructor of the check class.
+    Spare instances never ran. This is only supported with python3.
+*/
+DATADOG_AGENT_RTLOADER_API void set_check_pool_size(rtloader_t *rtloader, int size);
+
 /*! \fn int get_check_deprecated(rtloader_t *rtloader, rtloader_pyobject_t *py_class, const char *init_config,
                                                const char *instance, const char *check_id, const char *check_name,
                                                const char *agent_config, rtloader_pyobject_t **check)
@@ -208,6 +222,63 @@ DATADOG_AGENT_RTLOADER_API void cancel_check(rtloader_t *, rtloader_pyobject_t *
 */
 DATADOG_AGENT_RTLOADER_API char **get_checks_warnings(rtloader_t *, rtloader_pyobject_t *check);
 
+/*! \fn int get_check_run_stats(rtloader_t *, rtloader_pyobject_t *check, check_run_stats_t *stats)
+    \brief Get the resources used by the last run of a check instance.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param check A rtloader_pyobject_t * pointer to the check instance we wish to collect the
+    run statistics for.
+    \param stats A pointer to check_run_stats_t structure that will be updated with the values
+    of the last run.
+    \return An integer with the success of the operation. Zero if the check never ran, or if
+    the statistics aren't available with the underlying python version.
+    \sa rtloader_pyobject_t, rtloader_t, init_pymem_stats
+
+    Allocations are only accounted for once `init_pymem_stats` has been called. The GIL must
+    be held when calling this function.
+*/
+DATADOG_AGENT_RTLOADER_API int get_check_run_stats(rtloader_t *, rtloader_pyobject_t *check, check_run_stats_t *stats);
+
+/*! \fn int start_check_profiler(rtloader_t *, int interval_ms)
+    \brief Start sampling the stacks of the running checks.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param interval_ms The sampling interval, in milliseconds.
+    \return An integer with the success of the operation. Zero if the profiler is already
+    running, if the interval isn't positive, or if profiling isn't available with the
+    underlying python version.
+    \sa get_check_profile, stop_check_profiler
+
+    A background thread takes the GIL every `interval_ms` milliseconds while checks are
+    running, and records the python stack of the thread running each of them. It doesn't take
+    the GIL when no check is running. The GIL must not be held when calling this function.
+*/
+DATADOG_AGENT_RTLOADER_API int start_check_profiler(rtloader_t *, int interval_ms);
+
+/*! \fn void stop_check_profiler(rtloader_t *)
+    \brief Stop sampling the stacks of the running checks.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \sa start_check_profiler
+
+    The samples already taken can still be collected with `get_check_profile`. The GIL must
+    not be held when calling this function, as the profiler thread may be waiting for it.
+*/
+DATADOG_AGENT_RTLOADER_API void stop_check_profiler(rtloader_t *);
+
+/*! \fn char *get_check_profile(rtloader_t *, rtloader_pyobject_t *check)
+    \brief Get the stacks sampled while a check instance was running.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param check A rtloader_pyobject_t * pointer to the check instance we wish to collect the
+    profile for.
+    \return A C-string with one line per collapsed stack, or NULL if no stack was sampled
+    since the last call. The caller is responsible for freeing it with `rtloader_free`.
+    \sa start_check_profiler
+
+    Each line holds the frames of a stack from the `run` method of the check down to the
+    function that was running, separated by `;`, followed by a space and the number of times
+    the stack was sampled. This is the input format of flame graph tools. The samples are
+    dropped once collected. The GIL must be held when calling this function.
+*/
+DATADOG_AGENT_RTLOADER_API char *get_check_profile(rtloader_t *, rtloader_pyobject_t *check);
+
 /*! \fn char *get_check_diagnoses(rtloader_t*, rtloader_pyobject_t* check)
     \brief Get all diagnoses, if any, for a check instance.
     \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
@@ -434,6 +505,28 @@ DATADOG_AGENT_RTLOADER_API void set_get_version_cb(rtloader_t *, cb_get_version_
 */
 DATADOG_AGENT_RTLOADER_API void set_get_config_cb(rtloader_t *, cb_get_config_t);
 
+/*! \fn void set_get_config_many_cb(rtloader_t *, cb_get_config_many_t)
+    \brief Sets a callback to be used by rtloader to collect several values of the agent
+    configuration at once.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param object A function pointer with cb_get_config_many_t prototype to the
+    callback function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It receives a NULL-terminated array of keys and returns a YAML mapping of the keys set
+    in the configuration to their value.
+*/
+DATADOG_AGENT_RTLOADER_API void set_get_config_many_cb(rtloader_t *, cb_get_config_many_t);
+
+/*! \fn void bump_config_generation(rtloader_t *)
+    \brief Notifies rtloader that the agent configuration changed.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+
+    The configuration values cached by `datadog_agent.get_config` are collected again on their
+    next read. This function doesn't need the GIL and can be called from any thread.
+*/
+DATADOG_AGENT_RTLOADER_API void bump_config_generation(rtloader_t *);
+
 /*! \fn void set_headers_cb(rtloader_t *, cb_headers_t)
     \brief Sets a callback to be used by rtloader to collect the typical HTTP headers for
     agent requests.
@@ -510,6 +603,21 @@ DATADOG_AGENT_RTLOADER_API void set_log_cb(rtloader_t *, cb_log_t);
 */
 DATADOG_AGENT_RTLOADER_API void set_send_log_cb(rtloader_t *, cb_send_log_t);
 
+/*! \fn void set_send_logs_cb(rtloader_t *, cb_send_logs_t)
+    \brief Sets a callback to be used by rtloader to allow for submitting several logs at
+    once for a given check instance.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param object A function pointer with cb_send_logs_t prototype to the callback
+    function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It's called without the GIL. The records are packed in a single buffer, each one
+    prefixed by its length as a native-endian `uint32_t`, and the buffer is freed by rtloader
+    once the callback returns. The callback returns the number of records accepted, the first
+    ones in the buffer.
+*/
+DATADOG_AGENT_RTLOADER_API void set_send_logs_cb(rtloader_t *, cb_send_logs_t);
+
 /*! \fn void set_set_check_metadata_cb(rtloader_t *, cb_set_check_metadata_t)
     \brief Sets a callback to be used by rtloader to allow setting metadata for a given
     check instance.
@@ -532,6 +640,19 @@ DATADOG_AGENT_RTLOADER_API void set_set_check_metadata_cb(rtloader_t *, cb_set_c
 */
 DATADOG_AGENT_RTLOADER_API void set_set_external_tags_cb(rtloader_t *, cb_set_external_tags_t);
 
+/*! \fn void set_set_external_tags_many_cb(rtloader_t *, cb_set_external_tags_many_t)
+    \brief Sets a callback to be used by rtloader to allow setting external tags for several
+    hostnames at once.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param object A function pointer with cb_set_external_tags_many_t prototype to the callback
+    function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It's used by `datadog_agent.set_external_tags`, which falls back to the single host callback
+    when it's not set.
+*/
+DATADOG_AGENT_RTLOADER_API void set_set_external_tags_many_cb(rtloader_t *, cb_set_external_tags_many_t);
+
 // _UTIL API
 /*! \fn void set_get_subprocess_output_cb(rtloader_t *rtloader, cb_get_subprocess_output_t)
     \brief Sets a callback to be used by rtloader to run subprocess commands and collect their
@@ -544,6 +665,42 @@ DATADOG_AGENT_RTLOADER_API void set_set_external_tags_cb(rtloader_t *, cb_set_ex
 */
 DATADOG_AGENT_RTLOADER_API void set_get_subprocess_output_cb(rtloader_t *rtloader, cb_get_subprocess_output_t cb);
 
+/*! \fn void set_start_subprocess_stream_cb(rtloader_t *rtloader, cb_start_subprocess_stream_t)
+    \brief Sets a callback to be used by rtloader to start subprocess commands whose output
+    is read in chunks.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param object A function pointer with cb_start_subprocess_stream_t prototype to the callback
+    function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It's used by `_util.subprocess_stream`, along with the read and close subprocess stream
+    callbacks.
+*/
+DATADOG_AGENT_RTLOADER_API void set_start_subprocess_stream_cb(rtloader_t *rtloader, cb_start_subprocess_stream_t cb);
+
+/*! \fn void set_read_subprocess_stream_cb(rtloader_t *rtloader, cb_read_subprocess_stream_t)
+    \brief Sets a callback to be used by rtloader to read the next chunk of output of a
+    subprocess.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param object A function pointer with cb_read_subprocess_stream_t prototype to the callback
+    function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+*/
+DATADOG_AGENT_RTLOADER_API void set_read_subprocess_stream_cb(rtloader_t *rtloader, cb_read_subprocess_stream_t cb);
+
+/*! \fn void set_close_subprocess_stream_cb(rtloader_t *rtloader, cb_close_subprocess_stream_t)
+    \brief Sets a callback to be used by rtloader to wait for a subprocess, or kill it, and
+    collect its error output and exit code.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param object A function pointer with cb_close_subprocess_stream_t prototype to the callback
+    function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+*/
+DATADOG_AGENT_RTLOADER_API void set_close_subprocess_stream_cb(rtloader_t *rtloader,
+                                                               cb_close_subprocess_stream_t cb);
+
 // CGO API
 /*! \fn void set_cgo_free_cb(rtloader_t *rtloader, cb_cgo_free_t cb)
     \brief Sets a callback to be used by rtloader to free memory allocated by the
@@ -619,6 +776,29 @@ DATADOG_AGENT_RTLOADER_API void set_write_persistent_cache_cb(rtloader_t *, cb_w
 */
 DATADOG_AGENT_RTLOADER_API void set_read_persistent_cache_cb(rtloader_t *, cb_read_persistent_cache_t);
 
+/*! \fn void set_write_persistent_cache_many_cb(rtloader_t *, cb_write_persistent_cache_many_t)
+    \brief Sets a callback to be used by rtloader to allow storing values for several check
+    instances at once.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param object A function pointer with cb_write_persistent_cache_many_t prototype to the
+    callback function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It receives two NULL-terminated arrays of the same length, with the keys and their value.
+    Once set, the values written by `datadog_agent.write_persistent_cache` are queued, and
+    handed to this callback by `flush_persistent_cache` or when too many are queued.
+*/
+DATADOG_AGENT_RTLOADER_API void set_write_persistent_cache_many_cb(rtloader_t *, cb_write_persistent_cache_many_t);
+
+/*! \fn void flush_persistent_cache(rtloader_t *)
+    \brief Hands the persistent cache values queued by the checks to the agent.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+
+    The caller is expected to call this function periodically and before exiting. The GIL
+    must be held when calling this function.
+*/
+DATADOG_AGENT_RTLOADER_API void flush_persistent_cache(rtloader_t *);
+
 /*! \fn void set_obfuscate_sql_cb(rtloader_t *, cb_obfuscate_sql_t)
     \brief Sets a callback to be used by rtloader to allow retrieving a value for a given
     check instance.
@@ -630,6 +810,18 @@ DATADOG_AGENT_RTLOADER_API void set_read_persistent_cache_cb(rtloader_t *, cb_re
 */
 DATADOG_AGENT_RTLOADER_API void set_obfuscate_sql_cb(rtloader_t *, cb_obfuscate_sql_t);
 
+/*! \fn void set_obfuscate_sql_many_cb(rtloader_t *, cb_obfuscate_sql_many_t)
+    \brief Sets a callback to be used by rtloader to obfuscate several SQL queries at once.
+    \param rtloader_t A rtloader_t * pointer to the RtLoader instance.
+    \param object A function pointer with cb_obfuscate_sql_many_t prototype to the callback
+    function.
+
+    The callback is expected to be provided by the rtloader caller - in go-context: CGO.
+    It's called without the GIL and fills one `sql_obfuscation_t` per query, the strings and
+    lists it allocates are freed by rtloader.
+*/
+DATADOG_AGENT_RTLOADER_API void set_obfuscate_sql_many_cb(rtloader_t *, cb_obfuscate_sql_many_t);
+
 /*! \fn void set_obfuscate_sql_exec_plan_cb(rtloader_t *, cb_obfuscate_sql_exec_plan_t)
     \brief Sets a callback to be used by rtloader to allow retrieving a value for a given
     check instance.
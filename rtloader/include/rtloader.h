@@ -102,6 +102,18 @@ public:
                           RtLoaderPyObject *&check)
         = 0;
 
+    //! setCheckPoolSize member.
+    /*!
+      \param size The number of spare check instances kept for each check configuration.
+
+      Checks scheduled again with a configuration they were already created with are
+      pre-constructed ahead of time, up to `size` instances per configuration, and handed
+      over by `getCheck`. Zero, the default, disables the pool.
+    */
+    virtual void setCheckPoolSize(int size)
+    {
+    }
+
     //! Pure virtual runCheck member.
     /*!
       \param check The python object pointer to the check we wish to run.
@@ -122,6 +134,54 @@ public:
     */
     virtual char **getCheckWarnings(RtLoaderPyObject *check) = 0;
 
+    //! getCheckRunStats member.
+    /*!
+      \param check The python object pointer to the check we wish to collect run statistics for.
+      \param stats Stats output.
+      \return A boolean indicating whether the check has statistics.
+
+      Retrieve the resources used by the last run of the check. Allocations are only
+      accounted for once the allocator hooks are installed by `initPymemStats`.
+    */
+    virtual bool getCheckRunStats(RtLoaderPyObject *check, check_run_stats_t &stats)
+    {
+        return false;
+    }
+
+    //! startCheckProfiler member.
+    /*!
+      \param interval_ms The sampling interval, in milliseconds.
+      \return A boolean indicating whether the profiler was started.
+
+      Start sampling the stacks of the running checks in a background thread. The samples
+      are aggregated by check instance and collected with `getCheckProfile`.
+    */
+    virtual bool startCheckProfiler(int interval_ms)
+    {
+        return false;
+    }
+
+    //! stopCheckProfiler member.
+    /*!
+      Stop the thread started by `startCheckProfiler`. The samples already taken are kept.
+    */
+    virtual void stopCheckProfiler()
+    {
+    }
+
+    //! getCheckProfile member.
+    /*!
+      \param check The python object pointer to the check we wish to collect the profile for.
+      \return A C-string with the collapsed stacks sampled while the check ran, or NULL if none
+      were sampled.
+
+      The samples are dropped once collected, the next call only returns the newer samples.
+    */
+    virtual char *getCheckProfile(RtLoaderPyObject *check)
+    {
+        return NULL;
+    }
+
     //! Pure virtual getCheckDiagnoses member.
     /*!
       \param check The python object pointer to the check we wish to collect diagnoses for.
@@ -291,6 +351,22 @@ public:
     */
     virtual void setGetConfigCb(cb_get_config_t) = 0;
 
+    //! setGetConfigManyCb member.
+    /*!
+      \param A cb_get_config_many_t function pointer to the CGO callback.
+
+      This allows us to set the CGO callback that will enable us to get several values of the
+      agent configuration at once.
+    */
+    virtual void setGetConfigManyCb(cb_get_config_many_t) = 0;
+
+    //! bumpConfigGeneration member.
+    /*!
+      Notifies the datadog_agent builtin that the agent configuration changed, so that the
+      configuration values it cached are collected again. Safe to call from any thread.
+    */
+    virtual void bumpConfigGeneration() = 0;
+
     //! setHeadersCb member.
     /*!
       \param A cb_headers_t function pointer to the CGO callback.
@@ -354,6 +430,15 @@ public:
     */
     virtual void setSendLogCb(cb_send_log_t) = 0;
 
+    //! setSendLogsCb member.
+    /*!
+      \param A cb_send_logs_t function pointer to the CGO callback.
+
+      This allows us to set the relevant CGO callback that will allow for sending several
+      logs at once for eventual submission for a specific check instance.
+    */
+    virtual void setSendLogsCb(cb_send_logs_t) = 0;
+
     //! setCheckMetadataCb member.
     /*!
       \param A cb_set_check_metadata_t function pointer to the CGO callback.
@@ -372,6 +457,15 @@ public:
     */
     virtual void setSetExternalTagsCb(cb_set_external_tags_t) = 0;
 
+    //! setSetExternalTagsManyCb member.
+    /*!
+      \param A cb_set_external_tags_many_t function pointer to the CGO callback.
+
+      This allows us to set the relevant CGO callback that will allow adding the tags of several
+      hostnames at once to the go-land External Host Tags metadata provider cache.
+    */
+    virtual void setSetExternalTagsManyCb(cb_set_external_tags_many_t) = 0;
+
     // _util API
     //! setSubprocessOutputCb member.
     /*!
@@ -382,6 +476,33 @@ public:
     */
     virtual void setSubprocessOutputCb(cb_get_subprocess_output_t) = 0;
 
+    //! setStartSubprocessStreamCb member.
+    /*!
+      \param A cb_start_subprocess_stream_t function pointer to the CGO callback.
+
+      This allows us to set the relevant CGO callback that will allow starting subprocess
+      commands from go-land and reading their output as it is produced.
+    */
+    virtual void setStartSubprocessStreamCb(cb_start_subprocess_stream_t) = 0;
+
+    //! setReadSubprocessStreamCb member.
+    /*!
+      \param A cb_read_subprocess_stream_t function pointer to the CGO callback.
+
+      This allows us to set the relevant CGO callback that will allow reading the next chunk
+      of output of a subprocess started with the start subprocess stream callback.
+    */
+    virtual void setReadSubprocessStreamCb(cb_read_subprocess_stream_t) = 0;
+
+    //! setCloseSubprocessStreamCb member.
+    /*!
+      \param A cb_close_subprocess_stream_t function pointer to the CGO callback.
+
+      This allows us to set the relevant CGO callback that will allow waiting for a subprocess
+      started with the start subprocess stream callback, or killing it if it's still running.
+    */
+    virtual void setCloseSubprocessStreamCb(cb_close_subprocess_stream_t) = 0;
+
     // CGO API
     //! setCGOFreeCb member.
     /*!
@@ -442,6 +563,23 @@ public:
     */
     virtual void setReadPersistentCacheCb(cb_read_persistent_cache_t) = 0;
 
+    //! setWritePersistentCacheManyCb member.
+    /*!
+      \param A cb_write_persistent_cache_many_t function pointer to the CGO callback.
+
+      This allows us to set the relevant CGO callback that will allow storing values for
+      several check instances at once. Once set, the values written by the checks are queued
+      until the next call to `flushPersistentCache`.
+    */
+    virtual void setWritePersistentCacheManyCb(cb_write_persistent_cache_many_t) = 0;
+
+    //! flushPersistentCache member.
+    /*!
+      Hands the values queued by the checks to the persistent cache callbacks. The GIL must
+      be held when calling this function.
+    */
+    virtual void flushPersistentCache() = 0;
+
     //! setObfuscateSqlCb member.
     /*!
       \param A cb_obfuscate_sql_t function pointer to the CGO callback.
@@ -451,6 +589,15 @@ public:
     */
     virtual void setObfuscateSqlCb(cb_obfuscate_sql_t) = 0;
 
+    //! setObfuscateSqlManyCb member.
+    /*!
+      \param A cb_obfuscate_sql_many_t function pointer to the CGO callback.
+
+      This allows us to set the relevant CGO callback that will allow obfuscating several
+      SQL queries with the same options at once.
+    */
+    virtual void setObfuscateSqlManyCb(cb_obfuscate_sql_many_t) = 0;
+
     //! setObfuscateSqlExecPlanCb member.
     /*!
       \param A cb_obfuscate_sql_exec_plan_t function pointer to the CGO callback.
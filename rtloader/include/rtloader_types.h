@@ -6,6 +6,7 @@
 #ifndef DATADOG_AGENT_RTLOADER_TYPES_H
 #define DATADOG_AGENT_RTLOADER_TYPES_H
 #include <stdbool.h>
+#include <stdint.h>
 #include <stdlib.h>
 
 #ifdef __cplusplus
@@ -90,6 +91,36 @@ typedef struct pymem_stats_s {
     size_t inuse, alloc;
 } pymem_stats_t;
 
+typedef struct check_run_stats_s {
+    // number of completed runs of the check
+    size_t runs;
+    // wall time and CPU time of the thread running the check, in nanoseconds, for the last run
+    uint64_t wall_time_ns, cpu_time_ns;
+    // bytes allocated and freed by the python interpreter during the last run
+    size_t alloc, freed;
+} check_run_stats_t;
+
+typedef struct sql_obfuscation_s {
+    // obfuscated query, NULL if the obfuscation failed
+    char *query;
+    // error message, NULL if the obfuscation succeeded
+    char *error;
+    // metadata extracted from the query: its size in bytes, then the lists, NULL-terminated,
+    // or NULL when the agent has none
+    int64_t size;
+    char *tables_csv;
+    char **commands;
+    char **comments;
+    char **procedures;
+} sql_obfuscation_t;
+
+typedef struct external_tags_s {
+    char *hostname;
+    char *source_type;
+    // NULL-terminated, empty when the tags of the host are removed
+    char **tags;
+} external_tags_t;
+
 /*
  * custom builtins
  */
@@ -113,6 +144,8 @@ typedef void (*cb_submit_event_platform_event_t)(char *, char *, int, char *);
 typedef void (*cb_get_version_t)(char **);
 // (key, yaml_result)
 typedef void (*cb_get_config_t)(char *, char **);
+// (keys, yaml_result)
+typedef void (*cb_get_config_many_t)(char **, char **);
 // (yaml_result)
 typedef void (*cb_headers_t)(char **);
 // (hostname)
@@ -127,16 +160,24 @@ typedef bool (*cb_tracemalloc_enabled_t)(void);
 typedef void (*cb_log_t)(char *, int);
 // (log_line, check_id)
 typedef void (*cb_send_log_t)(char *, char *);
+// (records, records_size, check_id), returns the number of records accepted
+typedef int (*cb_send_logs_t)(char *, size_t, char *);
 // (check_id, name, value)
 typedef void (*cb_set_check_metadata_t)(char *, char *, char *);
 // (hostname, source_type_name, list of tags)
 typedef void (*cb_set_external_tags_t)(char *, char *, char **);
+// (external_tags, external_tags_len)
+typedef void (*cb_set_external_tags_many_t)(external_tags_t *, int);
 // (key, value)
 typedef void (*cb_write_persistent_cache_t)(char *, char *);
 // (value)
 typedef char *(*cb_read_persistent_cache_t)(char *);
+// (keys, values)
+typedef void (*cb_write_persistent_cache_many_t)(char **, char **);
 // (sql_query, options, error_message)
 typedef char *(*cb_obfuscate_sql_t)(char *, char *, char **);
+// (sql_queries, options, results, error_message)
+typedef void (*cb_obfuscate_sql_many_t)(char **, char *, sql_obfuscation_t *, char **);
 // (exec_plan, normalize, error_message)
 typedef char *(*cb_obfuscate_sql_exec_plan_t)(char *, bool, char **);
 // ()
@@ -147,6 +188,12 @@ typedef char *(*cb_obfuscate_mongodb_string_t)(char *, char **);
 // _util
 // (argv, env, stdout, stderr, ret_code, exception)
 typedef void (*cb_get_subprocess_output_t)(char **, char **, char **, char **, int *, char **);
+// (argv, env, timeout, exception)
+typedef long (*cb_start_subprocess_stream_t)(char **, char **, double, char **);
+// (stream_id, buffer, buffer_size, exception)
+typedef int (*cb_read_subprocess_stream_t)(long, char *, int, char **);
+// (stream_id, stderr, ret_code)
+typedef int (*cb_close_subprocess_stream_t)(long, char **, int *);
 
 // CGO API
 //
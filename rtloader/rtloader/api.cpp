@@ -301,6 +301,11 @@ int get_check(rtloader_t *rtloader, rtloader_pyobject_t *py_class, const char *i
         : 0;
 }
 
+void set_check_pool_size(rtloader_t *rtloader, int size)
+{
+    AS_TYPE(RtLoader, rtloader)->setCheckPoolSize(size);
+}
+
 int get_check_deprecated(rtloader_t *rtloader, rtloader_pyobject_t *py_class, const char *init_config,
                          const char *instance, const char *agent_config, const char *check_id, const char *check_name,
                          rtloader_pyobject_t **check)
@@ -327,6 +332,29 @@ char **get_checks_warnings(rtloader_t *rtloader, rtloader_pyobject_t *check)
     return AS_TYPE(RtLoader, rtloader)->getCheckWarnings(AS_TYPE(RtLoaderPyObject, check));
 }
 
+int get_check_run_stats(rtloader_t *rtloader, rtloader_pyobject_t *check, check_run_stats_t *stats)
+{
+    if (stats == NULL) {
+        return 0;
+    }
+    return AS_TYPE(RtLoader, rtloader)->getCheckRunStats(AS_TYPE(RtLoaderPyObject, check), *stats) ? 1 : 0;
+}
+
+int start_check_profiler(rtloader_t *rtloader, int interval_ms)
+{
+    return AS_TYPE(RtLoader, rtloader)->startCheckProfiler(interval_ms) ? 1 : 0;
+}
+
+void stop_check_profiler(rtloader_t *rtloader)
+{
+    AS_TYPE(RtLoader, rtloader)->stopCheckProfiler();
+}
+
+char *get_check_profile(rtloader_t *rtloader, rtloader_pyobject_t *check)
+{
+    return AS_TYPE(RtLoader, rtloader)->getCheckProfile(AS_TYPE(RtLoaderPyObject, check));
+}
+
 char *get_check_diagnoses(rtloader_t *rtloader, rtloader_pyobject_t *check)
 {
     return AS_TYPE(RtLoader, rtloader)->getCheckDiagnoses(AS_TYPE(RtLoaderPyObject, check));
@@ -502,6 +530,16 @@ void set_get_config_cb(rtloader_t *rtloader, cb_get_config_t cb)
     AS_TYPE(RtLoader, rtloader)->setGetConfigCb(cb);
 }
 
+void set_get_config_many_cb(rtloader_t *rtloader, cb_get_config_many_t cb)
+{
+    AS_TYPE(RtLoader, rtloader)->setGetConfigManyCb(cb);
+}
+
+void bump_config_generation(rtloader_t *rtloader)
+{
+    AS_TYPE(RtLoader, rtloader)->bumpConfigGeneration();
+}
+
 void set_headers_cb(rtloader_t *rtloader, cb_headers_t cb)
 {
     AS_TYPE(RtLoader, rtloader)->setHeadersCb(cb);
@@ -537,6 +575,11 @@ void set_send_log_cb(rtloader_t *rtloader, cb_send_log_t cb)
     AS_TYPE(RtLoader, rtloader)->setSendLogCb(cb);
 }
 
+void set_send_logs_cb(rtloader_t *rtloader, cb_send_logs_t cb)
+{
+    AS_TYPE(RtLoader, rtloader)->setSendLogsCb(cb);
+}
+
 void set_set_check_metadata_cb(rtloader_t *rtloader, cb_set_check_metadata_t cb)
 {
     AS_TYPE(RtLoader, rtloader)->setSetCheckMetadataCb(cb);
@@ -547,6 +590,11 @@ void set_set_external_tags_cb(rtloader_t *rtloader, cb_set_external_tags_t cb)
     AS_TYPE(RtLoader, rtloader)->setSetExternalTagsCb(cb);
 }
 
+void set_set_external_tags_many_cb(rtloader_t *rtloader, cb_set_external_tags_many_t cb)
+{
+    AS_TYPE(RtLoader, rtloader)->setSetExternalTagsManyCb(cb);
+}
+
 char *get_integration_list(rtloader_t *rtloader)
 {
     return AS_TYPE(RtLoader, rtloader)->getIntegrationList();
@@ -567,11 +615,26 @@ void set_read_persistent_cache_cb(rtloader_t *rtloader, cb_read_persistent_cache
     AS_TYPE(RtLoader, rtloader)->setReadPersistentCacheCb(cb);
 }
 
+void set_write_persistent_cache_many_cb(rtloader_t *rtloader, cb_write_persistent_cache_many_t cb)
+{
+    AS_TYPE(RtLoader, rtloader)->setWritePersistentCacheManyCb(cb);
+}
+
+void flush_persistent_cache(rtloader_t *rtloader)
+{
+    AS_TYPE(RtLoader, rtloader)->flushPersistentCache();
+}
+
 void set_obfuscate_sql_cb(rtloader_t *rtloader, cb_obfuscate_sql_t cb)
 {
     AS_TYPE(RtLoader, rtloader)->setObfuscateSqlCb(cb);
 }
 
+void set_obfuscate_sql_many_cb(rtloader_t *rtloader, cb_obfuscate_sql_many_t cb)
+{
+    AS_TYPE(RtLoader, rtloader)->setObfuscateSqlManyCb(cb);
+}
+
 void set_obfuscate_sql_exec_plan_cb(rtloader_t *rtloader, cb_obfuscate_sql_exec_plan_t cb)
 {
     AS_TYPE(RtLoader, rtloader)->setObfuscateSqlExecPlanCb(cb);
@@ -595,6 +658,21 @@ void set_get_subprocess_output_cb(rtloader_t *rtloader, cb_get_subprocess_output
     AS_TYPE(RtLoader, rtloader)->setSubprocessOutputCb(cb);
 }
 
+void set_start_subprocess_stream_cb(rtloader_t *rtloader, cb_start_subprocess_stream_t cb)
+{
+    AS_TYPE(RtLoader, rtloader)->setStartSubprocessStreamCb(cb);
+}
+
+void set_read_subprocess_stream_cb(rtloader_t *rtloader, cb_read_subprocess_stream_t cb)
+{
+    AS_TYPE(RtLoader, rtloader)->setReadSubprocessStreamCb(cb);
+}
+
+void set_close_subprocess_stream_cb(rtloader_t *rtloader, cb_close_subprocess_stream_t cb)
+{
+    AS_TYPE(RtLoader, rtloader)->setCloseSubprocessStreamCb(cb);
+}
+
 /*
  * CGO API
  */
@@ -6,6 +6,7 @@
 package testdatadogagent
 
 import (
+	"encoding/binary"
 	"encoding/json"
 	"fmt"
 	"os"
@@ -28,16 +29,21 @@ import (
 extern void doLog(char*, int);
 extern void getClustername(char **);
 extern void getConfig(char *, char **);
+extern void getConfigMany(char **, char **);
 extern void getHostname(char **);
 extern bool getTracemallocEnabled();
 extern void getVersion(char **);
 extern void headers(char **);
 extern void sendLog(char *, char *);
+extern int sendLogs(char *, size_t, char *);
 extern void setCheckMetadata(char*, char*, char*);
 extern void setExternalHostTags(char*, char*, char**);
+extern void setExternalHostTagsMany(external_tags_t*, int);
 extern void writePersistentCache(char*, char*);
 extern char* readPersistentCache(char*);
+extern void writePersistentCacheMany(char**, char**);
 extern char* obfuscateSQL(char*, char*, char**);
+extern void obfuscateSQLMany(char**, char*, sql_obfuscation_t*, char**);
 extern char* obfuscateSQLExecPlan(char*, bool, char**);
 extern double getProcessStartTime();
 extern char* obfuscateMongoDBString(char*, char**);
@@ -47,17 +53,22 @@ static void initDatadogAgentTests(rtloader_t *rtloader) {
    set_cgo_free_cb(rtloader, _free);
    set_get_clustername_cb(rtloader, getClustername);
    set_get_config_cb(rtloader, getConfig);
+   set_get_config_many_cb(rtloader, getConfigMany);
    set_get_hostname_cb(rtloader, getHostname);
    set_tracemalloc_enabled_cb(rtloader, getTracemallocEnabled);
    set_get_version_cb(rtloader, getVersion);
    set_headers_cb(rtloader, headers);
    set_log_cb(rtloader, doLog);
    set_send_log_cb(rtloader, sendLog);
+   set_send_logs_cb(rtloader, sendLogs);
    set_set_check_metadata_cb(rtloader, setCheckMetadata);
    set_set_external_tags_cb(rtloader, setExternalHostTags);
+   set_set_external_tags_many_cb(rtloader, setExternalHostTagsMany);
    set_write_persistent_cache_cb(rtloader, writePersistentCache);
    set_read_persistent_cache_cb(rtloader, readPersistentCache);
+   set_write_persistent_cache_many_cb(rtloader, writePersistentCacheMany);
    set_obfuscate_sql_cb(rtloader, obfuscateSQL);
+   set_obfuscate_sql_many_cb(rtloader, obfuscateSQLMany);
    set_obfuscate_sql_exec_plan_cb(rtloader, obfuscateSQLExecPlan);
    set_get_process_start_time_cb(rtloader, getProcessStartTime);
    set_obfuscate_mongodb_string_cb(rtloader, obfuscateMongoDBString);
@@ -68,6 +79,27 @@ import "C"
 var (
 	rtloader *C.rtloader_t
 	tmpfile  *os.File
+
+	// number of calls to the getConfig and getConfigMany callbacks
+	getConfigCalls     int
+	getConfigManyCalls int
+
+	// logs received by the sendLog and sendLogs callbacks. They're only counted when
+	// discardLogs is set, and sendLogs accepts at most sendLogsLimit of them if it's not -1.
+	sentLogs      int
+	discardLogs   bool
+	sendLogsLimit = -1
+
+	// number of calls to the writePersistentCacheMany callback
+	writePersistentCacheManyCalls int
+
+	// number of calls to the obfuscateSQLMany callback, and of queries it obfuscated
+	obfuscateSQLManyCalls   int
+	obfuscateSQLManyQueries int
+
+	// number of calls to the setExternalHostTagsMany callback, and of hosts it received
+	setExternalHostTagsManyCalls int
+	setExternalHostTagsManyHosts int
 )
 
 type message struct {
@@ -143,20 +175,52 @@ func getVersion(in **C.char) {
 	*in = (*C.char)(helpers.TrackedCString("1.2.3"))
 }
 
-//export getConfig
-func getConfig(key *C.char, in **C.char) {
+// resetConfig drops the config values cached by rtloader and resets the callback counters
+func resetConfig() {
+	C.bump_config_generation(rtloader)
+	getConfigCalls = 0
+	getConfigManyCalls = 0
+}
 
-	goKey := C.GoString(key)
-	switch goKey {
+func configValue(key string) (interface{}, bool) {
+	switch key {
 	case "log_level":
-		*in = (*C.char)(helpers.TrackedCString("\"warning\""))
+		return "warning", true
 	case "foo":
-		m := message{C.GoString(key), "Hello", 123456}
-		b, _ := yaml.Marshal(m)
-		*in = (*C.char)(helpers.TrackedCString(string(b)))
+		return message{key, "Hello", 123456}, true
 	default:
-		*in = (*C.char)(helpers.TrackedCString("null"))
+		return nil, false
+	}
+}
+
+//export getConfig
+func getConfig(key *C.char, in **C.char) {
+	getConfigCalls++
+
+	value, _ := configValue(C.GoString(key))
+	b, _ := yaml.Marshal(value)
+	*in = (*C.char)(helpers.TrackedCString(string(b)))
+}
+
+//export getConfigMany
+func getConfigMany(keys **C.char, in **C.char) {
+	getConfigManyCalls++
+
+	values := map[string]interface{}{}
+	pKeys := uintptr(unsafe.Pointer(keys))
+	ptrSize := unsafe.Sizeof(*keys)
+	for i := uintptr(0); ; i++ {
+		keyPtr := *(**C.char)(unsafe.Pointer(pKeys + ptrSize*i))
+		if keyPtr == nil {
+			break
+		}
+		key := C.GoString(keyPtr)
+		if value, ok := configValue(key); ok {
+			values[key] = value
+		}
 	}
+	b, _ := yaml.Marshal(values)
+	*in = (*C.char)(helpers.TrackedCString(string(b)))
 }
 
 //export headers
@@ -194,6 +258,11 @@ func doLog(msg *C.char, level C.int) {
 
 //export sendLog
 func sendLog(logLine, checkID *C.char) {
+	sentLogs++
+	if discardLogs {
+		return
+	}
+
 	line := C.GoString(logLine)
 	cid := C.GoString(checkID)
 
@@ -203,6 +272,28 @@ func sendLog(logLine, checkID *C.char) {
 	f.WriteString(strings.Join([]string{line, cid}, ","))
 }
 
+//export sendLogs
+func sendLogs(records *C.char, recordsSize C.size_t, checkID *C.char) C.int {
+	buf := unsafe.Slice((*byte)(unsafe.Pointer(records)), int(recordsSize))
+	cid := C.GoString(checkID)
+
+	lines := []string{}
+	for len(buf) >= 4 && len(lines) != sendLogsLimit {
+		size := binary.NativeEndian.Uint32(buf)
+		lines = append(lines, strings.Join([]string{string(buf[4 : 4+size]), cid}, ","))
+		buf = buf[4+size:]
+	}
+	sentLogs += len(lines)
+
+	if !discardLogs {
+		f, _ := os.OpenFile(tmpfile.Name(), os.O_APPEND|os.O_RDWR|os.O_CREATE, 0666)
+		defer f.Close()
+
+		f.WriteString(strings.Join(lines, "\n"))
+	}
+	return C.int(len(lines))
+}
+
 //export setCheckMetadata
 func setCheckMetadata(checkID, name, value *C.char) {
 	cid := C.GoString(checkID)
@@ -243,6 +334,17 @@ func setExternalHostTags(hostname *C.char, sourceType *C.char, tags **C.char) {
 	f.WriteString("\n")
 }
 
+//export setExternalHostTagsMany
+func setExternalHostTagsMany(externalTags *C.external_tags_t, externalTagsLen C.int) {
+	setExternalHostTagsManyCalls++
+	setExternalHostTagsManyHosts += int(externalTagsLen)
+
+	// written like setExternalHostTags does
+	for _, entry := range unsafe.Slice(externalTags, int(externalTagsLen)) {
+		setExternalHostTags(entry.hostname, entry.source_type, entry.tags)
+	}
+}
+
 //export writePersistentCache
 func writePersistentCache(key, value *C.char) {
 	keyName := C.GoString(key)
@@ -255,6 +357,43 @@ func writePersistentCache(key, value *C.char) {
 	f.WriteString(val)
 }
 
+//export writePersistentCacheMany
+func writePersistentCacheMany(keys, values **C.char) {
+	writePersistentCacheManyCalls++
+
+	f, _ := os.OpenFile(tmpfile.Name(), os.O_APPEND|os.O_RDWR|os.O_CREATE, 0600)
+	defer f.Close()
+
+	pKeys := uintptr(unsafe.Pointer(keys))
+	pValues := uintptr(unsafe.Pointer(values))
+	ptrSize := unsafe.Sizeof(*keys)
+	for i := uintptr(0); ; i++ {
+		keyPtr := *(**C.char)(unsafe.Pointer(pKeys + ptrSize*i))
+		if keyPtr == nil {
+			break
+		}
+		valuePtr := *(**C.char)(unsafe.Pointer(pValues + ptrSize*i))
+		f.WriteString(C.GoString(keyPtr))
+		f.WriteString(C.GoString(valuePtr))
+	}
+}
+
+// flushPersistentCache stores the values queued by `write_persistent_cache` and returns
+// what the callbacks wrote since the last call to `run`
+func flushPersistentCache() (string, error) {
+	runtime.LockOSThread()
+	state := C.ensure_gil(rtloader)
+
+	C.flush_persistent_cache(rtloader)
+
+	C.release_gil(rtloader, state)
+	runtime.UnlockOSThread()
+
+	output, err := os.ReadFile(tmpfile.Name())
+
+	return strings.TrimSpace(string(output)), err
+}
+
 //export readPersistentCache
 func readPersistentCache(key *C.char) *C.char {
 	return (*C.char)(helpers.TrackedCString("somevalue"))
@@ -278,6 +417,9 @@ type sqlConfig struct {
 	ReturnJSONMetadata bool `json:"return_json_metadata"`
 }
 
+// size of the metadata of "select * from table where id = 1", as computed by the obfuscator
+const testQueryMetadataSize = len("table") + len("SELECT") + len("-- SQL test comment")
+
 //export obfuscateSQL
 func obfuscateSQL(rawQuery, opts *C.char, errResult **C.char) *C.char {
 	var sqlOpts sqlConfig
@@ -295,6 +437,7 @@ func obfuscateSQL(rawQuery, opts *C.char, errResult **C.char) *C.char {
 		obfuscatedQuery := obfuscate.ObfuscatedQuery{
 			Query: "select * from table where id = ?",
 			Metadata: obfuscate.SQLMetadata{
+				Size:      testQueryMetadataSize,
 				TablesCSV: "table",
 				Commands:  []string{"SELECT"},
 				Comments:  []string{"-- SQL test comment"},
@@ -316,6 +459,61 @@ func obfuscateSQL(rawQuery, opts *C.char, errResult **C.char) *C.char {
 	}
 }
 
+func trackedCStringArray(strs []string) **C.char {
+	if strs == nil {
+		return nil
+	}
+	cArray := (**C.char)(C._malloc(C.size_t(unsafe.Sizeof((*C.char)(nil))) * C.size_t(len(strs)+1)))
+	items := unsafe.Slice(cArray, len(strs)+1)
+	for i, str := range strs {
+		items[i] = (*C.char)(helpers.TrackedCString(str))
+	}
+	items[len(strs)] = nil
+	return cArray
+}
+
+//export obfuscateSQLMany
+func obfuscateSQLMany(rawQueries **C.char, opts *C.char, results *C.sql_obfuscation_t, errResult **C.char) {
+	obfuscateSQLManyCalls++
+
+	var sqlOpts sqlConfig
+	optStr := C.GoString(opts)
+	if optStr == "" {
+		optStr = "{}"
+	}
+	if err := json.Unmarshal([]byte(optStr), &sqlOpts); err != nil {
+		*errResult = (*C.char)(helpers.TrackedCString(err.Error()))
+		return
+	}
+
+	pQueries := uintptr(unsafe.Pointer(rawQueries))
+	ptrSize := unsafe.Sizeof(*rawQueries)
+	for i := uintptr(0); ; i++ {
+		queryPtr := *(**C.char)(unsafe.Pointer(pQueries + ptrSize*i))
+		if queryPtr == nil {
+			break
+		}
+		obfuscateSQLManyQueries++
+
+		result := (*C.sql_obfuscation_t)(unsafe.Add(unsafe.Pointer(results), unsafe.Sizeof(*results)*i))
+		switch C.GoString(queryPtr) {
+		case "select * from table where id = 1":
+			result.query = (*C.char)(helpers.TrackedCString("select * from table where id = ?"))
+			result.size = testQueryMetadataSize
+			result.tables_csv = (*C.char)(helpers.TrackedCString("table"))
+			result.commands = trackedCStringArray([]string{"SELECT"})
+			result.comments = trackedCStringArray([]string{"-- SQL test comment"})
+		case "select * from other where id = 2":
+			result.query = (*C.char)(helpers.TrackedCString("select * from other where id = ?"))
+		// expected error results from obfuscator
+		case "":
+			result.error = (*C.char)(helpers.TrackedCString("result is empty"))
+		default:
+			result.error = (*C.char)(helpers.TrackedCString("unknown test case"))
+		}
+	}
+}
+
 //export obfuscateSQLExecPlan
 func obfuscateSQLExecPlan(rawQuery *C.char, normalize C.bool, errResult **C.char) *C.char {
 	switch C.GoString(rawQuery) {
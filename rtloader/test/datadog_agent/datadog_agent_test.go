@@ -10,6 +10,7 @@ import (
 	"os"
 	"regexp"
 	"strconv"
+	"strings"
 	"testing"
 
 	"github.com/DataDog/datadog-agent/rtloader/test/helpers"
@@ -74,6 +75,97 @@ func TestGetConfig(t *testing.T) {
 	helpers.AssertMemoryUsage(t)
 }
 
+func TestGetConfigCache(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+	resetConfig()
+
+	code := fmt.Sprintf(`
+	d = datadog_agent.get_config("foo")
+	d['name'] = 'bar'
+	d = datadog_agent.get_config("foo")
+	with open(r'%s', 'w') as f:
+		f.write("{}:{}:{}".format(d.get('name'), d.get('body'), datadog_agent.get_config("foo").get('time')))
+	`, tmpfile.Name())
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "foo:Hello:123456" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+	if getConfigCalls != 1 {
+		t.Errorf("Expected a single call to the callback, got %d", getConfigCalls)
+	}
+
+	// a config change drops the cached values
+	resetConfig()
+	if _, err := run(`datadog_agent.get_config("foo")`); err != nil {
+		t.Fatal(err)
+	}
+	if getConfigCalls != 1 {
+		t.Errorf("Expected the value to be collected again, got %d calls", getConfigCalls)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestGetConfigMany(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+	resetConfig()
+
+	code := fmt.Sprintf(`
+	d = datadog_agent.get_config_many(["foo", "log_level", "unknown"])
+	with open(r'%s', 'w') as f:
+		f.write("{}:{}:{}:{}".format(d["foo"]["name"], d["log_level"], d["unknown"], datadog_agent.get_config("log_level")))
+	`, tmpfile.Name())
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "foo:warning:None:warning" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+	if getConfigManyCalls != 1 || getConfigCalls != 0 {
+		t.Errorf("Expected a single call to the callbacks, got %d and %d", getConfigManyCalls, getConfigCalls)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestGetConfigManyErrors(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	out, err := run(`datadog_agent.get_config_many(["foo", 1])`)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "TypeError: keys must be a sequence of strings" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func BenchmarkGetConfig(b *testing.B) {
+	resetConfig()
+
+	code := fmt.Sprintf(`
+	for _ in range(%d):
+		datadog_agent.get_config("foo")
+	`, b.N)
+	b.ResetTimer()
+	if _, err := run(code); err != nil {
+		b.Fatal(err)
+	}
+	b.ReportMetric(float64(getConfigCalls)/float64(b.N), "calls/op")
+}
+
 func TestHeaders(t *testing.T) {
 	// Reset memory counters
 	helpers.ResetMemoryStats()
@@ -192,6 +284,98 @@ func TestSendLog(t *testing.T) {
 	}
 }
 
+func TestSendLogs(t *testing.T) {
+	helpers.ResetMemoryStats()
+
+	code := `
+	accepted = datadog_agent.send_logs(["log line 1", u"log line \u00e9", b"log line 3"], "postgres:test:12345")
+	assert accepted == 3, accepted
+	`
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "log line 1,postgres:test:12345\nlog line \u00e9,postgres:test:12345\nlog line 3,postgres:test:12345" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestSendLogsBackPressure(t *testing.T) {
+	sendLogsLimit = 1
+	defer func() { sendLogsLimit = -1 }()
+
+	code := `
+	accepted = datadog_agent.send_logs(["log line 1", "log line 2"], "postgres:test:12345")
+	assert accepted == 1, accepted
+	`
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "log line 1,postgres:test:12345" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+}
+
+func TestSendLogsErrors(t *testing.T) {
+	testCases := []struct {
+		code     string
+		expected string
+	}{
+		{
+			code:     `datadog_agent.send_logs("log line", "postgres:test:12345")`,
+			expected: "TypeError: records must be a sequence of strings",
+		},
+		{
+			code:     `datadog_agent.send_logs(["log line", 1], "postgres:test:12345")`,
+			expected: "TypeError: records must be a sequence of strings",
+		},
+		{
+			code:     `datadog_agent.send_logs(["log line"])`,
+			expected: "TypeError: function takes exactly 2 arguments (1 given)",
+		},
+	}
+
+	for _, tc := range testCases {
+		out, err := run(tc.code)
+		if err != nil {
+			t.Fatal(err)
+		}
+		if out != tc.expected {
+			t.Errorf("Unexpected printed value: '%s'", out)
+		}
+	}
+}
+
+func benchmarkSendLogs(b *testing.B, call string) {
+	discardLogs = true
+	sentLogs = 0
+	defer func() { discardLogs = false }()
+
+	code := fmt.Sprintf(`
+	records = ['{"message": "event %%d", "status": "info"}' %% i for i in range(%d)]
+	%s
+	`, b.N, call)
+	b.ResetTimer()
+	if _, err := run(code); err != nil {
+		b.Fatal(err)
+	}
+	if sentLogs != b.N {
+		b.Fatalf("Unexpected number of logs sent: %d", sentLogs)
+	}
+	b.ReportMetric(float64(b.N)/b.Elapsed().Seconds(), "records/s")
+}
+
+func BenchmarkSendLog(b *testing.B) {
+	benchmarkSendLogs(b, `for record in records: datadog_agent.send_log(record, "postgres:test:12345")`)
+}
+
+func BenchmarkSendLogs(b *testing.B) {
+	benchmarkSendLogs(b, `for i in range(0, len(records), 1000): datadog_agent.send_logs(records[i:i + 1000], "postgres:test:12345")`)
+}
+
 func TestSetCheckMetadata(t *testing.T) {
 	code := `
 	datadog_agent.set_check_metadata("redis:test:12345", "version.raw", "5.0.6")
@@ -428,7 +612,147 @@ func TestSetExternalTagEmptyDict(t *testing.T) {
 	helpers.AssertMemoryUsage(t)
 }
 
+func TestSetExternalTagsBatched(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+	setExternalHostTagsManyCalls = 0
+
+	code := `
+	tags = [('hostname%d' % i, {'source_type': ['tag1', 'tag2']}) for i in range(1000)]
+	datadog_agent.set_external_tags(tags)
+	`
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if len(strings.Split(out, "\n")) != 1000 {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+	if setExternalHostTagsManyCalls != 1 {
+		t.Errorf("Unexpected number of calls: %d", setExternalHostTagsManyCalls)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestSetExternalTagsDelta(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	code := `
+	tags = [
+		('hostname', {'source_type': ['tag1', 'tag2']}),
+		('hostname2', {'source_type2': ['tag3', 'tag4']}),
+		('hostname3', {'source_type3': ['tag5']}),
+	]
+	datadog_agent.set_external_tags(tags, 'delta:1')
+	datadog_agent.set_external_tags(tags, 'delta:1')
+	with open(r'%s', 'a') as f:
+		f.write("--\n")
+	# hostname2 changed, hostname3 is removed
+	tags = [
+		('hostname', {'source_type': ['tag1', 'tag2']}),
+		('hostname2', {'source_type2': ['tag3']}),
+	]
+	datadog_agent.set_external_tags(tags, check_id='delta:1')
+	# other checks are tracked separately
+	datadog_agent.set_external_tags(tags, 'delta:2')
+	`
+	out, err := run(fmt.Sprintf(code, tmpfile.Name()))
+	if err != nil {
+		t.Fatal(err)
+	}
+	expected := "hostname,source_type,tag1,tag2\nhostname2,source_type2,tag3,tag4\nhostname3,source_type3,tag5\n--\n" +
+		"hostname2,source_type2,tag3\nhostname3,source_type3,\n" +
+		"hostname,source_type,tag1,tag2\nhostname2,source_type2,tag3"
+	if out != expected {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestSetExternalTagsDeltaSourceTypes(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	code := `
+	# the tags of a host are kept for each source type
+	tags = [
+		('hostname', {'vsphere': ['tag1']}),
+		('hostname', {'openstack': ['tag2']}),
+	]
+	datadog_agent.set_external_tags(tags, 'sources')
+	datadog_agent.set_external_tags(tags, 'sources')
+	with open(r'%s', 'a') as f:
+		f.write("--\n")
+	datadog_agent.set_external_tags([('hostname', {'openstack': ['tag2']})], 'sources')
+	datadog_agent.set_external_tags([('hostname', {'vsphere': ['tag3']})], 'sources')
+	`
+	out, err := run(fmt.Sprintf(code, tmpfile.Name()))
+	if err != nil {
+		t.Fatal(err)
+	}
+	expected := "hostname,vsphere,tag1\nhostname,openstack,tag2\n--\n" +
+		"hostname,vsphere,\n" +
+		"hostname,vsphere,tag3\nhostname,openstack,"
+	if out != expected {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestSetExternalTagsDeltaChurn(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+	setExternalHostTagsManyCalls = 0
+	setExternalHostTagsManyHosts = 0
+
+	code := `
+	import random
+	rng = random.Random(42)
+	hosts = {'host%d' % i: ['tag:%d' % i, 'cluster:a'] for i in range(5000)}
+	datadog_agent.set_external_tags([(h, {'vsphere': t}) for h, t in hosts.items()], 'churn')
+	changed = 0
+	for _ in range(10):
+		# update 1%% of the hosts
+		for h in rng.sample(sorted(hosts), 50):
+			hosts[h] = hosts[h] + ['changed']
+			changed += 1
+		datadog_agent.set_external_tags([(h, {'vsphere': t}) for h, t in hosts.items()], 'churn')
+	datadog_agent.set_external_tags([(h, {'vsphere': t}) for h, t in hosts.items()], 'churn', full_resync=True)
+	# all the hosts are removed
+	datadog_agent.set_external_tags([], 'churn')
+	datadog_agent.set_external_tags([], 'churn')
+	with open(r'%s', 'w') as f:
+		f.write(str(changed))
+	`
+	out, err := run(fmt.Sprintf(code, tmpfile.Name()))
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "500" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+	if setExternalHostTagsManyCalls != 13 {
+		t.Errorf("Unexpected number of calls: %d", setExternalHostTagsManyCalls)
+	}
+	// initial sync, changes, full resync and removal
+	if setExternalHostTagsManyHosts != 5000+500+5000+5000 {
+		t.Errorf("Unexpected number of hosts: %d", setExternalHostTagsManyHosts)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
 func TestWritePersistentCache(t *testing.T) {
+	writePersistentCacheManyCalls = 0
+
 	code := `
 	datadog_agent.write_persistent_cache("12345", "someothervalue")
 	`
@@ -436,15 +760,112 @@ func TestWritePersistentCache(t *testing.T) {
 	if err != nil {
 		t.Fatal(err)
 	}
+	// the value is only stored when the cache is flushed
+	if out != "" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	out, err = flushPersistentCache()
+	if err != nil {
+		t.Fatal(err)
+	}
 	if out != "12345someothervalue" {
 		t.Errorf("Unexpected printed value: '%s'", out)
 	}
+	if writePersistentCacheManyCalls != 1 {
+		t.Errorf("Unexpected number of calls to writePersistentCacheMany: %d", writePersistentCacheManyCalls)
+	}
+}
+
+func TestWritePersistentCacheCoalesce(t *testing.T) {
+	writePersistentCacheManyCalls = 0
+
+	code := `
+	datadog_agent.write_persistent_cache("key1", "value1")
+	datadog_agent.write_persistent_cache("key2", "value2")
+	datadog_agent.write_persistent_cache("key1", "value3")
+	`
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	out, err = flushPersistentCache()
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "key1value3key2value2" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+	if writePersistentCacheManyCalls != 1 {
+		t.Errorf("Unexpected number of calls to writePersistentCacheMany: %d", writePersistentCacheManyCalls)
+	}
+
+	// nothing left to store
+	tmpfile.Truncate(0)
+	if _, err = flushPersistentCache(); err != nil {
+		t.Fatal(err)
+	}
+	if writePersistentCacheManyCalls != 1 {
+		t.Errorf("Unexpected number of calls to writePersistentCacheMany: %d", writePersistentCacheManyCalls)
+	}
+}
+
+func TestWritePersistentCacheMany(t *testing.T) {
+	writePersistentCacheManyCalls = 0
+
+	code := `
+	datadog_agent.write_persistent_cache_many({"key3": "value3", "key4": "value4"})
+	`
+	if _, err := run(code); err != nil {
+		t.Fatal(err)
+	}
+
+	out, err := flushPersistentCache()
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "key3value3key4value4" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+	if writePersistentCacheManyCalls != 1 {
+		t.Errorf("Unexpected number of calls to writePersistentCacheMany: %d", writePersistentCacheManyCalls)
+	}
+}
+
+func TestWritePersistentCacheManyErrors(t *testing.T) {
+	testCases := []struct {
+		code     string
+		expected string
+	}{
+		{
+			code:     `datadog_agent.write_persistent_cache_many([("key", "value")])`,
+			expected: "TypeError: argument 1 must be dict, not list",
+		},
+		{
+			code:     `datadog_agent.write_persistent_cache_many({"key": 1})`,
+			expected: "TypeError: keys and values must be strings",
+		},
+	}
+
+	for _, tc := range testCases {
+		out, err := run(tc.code)
+		if err != nil {
+			t.Fatal(err)
+		}
+		if out != tc.expected {
+			t.Errorf("Unexpected printed value: '%s'", out)
+		}
+	}
 }
 
 func TestReadPersistentCache(t *testing.T) {
 	code := fmt.Sprintf(`
 	with open(r'%s', 'w') as f:
-		data = datadog_agent.read_persistent_cache("12345")
+		data = datadog_agent.read_persistent_cache("67890")
 		assert type(data) == type("")
 		f.write(data)
 	`, tmpfile.Name())
@@ -457,6 +878,38 @@ func TestReadPersistentCache(t *testing.T) {
 	}
 }
 
+func TestReadPersistentCacheAfterWrite(t *testing.T) {
+	// the written value is returned before and after it's stored
+	code := fmt.Sprintf(`
+	datadog_agent.write_persistent_cache("key5", "value5")
+	with open(r'%s', 'w') as f:
+		f.write(datadog_agent.read_persistent_cache("key5"))
+	`, tmpfile.Name())
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "value5" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	if _, err = flushPersistentCache(); err != nil {
+		t.Fatal(err)
+	}
+
+	code = fmt.Sprintf(`
+	with open(r'%s', 'w') as f:
+		f.write(datadog_agent.read_persistent_cache("key5"))
+	`, tmpfile.Name())
+	out, err = run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "value5" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+}
+
 func TestObfuscateSql(t *testing.T) {
 	helpers.ResetMemoryStats()
 
@@ -554,6 +1007,133 @@ func TestObfuscateSQLErrors(t *testing.T) {
 	helpers.AssertMemoryUsage(t)
 }
 
+func TestObfuscateSqlBatch(t *testing.T) {
+	helpers.ResetMemoryStats()
+	obfuscateSQLManyCalls = 0
+	obfuscateSQLManyQueries = 0
+
+	code := fmt.Sprintf(`
+	results = datadog_agent.obfuscate_sql_batch([
+		"select * from table where id = 1",
+		"select * from other where id = 2",
+		"select * from table where id = 1",
+		"",
+	], '{"table_names": true}')
+	with open(r'%s', 'w') as f:
+		f.write(json.dumps(results, sort_keys=True))
+	`, tmpfile.Name())
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	expected := `[` +
+		`{"metadata": {"Size": 30, "commands": ["SELECT"], "comments": ["-- SQL test comment"], "procedures": null, "tables_csv": "table"}, "query": "select * from table where id = ?"}, ` +
+		`{"metadata": {"Size": 0, "commands": null, "comments": null, "procedures": null, "tables_csv": ""}, "query": "select * from other where id = ?"}, ` +
+		`{"metadata": {"Size": 30, "commands": ["SELECT"], "comments": ["-- SQL test comment"], "procedures": null, "tables_csv": "table"}, "query": "select * from table where id = ?"}, ` +
+		`{"error": "result is empty"}]`
+	if out != expected {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+	// the duplicated query is only obfuscated once
+	if obfuscateSQLManyCalls != 1 || obfuscateSQLManyQueries != 3 {
+		t.Errorf("Unexpected calls to obfuscateSQLMany: %d calls, %d queries", obfuscateSQLManyCalls, obfuscateSQLManyQueries)
+	}
+
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestObfuscateSqlBatchMatchesObfuscateSql(t *testing.T) {
+	helpers.ResetMemoryStats()
+
+	code := fmt.Sprintf(`
+	query = "select * from table where id = 1"
+	options = '{"return_json_metadata": true}'
+	batched = datadog_agent.obfuscate_sql_batch([query], options)[0]
+	single = json.loads(datadog_agent.obfuscate_sql(query, options))
+	with open(r'%s', 'w') as f:
+		f.write(json.dumps(batched) == json.dumps(single) and "match" or json.dumps([batched, single]))
+	`, tmpfile.Name())
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	// callers can switch from one function to the other
+	if out != "match" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestObfuscateSqlBatchCache(t *testing.T) {
+	helpers.ResetMemoryStats()
+	obfuscateSQLManyCalls = 0
+	obfuscateSQLManyQueries = 0
+
+	code := fmt.Sprintf(`
+	options = '{"collect_commands": true}'
+	first = datadog_agent.obfuscate_sql_batch(["select * from table where id = 1"], options)
+	first[0]["metadata"]["commands"].append("UPDATE")
+	results = datadog_agent.obfuscate_sql_batch(["select * from other where id = 2", "select * from table where id = 1"], options)
+	results += datadog_agent.obfuscate_sql_batch(["select * from table where id = 1"], options)
+	results += datadog_agent.obfuscate_sql_batch(["select * from table where id = 1"], '{"collect_comments": true}')
+	with open(r'%s', 'w') as f:
+		f.write(",".join(",".join(r["metadata"]["commands"] or []) for r in results))
+	`, tmpfile.Name())
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	// the cached results can't be modified by the caller
+	if out != ",SELECT,SELECT,SELECT" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+	// the cache is keyed by query and options
+	if obfuscateSQLManyCalls != 3 || obfuscateSQLManyQueries != 3 {
+		t.Errorf("Unexpected calls to obfuscateSQLMany: %d calls, %d queries", obfuscateSQLManyCalls, obfuscateSQLManyQueries)
+	}
+
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestObfuscateSqlBatchErrors(t *testing.T) {
+	helpers.ResetMemoryStats()
+
+	testCases := []struct {
+		code     string
+		expected string
+	}{
+		{
+			code:     `datadog_agent.obfuscate_sql_batch(["select * from table where id = 1"], '{"table_names": 1}')`,
+			expected: "RuntimeError: json: cannot unmarshal number into Go struct field sqlConfig.table_names of type bool",
+		},
+		{
+			code:     `datadog_agent.obfuscate_sql_batch(["select * from table where id = 1", 1])`,
+			expected: "TypeError: queries must be a sequence of strings",
+		},
+		{
+			code:     `datadog_agent.obfuscate_sql_batch("select * from table where id = 1")`,
+			expected: "TypeError: queries must be a sequence of strings",
+		},
+		{
+			code:     `datadog_agent.obfuscate_sql_batch(None)`,
+			expected: "TypeError: queries must be a sequence of strings",
+		},
+	}
+
+	for _, tc := range testCases {
+		out, err := run(tc.code)
+		if err != nil {
+			t.Fatal(err)
+		}
+		if out != tc.expected {
+			t.Errorf("Unexpected printed value: '%s'", out)
+		}
+	}
+
+	helpers.AssertMemoryUsage(t)
+}
+
 func TestObfuscateSqlExecPlan(t *testing.T) {
 	helpers.ResetMemoryStats()
 
@@ -0,0 +1,28 @@
+import time
+
+from datadog_checks.base.checks import AgentCheck
+
+# resources used by each run of the check, for testing purposes
+ALLOC_SIZE = 10 * 1024 * 1024
+CPU_TIME = 0.05
+SLEEP_TIME = 0.05
+
+
+# Check using known amounts of memory and time on each run
+class AllocCheck(AgentCheck):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buffer = None
+
+    def run(self):
+        # the buffer of the previous run is freed
+        self.buffer = bytearray(ALLOC_SIZE)
+
+        start = time.thread_time()
+        while time.thread_time() - start < CPU_TIME:
+            pass
+        time.sleep(SLEEP_TIME)
+        return ""
+
+
+__version__ = '0.1.0'
@@ -0,0 +1,24 @@
+import time
+
+from datadog_checks.base.checks import AgentCheck
+
+# time spent by each run of the check, for testing purposes
+BUSY_TIME = 0.2
+IDLE_TIME = 0.02
+
+
+def busy_loop(duration):
+    start = time.thread_time()
+    while time.thread_time() - start < duration:
+        pass
+
+
+# Check spending most of its runs in `busy_loop`
+class BusyCheck(AgentCheck):
+    def run(self):
+        time.sleep(IDLE_TIME)
+        busy_loop(BUSY_TIME)
+        return ""
+
+
+__version__ = '0.1.0'
@@ -0,0 +1,26 @@
+import json
+
+from datadog_checks.base.checks import AgentCheck
+
+
+# Check reporting the configuration it was created with, for testing purposes
+class ConfigCheck(AgentCheck):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.init_config = kwargs['init_config']
+        self.instance = kwargs['instances'][0]
+        # checks may modify their configuration, it must not leak into other instances
+        self.init_config['created'] = self.init_config.get('created', 0) + 1
+
+    def run(self):
+        return json.dumps(
+            {
+                'init_config': self.init_config,
+                'instance': self.instance,
+                'load_config_calls': AgentCheck.load_config_calls,
+            },
+            sort_keys=True,
+        )
+
+
+__version__ = '0.1.0'
@@ -1,5 +1,11 @@
+import yaml
+
+
 # AgentCheck stubs for testing
 class AgentCheck(object):  # noqa: UP004
+    # number of calls to `load_config`, for the tests of the config parsing in rtloader
+    load_config_calls = 0
+
     def __init__(self, *args, **kwargs):  # noqa: U100
         pass
 
@@ -11,7 +17,5 @@ class AgentCheck(object):  # noqa: UP004
 
     @staticmethod
     def load_config(yaml_str):
-        if yaml_str == "":
-            return None
-        else:
-            return {}
+        AgentCheck.load_config_calls += 1
+        return yaml.safe_load(yaml_str)
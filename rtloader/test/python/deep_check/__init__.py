@@ -0,0 +1,26 @@
+import time
+
+from datadog_checks.base.checks import AgentCheck
+
+# time spent by each run of the check, and depth of the stack it's spent in, for testing purposes
+BUSY_TIME = 0.1
+DEPTH = 200
+
+
+def recurse(depth):
+    if depth == 0:
+        start = time.thread_time()
+        while time.thread_time() - start < BUSY_TIME:
+            pass
+        return
+    recurse(depth - 1)
+
+
+# Check spending its runs deeper than the frames kept by the profiler
+class DeepCheck(AgentCheck):
+    def run(self):
+        recurse(DEPTH)
+        return ""
+
+
+__version__ = '0.1.0'
@@ -0,0 +1,34 @@
+import json
+import time
+
+from datadog_checks.base.checks import AgentCheck
+
+# time spent in the constructor of the check, for testing purposes
+INIT_TIME = 0.05
+
+# number of times rtloader looked for the check class in this module
+scans = 0
+
+
+def __dir__():
+    global scans
+    scans += 1
+    return list(globals())
+
+
+# Check slow to construct, counting the instances created
+class PoolCheck(AgentCheck):
+    created = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        time.sleep(INIT_TIME)
+        PoolCheck.created += 1
+        self.runs = 0
+
+    def run(self):
+        self.runs += 1
+        return json.dumps({'check_id': self.check_id, 'created': PoolCheck.created, 'runs': self.runs, 'scans': scans})
+
+
+__version__ = '0.1.0'
@@ -12,10 +12,12 @@ package testrtloader
 import "C"
 
 import (
+	"encoding/json"
 	"fmt"
 	"os"
 	"path/filepath"
 	"runtime"
+	"time"
 	"unsafe"
 
 	common "github.com/DataDog/datadog-agent/rtloader/test/common"
@@ -51,6 +53,9 @@ func setUp() error {
 		return fmt.Errorf("`init` failed: %s", C.GoString(C.get_error(rtloader)))
 	}
 
+	// Account for the allocations of the checks
+	C.init_pymem_stats(rtloader)
+
 	return nil
 }
 
@@ -306,6 +311,248 @@ func runFakeGetWarnings() ([]string, error) {
 	return warnings, nil
 }
 
+func runConfigCheck(initConfig string, instance string) (string, error) {
+	var module *C.rtloader_pyobject_t
+	var class *C.rtloader_pyobject_t
+	var check *C.rtloader_pyobject_t
+
+	runtime.LockOSThread()
+	state := C.ensure_gil(rtloader)
+	defer func() {
+		C.release_gil(rtloader, state)
+		runtime.UnlockOSThread()
+	}()
+
+	classStr := (*C.char)(helpers.TrackedCString("config_check"))
+	defer C._free(unsafe.Pointer(classStr))
+
+	ret := C.get_class(rtloader, classStr, &module, &class)
+	if ret != 1 || module == nil || class == nil {
+		return "", fmt.Errorf(C.GoString(C.get_error(rtloader)))
+	}
+	defer C.rtloader_decref(rtloader, module)
+	defer C.rtloader_decref(rtloader, class)
+
+	initConfigStr := (*C.char)(helpers.TrackedCString(initConfig))
+	defer C._free(unsafe.Pointer(initConfigStr))
+	instanceStr := (*C.char)(helpers.TrackedCString(instance))
+	defer C._free(unsafe.Pointer(instanceStr))
+	checkIDStr := (*C.char)(helpers.TrackedCString("checkID"))
+	defer C._free(unsafe.Pointer(checkIDStr))
+
+	ret = C.get_check(rtloader, class, initConfigStr, instanceStr, checkIDStr, classStr, &check)
+	if ret != 1 || check == nil {
+		return "", fmt.Errorf(C.GoString(C.get_error(rtloader)))
+	}
+	defer C.rtloader_decref(rtloader, check)
+
+	checkResultStr := C.run_check(rtloader, check)
+	defer C._free(unsafe.Pointer(checkResultStr))
+
+	return C.GoString(checkResultStr), fetchError()
+}
+
+type checkRunStats struct {
+	runs     int
+	wallTime time.Duration
+	cpuTime  time.Duration
+	alloc    int
+	freed    int
+}
+
+func runAllocCheck(runs int) (*checkRunStats, error) {
+	var module *C.rtloader_pyobject_t
+	var class *C.rtloader_pyobject_t
+	var check *C.rtloader_pyobject_t
+
+	runtime.LockOSThread()
+	state := C.ensure_gil(rtloader)
+	defer func() {
+		C.release_gil(rtloader, state)
+		runtime.UnlockOSThread()
+	}()
+
+	classStr := (*C.char)(helpers.TrackedCString("alloc_check"))
+	defer C._free(unsafe.Pointer(classStr))
+
+	ret := C.get_class(rtloader, classStr, &module, &class)
+	if ret != 1 || module == nil || class == nil {
+		return nil, fmt.Errorf(C.GoString(C.get_error(rtloader)))
+	}
+	defer C.rtloader_decref(rtloader, module)
+	defer C.rtloader_decref(rtloader, class)
+
+	emptyStr := (*C.char)(helpers.TrackedCString(""))
+	defer C._free(unsafe.Pointer(emptyStr))
+	instanceStr := (*C.char)(helpers.TrackedCString("{}"))
+	defer C._free(unsafe.Pointer(instanceStr))
+	checkIDStr := (*C.char)(helpers.TrackedCString("checkID"))
+	defer C._free(unsafe.Pointer(checkIDStr))
+
+	ret = C.get_check(rtloader, class, emptyStr, instanceStr, checkIDStr, classStr, &check)
+	if ret != 1 || check == nil {
+		return nil, fmt.Errorf(C.GoString(C.get_error(rtloader)))
+	}
+	defer C.rtloader_decref(rtloader, check)
+
+	var stats C.check_run_stats_t
+	if C.get_check_run_stats(rtloader, check, &stats) != 0 {
+		return nil, fmt.Errorf("get_check_run_stats returned statistics before the first run")
+	}
+
+	for i := 0; i < runs; i++ {
+		checkResultStr := C.run_check(rtloader, check)
+		C._free(unsafe.Pointer(checkResultStr))
+		if err := fetchError(); err != nil {
+			return nil, err
+		}
+	}
+
+	if C.get_check_run_stats(rtloader, check, &stats) != 1 {
+		return nil, fmt.Errorf("get_check_run_stats returned no statistics")
+	}
+	return &checkRunStats{
+		runs:     int(stats.runs),
+		wallTime: time.Duration(stats.wall_time_ns),
+		cpuTime:  time.Duration(stats.cpu_time_ns),
+		alloc:    int(stats.alloc),
+		freed:    int(stats.freed),
+	}, nil
+}
+
+// profileCheck runs the `name` check `runs` times with the profiler sampling its stack
+// every `interval`, returning the profile of the check.
+func profileCheck(name string, runs int, interval time.Duration) (string, error) {
+	var module *C.rtloader_pyobject_t
+	var class *C.rtloader_pyobject_t
+	var check *C.rtloader_pyobject_t
+
+	if C.start_check_profiler(rtloader, C.int(interval.Milliseconds())) != 1 {
+		return "", fmt.Errorf(C.GoString(C.get_error(rtloader)))
+	}
+	defer C.stop_check_profiler(rtloader)
+
+	runtime.LockOSThread()
+	state := C.ensure_gil(rtloader)
+	defer func() {
+		C.release_gil(rtloader, state)
+		runtime.UnlockOSThread()
+	}()
+
+	classStr := (*C.char)(helpers.TrackedCString(name))
+	defer C._free(unsafe.Pointer(classStr))
+
+	ret := C.get_class(rtloader, classStr, &module, &class)
+	if ret != 1 || module == nil || class == nil {
+		return "", fmt.Errorf(C.GoString(C.get_error(rtloader)))
+	}
+	defer C.rtloader_decref(rtloader, module)
+	defer C.rtloader_decref(rtloader, class)
+
+	emptyStr := (*C.char)(helpers.TrackedCString(""))
+	defer C._free(unsafe.Pointer(emptyStr))
+	instanceStr := (*C.char)(helpers.TrackedCString("{}"))
+	defer C._free(unsafe.Pointer(instanceStr))
+	checkIDStr := (*C.char)(helpers.TrackedCString("checkID"))
+	defer C._free(unsafe.Pointer(checkIDStr))
+
+	ret = C.get_check(rtloader, class, emptyStr, instanceStr, checkIDStr, classStr, &check)
+	if ret != 1 || check == nil {
+		return "", fmt.Errorf(C.GoString(C.get_error(rtloader)))
+	}
+	defer C.rtloader_decref(rtloader, check)
+
+	for i := 0; i < runs; i++ {
+		checkResultStr := C.run_check(rtloader, check)
+		C._free(unsafe.Pointer(checkResultStr))
+		if err := fetchError(); err != nil {
+			return "", err
+		}
+	}
+
+	profile := C.get_check_profile(rtloader, check)
+	if profile == nil {
+		return "", fmt.Errorf("get_check_profile returned no samples")
+	}
+	defer C._free(unsafe.Pointer(profile))
+
+	// the samples are only returned once
+	if again := C.get_check_profile(rtloader, check); again != nil {
+		C._free(unsafe.Pointer(again))
+		return "", fmt.Errorf("get_check_profile returned the same samples twice")
+	}
+
+	return C.GoString(profile), nil
+}
+
+type poolCheckOutput struct {
+	CheckID string `json:"check_id"`
+	Created int    `json:"created"`
+	Runs    int    `json:"runs"`
+	Scans   int    `json:"scans"`
+}
+
+// loadPoolChecks loads and runs the pool_check check `loads` times with the same configuration,
+// returning the output of each check and the time spent in `get_check`.
+func loadPoolChecks(loads int, poolSize int, instance string) ([]poolCheckOutput, []time.Duration, error) {
+	runtime.LockOSThread()
+	state := C.ensure_gil(rtloader)
+	defer func() {
+		C.set_check_pool_size(rtloader, 0)
+		C.release_gil(rtloader, state)
+		runtime.UnlockOSThread()
+	}()
+
+	C.set_check_pool_size(rtloader, C.int(poolSize))
+
+	classStr := (*C.char)(helpers.TrackedCString("pool_check"))
+	defer C._free(unsafe.Pointer(classStr))
+	emptyStr := (*C.char)(helpers.TrackedCString(""))
+	defer C._free(unsafe.Pointer(emptyStr))
+	instanceStr := (*C.char)(helpers.TrackedCString(instance))
+	defer C._free(unsafe.Pointer(instanceStr))
+
+	outputs := make([]poolCheckOutput, 0, loads)
+	durations := make([]time.Duration, 0, loads)
+	for i := 0; i < loads; i++ {
+		var module *C.rtloader_pyobject_t
+		var class *C.rtloader_pyobject_t
+		var check *C.rtloader_pyobject_t
+
+		ret := C.get_class(rtloader, classStr, &module, &class)
+		if ret != 1 || module == nil || class == nil {
+			return nil, nil, fmt.Errorf(C.GoString(C.get_error(rtloader)))
+		}
+
+		checkIDStr := (*C.char)(helpers.TrackedCString(fmt.Sprintf("pool_check:%d", i)))
+		start := time.Now()
+		ret = C.get_check(rtloader, class, emptyStr, instanceStr, checkIDStr, classStr, &check)
+		durations = append(durations, time.Since(start))
+		C._free(unsafe.Pointer(checkIDStr))
+		C.rtloader_decref(rtloader, class)
+		C.rtloader_decref(rtloader, module)
+		if ret != 1 || check == nil {
+			return nil, nil, fmt.Errorf(C.GoString(C.get_error(rtloader)))
+		}
+
+		checkResultStr := C.run_check(rtloader, check)
+		res := C.GoString(checkResultStr)
+		C._free(unsafe.Pointer(checkResultStr))
+		C.rtloader_decref(rtloader, check)
+		if err := fetchError(); err != nil {
+			return nil, nil, err
+		}
+
+		var output poolCheckOutput
+		if err := json.Unmarshal([]byte(res), &output); err != nil {
+			return nil, nil, err
+		}
+		outputs = append(outputs, output)
+	}
+
+	return outputs, durations, nil
+}
+
 func getIntegrationList() ([]string, error) {
 	runtime.LockOSThread()
 	state := C.ensure_gil(rtloader)
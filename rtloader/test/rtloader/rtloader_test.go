@@ -6,11 +6,14 @@
 package testrtloader
 
 import (
+	"encoding/json"
 	"fmt"
 	"os"
 	"reflect"
+	"strconv"
 	"strings"
 	"testing"
+	"time"
 
 	common "github.com/DataDog/datadog-agent/rtloader/test/common"
 	"github.com/DataDog/datadog-agent/rtloader/test/helpers"
@@ -179,6 +182,234 @@ func TestGetCheckWarnings(t *testing.T) {
 	helpers.AssertMemoryUsage(t)
 }
 
+type configCheckOutput struct {
+	InitConfig      map[string]interface{} `json:"init_config"`
+	Instance        map[string]interface{} `json:"instance"`
+	LoadConfigCalls int                    `json:"load_config_calls"`
+}
+
+func TestGetCheckConfigParsing(t *testing.T) {
+	if common.UsingTwo {
+		t.Skip("parsed configurations are only shared with python3")
+	}
+
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	calls := -1
+	for _, tc := range []struct {
+		initConfig string
+		instance   string
+		expected   configCheckOutput
+		parsed     int
+	}{
+		// the first check sets the baseline of the number of calls to load_config
+		{"foo: bar", "host: a", configCheckOutput{map[string]interface{}{"foo": "bar"}, map[string]interface{}{"host": "a"}, 0}, 0},
+		// init_config is shared, JSON instances don't need load_config
+		{"foo: bar", "{\"host\": \"b\", \"port\": 80}", configCheckOutput{map[string]interface{}{"foo": "bar"}, map[string]interface{}{"host": "b", "port": 80.0}, 0}, 0},
+		{"foo: bar", " {\"hosts\": [\"c\"]}", configCheckOutput{map[string]interface{}{"foo": "bar"}, map[string]interface{}{"hosts": []interface{}{"c"}}, 0}, 0},
+		{"foo: bar", "host: a", configCheckOutput{map[string]interface{}{"foo": "bar"}, map[string]interface{}{"host": "a"}, 0}, 1},
+		// a different init_config is parsed
+		{"foo: baz", "{\"host\": \"d\"}", configCheckOutput{map[string]interface{}{"foo": "baz"}, map[string]interface{}{"host": "d"}, 0}, 1},
+		// YAML doesn't read 1e5 as a float, the instance goes through load_config
+		{"foo: baz", "{\"ratio\": 1e5}", configCheckOutput{map[string]interface{}{"foo": "baz"}, map[string]interface{}{"ratio": "1e5"}, 0}, 1},
+		{"foo: baz", "{\"ratio\": 1e5}", configCheckOutput{map[string]interface{}{"foo": "baz"}, map[string]interface{}{"ratio": "1e5"}, 0}, 1},
+	} {
+		res, err := runConfigCheck(tc.initConfig, tc.instance)
+		if err != nil {
+			t.Fatal(err)
+		}
+
+		var output configCheckOutput
+		if err := json.Unmarshal([]byte(res), &output); err != nil {
+			t.Fatal(err)
+		}
+
+		// every check gets its own copy of init_config
+		tc.expected.InitConfig["created"] = 1.0
+		if !reflect.DeepEqual(tc.expected.InitConfig, output.InitConfig) {
+			t.Fatalf("Expected init_config %v, got %v", tc.expected.InitConfig, output.InitConfig)
+		}
+		if !reflect.DeepEqual(tc.expected.Instance, output.Instance) {
+			t.Fatalf("Expected instance %v, got %v", tc.expected.Instance, output.Instance)
+		}
+		if calls != -1 && output.LoadConfigCalls-calls != tc.parsed {
+			t.Fatalf("Expected %d calls to load_config for %q/%q, got %d", tc.parsed, tc.initConfig, tc.instance, output.LoadConfigCalls-calls)
+		}
+		calls = output.LoadConfigCalls
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestGetCheckRunStats(t *testing.T) {
+	if common.UsingTwo {
+		t.Skip("check run statistics are only available with python3")
+	}
+
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	stats, err := runAllocCheck(2)
+	if err != nil {
+		t.Fatal(err)
+	}
+
+	// see rtloader/test/python/alloc_check
+	allocSize := 10 * 1024 * 1024
+	cpuTime := 50 * time.Millisecond
+	sleepTime := 50 * time.Millisecond
+
+	if stats.runs != 2 {
+		t.Fatalf("Expected 2 runs, got %d", stats.runs)
+	}
+	// the buffer of the first run is freed by the second one
+	if stats.alloc < allocSize || stats.freed < allocSize {
+		t.Fatalf("Expected at least %d bytes allocated and freed, got %d and %d", allocSize, stats.alloc, stats.freed)
+	}
+	if stats.alloc > 2*allocSize {
+		t.Fatalf("Expected about %d bytes allocated, got %d", allocSize, stats.alloc)
+	}
+	if stats.cpuTime < cpuTime {
+		t.Fatalf("Expected at least %s of CPU time, got %s", cpuTime, stats.cpuTime)
+	}
+	if stats.wallTime < cpuTime+sleepTime {
+		t.Fatalf("Expected at least %s of wall time, got %s", cpuTime+sleepTime, stats.wallTime)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestCheckProfiler(t *testing.T) {
+	if common.UsingTwo {
+		t.Skip("the check profiler is only available with python3")
+	}
+
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	profile, err := profileCheck("busy_check", 3, 5*time.Millisecond)
+	if err != nil {
+		t.Fatal(err)
+	}
+
+	// see rtloader/test/python/busy_check, most of the samples are taken in `busy_loop`
+	var top string
+	total, topSamples := 0, 0
+	for _, line := range strings.Split(strings.TrimSpace(profile), "\n") {
+		idx := strings.LastIndex(line, " ")
+		samples, err := strconv.Atoi(line[idx+1:])
+		if err != nil {
+			t.Fatalf("Unexpected profile line %q: %v", line, err)
+		}
+		if !strings.HasPrefix(line, "run (") {
+			t.Fatalf("Expected stacks to start from the run method of the check, got %q", line)
+		}
+		total += samples
+		if samples > topSamples {
+			top, topSamples = line[:idx], samples
+		}
+	}
+	if frames := strings.Split(top, ";"); len(frames) != 2 || !strings.HasPrefix(frames[1], "busy_loop (") {
+		t.Fatalf("Expected busy_loop to be the most sampled function, got %q in:\n%s", top, profile)
+	}
+	if topSamples*2 < total {
+		t.Fatalf("Expected busy_loop to get most of the samples, got %d out of %d in:\n%s", topSamples, total, profile)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestCheckProfilerTruncated(t *testing.T) {
+	if common.UsingTwo {
+		t.Skip("the check profiler is only available with python3")
+	}
+
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	profile, err := profileCheck("deep_check", 2, 5*time.Millisecond)
+	if err != nil {
+		t.Fatal(err)
+	}
+
+	// see rtloader/test/python/deep_check, the samples are taken deeper than the frames kept
+	truncated := 0
+	for _, line := range strings.Split(strings.TrimSpace(profile), "\n") {
+		stack := line[:strings.LastIndex(line, " ")]
+		if !strings.HasPrefix(stack, "run (") {
+			t.Fatalf("Expected stacks to start from the run method of the check, got %q", line)
+		}
+		if strings.HasSuffix(stack, ";[truncated]") {
+			truncated++
+			// the frames kept, and the marker
+			if frames := strings.Split(stack, ";"); len(frames) != 129 {
+				t.Fatalf("Expected truncated stacks to keep 128 frames, got %d in %q", len(frames)-1, line)
+			}
+		}
+	}
+	if truncated == 0 {
+		t.Fatalf("Expected truncated stacks in:\n%s", profile)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestGetCheckPool(t *testing.T) {
+	if common.UsingTwo {
+		t.Skip("the check pool is only available with python3")
+	}
+
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	// see rtloader/test/python/pool_check
+	initTime := 50 * time.Millisecond
+
+	// a configuration unique to this run, the pool outlives the test
+	instance := fmt.Sprintf("{\"run\": %d}", time.Now().UnixNano())
+	outputs, durations, err := loadPoolChecks(5, 2, instance)
+	if err != nil {
+		t.Fatal(err)
+	}
+
+	// the class is only looked up once in the module
+	if scans := outputs[len(outputs)-1].Scans; scans != 1 {
+		t.Fatalf("Expected the module to be scanned once, got %d", scans)
+	}
+
+	// 1st: built, the configuration is recorded
+	// 2nd: built along with 2 spare instances
+	// 3rd and 4th: taken from the pool
+	// 5th: built along with 2 spare instances
+	created := []int{0, 3, 3, 3, 6}
+	for i, output := range outputs {
+		if output.CheckID != fmt.Sprintf("pool_check:%d", i) || output.Runs != 1 {
+			t.Fatalf("Expected a fresh check instance with check_id pool_check:%d, got %+v", i, output)
+		}
+		if output.Created-outputs[0].Created != created[i] {
+			t.Fatalf("Expected %d more instances created for check %d, got %d", created[i], i, output.Created-outputs[0].Created)
+		}
+	}
+	for _, i := range []int{2, 3} {
+		if durations[i] >= initTime {
+			t.Fatalf("Expected check %d to be taken from the pool, took %s", i, durations[i])
+		}
+	}
+	for _, i := range []int{0, 1, 4} {
+		if durations[i] < initTime {
+			t.Fatalf("Expected check %d to be built, took %s", i, durations[i])
+		}
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
 func TestGetIntegrationsList(t *testing.T) {
 	// Reset memory counters
 	helpers.ResetMemoryStats()
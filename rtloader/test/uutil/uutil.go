@@ -21,10 +21,16 @@ import (
 #include "datadog_agent_rtloader.h"
 
 extern void getSubprocessOutput(char **, char **, char **, char **, int*, char **);
+extern long startSubprocessStream(char **, char **, double, char **);
+extern int readSubprocessStream(long, char *, int, char **);
+extern int closeSubprocessStream(long, char **, int *);
 
 static void init_utilTests(rtloader_t *rtloader) {
    set_cgo_free_cb(rtloader, _free);
    set_get_subprocess_output_cb(rtloader, getSubprocessOutput);
+   set_start_subprocess_stream_cb(rtloader, startSubprocessStream);
+   set_read_subprocess_stream_cb(rtloader, readSubprocessStream);
+   set_close_subprocess_stream_cb(rtloader, closeSubprocessStream);
 }
 */
 import "C"
@@ -124,3 +130,40 @@ func getSubprocessOutput(cargs **C.char, cenv **C.char, cstdout **C.char, cstder
 		*cexception = (*C.char)(helpers.TrackedCString(exception))
 	}
 }
+
+//export startSubprocessStream
+func startSubprocessStream(cargs **C.char, cenv **C.char, ctimeout C.double, cexception **C.char) C.long {
+	args = charArrayToSlice(cargs)
+	env = charArrayToSlice(cenv)
+	timeout = float64(ctimeout)
+	if setException {
+		*cexception = (*C.char)(helpers.TrackedCString(exception))
+		return 0
+	}
+	streamOffset = 0
+	return 1
+}
+
+//export readSubprocessStream
+func readSubprocessStream(id C.long, cbuffer *C.char, cbufferSize C.int, cexception **C.char) C.int {
+	if readException {
+		*cexception = (*C.char)(helpers.TrackedCString(exception))
+		return -1
+	}
+	streamReads++
+	buffer := unsafe.Slice((*byte)(unsafe.Pointer(cbuffer)), int(cbufferSize))
+	n := copy(buffer, stdout[streamOffset:])
+	streamOffset += n
+	return C.int(n)
+}
+
+//export closeSubprocessStream
+func closeSubprocessStream(id C.long, cstderr **C.char, cretCode *C.int) C.int {
+	streamCloses++
+	*cstderr = (*C.char)(helpers.TrackedCString(stderr))
+	*cretCode = C.int(retCode)
+	if timedOut {
+		return 1
+	}
+	return 0
+}
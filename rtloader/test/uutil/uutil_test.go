@@ -9,19 +9,26 @@ import (
 	"fmt"
 	"os"
 	"reflect"
+	"strings"
 	"testing"
 
 	"github.com/DataDog/datadog-agent/rtloader/test/helpers"
 )
 
 var (
-	stdout       string
-	stderr       string
-	setException bool
-	exception    string
-	retCode      int
-	args         []string
-	env          []string
+	stdout        string
+	stderr        string
+	setException  bool
+	exception     string
+	retCode       int
+	args          []string
+	env           []string
+	timeout       float64
+	timedOut      bool
+	readException bool
+	streamOffset  int
+	streamReads   int
+	streamCloses  int
 )
 
 func resetTest() {
@@ -31,6 +38,9 @@ func resetTest() {
 	exception = ""
 	retCode = 0
 	args = nil
+	timeout = 0
+	timedOut = false
+	readException = false
 }
 
 func TestMain(m *testing.M) {
@@ -315,3 +325,179 @@ func TestGetSubprocessOutputEnv(t *testing.T) {
 	// Check for leaks
 	helpers.AssertMemoryUsage(t)
 }
+
+func TestSubprocessStream(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	stdout = strings.Repeat("0123456789", 1000)
+	stderr = "some error"
+	retCode = 21
+	streamReads = 0
+	streamCloses = 0
+	code := fmt.Sprintf(`
+	stream = _util.subprocess_stream(["ls"], chunk_size=4096)
+	before = (stream.returncode, stream.stderr)
+	chunks = list(stream)
+	with open(r'%s', 'w') as f:
+		f.write("{} | {} | {} | {} | {} | {}".format(before, [len(c) for c in chunks], len(b"".join(chunks)), stream.stderr, stream.returncode, list(stream)))
+	`, tmpfile.Name())
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "(None, None) | [4096, 4096, 1808] | 10000 | some error | 21 | []" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+	if streamReads != 4 || streamCloses != 1 {
+		t.Errorf("Unexpected reads and closes: %d, %d", streamReads, streamCloses)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestSubprocessStreamArgs(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	code := fmt.Sprintf(`list(_util.subprocess_stream(["bash", "-c", "echo $BAZ"], {'FOO': 'BAR', 'BAZ': 'QUX'}, timeout=2.5))`)
+	_, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if !reflect.DeepEqual(args, []string{"bash", "-c", "echo $BAZ"}) {
+		t.Errorf("Unexpected args value: '%v'", args)
+	}
+	if !reflect.DeepEqual(env, []string{"FOO=BAR", "BAZ=QUX"}) {
+		t.Errorf("Unexpected env value: '%v'", env)
+	}
+	if timeout != 2.5 {
+		t.Errorf("Unexpected timeout value: '%v'", timeout)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestSubprocessStreamTimeout(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	stdout = "partial output"
+	timedOut = true
+	code := fmt.Sprintf(`
+	stream = _util.subprocess_stream(["ls"], timeout=1)
+	chunks = []
+	try:
+		for chunk in stream:
+			chunks.append(chunk)
+	except _util.SubprocessTimeoutError as e:
+		with open(r'%s', 'w') as f:
+			f.write("{} | {}".format(b"".join(chunks).decode(), e))
+	`, tmpfile.Name())
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "partial output | subprocess_stream: the subprocess reached its deadline." {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestSubprocessStreamClose(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	stdout = strings.Repeat("y\n", 1000)
+	retCode = -1
+	streamReads = 0
+	streamCloses = 0
+	code := fmt.Sprintf(`
+	stream = _util.subprocess_stream(["yes"], chunk_size=10)
+	first = next(stream)
+	stream.close()
+	stream.close()
+	with open(r'%s', 'w') as f:
+		f.write("{} | {} | {}".format(first.decode().count("y"), stream.returncode, list(stream)))
+	del stream
+	_util.subprocess_stream(["yes"])
+	`, tmpfile.Name())
+	out, err := run(code)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "5 | -1 | []" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+	// the second stream is closed when it's dropped
+	if streamReads != 1 || streamCloses != 2 {
+		t.Errorf("Unexpected reads and closes: %d, %d", streamReads, streamCloses)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestSubprocessStreamRaiseException(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	setException = true
+	exception = "THIS IS AN ERROR FROM GO"
+	out, err := run(`_util.subprocess_stream(["ls"])`)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "Exception: THIS IS AN ERROR FROM GO" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestSubprocessStreamReadException(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	readException = true
+	exception = "THIS IS AN ERROR FROM GO"
+	out, err := run(`list(_util.subprocess_stream(["ls"]))`)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if out != "Exception: THIS IS AN ERROR FROM GO" {
+		t.Errorf("Unexpected printed value: '%s'", out)
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
+
+func TestSubprocessStreamWrongArgs(t *testing.T) {
+	// Reset memory counters
+	helpers.ResetMemoryStats()
+
+	for code, expected := range map[string]string{
+		`_util.subprocess_stream("ls")`:                   "TypeError: command args is not a list",
+		`_util.subprocess_stream([])`:                     "TypeError: invalid command: empty list",
+		`_util.subprocess_stream(["ls"], chunk_size=0)`:   "ValueError: chunk_size must be positive",
+		`_util.subprocess_stream(["ls"], timeout=0)`:      "ValueError: timeout must be positive",
+		`_util.subprocess_stream(["ls"], env={'FOO': 1})`: "TypeError: env value is not a string",
+	} {
+		out, err := run(code)
+		if err != nil {
+			t.Fatal(err)
+		}
+		if out != expected {
+			t.Errorf("Unexpected printed value for %s: '%s'", code, out)
+		}
+	}
+
+	// Check for leaks
+	helpers.AssertMemoryUsage(t)
+}
@@ -19,8 +19,24 @@
 #include "util.h"
 
 #include <algorithm>
+#include <cctype>
 #include <sstream>
 
+#include <sys/stat.h>
+
+// Number of parsed configuration sections kept by `Three::_loadSharedConfig`, they're all
+// released when the limit is reached.
+#define MAX_PARSED_CONFIGS 128
+// Number of check configurations kept by `Three::_fillCheckPool`, they're all released along
+// with their spare instances when the limit is reached.
+#define MAX_CHECK_POOL_CONFIGS 128
+// Number of distinct stacks kept in the profile of a check, the samples of the other stacks are
+// counted under `PROFILE_OTHER_STACKS`.
+#define MAX_PROFILE_STACKS 1024
+#define PROFILE_OTHER_STACKS "[other]"
+// Number of frames kept in a sampled stack, from the `run` method of the check.
+#define MAX_PROFILE_DEPTH 128
+
 extern "C" DATADOG_AGENT_RTLOADER_API RtLoader *create(const char *python_home, const char *python_exe,
                                                        cb_memory_tracker_t memtrack_cb)
 {
@@ -37,6 +53,17 @@ Three::Three(const char *python_home, const char *python_exe, cb_memory_tracker_
     , _pythonHome(NULL)
     , _pythonExe(NULL)
     , _baseClass(NULL)
+    , _jsonLoads(NULL)
+    , _parsedConfigs()
+    , _checksRunStats()
+    , _runningChecks()
+    , _profilerRunning(false)
+    , _profiledChecks(0)
+    , _profilerThread()
+    , _profilerStop(false)
+    , _checkClasses()
+    , _checkPool()
+    , _checkPoolSize(0)
     , _pythonPaths()
     , _pymallocPrev{ 0 }
     , _pymemInuse(0)
@@ -54,7 +81,13 @@ Three::~Three()
 {
     // For more information on why Py_Finalize() isn't called here please
     // refer to the header file or the doxygen documentation.
+    stopCheckProfiler();
     PyEval_RestoreThread(_threadState);
+    _clearParsedConfigs();
+    _clearCheckPool();
+    _clearCheckClasses();
+    _clearCheckRunStats(true);
+    Py_XDECREF(_jsonLoads);
     Py_XDECREF(_baseClass);
 }
 
@@ -92,6 +125,8 @@ void Three::initPythonExe(const char *python_exe)
 
 bool Three::init()
 {
+    PyObject *json = NULL;
+
     // we want the checks to be runned with the standard encoding utf-8
     // setting this var to 1 forces the UTF8 mode for CPython >= 3.7
     // See:
@@ -151,8 +186,18 @@ bool Three::init()
     _baseClass = _importFrom("datadog_checks.checks", "AgentCheck");
     if (_baseClass == NULL) {
         setError("could not import base class: " + std::string(getError()));
+        goto done;
     }
 
+    // the JSON fast path of `_loadInstance` is optional, instances are parsed with
+    // `load_config` when `json.loads` isn't available
+    json = PyImport_ImportModule("json");
+    if (json != NULL) {
+        _jsonLoads = PyObject_GetAttrString(json, "loads");
+        Py_DECREF(json);
+    }
+    PyErr_Clear();
+
 done:
     // save thread state and release the GIL
     _threadState = PyEval_SaveThread();
@@ -262,7 +307,7 @@ bool Three::getClass(const char *module, RtLoaderPyObject *&pyModule, RtLoaderPy
         return false;
     }
 
-    obj_class = _findSubclassOf(_baseClass, obj_module);
+    obj_class = _findCheckClass(module, obj_module);
     if (obj_class == NULL) {
         // `_findSubclassOf` does not set the interpreter's error flag, but leaves an error on rtloader
         std::ostringstream err;
@@ -281,8 +326,73 @@ bool Three::getCheck(RtLoaderPyObject *py_class, const char *init_config_str, co
                      const char *check_id_str, const char *check_name, const char *agent_config_str,
                      RtLoaderPyObject *&check)
 {
-
     PyObject *klass = reinterpret_cast<PyObject *>(py_class);
+    PyObject *py_check = NULL;
+    PyObject *check_id = NULL;
+
+    if (_checkPoolSize <= 0) {
+        if (!_checkPool.empty()) {
+            _clearCheckPool();
+        }
+        py_check = _newCheck(klass, init_config_str, instance_str, check_name, agent_config_str);
+    } else {
+        CheckPoolKey key(klass, std::vector<std::string>());
+        key.second.push_back(check_name);
+        key.second.push_back(init_config_str);
+        key.second.push_back(instance_str);
+        if (agent_config_str != NULL) {
+            key.second.push_back(agent_config_str);
+        }
+
+        CheckPool::iterator it = _checkPool.find(key);
+        if (it != _checkPool.end() && !it->second.empty()) {
+            // steals the reference held by the pool
+            py_check = it->second.back();
+            it->second.pop_back();
+        } else {
+            py_check = _newCheck(klass, init_config_str, instance_str, check_name, agent_config_str);
+            if (py_check != NULL) {
+                _fillCheckPool(key, init_config_str, instance_str, check_name, agent_config_str);
+            }
+        }
+    }
+    if (py_check == NULL) {
+        return false;
+    }
+
+    if (check_id_str != NULL && strlen(check_id_str) != 0) {
+        check_id = PyUnicode_FromString(check_id_str);
+        if (check_id == NULL) {
+            std::ostringstream err;
+            err << "error could not set check_id: " << check_id_str;
+            setError(err.str());
+            Py_XDECREF(py_check);
+            return false;
+        }
+
+        if (PyObject_SetAttrString(py_check, "check_id", check_id) != 0) {
+            setError("error could not set 'check_id' attr: " + _fetchPythonError());
+            Py_XDECREF(check_id);
+            Py_XDECREF(py_check);
+            return false;
+        }
+        Py_XDECREF(check_id);
+    }
+
+    check = reinterpret_cast<RtLoaderPyObject *>(py_check);
+    return true;
+}
+
+void Three::setCheckPoolSize(int size)
+{
+    // the spare instances are released by the next call to `getCheck`, with the GIL held
+    _checkPoolSize = size;
+}
+
+// return new reference
+PyObject *Three::_newCheck(PyObject *klass, const char *init_config_str, const char *instance_str,
+                           const char *check_name, const char *agent_config_str)
+{
     PyObject *agent_config = NULL;
     PyObject *init_config = NULL;
     PyObject *instance = NULL;
@@ -290,14 +400,10 @@ bool Three::getCheck(RtLoaderPyObject *py_class, const char *init_config_str, co
     PyObject *py_check = NULL;
     PyObject *args = NULL;
     PyObject *kwargs = NULL;
-    PyObject *check_id = NULL;
     PyObject *name = NULL;
 
-    char load_config[] = "load_config";
-    char format[] = "(s)"; // use parentheses to force Tuple creation
-
-    // call `AgentCheck.load_config(init_config)`
-    init_config = PyObject_CallMethod(klass, load_config, format, init_config_str);
+    // call `AgentCheck.load_config(init_config)`, once for all the instances sharing it
+    init_config = _loadSharedConfig(klass, init_config_str);
     if (init_config == NULL) {
         setError("error parsing init_config: " + _fetchPythonError());
         goto done;
@@ -316,7 +422,7 @@ bool Three::getCheck(RtLoaderPyObject *py_class, const char *init_config_str, co
     }
 
     // call `AgentCheck.load_config(instance)`
-    instance = PyObject_CallMethod(klass, load_config, format, instance_str);
+    instance = _loadInstance(klass, instance_str);
     if (instance == NULL) {
         setError("error parsing instance: " + _fetchPythonError());
         goto done;
@@ -370,7 +476,7 @@ bool Three::getCheck(RtLoaderPyObject *py_class, const char *init_config_str, co
     }
 
     if (agent_config_str != NULL) {
-        agent_config = PyObject_CallMethod(klass, load_config, format, agent_config_str);
+        agent_config = _loadSharedConfig(klass, agent_config_str);
         if (agent_config == NULL) {
             setError("error parsing agent_config: " + _fetchPythonError());
             goto done;
@@ -389,26 +495,6 @@ bool Three::getCheck(RtLoaderPyObject *py_class, const char *init_config_str, co
     py_check = PyObject_Call(klass, args, kwargs);
     if (py_check == NULL) {
         setError(_fetchPythonError());
-        goto done;
-    }
-
-    if (check_id_str != NULL && strlen(check_id_str) != 0) {
-        check_id = PyUnicode_FromString(check_id_str);
-        if (check_id == NULL) {
-            std::ostringstream err;
-            err << "error could not set check_id: " << check_id_str;
-            setError(err.str());
-            Py_XDECREF(py_check);
-            py_check = NULL;
-            goto done;
-        }
-
-        if (PyObject_SetAttrString(py_check, "check_id", check_id) != 0) {
-            setError("error could not set 'check_id' attr: " + _fetchPythonError());
-            Py_XDECREF(py_check);
-            py_check = NULL;
-            goto done;
-        }
     }
 
 done:
@@ -416,19 +502,164 @@ done:
     // calling PyTuple_SetItem. More details are available in the comment above this PyTuple_SetItem
     // call
     Py_XDECREF(name);
-    Py_XDECREF(check_id);
     Py_XDECREF(init_config);
     Py_XDECREF(instances);
     Py_XDECREF(agent_config);
     Py_XDECREF(args);
     Py_XDECREF(kwargs);
 
-    if (py_check == NULL) {
-        return false;
+    return py_check;
+}
+
+void Three::_fillCheckPool(const CheckPoolKey &key, const char *init_config_str, const char *instance_str,
+                           const char *check_name, const char *agent_config_str)
+{
+    CheckPool::iterator it = _checkPool.find(key);
+    if (it == _checkPool.end()) {
+        if (_checkPool.size() >= MAX_CHECK_POOL_CONFIGS) {
+            _clearCheckPool();
+        }
+        // the key holds a reference to the class so its address can't be reused by another class
+        Py_INCREF(key.first);
+        _checkPool.insert(std::make_pair(key, std::vector<PyObject *>()));
+        return;
     }
 
-    check = reinterpret_cast<RtLoaderPyObject *>(py_check);
-    return true;
+    while (it->second.size() > static_cast<size_t>(_checkPoolSize)) {
+        Py_XDECREF(it->second.back());
+        it->second.pop_back();
+    }
+    while (it->second.size() < static_cast<size_t>(_checkPoolSize)) {
+        PyObject *py_check = _newCheck(key.first, init_config_str, instance_str, check_name, agent_config_str);
+        if (py_check == NULL) {
+            // not an error for the caller, which already got its instance
+            PyErr_Clear();
+            clearError();
+            return;
+        }
+        it->second.push_back(py_check);
+    }
+}
+
+void Three::_clearCheckPool()
+{
+    for (CheckPool::iterator it = _checkPool.begin(); it != _checkPool.end(); ++it) {
+        for (size_t i = 0; i < it->second.size(); i++) {
+            Py_XDECREF(it->second[i]);
+        }
+        Py_XDECREF(it->first.first);
+    }
+    _checkPool.clear();
+}
+
+// return new reference
+PyObject *Three::_loadSharedConfig(PyObject *klass, const char *config_str)
+{
+    char load_config[] = "load_config";
+    char format[] = "(s)"; // use parentheses to force Tuple creation
+
+    if (config_str == NULL) {
+        return PyObject_CallMethod(klass, load_config, format, config_str);
+    }
+
+    ParsedConfigKey key(klass, config_str);
+    ParsedConfigs::iterator it = _parsedConfigs.find(key);
+    if (it == _parsedConfigs.end()) {
+        PyObject *config = PyObject_CallMethod(klass, load_config, format, config_str);
+        if (config == NULL) {
+            return NULL;
+        }
+        if (_parsedConfigs.size() >= MAX_PARSED_CONFIGS) {
+            _clearParsedConfigs();
+        }
+        // the key holds a reference to the class so its address can't be reused by another class
+        Py_INCREF(klass);
+        it = _parsedConfigs.insert(std::make_pair(key, config)).first;
+    }
+
+    return copy_containers(it->second);
+}
+
+void Three::_clearParsedConfigs()
+{
+    for (ParsedConfigs::iterator it = _parsedConfigs.begin(); it != _parsedConfigs.end(); ++it) {
+        Py_XDECREF(it->first.first);
+        Py_XDECREF(it->second);
+    }
+    _parsedConfigs.clear();
+}
+
+// return new reference to the function implementing `load_config` for `klass`
+static PyObject *getLoadConfigFunc(PyObject *klass)
+{
+    PyObject *func = PyObject_GetAttrString(klass, "load_config");
+    if (func != NULL && PyMethod_Check(func)) {
+        // classmethod, compare the underlying functions
+        PyObject *unbound = PyMethod_GET_FUNCTION(func);
+        Py_INCREF(unbound);
+        Py_DECREF(func);
+        func = unbound;
+    }
+    return func;
+}
+
+// whether `obj`, as returned by `json.loads`, contains a float. YAML 1.1 doesn't read
+// JSON numbers with an exponent and no dot as floats, so such payloads are left to YAML.
+static bool containsFloat(PyObject *obj)
+{
+    if (PyFloat_Check(obj)) {
+        return true;
+    }
+
+    if (PyDict_Check(obj)) {
+        Py_ssize_t pos = 0;
+        PyObject *key = NULL, *value = NULL;
+        while (PyDict_Next(obj, &pos, &key, &value)) {
+            if (containsFloat(value)) {
+                return true;
+            }
+        }
+    } else if (PyList_Check(obj)) {
+        for (Py_ssize_t i = 0; i < PyList_GET_SIZE(obj); i++) {
+            if (containsFloat(PyList_GET_ITEM(obj, i))) {
+                return true;
+            }
+        }
+    }
+    return false;
+}
+
+// return new reference
+PyObject *Three::_loadInstance(PyObject *klass, const char *instance_str)
+{
+    char load_config[] = "load_config";
+    char format[] = "(s)"; // use parentheses to force Tuple creation
+
+    const char *payload = instance_str;
+    while (payload != NULL && isspace(static_cast<unsigned char>(*payload))) {
+        payload++;
+    }
+
+    // only JSON objects are worth trying, and only when `load_config` isn't overridden
+    if (_jsonLoads != NULL && payload != NULL && *payload == '{') {
+        PyObject *func = getLoadConfigFunc(klass);
+        PyObject *base_func = getLoadConfigFunc(_baseClass);
+        bool fast_path = func != NULL && func == base_func;
+        Py_XDECREF(func);
+        Py_XDECREF(base_func);
+
+        if (fast_path) {
+            PyObject *instance = PyObject_CallFunction(_jsonLoads, format, instance_str);
+            if (instance != NULL && PyDict_Check(instance) && !containsFloat(instance)) {
+                return instance;
+            }
+            Py_XDECREF(instance);
+        }
+        // the payload isn't JSON or can't use the fast path, let `load_config` handle it
+        PyErr_Clear();
+    }
+
+    return PyObject_CallMethod(klass, load_config, format, instance_str);
 }
 
 char *Three::runCheck(RtLoaderPyObject *check)
@@ -444,8 +675,25 @@ char *Three::runCheck(RtLoaderPyObject *check)
     char *ret = NULL;
     char run[] = "run";
     PyObject *result = NULL;
+    check_run_stats_t run_stats;
+    CheckProfile profile;
+    PyThreadState *tstate = NULL;
+
+    if (_profilerRunning) {
+        // let the profiler thread sample the stack of the current thread
+        tstate = PyThreadState_Get();
+        _runningChecks[tstate] = &profile;
+        _profiledChecks++;
+    }
 
+    check_run_stats_t *prev_run_stats = beginCheckRun(&run_stats);
     result = PyObject_CallMethod(py_check, run, NULL);
+    endCheckRun(&run_stats, prev_run_stats);
+
+    if (tstate != NULL) {
+        _runningChecks.erase(tstate);
+        _profiledChecks--;
+    }
     if (result == NULL || !PyUnicode_Check(result)) {
         setError("error invoking 'run' method: " + _fetchPythonError());
         goto done;
@@ -459,10 +707,213 @@ char *Three::runCheck(RtLoaderPyObject *check)
     }
 
 done:
+    _setCheckRunStats(py_check, run_stats, profile);
     Py_XDECREF(result);
     return ret;
 }
 
+// whether the statistics were recorded for `check` and not for a freed check at the same address
+static bool isSameCheck(PyObject *ref, PyObject *check)
+{
+    return ref == NULL || PyWeakref_GetObject(ref) == check;
+}
+
+// count `samples` more samples of `stack` in `profile`
+static void addProfileSamples(std::map<std::string, size_t> &profile, const std::string &stack, size_t samples)
+{
+    if (profile.size() >= MAX_PROFILE_STACKS && profile.find(stack) == profile.end()) {
+        profile[PROFILE_OTHER_STACKS] += samples;
+    } else {
+        profile[stack] += samples;
+    }
+}
+
+void Three::_setCheckRunStats(PyObject *check, const check_run_stats_t &run, const CheckProfile &profile)
+{
+    ChecksRunStats::iterator it = _checksRunStats.find(check);
+    if (it != _checksRunStats.end() && !isSameCheck(it->second.ref, check)) {
+        Py_XDECREF(it->second.ref);
+        _checksRunStats.erase(it);
+        it = _checksRunStats.end();
+    }
+
+    if (it == _checksRunStats.end()) {
+        // first run of the check, a good time to forget about the ones that were freed
+        _clearCheckRunStats();
+
+        CheckRunStats entry;
+        entry.ref = PyWeakref_NewRef(check, NULL);
+        if (entry.ref == NULL) {
+            PyErr_Clear();
+        }
+        entry.stats = check_run_stats_t();
+        it = _checksRunStats.insert(std::make_pair(check, entry)).first;
+    }
+
+    size_t runs = it->second.stats.runs + 1;
+    it->second.stats = run;
+    it->second.stats.runs = runs;
+
+    for (CheckProfile::const_iterator sample = profile.begin(); sample != profile.end(); ++sample) {
+        addProfileSamples(it->second.profile, sample->first, sample->second);
+    }
+}
+
+void Three::_clearCheckRunStats(bool all)
+{
+    ChecksRunStats::iterator it = _checksRunStats.begin();
+    while (it != _checksRunStats.end()) {
+        if (all || !isSameCheck(it->second.ref, it->first)) {
+            Py_XDECREF(it->second.ref);
+            it = _checksRunStats.erase(it);
+        } else {
+            ++it;
+        }
+    }
+}
+
+bool Three::getCheckRunStats(RtLoaderPyObject *check, check_run_stats_t &stats)
+{
+    PyObject *py_check = reinterpret_cast<PyObject *>(check);
+
+    ChecksRunStats::iterator it = _checksRunStats.find(py_check);
+    if (it == _checksRunStats.end() || !isSameCheck(it->second.ref, py_check)) {
+        return false;
+    }
+
+    stats = it->second.stats;
+    return true;
+}
+
+bool Three::startCheckProfiler(int interval_ms)
+{
+    if (interval_ms <= 0) {
+        setError("the sampling interval of the check profiler must be positive");
+        return false;
+    }
+    if (_profilerRunning.exchange(true)) {
+        setError("the check profiler is already running");
+        return false;
+    }
+
+    _profilerStop = false;
+    _profilerThread = std::thread(&Three::_runCheckProfiler, this, interval_ms);
+    return true;
+}
+
+void Three::stopCheckProfiler()
+{
+    if (!_profilerThread.joinable()) {
+        return;
+    }
+
+    {
+        std::lock_guard<std::mutex> lock(_profilerMutex);
+        _profilerStop = true;
+    }
+    _profilerCond.notify_all();
+    _profilerThread.join();
+    _profilerRunning = false;
+}
+
+void Three::_runCheckProfiler(int interval_ms)
+{
+    // keep the same thread state for all the samples
+    PyGILState_STATE gstate = PyGILState_Ensure();
+    PyThreadState *tstate = PyEval_SaveThread();
+
+    std::unique_lock<std::mutex> lock(_profilerMutex);
+    while (!_profilerCond.wait_for(lock, std::chrono::milliseconds(interval_ms), [this] { return _profilerStop; })) {
+        if (_profiledChecks == 0) {
+            continue;
+        }
+
+        lock.unlock();
+        PyEval_RestoreThread(tstate);
+        _sampleRunningChecks();
+        tstate = PyEval_SaveThread();
+        lock.lock();
+    }
+    lock.unlock();
+
+    PyEval_RestoreThread(tstate);
+    PyGILState_Release(gstate);
+}
+
+// return the name of the function run by a frame, along with its file and first line
+static std::string getFrameName(PyFrameObject *frame)
+{
+    PyCodeObject *code = PyFrame_GetCode(frame);
+    const char *name = PyUnicode_AsUTF8(code->co_name);
+    if (name == NULL) {
+        PyErr_Clear();
+        name = "?";
+    }
+    const char *filename = PyUnicode_AsUTF8(code->co_filename);
+    if (filename == NULL) {
+        PyErr_Clear();
+        filename = "?";
+    }
+
+    std::ostringstream ret;
+    ret << name << " (" << filename << ":" << code->co_firstlineno << ")";
+    Py_DECREF(code);
+    return ret.str();
+}
+
+void Three::_sampleRunningChecks()
+{
+    for (RunningChecks::iterator it = _runningChecks.begin(); it != _runningChecks.end(); ++it) {
+        // new refs, frames are listed from the innermost one
+        std::vector<PyFrameObject *> frames;
+        PyFrameObject *frame = PyThreadState_GetFrame(it->first);
+        while (frame != NULL) {
+            frames.push_back(frame);
+            frame = PyFrame_GetBack(frame);
+        }
+        if (frames.empty()) {
+            continue;
+        }
+
+        // the stack goes from the outermost frame, the `run` method of the check, and the deepest
+        // frames are dropped so that truncated stacks stay under their callers
+        size_t depth = std::min(frames.size(), static_cast<size_t>(MAX_PROFILE_DEPTH));
+        std::string stack;
+        for (size_t i = frames.size(); i > frames.size() - depth; --i) {
+            if (!stack.empty()) {
+                stack += ";";
+            }
+            stack += getFrameName(frames[i - 1]);
+        }
+        if (depth < frames.size()) {
+            stack += ";[truncated]";
+        }
+        for (std::vector<PyFrameObject *>::iterator f = frames.begin(); f != frames.end(); ++f) {
+            Py_DECREF(*f);
+        }
+        addProfileSamples(*it->second, stack, 1);
+    }
+}
+
+char *Three::getCheckProfile(RtLoaderPyObject *check)
+{
+    PyObject *py_check = reinterpret_cast<PyObject *>(check);
+
+    ChecksRunStats::iterator it = _checksRunStats.find(py_check);
+    if (it == _checksRunStats.end() || !isSameCheck(it->second.ref, py_check) || it->second.profile.empty()) {
+        return NULL;
+    }
+
+    std::ostringstream ret;
+    CheckProfile &profile = it->second.profile;
+    for (CheckProfile::iterator sample = profile.begin(); sample != profile.end(); ++sample) {
+        ret << sample->first << " " << sample->second << "\n";
+    }
+    profile.clear();
+
+    return strdupe(ret.str().c_str());
+}
+
 void Three::cancelCheck(RtLoaderPyObject *check)
 {
     if (check == NULL) {
@@ -703,6 +1154,76 @@ done:
     return klass;
 }
 
+// return the modification time of the file of a module, 0 if it has none
+static time_t getModuleMtime(PyObject *module)
+{
+    time_t mtime = 0;
+    PyObject *file = PyObject_GetAttrString(module, "__file__");
+    if (file == NULL) {
+        PyErr_Clear();
+        return mtime;
+    }
+
+    char *path = as_string(file);
+    Py_XDECREF(file);
+    if (path == NULL) {
+        PyErr_Clear();
+        return mtime;
+    }
+
+    struct stat st;
+    if (stat(path, &st) == 0) {
+        mtime = st.st_mtime;
+    }
+    ::_free(path);
+    return mtime;
+}
+
+// return new reference
+PyObject *Three::_findCheckClass(const char *name, PyObject *module)
+{
+    time_t mtime = getModuleMtime(module);
+
+    CheckClasses::iterator it = _checkClasses.find(name);
+    if (it != _checkClasses.end()) {
+        if (it->second.module == module && it->second.mtime == mtime) {
+            // like `_findSubclassOf`, don't return a class that was subclassed since
+            char func_name[] = "__subclasses__";
+            PyObject *children = PyObject_CallMethod(it->second.klass, func_name, NULL);
+            if (children != NULL && PyList_GET_SIZE(children) == 0) {
+                Py_XDECREF(children);
+                Py_INCREF(it->second.klass);
+                return it->second.klass;
+            }
+            Py_XDECREF(children);
+            PyErr_Clear();
+        }
+        Py_XDECREF(it->second.module);
+        Py_XDECREF(it->second.klass);
+        _checkClasses.erase(it);
+    }
+
+    PyObject *klass = _findSubclassOf(_baseClass, module);
+    if (klass == NULL) {
+        return NULL;
+    }
+
+    CheckClass checkClass = { module, klass, mtime };
+    Py_INCREF(module);
+    Py_INCREF(klass);
+    _checkClasses.insert(std::make_pair(std::string(name), checkClass));
+    return klass;
+}
+
+void Three::_clearCheckClasses()
+{
+    for (CheckClasses::iterator it = _checkClasses.begin(); it != _checkClasses.end(); ++it) {
+        Py_XDECREF(it->second.module);
+        Py_XDECREF(it->second.klass);
+    }
+    _checkClasses.clear();
+}
+
 std::string Three::_fetchPythonError() const
 {
     std::string ret_val = "";
@@ -900,6 +1421,16 @@ void Three::setGetConfigCb(cb_get_config_t cb)
     _set_get_config_cb(cb);
 }
 
+void Three::setGetConfigManyCb(cb_get_config_many_t cb)
+{
+    _set_get_config_many_cb(cb);
+}
+
+void Three::bumpConfigGeneration()
+{
+    _bump_config_generation();
+}
+
 void Three::setHeadersCb(cb_headers_t cb)
 {
     _set_headers_cb(cb);
@@ -935,6 +1466,11 @@ void Three::setSendLogCb(cb_send_log_t cb)
     _set_send_log_cb(cb);
 }
 
+void Three::setSendLogsCb(cb_send_logs_t cb)
+{
+    _set_send_logs_cb(cb);
+}
+
 void Three::setSetCheckMetadataCb(cb_set_check_metadata_t cb)
 {
     _set_set_check_metadata_cb(cb);
@@ -945,11 +1481,31 @@ void Three::setSetExternalTagsCb(cb_set_external_tags_t cb)
     _set_set_external_tags_cb(cb);
 }
 
+void Three::setSetExternalTagsManyCb(cb_set_external_tags_many_t cb)
+{
+    _set_set_external_tags_many_cb(cb);
+}
+
 void Three::setSubprocessOutputCb(cb_get_subprocess_output_t cb)
 {
     _set_get_subprocess_output_cb(cb);
 }
 
+void Three::setStartSubprocessStreamCb(cb_start_subprocess_stream_t cb)
+{
+    _set_start_subprocess_stream_cb(cb);
+}
+
+void Three::setReadSubprocessStreamCb(cb_read_subprocess_stream_t cb)
+{
+    _set_read_subprocess_stream_cb(cb);
+}
+
+void Three::setCloseSubprocessStreamCb(cb_close_subprocess_stream_t cb)
+{
+    _set_close_subprocess_stream_cb(cb);
+}
+
 void Three::setCGOFreeCb(cb_cgo_free_t cb)
 {
     _set_cgo_free_cb(cb);
@@ -980,11 +1536,26 @@ void Three::setReadPersistentCacheCb(cb_read_persistent_cache_t cb)
     _set_read_persistent_cache_cb(cb);
 }
 
+void Three::setWritePersistentCacheManyCb(cb_write_persistent_cache_many_t cb)
+{
+    _set_write_persistent_cache_many_cb(cb);
+}
+
+void Three::flushPersistentCache()
+{
+    _flush_persistent_cache();
+}
+
 void Three::setObfuscateSqlCb(cb_obfuscate_sql_t cb)
 {
     _set_obfuscate_sql_cb(cb);
 }
 
+void Three::setObfuscateSqlManyCb(cb_obfuscate_sql_many_t cb)
+{
+    _set_obfuscate_sql_many_cb(cb);
+}
+
 void Three::setObfuscateSqlExecPlanCb(cb_obfuscate_sql_exec_plan_t cb)
 {
     _set_obfuscate_sql_exec_plan_cb(cb);
@@ -14,9 +14,12 @@
 #endif
 
 #include <atomic>
+#include <condition_variable>
 #include <map>
 #include <mutex>
 #include <string>
+#include <thread>
+#include <utility>
 #include <vector>
 
 #include <Python.h>
@@ -67,11 +70,16 @@ public:
     bool getCheck(RtLoaderPyObject *py_class, const char *init_config_str, const char *instance_str,
                   const char *check_id_str, const char *check_name, const char *agent_config_str,
                   RtLoaderPyObject *&check);
+    void setCheckPoolSize(int size);
 
     char *runCheck(RtLoaderPyObject *check);
     void cancelCheck(RtLoaderPyObject *check);
     char **getCheckWarnings(RtLoaderPyObject *check);
     char *getCheckDiagnoses(RtLoaderPyObject *check);
+    bool getCheckRunStats(RtLoaderPyObject *check, check_run_stats_t &stats);
+    bool startCheckProfiler(int interval_ms);
+    void stopCheckProfiler();
+    char *getCheckProfile(RtLoaderPyObject *check);
     void decref(RtLoaderPyObject *obj);
     void incref(RtLoaderPyObject *obj);
     void setModuleAttrString(char *module, char *attr, char *value);
@@ -99,6 +107,8 @@ public:
     // datadog_agent API
     void setGetVersionCb(cb_get_version_t);
     void setGetConfigCb(cb_get_config_t);
+    void setGetConfigManyCb(cb_get_config_many_t);
+    void bumpConfigGeneration();
     void setHeadersCb(cb_headers_t);
     void setGetHostnameCb(cb_get_hostname_t);
     void setGetHostTagsCb(cb_get_host_tags_t);
@@ -106,11 +116,16 @@ public:
     void setGetTracemallocEnabledCb(cb_tracemalloc_enabled_t);
     void setLogCb(cb_log_t);
     void setSendLogCb(cb_send_log_t);
+    void setSendLogsCb(cb_send_logs_t);
     void setSetCheckMetadataCb(cb_set_check_metadata_t);
     void setSetExternalTagsCb(cb_set_external_tags_t);
+    void setSetExternalTagsManyCb(cb_set_external_tags_many_t);
     void setWritePersistentCacheCb(cb_write_persistent_cache_t);
     void setReadPersistentCacheCb(cb_read_persistent_cache_t);
+    void setWritePersistentCacheManyCb(cb_write_persistent_cache_many_t);
+    void flushPersistentCache();
     void setObfuscateSqlCb(cb_obfuscate_sql_t);
+    void setObfuscateSqlManyCb(cb_obfuscate_sql_many_t);
     void setObfuscateSqlExecPlanCb(cb_obfuscate_sql_exec_plan_t);
     void setGetProcessStartTimeCb(cb_get_process_start_time_t);
     void setObfuscateMongoDBStringCb(cb_obfuscate_mongodb_string_t);
@@ -120,6 +135,9 @@ public:
 
     // _util API
     virtual void setSubprocessOutputCb(cb_get_subprocess_output_t);
+    virtual void setStartSubprocessStreamCb(cb_start_subprocess_stream_t);
+    virtual void setReadSubprocessStreamCb(cb_read_subprocess_stream_t);
+    virtual void setCloseSubprocessStreamCb(cb_close_subprocess_stream_t);
 
     // CGO API
     void setCGOFreeCb(cb_cgo_free_t);
@@ -134,6 +152,39 @@ public:
     void setIsExcludedCb(cb_is_excluded_t);
 
 private:
+    /*! CheckProfile type prototype
+      \typedef CheckProfile defines a map of the number of samples by collapsed stack.
+
+      Stacks are collapsed into a single line, one frame per `;`-separated item starting from
+      the `run` method of the check, as expected by flame graph tools.
+    */
+    typedef std::map<std::string, size_t> CheckProfile;
+
+    /*! CheckClass type prototype
+      \typedef CheckClass holds the check class found in a module.
+    */
+    typedef struct {
+        PyObject *module;
+        PyObject *klass;
+        time_t mtime;
+    } CheckClass;
+
+    /*! CheckClasses type prototype
+      \typedef CheckClasses defines a map of check classes by module name.
+    */
+    typedef std::map<std::string, CheckClass> CheckClasses;
+
+    /*! CheckPoolKey type prototype
+      \typedef CheckPoolKey identifies the configuration of a check instance by its check class,
+      and its name, init_config, instance and agent configuration payloads.
+    */
+    typedef std::pair<PyObject *, std::vector<std::string> > CheckPoolKey;
+
+    /*! CheckPool type prototype
+      \typedef CheckPool defines a map of spare check instances by configuration.
+    */
+    typedef std::map<CheckPoolKey, std::vector<PyObject *> > CheckPool;
+
     //! initPythonHome member.
     /*!
       \brief This member function sets the Python home for the underlying python3 interpreter.
@@ -175,6 +226,150 @@ private:
     */
     PyObject *_findSubclassOf(PyObject *base, PyObject *module);
 
+    //! _findCheckClass member.
+    /*!
+      \brief This member function finds the check class of a check module, see `_findSubclassOf`.
+      \param name A C-string with the name of the module.
+      \param module A PyObject * pointer to the module.
+      \return A PyObject * pointer to the check class, or NULL in case of error.
+
+      The class found in a module is kept in `_checkClasses` along with the modification time of
+      the module file, so checks loaded again (e.g. by autodiscovery) don't scan the module.
+      The class is looked up again when the module object or its file changed. This function
+      returns a new reference to the underlying PyObject. In case of error, NULL is returned
+      with clean interpreter error flag.
+    */
+    PyObject *_findCheckClass(const char *name, PyObject *module);
+
+    //! _clearCheckClasses member.
+    /*!
+      \brief This member function releases the classes kept in `_checkClasses`.
+
+      The GIL must be held when calling this function.
+    */
+    void _clearCheckClasses();
+
+    //! _newCheck member.
+    /*!
+      \brief This member function instantiates a check class.
+      \param klass A PyObject * pointer to the check class.
+      \param init_config_str A C-string containing the YAML payload of the init_config.
+      \param instance_str A C-string containing the YAML payload of the instance.
+      \param check_name A C-string containing the check name.
+      \param agent_config_str A C-string containing the YAML payload of the agent configuration,
+      or NULL to leave it out of the constructor arguments.
+      \return A PyObject * pointer to the new check instance, or NULL in case of error.
+
+      In case of error, NULL is returned with the rtloader error set.
+    */
+    PyObject *_newCheck(PyObject *klass, const char *init_config_str, const char *instance_str,
+                        const char *check_name, const char *agent_config_str);
+
+    //! _fillCheckPool member.
+    /*!
+      \brief This member function constructs the spare instances of a check configuration.
+      \param key The check configuration, see `CheckPoolKey`.
+      \param init_config_str A C-string containing the YAML payload of the init_config.
+      \param instance_str A C-string containing the YAML payload of the instance.
+      \param check_name A C-string containing the check name.
+      \param agent_config_str A C-string containing the YAML payload of the agent configuration,
+      or NULL.
+
+      The first time a configuration is seen it is only recorded, spare instances are built the
+      next times, up to `_checkPoolSize`. Errors raised by the constructor stop the refill and
+      are cleared, the next call to `getCheck` reports them. The GIL must be held when calling
+      this function.
+    */
+    void _fillCheckPool(const CheckPoolKey &key, const char *init_config_str, const char *instance_str,
+                        const char *check_name, const char *agent_config_str);
+
+    //! _clearCheckPool member.
+    /*!
+      \brief This member function releases the spare instances kept in `_checkPool`.
+
+      The GIL must be held when calling this function.
+    */
+    void _clearCheckPool();
+
+    //! _loadSharedConfig member.
+    /*!
+      \brief This member function parses a configuration section shared by the instances
+      of a check class, like `init_config` or the agent configuration.
+      \param klass A PyObject * pointer to the check class whose `load_config` parses the
+      section.
+      \param config_str A C-string containing the YAML payload of the section.
+      \return A PyObject * pointer to the parsed section, or NULL in case of error.
+
+      The sections parsed by `load_config` are kept in `_parsedConfigs`, so a section shared
+      by many instances is parsed once. Each call returns a new reference to a copy of the
+      parsed section, checks are free to modify it. In case of error, NULL is returned with
+      the interpreter error flag set.
+    */
+    PyObject *_loadSharedConfig(PyObject *klass, const char *config_str);
+
+    //! _loadInstance member.
+    /*!
+      \brief This member function parses the payload of a check instance.
+      \param klass A PyObject * pointer to the check class whose `load_config` parses the
+      instance.
+      \param instance_str A C-string containing the YAML payload of the instance.
+      \return A PyObject * pointer to the parsed instance, or NULL in case of error.
+
+      Instances scheduled by autodiscovery are serialized to JSON by the agent, which is a
+      subset of YAML. When the class uses the `load_config` of the base check class, such
+      payloads are decoded with `json.loads`, falling back to `load_config` whenever the
+      result could differ from what YAML would have returned. This function returns a new
+      reference to the underlying PyObject. In case of error, NULL is returned with the
+      interpreter error flag set.
+    */
+    PyObject *_loadInstance(PyObject *klass, const char *instance_str);
+
+    //! _clearParsedConfigs member.
+    /*!
+      \brief This member function releases the sections kept in `_parsedConfigs`.
+
+      The GIL must be held when calling this function.
+    */
+    void _clearParsedConfigs();
+
+    //! _setCheckRunStats member.
+    /*!
+      \brief This member function records the statistics of a check run.
+      \param check A PyObject * pointer to the check instance that ran.
+      \param run The statistics of the run.
+      \param profile The stacks sampled during the run.
+
+      The GIL must be held when calling this function.
+    */
+    void _setCheckRunStats(PyObject *check, const check_run_stats_t &run, const CheckProfile &profile);
+
+    //! _runCheckProfiler member.
+    /*!
+      \brief This member function implements the profiler thread, it samples the stacks of the
+      running checks until `stopCheckProfiler` is called.
+      \param interval_ms The sampling interval, in milliseconds.
+
+      The GIL is only taken when checks are running.
+    */
+    void _runCheckProfiler(int interval_ms);
+
+    //! _sampleRunningChecks member.
+    /*!
+      \brief This member function adds the current stack of each running check to its profile.
+
+      The GIL must be held when calling this function.
+    */
+    void _sampleRunningChecks();
+
+    //! _clearCheckRunStats member.
+    /*!
+      \brief This member function forgets the statistics of the checks that were freed.
+      \param all Forget the statistics of every check.
+
+      The GIL must be held when calling this function.
+    */
+    void _clearCheckRunStats(bool all = false);
+
     //! _fetchPythonError member.
     /*!
       \brief This member function retrieves the error set on the python interpreter.
@@ -188,12 +383,83 @@ private:
     */
     typedef std::vector<std::string> PyPaths;
 
+    /*! ParsedConfigKey type prototype
+      \typedef ParsedConfigKey identifies a parsed configuration section by the check class
+      that parsed it and the content of its payload.
+    */
+    typedef std::pair<PyObject *, std::string> ParsedConfigKey;
+
+    /*! ParsedConfigs type prototype
+      \typedef ParsedConfigs defines a map of parsed configuration sections.
+    */
+    typedef std::map<ParsedConfigKey, PyObject *> ParsedConfigs;
+
+    /*! CheckRunStats type prototype
+      \typedef CheckRunStats holds the statistics of the last run of a check.
+
+      The check is identified by a weak reference, so the statistics of a freed check aren't
+      mistaken for the ones of a new check allocated at the same address. `ref` is NULL for
+      checks that don't support weak references. `profile` holds the stacks sampled by the
+      profiler while the check ran, since they were last collected by `getCheckProfile`.
+    */
+    typedef struct {
+        PyObject *ref;
+        check_run_stats_t stats;
+        CheckProfile profile;
+    } CheckRunStats;
+
+    /*! RunningChecks type prototype
+      \typedef RunningChecks defines a map of the profiles of the running checks by the
+      thread state of the thread running them.
+    */
+    typedef std::map<PyThreadState *, CheckProfile *> RunningChecks;
+
+    /*! ChecksRunStats type prototype
+      \typedef ChecksRunStats defines a map of check run statistics by check instance.
+    */
+    typedef std::map<PyObject *, CheckRunStats> ChecksRunStats;
+
     wchar_t *_pythonHome; /*!< unicode string with the PYTHONHOME for the underlying interpreter */
     wchar_t *_pythonExe; /*!< unicode string with the path to the executable of the underlying interpreter */
     PyObject *_baseClass; /*!< PyObject * pointer to the base Agent check class */
+    PyObject *_jsonLoads; /*!< PyObject * pointer to the `json.loads` function, NULL if unavailable */
+    ParsedConfigs _parsedConfigs; /*!< parsed configuration sections, holding a reference to
+                                     their check class and to the parsed section */
+    ChecksRunStats _checksRunStats; /*!< statistics of the last run of the checks */
+    RunningChecks _runningChecks; /*!< profiles of the running checks, only filled when the profiler
+                                     is running, guarded by the GIL */
+    std::atomic_bool _profilerRunning; /*!< whether the profiler thread is running */
+    std::atomic_size_t _profiledChecks; /*!< number of entries in `_runningChecks` */
+    std::thread _profilerThread; /*!< thread sampling the stacks of the running checks */
+    std::mutex _profilerMutex; /*!< mutex guarding `_profilerStop` */
+    std::condition_variable _profilerCond; /*!< condition notified to stop the profiler thread */
+    bool _profilerStop; /*!< whether the profiler thread was asked to stop */
+    CheckClasses _checkClasses; /*!< check classes found in the check modules, holding a reference
+                                   to the module and to the class */
+    CheckPool _checkPool; /*!< spare check instances, holding a reference to their check class and
+                             to the instances */
+    int _checkPoolSize; /*!< number of spare check instances kept for each configuration */
     PyPaths _pythonPaths; /*!< string vector containing paths in the PYTHONPATH */
     PyThreadState *_threadState; /*!< PyThreadState * pointer to the saved Python interpreter thread state */
 
+    //! beginCheckRun static member.
+    /*!
+      \brief This member function starts accounting the resources used by the current thread
+      to a check run.
+      \param run The statistics of the run, the previous values are discarded.
+      \return The statistics of the run that was in progress on the current thread, if any.
+    */
+    static check_run_stats_t *beginCheckRun(check_run_stats_t *run);
+
+    //! endCheckRun static member.
+    /*!
+      \brief This member function stops accounting the resources used by the current thread
+      to a check run.
+      \param run The statistics of the run, as passed to `beginCheckRun`.
+      \param prev The statistics of the run that was in progress, as returned by `beginCheckRun`.
+    */
+    static void endCheckRun(check_run_stats_t *run, check_run_stats_t *prev);
+
     //! pymallocAlloc member.
     /*!
       \return Pointer value returned by _pymallocPrev.alloc.
@@ -14,15 +14,81 @@
 // types of allocations separately, as the distinction exists largely
 // inside Python implementation, out of reach for both users and
 // module authors.
+//
+// Allocations are also accounted to the check running on the current
+// thread, if any (see Three::beginCheckRun). Allocations made by other
+// threads, like the ones started by a check, aren't attributed to it.
 
 #include "three.h"
 
+#include <chrono>
+
 #if __linux__ || _WIN32
 #    include <malloc.h>
 #elif __APPLE__ || __FreeBSD__
 #    include <malloc/malloc.h>
 #endif
 
+#ifdef _WIN32
+#    include <windows.h>
+#else
+#    include <time.h>
+#endif
+
+// Statistics of the check run in progress on the current thread, if any
+static thread_local check_run_stats_t *currentCheckRun = NULL;
+
+static uint64_t wallTimeNs()
+{
+    return std::chrono::duration_cast<std::chrono::nanoseconds>(
+               std::chrono::steady_clock::now().time_since_epoch())
+        .count();
+}
+
+// CPU time consumed by the current thread, in user and kernel mode
+static uint64_t threadCpuTimeNs()
+{
+#ifdef _WIN32
+    FILETIME creation, exit, kernel, user;
+    if (!GetThreadTimes(GetCurrentThread(), &creation, &exit, &kernel, &user)) {
+        return 0;
+    }
+    ULARGE_INTEGER k, u;
+    k.LowPart = kernel.dwLowDateTime;
+    k.HighPart = kernel.dwHighDateTime;
+    u.LowPart = user.dwLowDateTime;
+    u.HighPart = user.dwHighDateTime;
+    // FILETIME is in 100ns units
+    return (k.QuadPart + u.QuadPart) * 100;
+#else
+    struct timespec ts;
+    if (clock_gettime(CLOCK_THREAD_CPUTIME_ID, &ts) != 0) {
+        return 0;
+    }
+    return static_cast<uint64_t>(ts.tv_sec) * 1000000000 + ts.tv_nsec;
+#endif
+}
+
+check_run_stats_t *Three::beginCheckRun(check_run_stats_t *run)
+{
+    check_run_stats_t *prev = currentCheckRun;
+
+    // the start times are kept in the stats until the end of the run
+    *run = check_run_stats_t();
+    run->wall_time_ns = wallTimeNs();
+    run->cpu_time_ns = threadCpuTimeNs();
+    currentCheckRun = run;
+
+    return prev;
+}
+
+void Three::endCheckRun(check_run_stats_t *run, check_run_stats_t *prev)
+{
+    run->wall_time_ns = wallTimeNs() - run->wall_time_ns;
+    run->cpu_time_ns = threadCpuTimeNs() - run->cpu_time_ns;
+    currentCheckRun = prev;
+}
+
 void Three::initPymemStats()
 {
     PyObject_GetArenaAllocator(&_pymallocPrev);
@@ -61,6 +127,9 @@ void *Three::pymallocAlloc(size_t size)
     if (ptr != NULL) {
         _pymemInuse += size;
         _pymemAlloc += size;
+        if (currentCheckRun != NULL) {
+            currentCheckRun->alloc += size;
+        }
     }
     return ptr;
 }
@@ -69,6 +138,9 @@ void Three::pymallocFree(void *ptr, size_t size)
 {
     _pymallocPrev.free(_pymallocPrev.ctx, ptr, size);
     _pymemInuse -= size;
+    if (currentCheckRun != NULL) {
+        currentCheckRun->freed += size;
+    }
 }
 
 void *Three::pymallocAllocCb(void *ctx, size_t size)
@@ -112,6 +184,9 @@ void Three::pyrawTrackAlloc(void *ptr)
     size_t size = pyrawAllocSize(ptr);
     _pymemInuse += size;
     _pymemAlloc += size;
+    if (currentCheckRun != NULL) {
+        currentCheckRun->alloc += size;
+    }
 }
 
 void Three::pyrawTrackFree(void *ptr)
@@ -121,6 +196,9 @@ void Three::pyrawTrackFree(void *ptr)
     }
     size_t size = pyrawAllocSize(ptr);
     _pymemInuse -= size;
+    if (currentCheckRun != NULL) {
+        currentCheckRun->freed += size;
+    }
 }
 
 void *Three::pyrawMalloc(size_t size)
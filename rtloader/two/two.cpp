@@ -898,6 +898,16 @@ void Two::setGetConfigCb(cb_get_config_t cb)
     _set_get_config_cb(cb);
 }
 
+void Two::setGetConfigManyCb(cb_get_config_many_t cb)
+{
+    _set_get_config_many_cb(cb);
+}
+
+void Two::bumpConfigGeneration()
+{
+    _bump_config_generation();
+}
+
 void Two::setHeadersCb(cb_headers_t cb)
 {
     _set_headers_cb(cb);
@@ -933,6 +943,11 @@ void Two::setSendLogCb(cb_send_log_t cb)
     _set_send_log_cb(cb);
 }
 
+void Two::setSendLogsCb(cb_send_logs_t cb)
+{
+    _set_send_logs_cb(cb);
+}
+
 void Two::setSetCheckMetadataCb(cb_set_check_metadata_t cb)
 {
     _set_set_check_metadata_cb(cb);
@@ -943,11 +958,31 @@ void Two::setSetExternalTagsCb(cb_set_external_tags_t cb)
     _set_set_external_tags_cb(cb);
 }
 
+void Two::setSetExternalTagsManyCb(cb_set_external_tags_many_t cb)
+{
+    _set_set_external_tags_many_cb(cb);
+}
+
 void Two::setSubprocessOutputCb(cb_get_subprocess_output_t cb)
 {
     _set_get_subprocess_output_cb(cb);
 }
 
+void Two::setStartSubprocessStreamCb(cb_start_subprocess_stream_t cb)
+{
+    _set_start_subprocess_stream_cb(cb);
+}
+
+void Two::setReadSubprocessStreamCb(cb_read_subprocess_stream_t cb)
+{
+    _set_read_subprocess_stream_cb(cb);
+}
+
+void Two::setCloseSubprocessStreamCb(cb_close_subprocess_stream_t cb)
+{
+    _set_close_subprocess_stream_cb(cb);
+}
+
 void Two::setCGOFreeCb(cb_cgo_free_t cb)
 {
     _set_cgo_free_cb(cb);
@@ -978,11 +1013,26 @@ void Two::setReadPersistentCacheCb(cb_read_persistent_cache_t cb)
     _set_read_persistent_cache_cb(cb);
 }
 
+void Two::setWritePersistentCacheManyCb(cb_write_persistent_cache_many_t cb)
+{
+    _set_write_persistent_cache_many_cb(cb);
+}
+
+void Two::flushPersistentCache()
+{
+    _flush_persistent_cache();
+}
+
 void Two::setObfuscateSqlCb(cb_obfuscate_sql_t cb)
 {
     _set_obfuscate_sql_cb(cb);
 }
 
+void Two::setObfuscateSqlManyCb(cb_obfuscate_sql_many_t cb)
+{
+    _set_obfuscate_sql_many_cb(cb);
+}
+
 void Two::setObfuscateSqlExecPlanCb(cb_obfuscate_sql_exec_plan_t cb)
 {
     _set_obfuscate_sql_exec_plan_cb(cb);
@@ -97,6 +97,8 @@ public:
     // datadog_agent API
     void setGetVersionCb(cb_get_version_t);
     void setGetConfigCb(cb_get_config_t);
+    void setGetConfigManyCb(cb_get_config_many_t);
+    void bumpConfigGeneration();
     void setHeadersCb(cb_headers_t);
     void setGetHostnameCb(cb_get_hostname_t);
     void setGetHostTagsCb(cb_get_host_tags_t);
@@ -104,17 +106,25 @@ public:
     void setGetTracemallocEnabledCb(cb_tracemalloc_enabled_t);
     void setLogCb(cb_log_t);
     void setSendLogCb(cb_send_log_t);
+    void setSendLogsCb(cb_send_logs_t);
     void setSetCheckMetadataCb(cb_set_check_metadata_t);
     void setSetExternalTagsCb(cb_set_external_tags_t);
+    void setSetExternalTagsManyCb(cb_set_external_tags_many_t);
     void setWritePersistentCacheCb(cb_write_persistent_cache_t);
     void setReadPersistentCacheCb(cb_read_persistent_cache_t);
+    void setWritePersistentCacheManyCb(cb_write_persistent_cache_many_t);
+    void flushPersistentCache();
     void setObfuscateSqlCb(cb_obfuscate_sql_t);
+    void setObfuscateSqlManyCb(cb_obfuscate_sql_many_t);
     void setObfuscateSqlExecPlanCb(cb_obfuscate_sql_exec_plan_t);
     void setGetProcessStartTimeCb(cb_get_process_start_time_t);
     void setObfuscateMongoDBStringCb(cb_obfuscate_mongodb_string_t);
 
     // _util API
     virtual void setSubprocessOutputCb(cb_get_subprocess_output_t);
+    virtual void setStartSubprocessStreamCb(cb_start_subprocess_stream_t);
+    virtual void setReadSubprocessStreamCb(cb_read_subprocess_stream_t);
+    virtual void setCloseSubprocessStreamCb(cb_close_subprocess_stream_t);
 
     // CGO API
     void setCGOFreeCb(cb_cgo_free_t);
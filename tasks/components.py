@@ -2,6 +2,7 @@
 Invoke entrypoint, import here all the tasks we want to make available
 """
 
+import json
 import os
 import pathlib
 from collections import namedtuple
@@ -189,16 +190,19 @@ mock_definitions = [
 ]
 
 
-def check_component_contents_and_file_hiearchy(comp):
+def check_component_contents_and_file_hiearchy(comp, index=None):
     """
     Check validity of component, returning first error, if any found
     """
-    def_content = read_file_content(comp.def_file).split('\n')
-    root_path = pathlib.Path(comp.path)
+    if index is None:
+        index = get_component_index()
+    def_info = index.files[comp.def_file]
+    root_path = comp.path
 
     # Definition file `def/component.go` must define a component interface
     if not any(
-        line.startswith('type Component interface') or line.startswith('type Component = ') for line in def_content
+        line.startswith('type Component interface') or line.startswith('type Component = ')
+        for line in def_info.declarations
     ):
         return f"** {comp.def_file} does not define a Component interface"
 
@@ -211,13 +215,13 @@ def check_component_contents_and_file_hiearchy(comp):
         return
 
     # Definition file `component.go` (v1) or `def/component.go` (v2) must use `package <compname>`
-    pkgname = parse_package_name(comp.def_file)
+    pkgname = def_info.package
     if pkgname != comp.name:
         return f"** {comp.def_file} has wrong package name '{pkgname}', must be '{comp.name}'"
 
     # Definition file `component.go` (v1) or `def/component.go` (v2) must not contain a mock definition
     for mock_definition in mock_definitions:
-        if any(line.startswith(mock_definition) for line in def_content):
+        if any(line.startswith(mock_definition) for line in def_info.declarations):
             return f"** {comp.def_file} defines '{mock_definition}' which should be in separate implementation. See docs/components/defining-components.md"
 
     # Allowlist of components that do not use an implementation folder
@@ -225,114 +229,48 @@ def check_component_contents_and_file_hiearchy(comp):
         return
 
     # Implementation folder or folders must exist
-    impl_folders = locate_implementation_folders(comp)
+    impl_folders = index.locate_implementation_folders(comp)
     if len(impl_folders) == 0:
         return f"** {comp.name} is missing the implementation folder in {comp.path}. See docs/components/defining-components.md"
 
     if comp.version == 2:
         # Implementation source files should use correct package name, and shouldn't import fx (except tests)
-        for src_file in locate_nontest_source_files(impl_folders):
-            pkgname = parse_package_name(src_file)
+        for src_file in index.locate_nontest_source_files(impl_folders):
+            src_info = index.files[src_file]
+            pkgname = src_info.package
             expectname = comp.name + 'impl'
             if pkgname != expectname:
                 return f"** {src_file} has wrong package name '{pkgname}', must be '{expectname}'"
             if comp.path in ignore_fx_import:
                 continue
-            src_content = read_file_content(src_file)
-            if 'go.uber.org/fx' in src_content:
+            if src_info.imports_fx:
                 return f"** {src_file} should not import 'go.uber.org/fx' because it a component implementation"
-            if 'fxutil' in src_content:
+            if src_info.uses_fxutil:
                 return f"** {src_file} should not import 'fxutil' because it a component implementation"
         # FX files should use correct filename and package name, and call ProvideComponentConstructor
-        for src_file in locate_fx_source_files(root_path):
-            if src_file.name != 'fx.go':
+        for src_file in index.locate_fx_source_files(root_path):
+            if os.path.basename(src_file) != 'fx.go':
                 return f"** {src_file} should be named 'fx.go'"
-            pkgname = parse_package_name(src_file)
+            src_info = index.files[src_file]
+            pkgname = src_info.package
             expectname = comp.name + 'fx'
             if pkgname != 'fx' and pkgname != expectname:
                 return f"** {src_file} has wrong package name '{pkgname}', must be 'fx' or '{expectname}'"
             if comp.path in ignore_provide_component_constructor_missing:
                 continue
-            src_content = read_file_content(src_file)
-            if 'ProvideComponentConstructor' not in src_content:
+            if not src_info.provides_component_constructor:
                 return f"** {src_file} should call ProvideComponentConstructor to convert regular constructor into fx-aware"
 
     return  # no error
 
 
-def parse_package_name(filename):
-    """
-    Return the package name from the given filename
-    """
-    lines = read_file_content(filename).split('\n')
-    pkgline = [line for line in lines if line.startswith('package ')][0]
-    results = pkgline.split(' ')
-    if len(results) < 2:
-        return None
-    return results[1]
-
-
-def locate_implementation_folders(comp):
-    """
-    Return all implementation folders from the component
-    """
-    root_path = pathlib.Path(comp.path)
-    folders = []
-
-    for entry in root_path.iterdir():
-        if entry.is_file():
-            continue
-
-        if str(entry) in components_missing_implementation_folder:
-            return 'skip'
-
-        if comp.version == 2:
-            # Check for component implementation using the new-style folder structure: comp/<component>/impl[-suffix]
-            if entry.match('impl-*') or entry.match('impl'):
-                folders.append(entry)
-
-        if comp.version == 1:
-            # Check for component implementation using the classic style: comp/<component>/<component>impl
-            if str(entry) in components_classic_style:
-                folders.append(entry)
-
-    return folders
-
-
-def locate_nontest_source_files(folder_list):
-    """
-    Return all non-test source files from given list of folders
-    """
-    results = []
-    for folder in folder_list:
-        for entry in folder.iterdir():
-            if not entry.is_file():
-                continue
-            filename = str(entry)
-            if filename.endswith('.go') and not filename.endswith('_test.go'):
-                results.append(entry)
-    return results
-
-
-def locate_fx_source_files(root_path):
-    """
-    Return all source files from the fx subfolder in the component's path
-    """
-    results = []
-    for entry in root_path.iterdir():
-        if entry.is_file():
-            continue
-        if entry.name.startswith('fx'):
-            for subentry in entry.iterdir():
-                results.append(subentry)
-    return results
-
-
-def validate_components(components, errs=None):
+def validate_components(components, errs=None, index=None):
     if errs is None:
         errs = []
+    if index is None:
+        index = get_component_index()
     for c in components:
-        e = check_component_contents_and_file_hiearchy(c)
+        e = check_component_contents_and_file_hiearchy(c, index)
         if e is not None and len(e) > 0:
             errs.append(e)
         if c.team is None:
@@ -354,31 +292,28 @@ def validate_bundles(bundles, errs=None):
     return errs
 
 
-def get_components_and_bundles():
+def get_components_and_bundles(index=None):
     """
     Traverse comp/ directory and return all components, plus all bundles
     """
+    if index is None:
+        index = get_component_index()
     components = []
     bundles = []
-    for component_file in pathlib.Path('comp').glob('**'):
-        if not component_file.is_dir():
+    for directory in sorted(index.dirs):
+        if directory == index.root:
             continue
 
-        component_directory = pathlib.Path(component_file)
-        for direntry in component_directory.iterdir():
-            if direntry.is_file() and direntry.name == "bundle.go":
-                # Found bundle definition
-                content = read_file_content(direntry).split('\n')
-                path = str(direntry)[: -len('/bundle.go')]
-                team = find_team(content)
-                doc = find_doc(content)
-                bundles.append(Bundle(path, doc, team, content, []))
-                continue
+        bundle_file = os.path.join(directory, 'bundle.go')
+        if bundle_file in index.files:
+            # Found bundle definition
+            info = index.files[bundle_file]
+            bundles.append(Bundle(directory, info.doc, info.team, info.content, []))
 
-            comp = locate_component_def(direntry)
-            if comp is not None:
-                # Found component definition
-                components.append(comp)
+        comp = index.locate_component_def(directory)
+        if comp is not None:
+            # Found component definition
+            components.append(comp)
 
     # assign components to bundles
     sorted_bundles = []
@@ -392,34 +327,205 @@ def get_components_and_bundles():
     return sorted(components, key=lambda c: c.path), sorted(sorted_bundles)
 
 
-def locate_component_def(dir):
+# GoFile holds what the component linter needs to know about a Go source file:
+#  declarations are the top-level `type`/`func` lines, content is only kept for bundle.go files
+GoFile = namedtuple(
+    'GoFile',
+    [
+        'package',
+        'team',
+        'doc',
+        'declarations',
+        'imports_fx',
+        'uses_fxutil',
+        'provides_component_constructor',
+        'content',
+    ],
+)
+
+# Index of the comp/ tree, cached across runs and validated by the files mtime and size
+COMPONENTS_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'datadog-agent', 'components-index.json')
+COMPONENTS_CACHE_VERSION = 1
+
+
+def parse_go_file(filename, content):
+    lines = content.split('\n')
+    package = None
+    pkglines = [line for line in lines if line.startswith('package ')]
+    if pkglines:
+        results = pkglines[0].split(' ')
+        package = results[1] if len(results) >= 2 else None
+
+    return GoFile(
+        package=package,
+        team=find_team(lines),
+        doc=find_doc(lines),
+        declarations=[line for line in lines if line.startswith('type ') or line.startswith('func ')],
+        imports_fx='go.uber.org/fx' in content,
+        uses_fxutil='fxutil' in content,
+        provides_component_constructor='ProvideComponentConstructor' in content,
+        content=lines if os.path.basename(filename) == 'bundle.go' else None,
+    )
+
+
+class ComponentIndex:
     """
-    Locate the component, if this directory contains a component
+    Single-pass index of the comp/ tree.
+
+    `dirs` maps every directory to its (sorted) sub-directory and file names, `files` maps
+    every Go source file to its parsed GoFile. All paths are relative, starting with `root`.
     """
-    component_name = dir.name.replace('-', '').lower()
-
-    # v2 component: this folder is a component root if it contains 'def/component.go'
-    def_file = dir / 'def/component.go'
-    if def_file.is_file():
-        # comp/api/api/def/component.go is a special case, it's not a component using version 2
-        # PLEASE DO NOT ADD MORE EXCEPTIONS
-        if str(def_file) == "comp/api/api/def/component.go":
-            return construct_component(component_name, def_file, dir, 1)
-        else:
-            return construct_component(component_name, def_file, dir, 2)
 
-    # v1 component: this folder is a component root if it contains '/component.go' but the path is not '/def/component.go'
-    # in particular, the directory named 'def' should not be treated as a component root
-    def_file = dir / 'component.go'
-    if def_file.is_file() and '/def/component.go' not in str(def_file):
-        return construct_component(component_name, def_file, dir, 1)
+    def __init__(self, root, dirs, files):
+        self.root = root
+        self.dirs = dirs
+        self.files = files
+
+    @classmethod
+    def build(cls, root='comp', cache_file=None):
+        """
+        Walk `root` once and parse every Go file, reusing the parsed files from `cache_file`
+        when their mtime and size did not change.
+        """
+        cached = _load_component_cache(cache_file) if cache_file else {}
+        stamps = {}
+        dirs = {}
+        files = {}
+
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            subdirs = []
+            filenames = []
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                        stack.append(os.path.join(directory, entry.name))
+                        continue
+
+                    filenames.append(entry.name)
+                    if not entry.name.endswith('.go'):
+                        continue
+                    st = entry.stat()
+                    stamp = [st.st_mtime_ns, st.st_size]
+                    path = os.path.join(directory, entry.name)
+                    cached_file = cached.get(os.path.abspath(path))
+                    if cached_file and cached_file['stamp'] == stamp:
+                        files[path] = GoFile(**cached_file['info'])
+                    else:
+                        files[path] = parse_go_file(path, read_file_content(path))
+                    stamps[path] = stamp
+            dirs[directory] = (sorted(subdirs), sorted(filenames))
+
+        index = cls(root, dirs, files)
+        if cache_file:
+            _save_component_cache(cache_file, root, cached, stamps, files)
+        return index
+
+    def locate_component_def(self, dir):
+        """
+        Locate the component, if this directory contains a component
+        """
+        component_name = os.path.basename(dir).replace('-', '').lower()
+
+        # v2 component: this folder is a component root if it contains 'def/component.go'
+        def_file = os.path.join(dir, 'def/component.go')
+        if def_file in self.files:
+            # comp/api/api/def/component.go is a special case, it's not a component using version 2
+            # PLEASE DO NOT ADD MORE EXCEPTIONS
+            if def_file == "comp/api/api/def/component.go":
+                return self._construct_component(component_name, def_file, dir, 1)
+            else:
+                return self._construct_component(component_name, def_file, dir, 2)
+
+        # v1 component: this folder is a component root if it contains '/component.go' but the path is not '/def/component.go'
+        # in particular, the directory named 'def' should not be treated as a component root
+        def_file = os.path.join(dir, 'component.go')
+        if def_file in self.files and '/def/component.go' not in def_file:
+            return self._construct_component(component_name, def_file, dir, 1)
+
+    def _construct_component(self, compname, def_file, path, version):
+        info = self.files[def_file]
+        return Component(compname, def_file, path, info.doc, info.team, version)
+
+    def locate_implementation_folders(self, comp):
+        """
+        Return all implementation folders from the component
+        """
+        folders = []
+
+        for name in self.dirs[comp.path][0]:
+            entry = os.path.join(comp.path, name)
+            if entry in components_missing_implementation_folder:
+                return 'skip'
+
+            if comp.version == 2:
+                # Check for component implementation using the new-style folder structure: comp/<component>/impl[-suffix]
+                if name == 'impl' or name.startswith('impl-'):
+                    folders.append(entry)
+
+            if comp.version == 1:
+                # Check for component implementation using the classic style: comp/<component>/<component>impl
+                if entry in components_classic_style:
+                    folders.append(entry)
+
+        return folders
+
+    def locate_nontest_source_files(self, folder_list):
+        """
+        Return all non-test source files from given list of folders
+        """
+        results = []
+        for folder in folder_list:
+            for name in self.dirs[folder][1]:
+                if name.endswith('.go') and not name.endswith('_test.go'):
+                    results.append(os.path.join(folder, name))
+        return results
+
+    def locate_fx_source_files(self, root_path):
+        """
+        Return all source files from the fx subfolder in the component's path
+        """
+        results = []
+        for name in self.dirs[root_path][0]:
+            if name.startswith('fx'):
+                subdirs, filenames = self.dirs[os.path.join(root_path, name)]
+                for subentry in sorted(subdirs + filenames):
+                    results.append(os.path.join(root_path, name, subentry))
+        return results
+
+
+def get_component_index(root='comp'):
+    return ComponentIndex.build(root, COMPONENTS_CACHE_FILE)
+
+
+def _load_component_cache(cache_file):
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if cache.get('version') != COMPONENTS_CACHE_VERSION:
+        return {}
+
+    return cache.get('files', {})
 
 
-def construct_component(compname, def_file, path, version):
-    def_content = read_file_content(str(def_file)).split('\n')
-    team = find_team(def_content)
-    doc = find_doc(def_content)
-    return Component(compname, str(def_file), str(path), doc, team, version)
+def _save_component_cache(cache_file, root, cached, stamps, files):
+    # Keep the entries of other checkouts, drop the ones of files removed from this one
+    abs_root = os.path.join(os.path.abspath(root), '')
+    entries = {path: entry for path, entry in cached.items() if not path.startswith(abs_root)}
+    for path, info in files.items():
+        entries[os.path.abspath(path)] = {'stamp': stamps[path], 'info': info._asdict()}
+
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, 'w') as f:
+            json.dump({'version': COMPONENTS_CACHE_VERSION, 'files': entries}, f)
+    except OSError as e:
+        print(f"Could not write the components index cache to {cache_file}: {e}")
 
 
 def make_components_md(bundles, components_without_bundle):
@@ -502,12 +608,13 @@ def lint_components(_, fix=False):
     """
     Verify (or with --fix, ensure) component-related things are correct.
     """
-    components, bundles = get_components_and_bundles()
+    index = get_component_index()
+    components, bundles = get_components_and_bundles(index)
     ok = True
     fixable = False
     errs = []
 
-    errs = validate_components(components, errs)
+    errs = validate_components(components, errs, index)
     if len(errs) > 0:
         for err in errs:
             ok = False
@@ -16,7 +16,6 @@ from time import perf_counter
 from invoke import Context
 
 from tasks.libs.common.color import color_message
-from tasks.libs.common.utils import running_in_ci, running_in_pre_commit, running_in_pyapp
 
 DD_INVOKE_LOGS_FILE = "dd_invoke.log"
 WIN_TEMP_FOLDER = "C:\\Windows\\Temp"
@@ -41,6 +40,9 @@ def get_running_modes() -> list[str]:
     If the task is run in the ci      -> "ci"
     Neither pre-commit nor ci         -> "manual"
     """
+    # Imported here as the utils are slow to import, and this module is imported by every `inv` call
+    from tasks.libs.common.utils import running_in_ci, running_in_pre_commit, running_in_pyapp
+
     # This will catch when devs are running the unit tests with the unittest module directly.
     # When running the unit tests with the invoke command, the INVOKE_UNIT_TESTS env variable is set.
     is_running_ut = "unittest" in " ".join(sys.argv)
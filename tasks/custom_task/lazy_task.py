@@ -0,0 +1,316 @@
+"""
+Lazy loading of the invoke task tree.
+
+Importing every task module costs several hundred milliseconds on each `inv` call, most of it spent
+importing API clients (GitHub, GitLab, ...) that the requested task often does not need.
+The tree is therefore described by a manifest - task names, docstrings and signatures - generated
+from the real tree and cached on disk. While the manifest is up to date, the tree is built from it
+and a task module is only imported when one of its tasks runs.
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+
+from invoke import Collection, Task
+from invoke import __version__ as invoke_version
+from invoke.parser import Argument
+
+TASKS_MANIFEST_VERSION = 1
+TASKS_MANIFEST_DIR = os.path.expanduser('~/.cache/datadog-agent')
+# Set to load every task module when building the tree, without using or refreshing the manifest
+EAGER_TASKS_ENV = 'INVOKE_EAGER_TASKS'
+
+_ARGUMENT_KINDS = {kind.__name__: kind for kind in (str, bool, int, float, list)}
+
+
+def install_custom_call():
+    """
+    Make every task log its execution, see tasks.custom_task.custom_task.
+    """
+    from tasks.custom_task.custom_task import custom__call__
+
+    Task.__call__ = custom__call__
+
+
+class LazyTask(Task):
+    """
+    Task standing for a task described in the manifest.
+
+    Exposes what invoke needs to list the task and parse its arguments without importing its module;
+    the module is imported the first time the task is called or its pre/post tasks are expanded.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self._task = None
+        # The positional arguments are given, so that the body is not introspected
+        super().__init__(
+            self._run,
+            name=spec['name'],
+            aliases=tuple(spec['aliases']),
+            positional=[arg['attr_name'] for arg in spec['arguments'] if arg['positional']],
+            optional=tuple(arg['attr_name'] for arg in spec['arguments'] if arg['optional']),
+            default=spec['default'],
+            autoprint=spec['autoprint'],
+            iterable=[arg['attr_name'] for arg in spec['arguments'] if arg['kind'] == 'list'],
+            incrementable=[arg['attr_name'] for arg in spec['arguments'] if arg['incrementable']],
+        )
+        self.__doc__ = spec['doc']
+        self.__name__ = spec['function']
+        self.__module__ = spec['module']
+
+    def __repr__(self):
+        return f"<LazyTask {self.name!r} from {self.spec['module']}>"
+
+    def load(self) -> Task:
+        """
+        Import the module of the task and return the real task object.
+        """
+        if self._task is None:
+            module = importlib.import_module(self.spec['module'])
+            self._task = getattr(module, self.spec['attribute'])
+        return self._task
+
+    def _run(self, *args, **kwargs):
+        return self.load().body(*args, **kwargs)
+
+    # The pre/post tasks are the ones of the real task, Task.__init__ setting them is a no-op
+    @property
+    def pre(self):
+        return self.load().pre
+
+    @pre.setter
+    def pre(self, _):
+        pass
+
+    @property
+    def post(self):
+        return self.load().post
+
+    @post.setter
+    def post(self, _):
+        pass
+
+    def get_arguments(self, **_options):
+        # The help of the arguments was checked when generating the manifest, ignore_unknown_help has no effect
+        return [
+            Argument(
+                names=tuple(arg['names']),
+                kind=_load_kind(arg['kind']),
+                default=_load_default(arg),
+                help=arg['help'],
+                positional=arg['positional'],
+                optional=arg['optional'],
+                incrementable=arg['incrementable'],
+                attr_name=arg['attr_name'],
+            )
+            for arg in self.spec['arguments']
+        ]
+
+
+def _kind_name(kind) -> str:
+    if kind.__name__ in _ARGUMENT_KINDS:
+        return kind.__name__
+    return f'{kind.__module__}:{kind.__qualname__}'
+
+
+def _load_kind(name: str):
+    if name in _ARGUMENT_KINDS:
+        return _ARGUMENT_KINDS[name]
+    module, qualname = name.split(':')
+    return getattr(importlib.import_module(module), qualname)
+
+
+def _dump_default(arg: Argument, task: Task):
+    # Iterable parameters without default keep the empty marker of the signature as default
+    if arg.default is inspect.Parameter.empty:
+        return {'empty': True}
+    # Defaults of other kinds (e.g. paths) are stored as the string they are parsed from
+    if arg.kind.__name__ in _ARGUMENT_KINDS or arg.default is None:
+        return arg.default
+    if arg.kind(str(arg.default)) != arg.default:
+        raise ValueError(f"Unsupported default value {arg.default!r} for task {task.name}")
+    return str(arg.default)
+
+
+def _load_default(arg: dict):
+    if arg['default'] == {'empty': True}:
+        return inspect.Parameter.empty
+    if arg['kind'] in _ARGUMENT_KINDS or arg['default'] is None:
+        return arg['default']
+    return _load_kind(arg['kind'])(arg['default'])
+
+
+def _locate_task(task: Task) -> tuple[str, str]:
+    """
+    Return the module and attribute name under which a task can be imported.
+    """
+    body = task.body
+    module = sys.modules.get(body.__module__)
+    if module is not None and getattr(module, body.__name__, None) is task:
+        return body.__module__, body.__name__
+    for module_name, module in list(sys.modules.items()):
+        if module_name.startswith('tasks.'):
+            for attribute, value in vars(module).items():
+                if value is task:
+                    return module_name, attribute
+    raise ValueError(f"Cannot find the module defining task {task.name}")
+
+
+def task_spec(task: Task) -> dict:
+    """
+    Describe a task - where to import it from and its signature - as a JSON-serializable dict.
+    """
+    module, attribute = _locate_task(task)
+    # get_arguments consumes the help dict of the task
+    task_help = task.help
+    task.help = task_help.copy()
+    try:
+        arguments = task.get_arguments(ignore_unknown_help=True)
+    finally:
+        task.help = task_help
+    return {
+        'module': module,
+        'attribute': attribute,
+        'function': task.__name__,
+        'name': task.name,
+        'doc': task.__doc__,
+        'aliases': list(task.aliases),
+        'default': task.is_default,
+        'autoprint': task.autoprint,
+        'arguments': [
+            {
+                'names': list(arg.names),
+                'attr_name': arg.attr_name,
+                'kind': _kind_name(arg.kind),
+                'default': _dump_default(arg, task),
+                'help': arg.help,
+                'positional': arg.positional,
+                'optional': arg.optional,
+                'incrementable': arg.incrementable,
+            }
+            for arg in arguments
+        ],
+    }
+
+
+def collection_spec(collection: Collection) -> dict:
+    """
+    Describe a collection and its sub-collections as a JSON-serializable dict.
+    Raises ValueError if some task cannot be described faithfully.
+    """
+    spec = {
+        'name': collection.name,
+        'doc': collection.__doc__,
+        'default': collection.default,
+        'configuration': collection._configuration,
+        'tasks': {name: task_spec(task) for name, task in collection.tasks.items()},
+        'aliases': dict(collection.tasks.aliases),
+        'collections': {name: collection_spec(sub) for name, sub in collection.collections.items()},
+    }
+    try:
+        serialized = json.loads(json.dumps(spec))
+    except TypeError as e:
+        raise ValueError(f"Collection {collection.name} cannot be serialized: {e}") from e
+    # Tuples and other types that don't survive a round-trip would change the behavior of the tasks
+    if serialized != spec:
+        raise ValueError(f"Collection {collection.name} does not survive serialization")
+
+    return spec
+
+
+def lazy_collection(spec: dict, tasks: dict | None = None) -> Collection:
+    """
+    Build a collection of LazyTask from its description.
+    """
+    # The same task can be listed in several collections, keep a single object for it like the real tree does
+    tasks = {} if tasks is None else tasks
+    collection = Collection(spec['name']) if spec['name'] else Collection()
+    collection.__doc__ = spec['doc']
+    for name, task in spec['tasks'].items():
+        key = (task['module'], task['attribute'])
+        if key not in tasks:
+            tasks[key] = LazyTask(task)
+        collection.tasks[name] = tasks[key]
+    for alias, target in spec['aliases'].items():
+        collection.tasks.alias(alias, to=target)
+    for name, sub in spec['collections'].items():
+        collection.collections[name] = lazy_collection(sub, tasks)
+    collection.default = spec['default']
+    collection.configure(spec['configuration'])
+
+    return collection
+
+
+def tasks_stamp(root: str) -> str:
+    """
+    Hash the stat of the task sources, to know when the manifest has to be regenerated.
+    """
+    digest = hashlib.sha256(f'{TASKS_MANIFEST_VERSION} {invoke_version} {sys.version}\n'.encode())
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in ('unit_tests', '__pycache__'))
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                digest.update(f'{path} {stat.st_mtime_ns} {stat.st_size}\n'.encode())
+
+    return digest.hexdigest()
+
+
+def get_manifest_file(root: str) -> str:
+    # One manifest per checkout
+    checkout = hashlib.sha256(os.path.abspath(root).encode()).hexdigest()[:12]
+
+    return os.path.join(TASKS_MANIFEST_DIR, f'tasks-manifest-{checkout}.json')
+
+
+def _load_manifest(manifest_file: str) -> dict:
+    try:
+        with open(manifest_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest_file: str, manifest: dict):
+    try:
+        os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+        with open(f'{manifest_file}.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(f'{manifest_file}.tmp', manifest_file)
+    except OSError as e:
+        print(f"Could not save the tasks manifest to {manifest_file}: {e}", file=sys.stderr)
+
+
+def load_namespace(build, root: str, manifest_file: str | None = None) -> Collection:
+    """
+    Return the root collection of the tasks.
+
+    - build: Function importing the task modules and returning the real root collection
+    - root: Directory of the task sources, any change below it regenerates the manifest
+    """
+    install_custom_call()
+    if os.environ.get(EAGER_TASKS_ENV):
+        return build()
+
+    manifest_file = manifest_file or get_manifest_file(root)
+    stamp = tasks_stamp(root)
+    manifest = _load_manifest(manifest_file)
+    if manifest.get('stamp') == stamp:
+        return lazy_collection(manifest['namespace'])
+
+    ns = build()
+    try:
+        namespace = collection_spec(ns)
+    except ValueError as e:
+        # Keep the real tree, the next call will try again
+        print(f"Could not generate the tasks manifest: {e}", file=sys.stderr)
+        return ns
+    _save_manifest(manifest_file, {'stamp': stamp, 'namespace': namespace})
+
+    return ns
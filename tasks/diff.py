@@ -4,7 +4,7 @@ Diffing tasks
 
 import datetime
 import os
-import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from invoke import task
 from invoke.exceptions import Exit
@@ -14,7 +14,8 @@ from tasks.flavor import AgentFlavor
 from tasks.go import GOARCH_MAPPING, GOOS_MAPPING
 from tasks.libs.common.color import color_message
 from tasks.libs.common.datadog_api import create_count, send_metrics
-from tasks.libs.common.git import check_uncommitted_changes, get_commit_sha, get_current_branch
+from tasks.libs.common.git import check_uncommitted_changes, get_commit_sha, worktrees
+from tasks.libs.common.go import get_go_cache_env, go_list_deps
 from tasks.release import _get_release_json_value
 
 BINARIES: dict[str, dict] = {
@@ -78,14 +79,21 @@ def go_deps(
     report_file=None,
     report_metrics: bool = False,
     git_ref: str | None = None,
+    jobs: int | None = None,
 ):
+    """
+    Compare the Go dependencies of every binary/platform between the baseline ref and the current commit.
+
+    Both commits are checked out in temporary git worktrees, the current checkout is left untouched.
+
+    - jobs: number of concurrent `go list` invocations, defaults to the number of CPUs
+    """
     if check_uncommitted_changes(ctx):
-        raise Exit(
+        print(
             color_message(
-                "There are uncomitted changes in your repository. Please commit or stash them before trying again.",
-                "red",
-            ),
-            code=1,
+                "There are uncomitted changes in your repository, they will not be taken into account.",
+                "orange",
+            )
         )
 
     if report_metrics and not os.environ.get("DD_API_KEY"):
@@ -98,7 +106,6 @@ def go_deps(
 
     timestamp = int(datetime.datetime.now(datetime.UTC).timestamp())
 
-    current_branch = get_current_branch(ctx)
     commit_sha = os.getenv("CI_COMMIT_SHA")
     if commit_sha is None:
         commit_sha = get_commit_sha(ctx)
@@ -107,107 +114,122 @@ def go_deps(
         base_branch = _get_release_json_value("base_branch")
         baseline_ref = ctx.run(f"git merge-base {commit_sha} origin/{base_branch}", hide=True).stdout.strip()
 
-    diffs = {}
-    dep_cmd = "go list -f '{{ range .Deps }}{{ printf \"%s\\n\" . }}{{end}}'"
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        try:
-            # generate list of imports for each target+branch combo
-            branches = {"current": None, "main": baseline_ref}
-            for branch_name, branch_ref in branches.items():
-                if branch_ref:
-                    ctx.run(f"git checkout -q {branch_ref}")
-
-                for binary, details in BINARIES.items():
-                    with ctx.cd(details.get("entrypoint")):
-                        for combo in details["platforms"]:
-                            platform, arch = combo.split("/")
-                            goos, goarch = GOOS_MAPPING.get(platform), GOARCH_MAPPING.get(arch)
-                            target = f"{binary}-{goos}-{goarch}"
-
-                            depsfile = os.path.join(tmpdir, f"{target}-{branch_name}")
-                            flavor = details.get("flavor", AgentFlavor.base)
-                            build = details.get("build", binary)
-                            build_tags = get_default_build_tags(build=build, platform=platform, flavor=flavor)
-                            # need to explicitly enable CGO to also include CGO-only deps when checking different platforms
-                            env = {"GOOS": goos, "GOARCH": goarch, "CGO_ENABLED": "1"}
-                            ctx.run(f"{dep_cmd} -tags \"{' '.join(build_tags)}\" > {depsfile}", env=env)
-        finally:
-            ctx.run(f"git checkout -q {current_branch}")
-
-        # compute diffs for each target
+    diffs = compute_deps_diffs(ctx, baseline_ref, commit_sha, jobs=jobs)
+
+    # output, also to file if requested
+    if len(diffs) > 0:
+        pr_comment = [
+            f"Baseline: {baseline_ref}",
+            f"Comparison: {commit_sha}\n",
+            "<table><thead><tr><th>binary</th><th>os</th><th>arch</th><th>change</th></tr></thead><tbody>",
+        ]
         for binary, details in BINARIES.items():
             for combo in details["platforms"]:
+                flavor = details.get("flavor", AgentFlavor.base)
+                build = details.get("build", binary)
                 platform, arch = combo.split("/")
                 goos, goarch = GOOS_MAPPING.get(platform), GOARCH_MAPPING.get(arch)
                 target = f"{binary}-{goos}-{goarch}"
-
-                prdeps = os.path.join(tmpdir, f"{target}-current")
-                maindeps = os.path.join(tmpdir, f"{target}-main")
-                res = ctx.run(
-                    f"diff -u0 {maindeps} {prdeps} | grep -v '^@@' | grep -v '^[+-][+-]'", hide=True, warn=True
-                )
-                if len(res.stdout) > 0:
-                    diffs[target] = res.stdout.strip()
-
-        # output, also to file if requested
-        if len(diffs) > 0:
-            pr_comment = [
-                f"Baseline: {baseline_ref}",
-                f"Comparison: {commit_sha}\n",
-                "<table><thead><tr><th>binary</th><th>os</th><th>arch</th><th>change</th></tr></thead><tbody>",
-            ]
-            for binary, details in BINARIES.items():
-                for combo in details["platforms"]:
-                    flavor = details.get("flavor", AgentFlavor.base)
-                    build = details.get("build", binary)
-                    platform, arch = combo.split("/")
-                    goos, goarch = GOOS_MAPPING.get(platform), GOARCH_MAPPING.get(arch)
-                    target = f"{binary}-{goos}-{goarch}"
-                    prettytarget = f"{binary} {goos}/{goarch}"
-
-                    if target in diffs:
-                        targetdiffs = diffs[target]
-                        add, remove = patch_summary(targetdiffs)
-
-                        if report_metrics:
-                            tags = [
-                                f"build:{build}",
-                                f"flavor:{flavor.name}",
-                                f"os:{goos}",
-                                f"arch:{goarch}",
-                                f"git_sha:{commit_sha}",
-                                f"git_ref:{git_ref}",
-                            ]
-
-                            if git_ref:
-                                tags.append(f"git_ref:{git_ref}")
-
-                            dependency_diff = create_count(METRIC_GO_DEPS_DIFF, timestamp, (add - remove), tags)
-                            send_metrics([dependency_diff])
-
-                        color_add = color_message(f"+{add}", "green")
-                        color_remove = color_message(f"-{remove}", "red")
-                        print(f"== {prettytarget} {color_add}, {color_remove} ==")
-                        print(f"{color_patch(targetdiffs)}\n")
-
-                        summary = f"<summary>+{add}, -{remove}</summary>"
-                        diff_block = f"<pre lang='diff'>\n{targetdiffs}\n</pre>"
-                        pr_comment.append(
-                            f"<tr><td>{binary}</td><td>{goos}</td><td>{goarch}</td><td><details>{summary}\n{diff_block}</details></td></tr>"
-                        )
-                    else:
-                        print(f"== {prettytarget} ==\nno changes\n")
-
-            pr_comment.append("</tbody></table>")
-            if report_file:
-                with open(report_file, 'w') as f:
-                    f.write("\n".join(pr_comment))
-        else:
-            print("no changes for all binaries")
-            if report_file:
-                # touch file
-                open(report_file, 'w').close()
+                prettytarget = f"{binary} {goos}/{goarch}"
+
+                if target in diffs:
+                    targetdiffs = diffs[target]
+                    add, remove = patch_summary(targetdiffs)
+
+                    if report_metrics:
+                        tags = [
+                            f"build:{build}",
+                            f"flavor:{flavor.name}",
+                            f"os:{goos}",
+                            f"arch:{goarch}",
+                            f"git_sha:{commit_sha}",
+                            f"git_ref:{git_ref}",
+                        ]
+
+                        if git_ref:
+                            tags.append(f"git_ref:{git_ref}")
+
+                        dependency_diff = create_count(METRIC_GO_DEPS_DIFF, timestamp, (add - remove), tags)
+                        send_metrics([dependency_diff])
+
+                    color_add = color_message(f"+{add}", "green")
+                    color_remove = color_message(f"-{remove}", "red")
+                    print(f"== {prettytarget} {color_add}, {color_remove} ==")
+                    print(f"{color_patch(targetdiffs)}\n")
+
+                    summary = f"<summary>+{add}, -{remove}</summary>"
+                    diff_block = f"<pre lang='diff'>\n{targetdiffs}\n</pre>"
+                    pr_comment.append(
+                        f"<tr><td>{binary}</td><td>{goos}</td><td>{goarch}</td><td><details>{summary}\n{diff_block}</details></td></tr>"
+                    )
+                else:
+                    print(f"== {prettytarget} ==\nno changes\n")
+
+        pr_comment.append("</tbody></table>")
+        if report_file:
+            with open(report_file, 'w') as f:
+                f.write("\n".join(pr_comment))
+    else:
+        print("no changes for all binaries")
+        if report_file:
+            # touch file
+            open(report_file, 'w').close()
+
+
+def iter_deps_targets(binaries=None):
+    """
+    Yield (target, binary, details, platform, goos, goarch) for every binary/platform combination
+    """
+    for binary, details in (binaries or BINARIES).items():
+        for combo in details["platforms"]:
+            platform, arch = combo.split("/")
+            goos, goarch = GOOS_MAPPING.get(platform), GOARCH_MAPPING.get(arch)
+            yield f"{binary}-{goos}-{goarch}", binary, details, platform, goos, goarch
+
+
+def deps_diff(baseline_deps, current_deps):
+    """
+    Return the diff between two dependency lists, as sorted `-removed`/`+added` lines
+    """
+    baseline_deps, current_deps = set(baseline_deps), set(current_deps)
+    lines = [f"-{dep}" for dep in baseline_deps - current_deps] + [f"+{dep}" for dep in current_deps - baseline_deps]
+    return "\n".join(sorted(lines, key=lambda line: (line[1:], line[0])))
+
+
+def compute_deps_diffs(ctx, baseline_ref, current_ref, binaries=None, jobs=None):
+    """
+    Return the dependencies diff of every binary/platform between two git refs, by target.
+
+    Each ref is checked out once in its own git worktree, then `go list` runs concurrently
+    for every target in both worktrees, sharing the host GOCACHE and GOMODCACHE. Each
+    target is diffed as soon as both of its dependency lists are known.
+    """
+    go_env = get_go_cache_env(ctx)
+    diffs = {}
+    deps = {}
+
+    with worktrees(ctx, {"main": baseline_ref, "current": current_ref}) as paths:
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+            futures = {}
+            for target, binary, details, platform, goos, goarch in iter_deps_targets(binaries):
+                flavor = details.get("flavor", AgentFlavor.base)
+                build = details.get("build", binary)
+                build_tags = get_default_build_tags(build=build, platform=platform, flavor=flavor)
+                for branch_name, path in paths.items():
+                    entrypoint = os.path.join(path, details["entrypoint"])
+                    future = executor.submit(go_list_deps, ctx, entrypoint, build_tags, goos, goarch, go_env)
+                    futures[future] = (target, branch_name)
+
+            for future in as_completed(futures):
+                target, branch_name = futures[future]
+                target_deps = deps.setdefault(target, {})
+                target_deps[branch_name] = future.result()
+                if len(target_deps) == len(paths):
+                    diff = deps_diff(deps.pop(target)["main"], target_deps["current"])
+                    if diff:
+                        diffs[target] = diff
+
+    return diffs
 
 
 def color_patch(diff):
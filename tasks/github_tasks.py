@@ -156,17 +156,12 @@ def _find_packages_without_owner(owners, folder):
 
 
 def _get_code_owners(root_folder):
-    code_owner_path = os.path.join(root_folder, ".github", "CODEOWNERS")
+    codeowners = read_owners(os.path.join(root_folder, ".github", "CODEOWNERS"))
     owners = {}
-    with open(code_owner_path) as f:
-        for line in f:
-            line = line.strip()
-            line = line.split("#")[0]  # remove comment
-            if len(line) > 0:
-                parts = line.split()
-                path = os.path.normpath(parts[0])
-                # example /tools/retry_file_dump ['@DataDog/agent-metrics-logs']
-                owners[path] = parts[1:]
+    # The last rule comes first, keep the owners set by the last rule of a path
+    for _, path, path_owners, *_ in reversed(codeowners.paths):
+        # example /tools/retry_file_dump ['@DataDog/agent-metrics-logs']
+        owners[os.path.normpath(path)] = [owner for _, owner in path_owners]
     return owners
 
 
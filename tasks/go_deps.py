@@ -3,6 +3,7 @@ import io
 import os
 from collections import namedtuple
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 
 from invoke.context import Context
 from invoke.exceptions import Exit
@@ -14,6 +15,7 @@ from tasks.flavor import AgentFlavor
 from tasks.go import GOARCH_MAPPING, GOOS_MAPPING
 from tasks.libs.common.color import color_message
 from tasks.libs.common.datadog_api import create_gauge, send_metrics
+from tasks.libs.common.go import go_list_deps
 
 METRIC_GO_DEPS_ALL_NAME = "datadog.agent.go_dependencies.all"
 METRIC_GO_DEPS_EXTERNAL_NAME = "datadog.agent.go_dependencies.external"
@@ -40,18 +42,7 @@ def compute_count_metric(
     goos, goarch = GOOS_MAPPING[platform], GOARCH_MAPPING[arch]
     build_tags = get_default_build_tags(build=build, flavor=flavor, platform=platform)
 
-    # need to explicitly enable CGO to also include CGO-only deps when checking different platforms
-    env = {"GOOS": goos, "GOARCH": goarch, "CGO_ENABLED": "1"}
-    cmd = "go list -f '{{ join .Deps \"\\n\"}}'"
-    with ctx.cd(entrypoint):
-        res = ctx.run(
-            f"{cmd} -tags {','.join(build_tags)}",
-            env=env,
-            hide='out',  # don't hide errors
-        )
-        assert res
-
-    deps = res.stdout.strip().split("\n")
+    deps = go_list_deps(ctx, entrypoint, build_tags, goos, goarch)
     count = len(deps)
     external = sum(1 for dep in deps if not dep.startswith("github.com/DataDog/datadog-agent/"))
 
@@ -71,23 +62,39 @@ def compute_count_metric(
 def compute_all_count_metrics(ctx: Context, extra_tags: Iterable[str] = ()):
     """
     Compute metrics representing the number of Go dependencies of every build/flavor/platform/arch.
+    The `go list` invocations run concurrently.
     """
 
     timestamp = int(datetime.datetime.now(datetime.UTC).timestamp())
 
+    futures = []
+    with ThreadPoolExecutor() as executor:
+        for binary, details in BINARIES.items():
+            for combo in details["platforms"]:
+                platform, arch = combo.split("/")
+                flavor = details.get("flavor", AgentFlavor.base)
+                build = details.get("build", binary)
+                entrypoint = details["entrypoint"]
+
+                futures.append(
+                    executor.submit(
+                        compute_count_metric,
+                        ctx,
+                        build,
+                        flavor,
+                        platform,
+                        arch,
+                        entrypoint,
+                        timestamp,
+                        extra_tags=extra_tags,
+                    )
+                )
+
     series = []
-    for binary, details in BINARIES.items():
-        for combo in details["platforms"]:
-            platform, arch = combo.split("/")
-            flavor = details.get("flavor", AgentFlavor.base)
-            build = details.get("build", binary)
-            entrypoint = details["entrypoint"]
-
-            metric_count, metric_external = compute_count_metric(
-                ctx, build, flavor, platform, arch, entrypoint, timestamp, extra_tags=extra_tags
-            )
-            series.append(metric_count)
-            series.append(metric_external)
+    for future in futures:
+        metric_count, metric_external = future.result()
+        series.append(metric_count)
+        series.append(metric_external)
 
     return series
 
@@ -199,7 +199,9 @@ def sanitize_env_vars():
             del os.environ[env]
 
 
-def process_test_result(test_results, junit_tar: str, flavor: AgentFlavor, test_washer: bool) -> bool:
+def process_test_result(
+    test_results, junit_tar: str, flavor: AgentFlavor, test_washer: bool, flake_history_file: str | None = None
+) -> bool:
     if junit_tar:
         junit_files = [
             module_test_result.junit_file_path
@@ -216,7 +218,7 @@ def process_test_result(test_results, junit_tar: str, flavor: AgentFlavor, test_
         return True
 
     if test_washer:
-        tw = TestWasher()
+        tw = TestWasher(flake_history_file=flake_history_file)
         should_succeed = tw.process_module_results(test_results)
         if should_succeed:
             print(
@@ -260,6 +262,7 @@ def test(
     skip_flakes=False,
     build_stdlib=False,
     test_washer=False,
+    flake_history_file=None,
     run_on=None,  # noqa: U100, F841. Used by the run_on_devcontainer decorator
 ):
     """
@@ -272,6 +275,9 @@ def test(
 
     If no module or target is set the tests are run against all modules and targets.
 
+    With --test-washer, the job succeeds when only known flaky tests fail. --flake-history-file records the outcome
+    of the tests in a JSON file, run after run, to show the failure rate of the failing tests.
+
     Example invokation:
         inv test --targets=./pkg/collector/check,./pkg/aggregator --race
         inv test --module=. --race
@@ -387,7 +393,7 @@ def test(
         # print("\n--- Top 15 packages sorted by run time:")
         test_profiler.print_sorted(15)
 
-    success = process_test_result(test_results, junit_tar, flavor, test_washer)
+    success = process_test_result(test_results, junit_tar, flavor, test_washer, flake_history_file)
     if not success:
         raise Exit(code=1)
 
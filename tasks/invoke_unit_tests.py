@@ -1,4 +1,5 @@
 import os
+import sys
 
 from invoke import task
 from invoke.exceptions import Exit
@@ -16,6 +17,18 @@ TEST_ENV = {
     'CI_PROJECT_DIR': '.',
 }
 
+# Modules of the tasks package imported when the task tree is loaded from its manifest
+LAZY_TASKS_IMPORTS = {
+    'tasks',
+    'tasks.custom_task',
+    'tasks.custom_task.custom_task',
+    'tasks.custom_task.lazy_task',
+    'tasks.libs',
+    'tasks.libs.common',
+    'tasks.libs.common.color',
+    'tasks.libs.common.go_workspaces',
+}
+
 
 @task(default=True)
 def run(ctx, tests: str = '', buffer: bool = True, verbosity: int = 1, debug: bool = True):
@@ -78,3 +91,43 @@ def run_unit_tests(_, pattern, buffer, verbosity, debug):
         # Restore env
         os.environ.clear()
         os.environ.update(old_environ)
+
+
+def parse_import_time(output: str) -> dict[str, int]:
+    """
+    Parse the output of `python -X importtime` into the cumulative import time of each module, in microseconds
+    """
+    imports = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line.split('|')
+        imports[module.strip()] = int(cumulative)
+
+    return imports
+
+
+@task
+def check_import_time(ctx, budget: int = 250):
+    """
+    Check that loading the task tree doesn't import the task modules
+
+    - budget: Maximum cumulative import time of the tasks package, in milliseconds
+    """
+
+    # The first import regenerates the tasks manifest if it is outdated
+    ctx.run(f'{sys.executable} -c "import tasks"', hide=True)
+    res = ctx.run(f'{sys.executable} -X importtime -c "import tasks"', hide=True)
+    imports = parse_import_time(res.stderr)
+
+    errors = []
+    unexpected = sorted(m for m in imports if m.startswith('tasks.') and m not in LAZY_TASKS_IMPORTS)
+    if unexpected:
+        errors.append(f'Task modules imported when loading the task tree: {", ".join(unexpected)}')
+    duration = imports['tasks'] // 1000
+    if duration > budget:
+        errors.append(f'Importing the tasks package took {duration}ms, more than the {budget}ms budget')
+
+    if errors:
+        raise Exit(color_message('\n'.join(errors), Color.RED), code=1)
+    print(color_message(f'Task tree loaded in {duration}ms', Color.GREEN))
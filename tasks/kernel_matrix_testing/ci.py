@@ -6,7 +6,9 @@ import os
 import re
 import tarfile
 import xml.etree.ElementTree as ET
-from typing import TYPE_CHECKING, overload
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, TYPE_CHECKING, overload
 
 from gitlab.v4.objects import Project, ProjectJob
 
@@ -162,26 +164,61 @@ class KMTSetupEnvJob(KMTJob):
         return self.artifact_file(vm_log_path)
 
 
+def get_test_results_from_junit(report: IO[bytes]) -> dict[str, bool | None]:
+    """Return the results of the tests in a JUnit XML report, indexed by "package_name:testname".
+
+    The report is parsed incrementally and elements are dropped once processed, so that memory usage
+    doesn't depend on the size of the report. Test cases are attributed to their enclosing test suite.
+    """
+    results: dict[str, bool | None] = {}
+    # Elements being parsed, from the root, to drop the processed ones from their parent
+    parents: list[ET.Element] = []
+    suites: list[str | None] = []
+    failed = skipped = False
+
+    for event, elem in ET.iterparse(report, events=("start", "end")):
+        if event == "start":
+            if elem.tag == "testsuite":
+                suites.append(elem.get("name"))
+            elif elem.tag == "testcase":
+                failed = skipped = False
+            parents.append(elem)
+            continue
+
+        parents.pop()
+        if elem.tag == "failure":
+            failed = True
+        elif elem.tag == "skipped":
+            skipped = True
+        elif elem.tag == "testcase":
+            name = elem.get("name")
+            if name is not None:
+                pkgname = suites[-1] if suites else None
+                results[f"{pkgname}:{name}"] = None if skipped else not failed
+        elif elem.tag == "testsuite":
+            suites.pop()
+        else:
+            continue
+
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+    return results
+
+
 def get_test_results_from_tarfile(tar: tarfile.TarFile) -> dict[str, bool | None]:
-    reports: list[ET.ElementTree] = []
-    for member in tar.getmembers():
+    """Return the results of the tests in all the JUnit XML reports of a tar archive, see get_test_results_from_junit.
+
+    Members are read in order, so the archive can be opened in streaming mode.
+    """
+    results: dict[str, bool | None] = {}
+    for member in tar:
         filename = os.path.basename(member.name)
         if filename.endswith(".xml"):
             data = tar.extractfile(member)
             if data is not None:
-                reports.append(ET.parse(data))
-
-    results: dict[str, bool | None] = {}
-    for report in reports:
-        for testsuite in report.findall(".//testsuite"):
-            pkgname = testsuite.get("name")
-
-            for testcase in report.findall(".//testcase"):
-                name = testcase.get("name")
-                if name is not None:
-                    failed = len(testcase.findall(".//failure")) > 0
-                    skipped = len(testcase.findall(".//skipped")) > 0
-                    results[f"{pkgname}:{name}"] = None if skipped else not failed
+                results.update(get_test_results_from_junit(data))
 
     return results
 
@@ -219,9 +256,20 @@ class KMTTestRunJob(KMTJob):
         if junit_archive is None:
             return {}
 
-        bytearr = io.BytesIO(junit_archive)
-        tar = tarfile.open(fileobj=bytearr)
-        return get_test_results_from_tarfile(tar)
+        with tarfile.open(fileobj=io.BytesIO(junit_archive), mode="r|*") as tar:
+            return get_test_results_from_tarfile(tar)
+
+
+def fetch_test_results(
+    jobs: Iterable[KMTTestRunJob], max_workers: int = 8
+) -> dict[KMTTestRunJob, dict[str, bool | None]]:
+    """Download and parse the JUnit archives of several test run jobs concurrently.
+
+    Returns the results of each job, in the format of KMTTestRunJob.get_test_results.
+    """
+    jobs = list(jobs)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(jobs, executor.map(KMTTestRunJob.get_test_results, jobs), strict=True))
 
 
 def get_all_jobs_for_pipeline(pipeline_id: int | str) -> tuple[list[KMTSetupEnvJob], list[KMTTestRunJob]]:
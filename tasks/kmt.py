@@ -22,7 +22,12 @@ from invoke.tasks import task
 
 from tasks.kernel_matrix_testing import selftest as selftests
 from tasks.kernel_matrix_testing import stacks, vmconfig
-from tasks.kernel_matrix_testing.ci import KMTTestRunJob, get_all_jobs_for_pipeline, get_test_results_from_tarfile
+from tasks.kernel_matrix_testing.ci import (
+    KMTTestRunJob,
+    fetch_test_results,
+    get_all_jobs_for_pipeline,
+    get_test_results_from_tarfile,
+)
 from tasks.kernel_matrix_testing.compiler import CONTAINER_AGENT_PATH, get_compiler
 from tasks.kernel_matrix_testing.config import ConfigManager
 from tasks.kernel_matrix_testing.download import update_rootfs
@@ -215,24 +220,25 @@ def gen_config_from_ci_pipeline(
     failed_packages: set[str] = set()
     failed_tests: set[str] = set()
     successful_tests: set[str] = set()
-    for test_job in test_jobs:
-        if test_job.status == "failed" and job.component == vmconfig_template:
-            vm_arch = test_job.arch
-            if use_local_if_possible and vm_arch == local_arch:
-                vm_arch = local_arch
-
-            results = test_job.get_test_results()
-            for test, result in results.items():
-                if result is False:
-                    package, test = test.split(":", maxsplit=1)
-                    failed_tests.add(test)
-                    failed_packages.add(package)
-                elif result is True:  # It can also be None if the test was skipped
-                    successful_tests.add(test)
-
-            vm_name = f"{vm_arch}-{test_job.distro}-distro"
-            info(f"[+] Adding {vm_name} from failed job {test_job.name}")
-            vms.add(vm_name)
+    failed_jobs = [j for j in test_jobs if j.status == "failed" and job.component == vmconfig_template]
+    results_by_job = fetch_test_results(failed_jobs)
+    for test_job in failed_jobs:
+        vm_arch = test_job.arch
+        if use_local_if_possible and vm_arch == local_arch:
+            vm_arch = local_arch
+
+        results = results_by_job[test_job]
+        for test, result in results.items():
+            if result is False:
+                package, test = test.split(":", maxsplit=1)
+                failed_tests.add(test)
+                failed_packages.add(package)
+            elif result is True:  # It can also be None if the test was skipped
+                successful_tests.add(test)
+
+        vm_name = f"{vm_arch}-{test_job.distro}-distro"
+        info(f"[+] Adding {vm_name} from failed job {test_job.name}")
+        vms.add(vm_name)
 
     # Simplify the failed tests so that we show only the parent tests with all failures below
     # and not all child tests that failed
@@ -1772,7 +1778,8 @@ def explain_ci_failure(ctx: Context, pipeline: str | None = None):
 
         ## Show a table summary with failed tests
         jobs_with_failed_tests = [j for j in group_jobs if failreasons[j.name] == testfail]
-        test_results_by_distro_arch = {(j.distro, j.arch): j.get_test_results() for j in jobs_with_failed_tests}
+        test_results_by_job = fetch_test_results(jobs_with_failed_tests)
+        test_results_by_distro_arch = {(j.distro, j.arch): test_results_by_job[j] for j in jobs_with_failed_tests}
         # Get the names of all tests
         all_tests = set(itertools.chain.from_iterable(d.keys() for d in test_results_by_distro_arch.values()))
         test_failure_table: list[list[str]] = []
@@ -2066,8 +2073,8 @@ def tag_ci_job(ctx: Context):
         # Retrieve all data for the tests to detect a failure reason
         test_jobs_executed, tests_failed = False, False
         for candidate in agent_testing_dir.glob("junit-*.tar.gz"):
-            tar = tarfile.open(candidate)
-            test_results = get_test_results_from_tarfile(tar)
+            with tarfile.open(candidate, mode="r|*") as tar:
+                test_results = get_test_results_from_tarfile(tar)
             test_jobs_executed = test_jobs_executed or len(test_results) > 0
             # values can be none, we have to explicitly check for False
             tests_failed = tests_failed or any(r is False for r in test_results.values())
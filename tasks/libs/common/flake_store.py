@@ -0,0 +1,204 @@
+"""
+Knowledge base of the flaky Go tests, used by the test washer.
+
+Known flaky tests are indexed by package in tries of their path segments (TestSuite/TestCase/...), to
+know in O(depth) whether a test or one of its ancestors is flaky. The outcome of the tests can also be
+recorded run after run and persisted, to compute flake rates incrementally.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import defaultdict
+from collections.abc import Iterable
+
+import yaml
+
+from tasks.libs.common.color import Color, color_message
+
+FLAKE_HISTORY_VERSION = 1
+# Number of outcomes kept per test, in addition to the overall counters
+FLAKE_HISTORY_RECENT_RUNS = 50
+FLAKES_PACKAGE_PREFIX = "github.com/DataDog/datadog-agent/"
+
+
+class FlakyTestTrie:
+    """
+    Set of test paths, answering whether a test or one of its ancestors belongs to it.
+    """
+
+    __slots__ = ('children', 'flaky')
+
+    def __init__(self, tests: Iterable[str] = ()):
+        self.children: dict[str, FlakyTestTrie] = {}
+        self.flaky = False
+        for test in tests:
+            self.add(test)
+
+    def add(self, test: str):
+        node = self
+        for segment in test.split('/'):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = FlakyTestTrie()
+            node = child
+        node.flaky = True
+
+    def __contains__(self, test: str) -> bool:
+        node = self
+        for segment in test.split('/'):
+            node = node.children.get(segment)
+            if node is None:
+                return False
+        return node.flaky
+
+    def is_flaky(self, test: str) -> bool:
+        """
+        Whether the test or one of its ancestors is flaky.
+        """
+        node = self
+        for segment in test.split('/'):
+            node = node.children.get(segment)
+            if node is None:
+                return False
+            if node.flaky:
+                return True
+        return False
+
+    def __iter__(self):
+        if self.flaky:
+            yield ''
+        for segment, child in self.children.items():
+            for test in child:
+                yield f"{segment}/{test}" if test else segment
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class TestOutcomes:
+    """
+    Outcome history of a test: number of runs, of failures, and the last outcomes ('p' or 'f'), oldest first.
+    """
+
+    __slots__ = ('runs', 'failures', 'recent')
+
+    def __init__(self, runs: int = 0, failures: int = 0, recent: str = ''):
+        self.runs = runs
+        self.failures = failures
+        self.recent = recent
+
+    def record(self, passed: bool):
+        self.runs += 1
+        self.failures += not passed
+        self.recent = (self.recent + ('p' if passed else 'f'))[-FLAKE_HISTORY_RECENT_RUNS:]
+
+    def flake_rate(self, recent: bool = False) -> float:
+        """
+        Ratio of failed runs, over all the recorded runs or only over the recent ones.
+        """
+        if recent:
+            return self.recent.count('f') / len(self.recent) if self.recent else 0.0
+        return self.failures / self.runs if self.runs else 0.0
+
+    def is_flaky(self) -> bool:
+        """
+        Whether the test both passed and failed in the recent runs.
+        """
+        return 'p' in self.recent and 'f' in self.recent
+
+
+class FlakeStore:
+    """
+    Known flaky tests and outcome history, indexed by package.
+
+    - history_file: JSON file the outcome history is loaded from and saved to, if any
+    """
+
+    def __init__(self, history_file: str | None = None):
+        self.flaky_tests: dict[str, FlakyTestTrie] = defaultdict(FlakyTestTrie)
+        self.history: dict[str, dict[str, TestOutcomes]] = defaultdict(dict)
+        self.history_file = history_file
+        self.runs = 0
+
+        if history_file and os.path.exists(history_file):
+            self.load_history(history_file)
+
+    def add_flaky_test(self, package: str, test: str):
+        self.flaky_tests[package].add(test)
+
+    def load_flakes_file(self, flakes_file: str):
+        """
+        Add the tests listed in a flakes.yaml file, packages are given relative to the repository.
+        """
+        with open(flakes_file) as f:
+            flakes = yaml.safe_load(f)
+        for package, tests in (flakes or {}).items():
+            for test in tests:
+                self.add_flaky_test(f"{FLAKES_PACKAGE_PREFIX}{package}", test)
+
+    def is_flaky(self, package: str, test: str) -> bool:
+        """
+        Whether the test or one of its ancestors is known to be flaky.
+        """
+        trie = self.flaky_tests.get(package)
+        return trie is not None and trie.is_flaky(test)
+
+    def record_run(self, outcomes: dict[str, dict[str, bool]]):
+        """
+        Record the outcome of the tests of a run, by package then test, True if the test passed.
+        """
+        self.runs += 1
+        for package, tests in outcomes.items():
+            history = self.history[package]
+            for test, passed in tests.items():
+                test_outcomes = history.get(test)
+                if test_outcomes is None:
+                    test_outcomes = history[test] = TestOutcomes()
+                test_outcomes.record(passed)
+
+    def flake_rate(self, package: str, test: str, recent: bool = False) -> float:
+        test_outcomes = self.history.get(package, {}).get(test)
+        return test_outcomes.flake_rate(recent) if test_outcomes else 0.0
+
+    def flaky_tests_from_history(self) -> dict[str, set[str]]:
+        """
+        Tests that both passed and failed in their recent runs, by package.
+        """
+        flaky_tests = defaultdict(set)
+        for package, tests in self.history.items():
+            for test, test_outcomes in tests.items():
+                if test_outcomes.is_flaky():
+                    flaky_tests[package].add(test)
+        return flaky_tests
+
+    def load_history(self, history_file: str):
+        with open(history_file) as f:
+            data = json.load(f)
+        if data.get('version') != FLAKE_HISTORY_VERSION:
+            print(
+                color_message(
+                    f"[WARN] Ignoring flake history {history_file} with unsupported version {data.get('version')}",
+                    Color.ORANGE,
+                )
+            )
+            return
+        self.runs = data['runs']
+        for package, tests in data['tests'].items():
+            self.history[package] = {test: TestOutcomes(*test_outcomes) for test, test_outcomes in tests.items()}
+
+    def save_history(self, history_file: str | None = None):
+        history_file = history_file or self.history_file
+        data = {
+            'version': FLAKE_HISTORY_VERSION,
+            'runs': self.runs,
+            'tests': {
+                package: {test: [o.runs, o.failures, o.recent] for test, o in tests.items()}
+                for package, tests in self.history.items()
+            },
+        }
+        # Write to a temporary file so that an interrupted run doesn't lose the history
+        with open(f'{history_file}.tmp', 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(f'{history_file}.tmp', history_file)
@@ -30,6 +30,28 @@ def clone(ctx, repo, branch, options=""):
         os.chdir(current_dir)
 
 
+@contextmanager
+def worktrees(ctx, refs: dict[str, str]):
+    """
+    Context manager creating a detached git worktree for each of the given refs.
+
+    Yields a dict mapping the name of each ref to the path of its worktree. The current
+    checkout is left untouched, and the worktrees are removed on exit.
+    """
+    with tempfile.TemporaryDirectory() as worktrees_dir:
+        paths = {}
+        try:
+            for name, ref in refs.items():
+                path = os.path.join(worktrees_dir, name)
+                ctx.run(f"git worktree add -q --detach {path} {ref}", hide=True)
+                paths[name] = path
+            yield paths
+        finally:
+            for path in paths.values():
+                ctx.run(f"git worktree remove --force {path}", hide=True, warn=True)
+            ctx.run("git worktree prune", hide=True, warn=True)
+
+
 def get_staged_files(ctx, commit="HEAD", include_deleted_files=False) -> Iterable[str]:
     """
     Get the list of staged (to be committed) files in the repository compared to the `commit` commit.
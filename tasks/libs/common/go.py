@@ -18,3 +18,34 @@ def download_go_dependencies(ctx: Context, paths: list[str], verbose: bool = Fal
                 run_command_with_retry(
                     ctx, f"go mod download{verbosity} && go mod tidy{verbosity}", max_retry=max_retry
                 )
+
+
+def get_go_cache_env(ctx: Context) -> dict[str, str]:
+    """
+    Return the GOCACHE and GOMODCACHE of the host, to share them explicitly between several go invocations.
+    """
+    res = ctx.run("go env GOCACHE GOMODCACHE", hide=True)
+    gocache, gomodcache = res.stdout.strip().splitlines()
+    return {"GOCACHE": gocache, "GOMODCACHE": gomodcache}
+
+
+def go_list_deps(
+    ctx: Context, path: str, build_tags: list[str], goos: str, goarch: str, env: dict[str, str] | None = None
+) -> list[str]:
+    """
+    Return the dependencies of the Go package in `path` for the given build tags and platform.
+
+    The package directory is passed as part of the command rather than with `ctx.cd`,
+    so that it can be called concurrently from several threads with the same context.
+    """
+    # need to explicitly enable CGO to also include CGO-only deps when checking different platforms
+    env = {**(env or {}), "GOOS": goos, "GOARCH": goarch, "CGO_ENABLED": "1"}
+    cmd = "go list -f '{{ join .Deps \"\\n\"}}'"
+    res = ctx.run(
+        f"cd {path} && {cmd} -tags {','.join(build_tags)}",
+        env=env,
+        hide='out',  # don't hide errors
+    )
+    assert res
+
+    return res.stdout.strip().splitlines()
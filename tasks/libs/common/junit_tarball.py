@@ -0,0 +1,110 @@
+"""
+Inspection of the JUnit tarballs produced by the test jobs, without extracting them.
+
+Archives are read in streaming mode: members are listed and reports parsed as the archive is decompressed,
+nothing is written to disk.
+"""
+
+from __future__ import annotations
+
+import os
+import tarfile
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import IO
+
+
+@dataclass
+class JUnitTarballSummary:
+    tarball: str
+    # Name of the JUnit XML reports at the root of the archive
+    reports: list[str] = field(default_factory=list)
+    tests: int = 0
+    failures: int = 0
+    skipped: int = 0
+    # Failed tests, as "suite:testcase"
+    failed_tests: list[str] = field(default_factory=list)
+
+    @property
+    def job_name(self) -> str:
+        return job_name_from_tarball(self.tarball)
+
+
+def job_name_from_tarball(tarball: str) -> str:
+    """
+    Name of the job which produced a junit-<job name>.tgz tarball.
+    """
+    # We remove -repacked to have a correct job name macos
+    return os.path.basename(tarball).replace("junit-", "").replace(".tgz", "").replace("-repacked", "")
+
+
+def is_junit_report(member: tarfile.TarInfo) -> bool:
+    """
+    Whether a member of the archive is a JUnit XML report, only the ones at the root of the archive are considered.
+    """
+    name = os.path.normpath(member.name)
+    return member.isfile() and os.sep not in name and name.endswith(".xml")
+
+
+def list_members(tarball: str) -> list[str]:
+    with tarfile.open(tarball, mode="r|*") as tar:
+        return [member.name for member in tar]
+
+
+def has_member(tarball: str, predicate: Callable[[tarfile.TarInfo], bool] = is_junit_report) -> bool:
+    """
+    Whether the archive contains a member matching the predicate, the archive is read up to the first match.
+    """
+    with tarfile.open(tarball, mode="r|*") as tar:
+        return any(predicate(member) for member in tar)
+
+
+def count_members(tarball: str, predicate: Callable[[tarfile.TarInfo], bool] = is_junit_report) -> int:
+    with tarfile.open(tarball, mode="r|*") as tar:
+        return sum(1 for member in tar if predicate(member))
+
+
+def _add_report(summary: JUnitTarballSummary, report: IO[bytes]):
+    suites: list[str | None] = []
+    failed = skipped = False
+    for event, elem in ET.iterparse(report, events=("start", "end")):
+        if event == "start":
+            if elem.tag == "testsuite":
+                suites.append(elem.get("name"))
+            elif elem.tag == "testcase":
+                failed = skipped = False
+            continue
+
+        if elem.tag in ("failure", "error"):
+            failed = True
+        elif elem.tag == "skipped":
+            skipped = True
+        elif elem.tag == "testcase":
+            summary.tests += 1
+            if skipped:
+                summary.skipped += 1
+            elif failed:
+                summary.failures += 1
+                summary.failed_tests.append(f"{suites[-1] if suites else None}:{elem.get('name')}")
+            elem.clear()
+        elif elem.tag == "testsuite":
+            suites.pop()
+            elem.clear()
+
+
+def inspect_tarball(tarball: str) -> JUnitTarballSummary:
+    """
+    Count the tests of the JUnit reports of an archive and list the failed ones, in a single pass over the archive.
+    """
+    summary = JUnitTarballSummary(tarball)
+    with tarfile.open(tarball, mode="r|*") as tar:
+        for member in tar:
+            if not is_junit_report(member):
+                continue
+            summary.reports.append(member.name)
+            report = tar.extractfile(member)
+            if report is not None:
+                _add_report(summary, report)
+
+    return summary
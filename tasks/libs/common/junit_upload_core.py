@@ -8,16 +8,18 @@ import tarfile
 import tempfile
 import xml.etree.ElementTree as ET
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from shutil import which
 from subprocess import PIPE, CalledProcessError, Popen
+from xml.sax.saxutils import escape
 
 from invoke.exceptions import Exit
 
 from tasks.flavor import AgentFlavor
 from tasks.libs.ciproviders.gitlab_api import get_gitlab_repo
 from tasks.libs.common.utils import gitlab_section
+from tasks.libs.owners.parsing import read_owners
 from tasks.libs.pipeline.notifications import (
     DEFAULT_JIRA_PROJECT,
     DEFAULT_SLACK_CHANNEL,
@@ -68,10 +70,7 @@ def junit_upload_from_tgz(junit_tgz, codeowners_path=".github/CODEOWNERS"):
     """
     Upload all JUnit XML files contained in given tgz archive.
     """
-    from codeowners import CodeOwners
-
-    with open(codeowners_path) as f:
-        codeowners = CodeOwners(f.read())
+    codeowners = read_owners(codeowners_path)
 
     junit_tgz = find_tarball(junit_tgz)
 
@@ -88,12 +87,13 @@ def junit_upload_from_tgz(junit_tgz, codeowners_path=".github/CODEOWNERS"):
         xml_folders = [item for item in working_dir.iterdir() if item.is_dir()]
 
         # Split xml files by codeowners
-        generated_xmls = 0
+        xml_files = []
         for xmlfile in list(working_dir.glob("**/*.xml")):  # We need to cast the generator to avoid infinite loop
             if not xmlfile.is_file():
                 print(f"[WARN] Matched folder named {xmlfile}")
                 continue
-            generated_xmls += split_junitxml(working_dir, xmlfile, codeowners, flaky_tests)
+            xml_files.append(xmlfile)
+        generated_xmls = split_junitxmls(working_dir, xml_files, codeowners, flaky_tests)
         print(f"Created {generated_xmls} JUnit XML files from {junit_tgz}")
         # *-fast(-v2).tgz contains only tests related to the modified code, they can be empty
         if generated_xmls == 0 and "-fast" not in junit_tgz:
@@ -106,6 +106,9 @@ def junit_upload_from_tgz(junit_tgz, codeowners_path=".github/CODEOWNERS"):
                 print(log)
 
 
+FLAKE_MESSAGE = "flakytest: this is a known flaky test"
+
+
 def get_flaky_from_test_output():
     """
     Read the test output file generated by gotestsum which contains a list of json for each unit test.
@@ -113,42 +116,36 @@ def get_flaky_from_test_output():
     """
     MODULE_TEST_OUTPUT_FILE = "module_test_output.json"
     GLOBAL_TEST_OUTPUT_FILE = "test_output.json"
-    FLAKE_MESSAGE = "flakytest: this is a known flaky test"
-    test_output = []
     flaky_tests = set()
 
     global_test_output_file = Path(GLOBAL_TEST_OUTPUT_FILE)
     if global_test_output_file.is_file():
-        with global_test_output_file.open(encoding="utf8") as f:
-            for line in f.readlines():
-                test_output.append(json.loads(line))
-        flaky_tests.update(
-            [
-                "/".join([test["Package"], test["Test"]])
-                for test in test_output
-                if FLAKE_MESSAGE in test.get("Output", "")
-            ]
-        )
+        _read_flaky_tests(global_test_output_file, flaky_tests)
         return flaky_tests
 
     # If the global test output file is not present, we look for module specific test output files
     for module in DEFAULT_MODULES:
         test_file = Path(module, MODULE_TEST_OUTPUT_FILE)
         if test_file.is_file():
-            with test_file.open(encoding="utf8") as f:
-                for line in f.readlines():
-                    test_output.append(json.loads(line))
-            flaky_tests.update(
-                [
-                    "/".join([test["Package"], test["Test"]])
-                    for test in test_output
-                    if FLAKE_MESSAGE in test.get("Output", "")
-                ]
-            )
+            _read_flaky_tests(test_file, flaky_tests)
     print(f"[INFO] Found {len(flaky_tests)} flaky tests.")
     return flaky_tests
 
 
+def _read_flaky_tests(test_output_file: Path, flaky_tests: set):
+    """
+    Add the tests marked as flaky in a gotestsum output file, read line by line.
+    """
+    with test_output_file.open(encoding="utf8") as f:
+        for line in f:
+            # Most lines aren't about flaky tests, don't decode them
+            if FLAKE_MESSAGE not in line:
+                continue
+            test = json.loads(line)
+            if FLAKE_MESSAGE in test.get("Output", ""):
+                flaky_tests.add("/".join([test["Package"], test["Test"]]))
+
+
 def find_tarball(tarball):
     """
     handle weird kitchen bug where it places the tarball in a subdirectory of the same name
@@ -173,55 +170,194 @@ def read_additional_tags(folder: Path):
     return tags
 
 
-def split_junitxml(root_dir: Path, xml_path: Path, codeowners, flaky_tests):
+def split_junitxml(root_dir: Path, xml_path: Path, codeowners, flaky_tests, owners_cache: dict | None = None):
     """
     Split a junit XML into several according to the suite name and the codeowners.
-    Returns a list with the owners of the written files.
+    Returns the number of written files.
     """
-    tree = ET.parse(xml_path)
-    output_xmls = {}
-
-    flem = tree.find("flavor")
-    flavor = flem.text if flem else AgentFlavor.base.name
+    staged = _stage_split_junitxml(root_dir, xml_path, codeowners, flaky_tests, owners_cache)
+    _move_split_junitxmls(root_dir, xml_path, staged)
+    return len(staged)
 
-    for suite in tree.iter("testsuite"):
-        path = suite.attrib["name"].replace(REPO_NAME_PREFIX, "", 1)
 
+def split_junitxmls(root_dir: Path, xml_paths: list[Path], codeowners, flaky_tests, max_workers: int | None = None):
+    """
+    Split several junit XMLs, in parallel. Returns the number of written files.
+    """
+    if len(xml_paths) > 1:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_split_worker, initargs=(codeowners, flaky_tests)
+        ) as executor:
+            staged_files = list(executor.map(_stage_in_worker, [(root_dir, xml_path) for xml_path in xml_paths]))
+    else:
+        owners_cache = {}
+        staged_files = [
+            _stage_split_junitxml(root_dir, xml_path, codeowners, flaky_tests, owners_cache) for xml_path in xml_paths
+        ]
+
+    # Moved in order, files with the same name are overwritten like when splitting one XML after the other
+    for xml_path, staged in zip(xml_paths, staged_files, strict=True):
+        _move_split_junitxmls(root_dir, xml_path, staged)
+    return sum(len(staged) for staged in staged_files)
+
+
+def _suite_owner(codeowners, path: str, owners_cache: dict) -> str | None:
+    """
+    Main owner of a test suite path, None if it has no owner.
+    """
+    if path not in owners_cache:
         # Dirs in CODEOWNERS might end with "/", but testsuite names in JUnit XML
         # don't, so for determining ownership we append "/" temporarily.
         owners = codeowners.of(path + "/")
-        if not owners:
-            # In kitchen testing the test name might not be a file path, so we check the file attribute instead
-            filepath = next(tree.iter("testcase")).attrib.get("file", None)
-            if filepath:
-                if filepath.startswith("./"):  # Leading "./" is not handled by codeowners
-                    filepath = filepath[2:]
-                owners = codeowners.of(filepath)
-                main_owner = owners[0][1][len(CODEOWNERS_ORG_PREFIX) :]
-            else:
-                main_owner = "none"
-        else:
-            main_owner = owners[0][1][len(CODEOWNERS_ORG_PREFIX) :]
-
-        if main_owner in output_xmls:
-            xml = output_xmls[main_owner]
-        else:
-            xml = ET.ElementTree(ET.Element("testsuites"))
-            output_xmls[main_owner] = xml
-        # Flag the test as known flaky if gotestsum already knew it
-        for test_case in suite.iter("testcase"):
-            test_name = "/".join([test_case.attrib["classname"], test_case.attrib["name"]])
-            test_case.attrib["agent_is_known_flaky"] = "true" if test_name in flaky_tests else "false"
-
-        xml.getroot().append(suite)
-
-    # Save the split XMLs in folders with <owner>_<flavor> name (they will be uploaded with the same tags)
-    for owner, xml in output_xmls.items():
+        owners_cache[path] = owners[0][1][len(CODEOWNERS_ORG_PREFIX) :] if owners else None
+    return owners_cache[path]
+
+
+def _stage_split_junitxml(root_dir: Path, xml_path: Path, codeowners, flaky_tests, owners_cache: dict | None = None):
+    """
+    Stream the suites of a junit XML to temporary files, one per owner, flagging the known flaky tests.
+    Only one suite is held in memory at a time.
+    Returns the temporary files by owner, along with the flavor of the XML.
+    """
+    owners_cache = {} if owners_cache is None else owners_cache
+    writers = {}
+    # Flavor appended by enrich_junitxml, after the suites
+    flavor = AgentFlavor.base.name
+    # The first test case of the XML gives the owner of the suites whose name isn't a path, see below
+    first_test_file = None
+    pending_suites = []
+    root = None
+    depth = 0
+
+    def write_suite(owner, suite):
+        if owner not in writers:
+            fd, staged_path = tempfile.mkstemp(dir=root_dir, prefix=f".{owner}_", suffix=".xml.tmp")
+            writers[owner] = (staged_path, os.fdopen(fd, "wb"))
+            writers[owner][1].write(b"<?xml version='1.0' encoding='UTF-8'?>\n<testsuites>")
+        chunks = []
+        _serialize_element(suite, chunks)
+        writers[owner][1].write("".join(chunks).encode())
+
+    def file_owner():
+        if not first_test_file:
+            return "none"
+        # Leading "./" is not handled by codeowners
+        filepath = first_test_file[2:] if first_test_file.startswith("./") else first_test_file
+        owners = codeowners.of(filepath)
+        return owners[0][1][len(CODEOWNERS_ORG_PREFIX) :] if owners else "none"
+
+    # Suite parsed but not written yet, its tail (the whitespace after it) is only parsed with the next event
+    parsed_suite = None
+
+    try:
+        for event, element in ET.iterparse(xml_path, events=("start", "end")):
+            if parsed_suite is not None:
+                write_suite(*parsed_suite)
+                parsed_suite = None
+
+            if event == "start":
+                if root is None:
+                    root = element
+                elif element.tag == "testcase" and first_test_file is None:
+                    first_test_file = element.get("file", "")
+                depth += 1
+                continue
+
+            depth -= 1
+            # Suites are the children of the <testsuites> root, or the root itself
+            if element.tag == "testsuite" and depth == (0 if element is root else 1):
+                # Flag the test as known flaky if gotestsum already knew it
+                for test_case in element.iter("testcase"):
+                    test_name = "/".join([test_case.get("classname", ""), test_case.get("name", "")])
+                    test_case.set("agent_is_known_flaky", "true" if test_name in flaky_tests else "false")
+
+                path = element.get("name", "").replace(REPO_NAME_PREFIX, "", 1)
+                owner = _suite_owner(codeowners, path, owners_cache)
+                if owner is None and first_test_file is None:
+                    # In kitchen testing the test name might not be a file path, so we check the file attribute of
+                    # the first test case instead, which comes later in the XML
+                    pending_suites.append(element)
+                else:
+                    for suite in pending_suites:
+                        write_suite(file_owner(), suite)
+                    pending_suites.clear()
+                    parsed_suite = (owner or file_owner(), element)
+                if element is not root:
+                    root.remove(element)
+            elif element.tag == "flavor" and depth == 1:
+                flavor = element.text or flavor
+
+        if parsed_suite is not None:
+            write_suite(*parsed_suite)
+        for suite in pending_suites:
+            write_suite(file_owner(), suite)
+
+        for _, writer in writers.values():
+            writer.write(b"</testsuites>")
+    except BaseException:
+        for staged_path, writer in writers.values():
+            writer.close()
+            os.unlink(staged_path)
+        raise
+    finally:
+        for _, writer in writers.values():
+            writer.close()
+
+    return {owner: (staged_path, flavor) for owner, (staged_path, _) in writers.items()}
+
+
+# Entities escaped in attribute values by ElementTree, along with &, < and >
+_ATTRIBUTE_ENTITIES = {'"': "&quot;", "\r": "&#13;", "\n": "&#10;", "\t": "&#09;"}
+
+
+def _serialize_element(element: ET.Element, chunks: list[str]):
+    """
+    Serialize an element like ElementTree.write, which spends most of its time looking for namespaces that
+    JUnit XMLs don't have. Elements with namespaces are left to ElementTree.
+    """
+    if "{" in element.tag:
+        chunks.append(ET.tostring(element, encoding="unicode"))
+        return
+    chunks.append(f"<{element.tag}")
+    for key, value in element.items():
+        chunks.append(f' {key}="{escape(value, _ATTRIBUTE_ENTITIES)}"')
+    if element.text or len(element):
+        chunks.append(">")
+        if element.text:
+            chunks.append(escape(element.text))
+        for child in element:
+            _serialize_element(child, chunks)
+        chunks.append(f"</{element.tag}>")
+    else:
+        chunks.append(" />")
+    if element.tail:
+        chunks.append(escape(element.tail))
+
+
+def _move_split_junitxmls(root_dir: Path, xml_path: Path, staged: dict):
+    """
+    Save the split XMLs in folders with <owner>_<flavor> name (they will be uploaded with the same tags)
+    """
+    for owner, (staged_path, flavor) in staged.items():
         write_dir = root_dir / f"{owner}_{flavor}"
-        if not write_dir.exists():
-            write_dir.mkdir()
-        xml.write(write_dir / xml_path.name, encoding="UTF-8", xml_declaration=True)
-    return len(output_xmls)
+        write_dir.mkdir(exist_ok=True)
+        os.replace(staged_path, write_dir / xml_path.name)
+
+
+# Owners and flaky tests of the process, in split_junitxmls workers
+_worker_codeowners = None
+_worker_flaky_tests = None
+
+
+def _init_split_worker(codeowners, flaky_tests):
+    global _worker_codeowners, _worker_flaky_tests
+    _worker_codeowners = codeowners
+    _worker_flaky_tests = flaky_tests
+
+
+def _stage_in_worker(args) -> dict:
+    root_dir, xml_path = args
+    return _stage_split_junitxml(root_dir, xml_path, _worker_codeowners, _worker_flaky_tests)
 
 
 def upload_junitxmls(team_dir: Path):
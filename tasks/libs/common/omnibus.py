@@ -1,27 +1,95 @@
 import hashlib
 import json
 import os
+import re
 import sys
 from datetime import datetime
 
 import requests
 
-from tasks.release import _get_release_json_value
+from tasks.libs.releasing.json import load_release_json
 
+OMNIBUS_INVALIDATING_FILES = ['omnibus/config/', 'omnibus/lib/', 'omnibus/omnibus.rb']
+# release.json entries that pin omnibus itself, always part of the cache key
+OMNIBUS_RELEASE_ENTRIES = ['OMNIBUS_RUBY_VERSION', 'OMNIBUS_SOFTWARE_VERSION']
+# Hashes of the omnibus files, reused across invocations while their mtime, size and inode are unchanged
+OMNIBUS_TREE_HASHES_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'datadog-agent', 'omnibus-tree-hashes.json')
+ENV_REFERENCE_RE = re.compile(r'''ENV\[['"]([A-Za-z0-9_]+)['"]\]''')
+BUILDIMAGES_RE = re.compile(r'DATADOG_AGENT_.*BUILDIMAGES')
 
-def _get_build_images(ctx):
+
+def _get_build_images():
     # We intentionally include both build images & their test suffixes in the pattern
     # as a test image and the merged version shouldn't share their cache
-    tags = ctx.run("grep -E 'DATADOG_AGENT_.*BUILDIMAGES' .gitlab-ci.yml | cut -d ':' -f 2", hide='stdout').stdout
-    return (t.strip() for t in tags.splitlines())
+    with open('.gitlab-ci.yml') as f:
+        return [line.split(':')[1].strip() for line in f if BUILDIMAGES_RE.search(line)]
 
 
-def _get_omnibus_commits(field):
+def _get_release_version():
     if 'RELEASE_VERSION' in os.environ:
-        release_version = os.environ['RELEASE_VERSION']
-    else:
-        release_version = os.environ['RELEASE_VERSION_7']
-    return _get_release_json_value(f'{release_version}::{field}')
+        return os.environ['RELEASE_VERSION']
+    return os.environ['RELEASE_VERSION_7']
+
+
+class TreeHasher:
+    """
+    Computes Merkle hashes of files and directories.
+
+    A file hash is the hash of its content, a directory hash is the hash of its
+    entries names and hashes. File hashes (and the ENV variables each file reads)
+    are memoized by mtime, size and inode, so only files that changed since the
+    last run are read again.
+    """
+
+    def __init__(self, memo_file=None):
+        self.memo_file = memo_file
+        self.memo = {}
+        # Hash of every file visited, by path
+        self.leaves = {}
+        self.env_references = set()
+        if memo_file:
+            try:
+                with open(memo_file) as f:
+                    self.memo = json.load(f)
+            except (OSError, ValueError):
+                self.memo = {}
+
+    def hash(self, path):
+        path = path.rstrip('/')
+        if os.path.isdir(path):
+            h = hashlib.sha1()
+            for name in sorted(os.listdir(path)):
+                child = os.path.join(path, name)
+                kind = 'tree' if os.path.isdir(child) else 'blob'
+                h.update(f'{kind} {name} {self.hash(child)}\n'.encode())
+            return h.hexdigest()
+
+        st = os.stat(path)
+        stamp = [st.st_mtime_ns, st.st_size, st.st_ino]
+        entry = self.memo.get(os.path.abspath(path))
+        if not entry or entry['stamp'] != stamp:
+            with open(path, 'rb') as f:
+                content = f.read()
+            entry = {
+                'stamp': stamp,
+                'hash': hashlib.sha1(content).hexdigest(),
+                'env': sorted(set(ENV_REFERENCE_RE.findall(content.decode('utf-8', errors='replace')))),
+            }
+            self.memo[os.path.abspath(path)] = entry
+
+        self.leaves[path] = entry['hash']
+        self.env_references.update(entry['env'])
+        return entry['hash']
+
+    def save(self):
+        if not self.memo_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.memo_file), exist_ok=True)
+            with open(self.memo_file, 'w') as f:
+                json.dump(self.memo, f)
+        except OSError as e:
+            print(f'Could not save omnibus file hashes to {self.memo_file}: {e}')
 
 
 def _get_environment_for_cache() -> dict:
@@ -181,48 +249,108 @@ def _get_environment_for_cache() -> dict:
     return dict(filter(env_filter, sorted(os.environ.items())))
 
 
-def _last_omnibus_changes(ctx):
-    omnibus_invalidating_files = ['omnibus/config/', 'omnibus/lib/', 'omnibus/omnibus.rb']
-    omnibus_last_commit = ctx.run(
-        f'git log -n 1 --pretty=format:%H {" ".join(omnibus_invalidating_files)}', hide='stdout'
-    ).stdout
-    # The commit sha1 is likely to change between a PR and its merge to main
-    # In order to work around this, we hash the commit diff so that the result
-    # can be reproduced on different branches with different sha1
-    omnibus_last_changes = ctx.run(
-        f'git diff {omnibus_last_commit}~ {omnibus_last_commit} {" ".join(omnibus_invalidating_files)}', hide='stdout'
-    ).stdout
-    hash = hashlib.sha1()
-    hash.update(str.encode(omnibus_last_changes))
-    result = hash.hexdigest()
-    print(f'Hash for last omnibus changes is {result}')
-    return result
-
-
-def omnibus_compute_cache_key(ctx):
-    print('Computing cache key')
+def omnibus_cache_key_manifest(memo_file=OMNIBUS_TREE_HASHES_FILE):
+    """
+    Returns the inputs of the omnibus cache key:
+    - files: the hash of every file omnibus reads its configuration from
+    - release: the release.json entries these files read (through ENV), and the omnibus versions
+    - build_images: the build images versions
+    - environment: the hash of the value of every environment variable taken into account
+    """
+    hasher = TreeHasher(memo_file)
+    for path in OMNIBUS_INVALIDATING_FILES:
+        hasher.hash(path)
+    hasher.save()
+
+    release_entries = load_release_json()[_get_release_version()]
+    release = {
+        key: str(value)
+        for key, value in release_entries.items()
+        if key in OMNIBUS_RELEASE_ENTRIES or key in hasher.env_references
+    }
+    environment = {
+        key: hashlib.sha1(str.encode(value)).hexdigest() for key, value in _get_environment_for_cache().items()
+    }
+
+    return {
+        'files': dict(sorted(hasher.leaves.items())),
+        'release': dict(sorted(release.items())),
+        'build_images': _get_build_images(),
+        'environment': environment,
+    }
+
+
+def cache_key_from_manifest(manifest):
     h = hashlib.sha1()
-    omnibus_last_changes = _last_omnibus_changes(ctx)
-    h.update(str.encode(omnibus_last_changes))
-    buildimages_hash = _get_build_images(ctx)
-    for img_hash in buildimages_hash:
-        h.update(str.encode(img_hash))
-    omnibus_ruby_commit = _get_omnibus_commits('OMNIBUS_RUBY_VERSION')
-    omnibus_software_commit = _get_omnibus_commits('OMNIBUS_SOFTWARE_VERSION')
-    print(f'Omnibus ruby commit: {omnibus_ruby_commit}')
-    print(f'Omnibus software commit: {omnibus_software_commit}')
-    h.update(str.encode(omnibus_ruby_commit))
-    h.update(str.encode(omnibus_software_commit))
-    environment = _get_environment_for_cache()
-    for k, v in environment.items():
-        print(f'\tUsing environment variable {k} to compute cache key')
-        h.update(str.encode(f'{k}={v}'))
-        print(f'Current hash value: {h.hexdigest()}')
-    cache_key = h.hexdigest()
+    for section in ('files', 'release', 'environment'):
+        for key, value in sorted(manifest[section].items()):
+            h.update(str.encode(f'{section}:{key}={value}\n'))
+    for image in manifest['build_images']:
+        h.update(str.encode(f'build_images:{image}\n'))
+    return h.hexdigest()
+
+
+def explain_cache_key_change(previous, current):
+    """
+    Returns a human readable list of the inputs that differ between two cache key manifests
+    """
+    changes = []
+    for section in ('files', 'release', 'environment'):
+        old, new = previous.get(section, {}), current.get(section, {})
+        for key in sorted(old.keys() | new.keys()):
+            if key not in old:
+                changes.append(f'{section}: {key} was added')
+            elif key not in new:
+                changes.append(f'{section}: {key} was removed')
+            elif old[key] != new[key]:
+                if section == 'release':
+                    changes.append(f'{section}: {key} changed from {old[key]} to {new[key]}')
+                else:
+                    changes.append(f'{section}: {key} changed')
+    if previous.get('build_images') != current.get('build_images'):
+        changes.append(f"build_images: changed from {previous.get('build_images')} to {current.get('build_images')}")
+    return changes
+
+
+def omnibus_compute_cache_key(manifest=None):
+    print('Computing cache key')
+    if manifest is None:
+        manifest = omnibus_cache_key_manifest()
+    print(f'Hashed {len(manifest["files"])} omnibus files')
+    for key, value in manifest['release'].items():
+        print(f'Using release.json entry {key}: {value}')
+    for key in manifest['environment']:
+        print(f'\tUsing environment variable {key} to compute cache key')
+    cache_key = cache_key_from_manifest(manifest)
     print(f'Cache key: {cache_key}')
     return cache_key
 
 
+def write_cache_key_manifest(manifest, path):
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def print_cache_key_explanation(previous_path, manifest):
+    """
+    Prints which inputs of the cache key changed compared to the manifest stored in `previous_path`
+    """
+    try:
+        with open(previous_path) as f:
+            previous = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f'Could not read previous cache key manifest {previous_path}: {e}')
+        return
+
+    changes = explain_cache_key_change(previous, manifest)
+    if not changes:
+        print('Cache key inputs are identical to the previous manifest')
+        return
+    print('Cache key inputs changed since the previous manifest:')
+    for change in changes:
+        print(f'\t{change}')
+
+
 def should_retry_bundle_install(res):
     # We sometimes get a Net::HTTPNotFound error when fetching the
     # license-scout gem. This is a transient error, so we retry the bundle install
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-import os
+import glob
 import re
-import tempfile
+
+from tasks.libs.common.junit_tarball import has_member, job_name_from_tarball
 
 
 def create_msg(pipeline_id, pipeline_url, job_list):
@@ -23,20 +24,11 @@ On pipeline [{pipeline_id}]({pipeline_url}) ([CI Visibility](https://app.datadog
     return msg
 
 
-def process_unit_tests_tarballs(ctx):
-    tarballs = ctx.run("ls junit-tests_*.tgz", hide=True).stdout.split()
-    jobs_with_no_tests_run = []
-    for tarball in tarballs:
-        with tempfile.TemporaryDirectory() as unpack_dir:
-            ctx.run(f"tar -xzf {tarball} -C {unpack_dir}")
-
-            # We check if the folder contains at least one junit.xml file. Otherwise we consider no tests were executed
-            if not any(f.endswith(".xml") for f in os.listdir(unpack_dir)):
-                jobs_with_no_tests_run.append(
-                    tarball.replace("junit-", "").replace(".tgz", "").replace("-repacked", "")
-                )  # We remove -repacked to have a correct job name macos
+def process_unit_tests_tarballs(_):
+    tarballs = sorted(glob.glob("junit-tests_*.tgz"))
 
-    return jobs_with_no_tests_run
+    # We check if the archive contains at least one junit.xml file. Otherwise we consider no tests were executed
+    return [job_name_from_tarball(tarball) for tarball in tarballs if not has_member(tarball)]
 
 
 def comment_pr(msg, pipeline_id, branch_name, jobs_with_no_tests_run):
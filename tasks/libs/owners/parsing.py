@@ -1,14 +1,129 @@
 from __future__ import annotations
 
+import os
 from collections import Counter
+from collections.abc import Iterable
 from typing import Any
 
+# Characters giving a special meaning to a segment of a CODEOWNERS pattern
+_GLOB_CHARS = frozenset('*?[\\')
+# Spaces are replaced by this mask by codeowners.CodeOwners before matching
+_SPACE_MASK = "/" * 20
+
+
+class _OwnersNode:
+    __slots__ = ('children', 'rules')
+
+    def __init__(self):
+        self.children: dict[str, _OwnersNode] = {}
+        self.rules: list[int] = []
+
+
+class OwnersIndex:
+    """
+    Rules of an owners file (CODEOWNERS, JOBOWNERS), compiled for fast lookups.
+
+    Gives the same results as codeowners.CodeOwners, which tries every rule from the last one on each lookup.
+    Anchored rules are stored in a trie, under their leading literal path segments, and unanchored literal rules
+    by the segment they match, so that a lookup only tries the rules that can match the path. The remaining
+    glob segments are matched at the nodes, by the regexes of codeowners.
+    """
+
+    def __init__(self, text: str):
+        from codeowners import CodeOwners
+
+        # Same structure as CodeOwners.paths: (regex, pattern, owners, line number, section), last rule first
+        self.paths = CodeOwners(text).paths
+        self._root = _OwnersNode()
+        self._segment_rules: dict[str, list[int]] = {}
+
+        for index, (_, pattern, *_) in enumerate(self.paths):
+            pattern = pattern.replace("\\ ", _SPACE_MASK)
+            slash_pos = pattern.find("/")
+            anchored = slash_pos > -1 and slash_pos != len(pattern) - 1
+            segments = pattern.strip("/").split("/")
+
+            if _SPACE_MASK in pattern:
+                # Escaped spaces turn into path separators, always try these rules
+                self._root.rules.append(index)
+            elif not anchored:
+                # Matches any path segment
+                if segments[0] and _GLOB_CHARS.isdisjoint(segments[0]):
+                    self._segment_rules.setdefault(segments[0], []).append(index)
+                else:
+                    self._root.rules.append(index)
+            else:
+                node = self._root
+                for segment in segments:
+                    if not _GLOB_CHARS.isdisjoint(segment):
+                        break
+                    node = node.children.setdefault(segment, _OwnersNode())
+                node.rules.append(index)
+
+    def _candidates(self, path: str) -> list[int]:
+        """
+        Index of the rules that may match a path (masked like codeowners does), by decreasing priority.
+        """
+        segments = path.split("/")
+        candidates = list(self._root.rules)
+        node = self._root
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                break
+            candidates.extend(node.rules)
+        for segment in set(segments):
+            candidates.extend(self._segment_rules.get(segment, ()))
+        candidates.sort()
+
+        return candidates
+
+    def matching_lines(self, filepath: str):
+        masked = filepath.replace(" ", _SPACE_MASK)
+        for index in self._candidates(masked):
+            regex, pattern, owners, line_num, section_name = self.paths[index]
+            if regex.search(masked) is not None:
+                yield (owners, line_num, pattern, section_name)
+
+    def matching_line(self, filepath: str):
+        return next(self.matching_lines(filepath), ([], None, None, None))
+
+    def section_name(self, filepath: str) -> str | None:
+        return self.matching_line(filepath)[3]
+
+    def of(self, filepath: str) -> list[tuple[str, str]]:
+        return self.matching_line(filepath)[0]
+
+    def owners_of_many(self, paths: Iterable[str]) -> dict[str, list[tuple[str, str]]]:
+        """
+        Owners of each path, in the format returned by `of`.
+        """
+        owners = {}
+        for path in paths:
+            if path not in owners:
+                owners[path] = self.of(path)
+
+        return owners
+
+
+# Compiled owners files, by absolute path, along with the stat of the file they were compiled from
+_owners_indexes: dict[str, tuple[tuple[int, int], OwnersIndex]] = {}
+
 
 def read_owners(owners_file: str) -> Any:
-    from codeowners import CodeOwners
+    """
+    Parse an owners file. The rules are compiled once per process, until the file changes.
+    """
+    path = os.path.abspath(owners_file)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _owners_indexes.get(path)
+    if cached is None or cached[0] != version:
+        with open(path) as f:
+            cached = (version, OwnersIndex(f.read()))
+        _owners_indexes[path] = cached
 
-    with open(owners_file) as f:
-        return CodeOwners(f.read())
+    return cached[1]
 
 
 def search_owners(search: str, owners_file: str) -> list[str]:
@@ -114,8 +114,10 @@ def find_job_owners(failed_jobs: FailedJobs, owners_file: str = ".gitlab/JOBOWNE
         if job.failure_reason == FailedJobReason.E2E_INFRA_FAILURE:
             owners_to_notify["@DataDog/agent-e2e-testing"].add_failed_job(job)
 
-    for job in failed_jobs.all_non_infra_failures():
-        job_owners = owners.of(job.name)
+    jobs = failed_jobs.all_non_infra_failures()
+    jobs_owners = owners.owners_of_many(job.name for job in jobs)
+    for job in jobs:
+        job_owners = jobs_owners[job.name]
         # job_owners is a list of tuples containing the type of owner (eg. USERNAME, TEAM) and the name of the owner
         # eg. [('TEAM', '@DataDog/agent-devx-infra')]
 
@@ -0,0 +1,109 @@
+"""
+Regression experiments of test/regression/cases, as read by the Regression Detector.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+from dataclasses import dataclass, field
+
+import yaml
+
+REGRESSION_CASES_DIR = os.path.join("test", "regression", "cases")
+
+# Sizes as written in lading configurations, e.g. "100 MiB" or "50 Mb"
+_SIZE_RE = re.compile(r"^\s*([0-9.]+)\s*([a-zA-Z]*)\s*$")
+_SIZE_UNITS = {
+    "": 1,
+    "b": 1,
+    "kb": 1000,
+    "kib": 1024,
+    "mb": 1000**2,
+    "mib": 1024**2,
+    "gb": 1000**3,
+    "gib": 1024**3,
+}
+
+
+def parse_size(size: str | int) -> int:
+    """
+    Parse a lading size, decimal (Mb, MB) or binary (MiB) units, in bytes.
+    """
+    if isinstance(size, int):
+        return size
+    match = _SIZE_RE.match(size)
+    if match is None or match.group(2).lower() not in _SIZE_UNITS:
+        raise ValueError(f"Invalid size {size}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+@dataclass
+class RegressionCase:
+    name: str
+    path: str
+    experiment: dict = field(default_factory=dict)
+    lading: dict = field(default_factory=dict)
+
+    @staticmethod
+    def load(name: str, cases_dir: str = REGRESSION_CASES_DIR) -> RegressionCase:
+        path = os.path.join(cases_dir, name)
+        if not os.path.isdir(path):
+            raise ValueError(f"Unknown regression case {name}, expected a directory in {cases_dir}")
+
+        with open(os.path.join(path, "experiment.yaml")) as f:
+            experiment = yaml.safe_load(f) or {}
+        with open(os.path.join(path, "lading", "lading.yaml")) as f:
+            lading = yaml.safe_load(f) or {}
+
+        return RegressionCase(name, path, experiment, lading)
+
+    @property
+    def optimization_goal(self) -> str:
+        return self.experiment.get("optimization_goal", "cpu")
+
+    @property
+    def environment(self) -> dict[str, str]:
+        """
+        Environment of the target, the profiling environment is left out.
+        """
+        environment = self.experiment.get("target", {}).get("environment") or {}
+        return {key: str(value) for key, value in environment.items()}
+
+    @property
+    def generators(self) -> list[dict]:
+        """
+        Generators of the lading configuration, as {kind: configuration} dicts.
+        """
+        return self.lading.get("generator") or []
+
+    @property
+    def blackholes(self) -> list[dict]:
+        return self.lading.get("blackhole") or []
+
+    def materialize_config(self, config_dir: str) -> str:
+        """
+        Copy the agent configuration of the case to a directory, which can be modified by the run.
+        Return the path of the datadog.yaml file.
+        """
+        shutil.copytree(os.path.join(self.path, "datadog-agent"), config_dir, dirs_exist_ok=True)
+
+        return os.path.join(config_dir, "datadog.yaml")
+
+    def target_environment(self, config_dir: str) -> dict[str, str]:
+        """
+        Environment of the target run with the configuration materialized in `config_dir`: its checks and their
+        configurations are loaded from there rather than from the default locations of the host.
+        """
+        return {
+            "DD_CONFD_PATH": os.path.join(config_dir, "conf.d"),
+            "DD_ADDITIONAL_CHECKSD": os.path.join(config_dir, "checks.d"),
+            **self.environment,
+        }
+
+
+def list_cases(cases_dir: str = REGRESSION_CASES_DIR) -> list[str]:
+    return sorted(
+        name for name in os.listdir(cases_dir) if os.path.isfile(os.path.join(cases_dir, name, "experiment.yaml"))
+    )
@@ -0,0 +1,398 @@
+"""
+Local stand-ins for the lading generators and blackholes used by the regression cases.
+
+They reproduce the shape of the traffic (transport, payload kind, throughput) rather than the exact payloads of
+lading: payloads are built once from the seed of the generator then sent in a loop at the configured rate.
+"""
+
+from __future__ import annotations
+
+import abc
+import errno
+import json
+import os
+import random
+import socket
+import string
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tasks.libs.common.color import Color, color_message
+from tasks.libs.regression.case import parse_size
+
+# Upper bound of the payloads built by a generator before the run, whatever the lading configuration says
+MAX_PREBUILD_CACHE_SIZE = 8 * 1024**2
+# Period of the rate limiter of the generators
+GENERATOR_TICK = 0.01
+
+_ALPHABET = string.ascii_lowercase + string.digits + "_"
+
+
+def _inclusive(config: dict, key: str, default: tuple[int, int]) -> tuple[int, int]:
+    bounds = (config.get(key) or {}).get("inclusive") or {}
+    return bounds.get("min", default[0]), bounds.get("max", default[1])
+
+
+def _word(rng: random.Random, bounds: tuple[int, int]) -> str:
+    return "".join(rng.choices(_ALPHABET, k=rng.randint(*bounds)))
+
+
+def dogstatsd_payloads(rng: random.Random, variant: dict, size: int) -> list[bytes]:
+    """
+    DogStatsD messages (metrics, events and service checks), drawn from a fixed set of contexts.
+    """
+    name_length = _inclusive(variant, "name_length", (1, 200))
+    tag_length = _inclusive(variant, "tag_length", (3, 150))
+    tags_per_msg = _inclusive(variant, "tags_per_msg", (2, 50))
+    contexts_count = rng.randint(*_inclusive(variant, "contexts", (1000, 10000)))
+    kind_weights = variant.get("kind_weights") or {"metric": 90, "event": 5, "service_check": 5}
+    metric_weights = variant.get("metric_weights") or {"count": 100, "gauge": 10}
+    metric_types = {"count": "c", "gauge": "g", "timer": "ms", "distribution": "d", "set": "s", "histogram": "h"}
+
+    kinds, kinds_weights = zip(*kind_weights.items(), strict=True)
+    types, types_weights = zip(
+        *((metric_types[kind], weight) for kind, weight in metric_weights.items() if weight), strict=True
+    )
+    contexts = [
+        (_word(rng, name_length), ",".join(_word(rng, tag_length) for _ in range(rng.randint(*tags_per_msg))))
+        for _ in range(contexts_count)
+    ]
+
+    payloads = []
+    total = 0
+    while total < size:
+        name, tags = rng.choice(contexts)
+        kind = rng.choices(kinds, kinds_weights)[0]
+        if kind == "event":
+            text = _word(rng, (10, 100))
+            message = f"_e{{{len(name)},{len(text)}}}:{name}|{text}|#{tags}"
+        elif kind == "service_check":
+            message = f"_sc|{name}|{rng.randint(0, 3)}|#{tags}"
+        else:
+            message = f"{name}:{rng.random() * 1000:.3f}|{rng.choices(types, types_weights)[0]}|#{tags}"
+        payloads.append(message.encode())
+        total += len(payloads[-1])
+
+    return payloads
+
+
+def line_payloads(rng: random.Random, variant: str, size: int) -> list[bytes]:
+    """
+    Newline-delimited logs, for the `datadog_log`, `syslog5424` and `ascii` variants of lading.
+    """
+    payloads = []
+    total = 0
+    while total < size:
+        message = " ".join(_word(rng, (2, 12)) for _ in range(rng.randint(5, 40)))
+        if variant == "datadog_log":
+            line = json.dumps(
+                {
+                    "message": message,
+                    "status": rng.choice(["notice", "info", "warning", "error"]),
+                    "timestamp": rng.randint(0, 2**31),
+                    "hostname": _word(rng, (4, 16)),
+                    "service": _word(rng, (4, 16)),
+                    "ddsource": _word(rng, (4, 16)),
+                    "ddtags": ",".join(_word(rng, (3, 20)) for _ in range(rng.randint(0, 10))),
+                }
+            )
+        elif variant == "syslog5424":
+            line = (
+                f"<{rng.randint(0, 191)}>1 2024-01-01T00:00:00.000Z {_word(rng, (4, 16))} {_word(rng, (4, 16))} "
+                f"{rng.randint(1, 65535)} ID{rng.randint(0, 999)} - {message}"
+            )
+        else:
+            line = message
+        payloads.append(f"{line}\n".encode())
+        total += len(payloads[-1])
+
+    return payloads
+
+
+class Generator(threading.Thread, abc.ABC):
+    """
+    Traffic sent to the target from a thread, until `stop` is called.
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(daemon=True)
+        self.config = config
+        self.rng = random.Random(bytes(config.get("seed") or [0]))
+        self.stop_event = threading.Event()
+        self.bytes_sent = 0
+        self.errors = 0
+        self.payloads: list[bytes] = []
+
+    @abc.abstractmethod
+    def build_payloads(self) -> list[bytes]:
+        """
+        Prepare the traffic before the run, which isn't sampled along with the target.
+        """
+
+    def stop(self):
+        self.stop_event.set()
+        if self.is_alive():
+            self.join()
+
+
+class PayloadGenerator(Generator):
+    """
+    Send prebuilt payloads in a loop, at `bytes_per_second`.
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.bytes_per_second = parse_size(config.get("bytes_per_second", "1 MiB"))
+
+    @property
+    def prebuild_size(self) -> int:
+        size = self.config.get("maximum_prebuild_cache_size_bytes") or (self.config.get("method") or {}).get(
+            "post", {}
+        ).get("maximum_prebuild_cache_size_bytes")
+        return min(parse_size(size) if size else MAX_PREBUILD_CACHE_SIZE, MAX_PREBUILD_CACHE_SIZE)
+
+    @abc.abstractmethod
+    def send(self, payload: bytes):
+        """
+        Send a payload to the target, an OSError counting as an error of the generator.
+        """
+
+    def close(self):
+        pass
+
+    def run(self):
+        if not self.payloads:
+            self.payloads = self.build_payloads()
+        if not self.payloads:
+            return
+        index = 0
+        allowance = 0.0
+        last = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                # Don't accumulate more than a second of traffic when the target can't keep up
+                allowance = min(allowance + (now - last) * self.bytes_per_second, self.bytes_per_second)
+                last = now
+                while allowance >= len(self.payloads[index]) and not self.stop_event.is_set():
+                    payload = self.payloads[index]
+                    index = (index + 1) % len(self.payloads)
+                    allowance -= len(payload)
+                    try:
+                        self.send(payload)
+                        self.bytes_sent += len(payload)
+                    except OSError:
+                        self.errors += 1
+                        break
+                self.stop_event.wait(GENERATOR_TICK)
+        finally:
+            self.close()
+
+
+class UnixDatagramGenerator(PayloadGenerator):
+    """
+    Stand-in for the `unix_datagram` generator, with the `dogstatsd` variant.
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.path = config["path"]
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def build_payloads(self) -> list[bytes]:
+        return dogstatsd_payloads(
+            self.rng, (self.config.get("variant") or {}).get("dogstatsd") or {}, self.prebuild_size
+        )
+
+    def send(self, payload: bytes):
+        self.sock.sendto(payload, self.path)
+
+    def close(self):
+        self.sock.close()
+
+
+class UdpGenerator(PayloadGenerator):
+    """
+    Stand-in for the `udp` generator, with the `dogstatsd` variant.
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        host, port = config["addr"].rsplit(":", 1)
+        self.addr = (host, int(port))
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def build_payloads(self) -> list[bytes]:
+        return dogstatsd_payloads(
+            self.rng, (self.config.get("variant") or {}).get("dogstatsd") or {}, self.prebuild_size
+        )
+
+    def send(self, payload: bytes):
+        self.sock.sendto(payload, self.addr)
+
+    def close(self):
+        self.sock.close()
+
+
+class TcpGenerator(PayloadGenerator):
+    """
+    Stand-in for the `tcp` generator, sending newline-delimited logs.
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        host, port = config["addr"].rsplit(":", 1)
+        self.addr = (host, int(port))
+        self.sock: socket.socket | None = None
+
+    def build_payloads(self) -> list[bytes]:
+        variant = self.config.get("variant", "ascii")
+        return line_payloads(self.rng, variant if isinstance(variant, str) else "ascii", self.prebuild_size)
+
+    def send(self, payload: bytes):
+        if self.sock is None:
+            self.sock = socket.create_connection(self.addr, timeout=1)
+        try:
+            self.sock.sendall(payload)
+        except OSError:
+            # Reconnect on the next payload
+            self.close()
+            raise
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class FileTreeGenerator(Generator):
+    """
+    Stand-in for the `file_tree` generator: a tree of files in which `rename_per_second` folders are renamed.
+    """
+
+    def __init__(self, config: dict, root: str | None = None):
+        super().__init__(config)
+        self.root = root or config["root"]
+        self.rename_per_second = config.get("rename_per_second", 10)
+        self.folders: list[str] = []
+        self.renames = 0
+
+    def build_payloads(self) -> list[bytes]:
+        if self.folders:
+            return []
+        depth = self.config.get("max_depth", 3)
+        breadth = self.config.get("max_sub_folders", 5)
+        files = self.config.get("max_files", 5)
+
+        def populate(folder, level):
+            os.makedirs(folder, exist_ok=True)
+            self.folders.append(folder)
+            for i in range(files):
+                with open(os.path.join(folder, f"file{i}"), "w") as f:
+                    f.write(_word(self.rng, (16, 256)))
+            if level < depth:
+                for i in range(breadth):
+                    populate(os.path.join(folder, f"folder{i}"), level + 1)
+
+        populate(self.root, 1)
+        self.folders.pop(0)
+        return []
+
+    def run(self):
+        self.build_payloads()
+        while not self.stop_event.wait(1 / self.rename_per_second):
+            if not self.folders:
+                return
+            folder = self.rng.choice(self.folders)
+            renamed = f"{folder}.{self.rng.randrange(1 << 16)}"
+            try:
+                os.rename(folder, renamed)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+                self.errors += 1
+                continue
+            # Sub-folders moved along with their parent
+            self.folders = [
+                renamed + path[len(folder) :] if path == folder or path.startswith(folder + os.sep) else path
+                for path in self.folders
+            ]
+            self.renames += 1
+
+
+GENERATORS = {
+    "unix_datagram": UnixDatagramGenerator,
+    "udp": UdpGenerator,
+    "tcp": TcpGenerator,
+    "file_tree": FileTreeGenerator,
+}
+
+
+def create_generator(spec: dict, work_dir: str) -> Generator | None:
+    """
+    Create the stand-in of a lading generator, given as {kind: configuration}, None if it has none.
+    Paths of file trees are moved into the work directory.
+    """
+    ((kind, config),) = spec.items()
+    if kind not in GENERATORS:
+        print(
+            color_message(
+                f"[WARN] No local stand-in for the lading generator {kind}, supported: {', '.join(GENERATORS)}",
+                Color.ORANGE,
+            )
+        )
+        return None
+    if kind == "file_tree":
+        return FileTreeGenerator(config, os.path.join(work_dir, "file_tree"))
+    return GENERATORS[kind](config)
+
+
+class _BlackholeHandler(BaseHTTPRequestHandler):
+    def _discard(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        received = len(self.rfile.read(length)) if length else 0
+        # Requests are handled by a thread each
+        with self.server.lock:
+            self.server.bytes_received += received
+            self.server.requests += 1
+        self.send_response(202)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    do_POST = do_PUT = do_GET = _discard
+
+    def log_message(self, *_):
+        pass
+
+
+class HttpBlackhole(ThreadingHTTPServer):
+    """
+    Stand-in for the `http` blackhole: accept and discard requests, counting their size.
+    """
+
+    def __init__(self, binding_addr: str):
+        host, port = binding_addr.rsplit(":", 1)
+        self.lock = threading.Lock()
+        self.bytes_received = 0
+        self.requests = 0
+        super().__init__((host, int(port)), _BlackholeHandler)
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def create_blackholes(specs: list[dict]) -> list[HttpBlackhole]:
+    blackholes = []
+    for spec in specs:
+        ((kind, config),) = spec.items()
+        if kind != "http":
+            raise ValueError(f"Unsupported lading blackhole {kind}")
+        blackholes.append(HttpBlackhole(config["binding_addr"]))
+    return blackholes
@@ -0,0 +1,258 @@
+"""
+Local runs of the regression experiments: CPU and memory of the target process, sampled from /proc.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import shlex
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+from tasks.libs.regression.case import RegressionCase
+from tasks.libs.regression.generators import create_blackholes, create_generator
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+# Metric of the summary compared for each optimization goal of the experiments
+GOAL_METRICS = {
+    "cpu": "cpu_percent",
+    "memory": "rss_mean",
+    "ingress_throughput": "ingress_bytes_per_second",
+}
+
+
+def _children(pid: int) -> list[int]:
+    """
+    Children of a process, forked by any of its threads.
+    """
+    children = []
+    for path in glob.glob(f"/proc/{pid}/task/*/children"):
+        try:
+            with open(path) as f:
+                children.extend(int(child) for child in f.read().split())
+        except OSError:
+            # The thread exited
+            continue
+    return children
+
+
+def process_tree(pid: int) -> list[int]:
+    """
+    The process and its descendants, the agent spawning its own sub-processes.
+    """
+    pids = [pid]
+    for parent in pids:
+        pids.extend(_children(parent))
+    return pids
+
+
+def read_process(pid: int) -> tuple[float, int] | None:
+    """
+    CPU time in seconds (user + system) and resident memory in bytes of a process, None if it exited.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+        with open(f"/proc/{pid}/statm") as f:
+            statm = f.read()
+    except OSError:
+        return None
+    # The command name can contain spaces, the fields are after its closing parenthesis
+    fields = stat[stat.rindex(")") + 2 :].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS, int(statm.split()[1]) * PAGE_SIZE
+
+
+@dataclass
+class ProcessSampler:
+    """
+    Sample the CPU and memory of a process tree every `interval` seconds, in a thread.
+    """
+
+    pid: int
+    interval: float = 1.0
+    samples: list[tuple[float, float, int]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        # CPU time of the processes which exited since the start of the sampling
+        self._cpu_times: dict[int, float] = {}
+
+    def sample(self) -> tuple[float, float, int]:
+        rss = 0
+        for pid in process_tree(self.pid):
+            usage = read_process(pid)
+            if usage is not None:
+                self._cpu_times[pid] = usage[0]
+                rss += usage[1]
+        sample = time.monotonic(), sum(self._cpu_times.values()), rss
+        self.samples.append(sample)
+        return sample
+
+    def run(self):
+        self.sample()
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.sample()
+
+
+def percentile(values: list[float], ratio: float) -> float:
+    values = sorted(values)
+    return values[min(int(ratio * len(values)), len(values) - 1)] if values else 0.0
+
+
+@dataclass
+class RunSummary:
+    case: str
+    command: str
+    duration: float
+    cpu_seconds: float
+    cpu_percent: float
+    rss_mean: float
+    rss_max: int
+    rss_p50: float
+    rss_p95: float
+    # Bytes sent by the generators to the target, and by the target to the blackholes
+    ingress_bytes: int
+    ingress_bytes_per_second: float
+    egress_bytes: int
+    egress_bytes_per_second: float
+    generator_errors: int
+    exit_code: int | None
+
+    @staticmethod
+    def from_samples(samples: list[tuple[float, float, int]], **kwargs) -> RunSummary:
+        """
+        Summarize the samples of a run, the CPU usage being the one between the first and the last sample.
+        """
+        duration = samples[-1][0] - samples[0][0] if len(samples) > 1 else 0.0
+        cpu_seconds = samples[-1][1] - samples[0][1] if samples else 0.0
+        rss = [sample[2] for sample in samples if sample[2]]
+        return RunSummary(
+            duration=duration,
+            cpu_seconds=cpu_seconds,
+            cpu_percent=100 * cpu_seconds / duration if duration else 0.0,
+            rss_mean=statistics.fmean(rss) if rss else 0.0,
+            rss_max=max(rss, default=0),
+            rss_p50=percentile(rss, 0.5),
+            rss_p95=percentile(rss, 0.95),
+            ingress_bytes_per_second=kwargs["ingress_bytes"] / duration if duration else 0.0,
+            egress_bytes_per_second=kwargs["egress_bytes"] / duration if duration else 0.0,
+            **kwargs,
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def describe(self) -> list[str]:
+        """
+        Human-readable lines of the summary.
+        """
+        mib = 1024**2
+        return [
+            f"CPU: {self.cpu_percent:.2f}% ({self.cpu_seconds:.2f}s over {self.duration:.2f}s)",
+            f"RSS: mean {self.rss_mean / mib:.1f} MiB, p50 {self.rss_p50 / mib:.1f} MiB, "
+            f"p95 {self.rss_p95 / mib:.1f} MiB, max {self.rss_max / mib:.1f} MiB",
+            f"Ingress: {self.ingress_bytes} bytes ({self.ingress_bytes_per_second / 1024:.1f} KiB/s), "
+            f"{self.generator_errors} send errors",
+            f"Egress: {self.egress_bytes} bytes ({self.egress_bytes_per_second / 1024:.1f} KiB/s)",
+            f"Exit code: {self.exit_code}",
+        ]
+
+
+def compare(baseline: dict, comparison: dict, goal: str = "cpu") -> dict:
+    """
+    Compare the summaries of two runs, the relative change of the metric of the optimization goal first.
+    For cpu and memory a positive change is a regression, for ingress_throughput it is an improvement.
+    """
+    metrics = [GOAL_METRICS[goal]] + [
+        metric
+        for metric in ("cpu_percent", "rss_mean", "rss_max", "ingress_bytes_per_second")
+        if metric != GOAL_METRICS[goal]
+    ]
+    changes = {}
+    for metric in metrics:
+        before, after = baseline[metric], comparison[metric]
+        changes[metric] = {
+            "baseline": before,
+            "comparison": after,
+            "change": (after - before) / before if before else None,
+        }
+    return {"goal": goal, "metric": GOAL_METRICS[goal], "changes": changes}
+
+
+def run_case(
+    case: RegressionCase,
+    command: str,
+    duration: float = 60,
+    warmup: float = 5,
+    interval: float = 1.0,
+    work_dir: str | None = None,
+) -> RunSummary:
+    """
+    Run a regression case locally: the target command is started with the configuration and environment of the
+    case, then the generators of the case send their traffic while the target is sampled.
+
+    The command can reference `{config_dir}`, the directory of the materialized configuration, and `{conf_file}`,
+    its datadog.yaml file. The checks and their configurations are loaded from the conf.d and checks.d directories
+    of `{config_dir}`.
+    """
+    with tempfile.TemporaryDirectory(prefix=f"regression-{case.name}-", dir=work_dir) as tmpdir:
+        config_dir = os.path.join(tmpdir, "etc")
+        conf_file = case.materialize_config(config_dir)
+        args = [arg.format(config_dir=config_dir, conf_file=conf_file) for arg in shlex.split(command)]
+
+        blackholes = create_blackholes(case.blackholes)
+        for blackhole in blackholes:
+            blackhole.start()
+        generators = [
+            generator for spec in case.generators if (generator := create_generator(spec, tmpdir)) is not None
+        ]
+        # Payloads are built before starting the target, not to be sampled along with it
+        for generator in generators:
+            generator.payloads = generator.build_payloads()
+
+        process = subprocess.Popen(args, env={**os.environ, **case.target_environment(config_dir)}, cwd=tmpdir)
+        sampler = ProcessSampler(process.pid, interval)
+        try:
+            time.sleep(warmup)
+            for generator in generators:
+                generator.start()
+            sampler.start()
+            time.sleep(duration)
+            sampler.stop()
+        finally:
+            for generator in generators:
+                generator.stop()
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            for blackhole in blackholes:
+                blackhole.stop()
+
+        return RunSummary.from_samples(
+            sampler.samples,
+            case=case.name,
+            command=command,
+            ingress_bytes=sum(generator.bytes_sent for generator in generators),
+            egress_bytes=sum(blackhole.bytes_received for blackhole in blackholes),
+            generator_errors=sum(generator.errors for generator in generators),
+            exit_code=process.returncode,
+        )
@@ -2,12 +2,15 @@
 Utility functions for manipulating licenses
 """
 
+import hashlib
+import inspect
 import json
 import os
 import re
 import shutil
 import tempfile
 import textwrap
+from concurrent.futures import ProcessPoolExecutor
 
 import yaml
 from invoke.exceptions import Exit
@@ -63,6 +66,10 @@ CONTRIBUTORS_WITH_UNCOMMENTED_HEADER = [
 ]
 
 
+# Copyright resolved per vendored module path@version, reused across runs
+COPYRIGHT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'datadog-agent', 'copyright-cache.json')
+
+
 # FIXME: This doesn't include licenses for non-go dependencies, like the javascript libs we use for the web gui
 def get_licenses_list(ctx, licenses_filename='LICENSE-3rdparty.csv'):
     # we need the full vendor tree in order to perform this analysis
@@ -233,24 +240,51 @@ def wwhrd_licenses(ctx):
     return licenses
 
 
-def find_copyright_for(package, overrides, ctx):
-    copyright = []
+class CopyrightResolver:
+    """
+    Resolve the copyright owners of vendored packages.
+
+    Copyright information of a package is the union of the one found in its
+    directory and in all of its parent directories. Each directory is only
+    scanned once per resolver, so resolving many sub-packages of the same
+    module does not re-read the module's LICENSE/NOTICE files.
+    """
+
+    def __init__(self, overrides, vendor_dir='vendor'):
+        self.overrides = overrides
+        self.vendor_dir = vendor_dir
+        self._dirs = {}
+        self._packages = {}
+
+    def resolve(self, package):
+        if package not in self._packages:
+            over = self.overrides(package)
+            if over:
+                self._packages[package] = over
+            else:
+                # since this is a package path, copyright information for the go module may
+                # be in a parent directory.
+                if package.count('/') > 0:
+                    parent = self.resolve('/'.join(package.split('/')[:-1]))
+                else:
+                    parent = []
+                self._packages[package] = list(set(parent + self._copyright_in_dir(package)))
+
+        return list(self._packages[package])
 
-    over = overrides(package)
-    if over:
-        return over
+    def _copyright_in_dir(self, package):
+        pkgdir = os.path.join(self.vendor_dir, package)
+        if pkgdir not in self._dirs:
+            self._dirs[pkgdir] = _scan_copyright_files(package, pkgdir)
 
-    # since this is a package path, copyright information for the go module may
-    # be in a parent directory.
-    if package.count('/') > 0:
-        parent = find_copyright_for('/'.join(package.split('/')[:-1]), overrides, ctx)
-    else:
-        parent = []
+        return self._dirs[pkgdir]
+
+
+def _scan_copyright_files(package, pkgdir):
+    copyright = []
 
     # search the package dir for a bunch of heuristically-useful files that might
     # contain copyright or authorship information
-    pkgdir = os.path.join('vendor', package)
-
     for filename in COPYRIGHT_LOCATIONS:
         filename = os.path.join(pkgdir, filename)
         if os.path.isfile(filename):
@@ -289,53 +323,208 @@ def find_copyright_for(package, overrides, ctx):
     for filename in AUTHORS_LOCATIONS:
         filename = os.path.join(pkgdir, filename)
         if os.path.isfile(filename):
-            lines = open(filename, encoding="utf-8")
-            if package in CONTRIBUTORS_WITH_UNCOMMENTED_HEADER:
-                lines = skipheader(lines)
-            for line in lines:
-                line = line.strip()
-                if not line or line[0] == '#':
-                    continue
-                copyright.append(line)
+            with open(filename, encoding="utf-8") as f:
+                lines = f
+                if package in CONTRIBUTORS_WITH_UNCOMMENTED_HEADER:
+                    lines = skipheader(lines)
+                for line in lines:
+                    line = line.strip()
+                    if not line or line[0] == '#':
+                        continue
+                    copyright.append(line)
 
-    return list(set(parent + copyright))
+    return copyright
 
 
-def read_overrides():
-    with open('.copyright-overrides.yml', encoding='utf-8') as overrides_yml:
-        override_spec = yaml.safe_load(overrides_yml)
-    override_pats = []
-    for pkg, dpy in override_spec.items():
-        # cast dpy to a list
-        if not isinstance(dpy, list):
-            dpy = [dpy]
-            override_spec[pkg] = dpy
-
-        if pkg.endswith('*'):
-            pkg = pkg[:-1]
-            override_pats.append((pkg, dpy))
-
-    def overrides(pkg):
+class Overrides:
+    """
+    Copyright overrides read from `.copyright-overrides.yml`.
+
+    Calling the object with a package name returns its overridden copyright, if any.
+    Exact package names take precedence over `*` patterns.
+    """
+
+    def __init__(self, override_spec):
+        self.spec = {}
+        self.patterns = []
+        for pkg, dpy in override_spec.items():
+            # cast dpy to a list
+            if not isinstance(dpy, list):
+                dpy = [dpy]
+            self.spec[pkg] = dpy
+
+            if pkg.endswith('*'):
+                self.patterns.append((pkg[:-1], dpy))
+
+        self.digest = hashlib.sha256(json.dumps(self.spec, sort_keys=True).encode()).hexdigest()
+
+    def __call__(self, pkg):
         try:
-            return override_spec[pkg]
+            return self.spec[pkg]
         except KeyError:
             pass
 
-        for pat, dpy in override_pats:
+        for pat, dpy in self.patterns:
             if pkg.startswith(pat):
                 return dpy
 
-    return overrides
 
+def read_overrides():
+    with open('.copyright-overrides.yml', encoding='utf-8') as overrides_yml:
+        override_spec = yaml.safe_load(overrides_yml)
+
+    return Overrides(override_spec)
 
-def find_copyright(ctx, licenses):
+
+def read_vendored_modules(vendor_dir='vendor'):
+    """
+    Returns the vendored modules listed in `vendor/modules.txt`, as a dict mapping
+    the module path to its version. The version is None for modules replaced by a
+    local directory, as their content is not pinned.
+    """
+    modules = {}
+    modules_file = os.path.join(vendor_dir, 'modules.txt')
+    if not os.path.isfile(modules_file):
+        return modules
+
+    with open(modules_file, encoding='utf-8') as f:
+        for line in f:
+            if not line.startswith('# '):
+                continue
+            # "# path version", "# path [version] => replacement [version]"
+            original, _, replacement = line[2:].partition('=>')
+            original = original.split()
+            replacement = replacement.split()
+            if replacement:
+                modules[original[0]] = replacement[1] if len(replacement) == 2 else None
+            elif len(original) == 2:
+                modules[original[0]] = original[1]
+
+    return modules
+
+
+def copyright_cache_key(package, modules):
+    """
+    Returns the cache key of a package: the path@version of every vendored module
+    containing it, from the outermost to the innermost one. Returns None if the
+    package does not belong to a module with a pinned version.
+    """
+    parts = package.split('/')
+    enclosing = []
+    for i in range(1, len(parts) + 1):
+        path = '/'.join(parts[:i])
+        if path in modules:
+            if modules[path] is None:
+                return None
+            enclosing.append(f'{path}@{modules[path]}')
+
+    return ' '.join(enclosing) or None
+
+
+def _resolve_copyright_shard(overrides, vendor_dir, packages):
+    resolver = CopyrightResolver(overrides, vendor_dir)
+    return {pkg: resolver.resolve(pkg) for pkg in packages}
+
+
+def resolve_copyrights(packages, overrides, vendor_dir='vendor', jobs=None):
+    """
+    Resolves the copyright of the given packages, sharding them by Go module
+    across a process pool so that each module's files are parsed by a single worker.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(packages) < 2 * jobs:
+        return _resolve_copyright_shard(overrides, vendor_dir, packages)
+
+    by_module = {}
+    for pkg in packages:
+        by_module.setdefault('/'.join(pkg.split('/')[:3]), []).append(pkg)
+
+    shards = [[] for _ in range(jobs)]
+    for i, module_packages in enumerate(sorted(by_module.values(), key=len, reverse=True)):
+        shards[i % jobs].extend(module_packages)
+
+    result = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_resolve_copyright_shard, overrides, vendor_dir, shard) for shard in shards if shard]
+        for future in futures:
+            result.update(future.result())
+
+    return result
+
+
+def copyright_heuristics_digest():
+    """
+    Returns a digest of the heuristics used to scan a package directory: the files
+    searched, the copyright patterns and the scanning code itself.
+    """
+    heuristics = {
+        'copyright_locations': COPYRIGHT_LOCATIONS,
+        'authors_locations': AUTHORS_LOCATIONS,
+        'copyright_re': COPYRIGHT_RE.pattern,
+        'copyright_ignore_res': [ign.pattern for ign in COPYRIGHT_IGNORE_RES],
+        'strip_suffixes_re': [suff_re.pattern for suff_re in STRIP_SUFFIXES_RE],
+        'contributors_with_uncommented_header': CONTRIBUTORS_WITH_UNCOMMENTED_HEADER,
+        'scan': inspect.getsource(_scan_copyright_files),
+    }
+    return hashlib.sha256(json.dumps(heuristics, sort_keys=True).encode()).hexdigest()
+
+
+def _load_copyright_cache(cache_file, overrides):
+    try:
+        with open(cache_file, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    # Any change to the overrides or to the heuristics may change the copyright of any package
+    if cache.get('overrides') != overrides.digest or cache.get('heuristics') != copyright_heuristics_digest():
+        return {}
+
+    return cache.get('modules', {})
+
+
+def _save_copyright_cache(cache_file, overrides, modules):
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'overrides': overrides.digest, 'heuristics': copyright_heuristics_digest(), 'modules': modules},
+                f,
+                sort_keys=True,
+            )
+    except OSError as e:
+        print(f"Could not write the copyright cache to {cache_file}: {e}")
+
+
+def find_copyright(ctx, licenses, vendor_dir='vendor', cache_file=COPYRIGHT_CACHE_FILE, jobs=None):
+    """
+    Fills the copyright of each license entry.
+
+    Results are cached in `cache_file` by module path@version, so only the packages
+    of the modules whose version changed since the last run are resolved again.
+    Set `cache_file` to None to disable the cache.
+    """
     overrides = read_overrides()
+    modules = read_vendored_modules(vendor_dir)
+    cache = _load_copyright_cache(cache_file, overrides) if cache_file else {}
+
+    keys = {lic['package']: copyright_cache_key(lic['package'], modules) for lic in licenses}
+    missing = [pkg for pkg, key in keys.items() if key is None or pkg not in cache.get(key, {})]
+    resolved = resolve_copyrights(missing, overrides, vendor_dir, jobs)
+
+    new_cache = {}
     for lic in licenses:
         pkg = lic['package']
-        cpy = find_copyright_for(pkg, overrides, ctx)
+        key = keys[pkg]
+        cpy = resolved[pkg] if pkg in resolved else cache[key][pkg]
+        if key is not None:
+            new_cache.setdefault(key, {})[pkg] = cpy
         if cpy:
             lic['copyright'] = cpy
         else:
             lic['copyright'] = ['UNKNOWN']
 
+    if cache_file:
+        _save_copyright_cache(cache_file, overrides, new_cache)
+
     return licenses
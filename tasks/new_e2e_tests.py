@@ -36,6 +36,7 @@ from tasks.modules import DEFAULT_MODULES
         'skip': 'Only run tests not matching the regular expression',
         'agent_image': 'Full image path for the agent image (e.g. "repository:tag") to run the e2e tests with',
         'cluster_agent_image': 'Full image path for the cluster agent image (e.g. "repository:tag") to run the e2e tests with',
+        'flake_history_file': 'JSON file recording the outcome of the tests run after run, used with --test-washer to show the failure rate of the failing tests',
     },
 )
 def run(
@@ -61,6 +62,7 @@ def run(
     junit_tar="",
     test_run_name="",
     test_washer=False,
+    flake_history_file=None,
     agent_image="",
     cluster_agent_image="",
 ):
@@ -144,7 +146,7 @@ def run(
         test_profiler=None,
     )
 
-    success = process_test_result(test_res, junit_tar, AgentFlavor.base, test_washer)
+    success = process_test_result(test_res, junit_tar, AgentFlavor.base, test_washer, flake_history_file)
 
     if running_in_ci():
         # Do not print all the params, they could contain secrets needed only in the CI
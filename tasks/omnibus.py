@@ -8,10 +8,13 @@ from tasks.flavor import AgentFlavor
 from tasks.go import deps
 from tasks.libs.common.omnibus import (
     install_dir_for_project,
+    omnibus_cache_key_manifest,
     omnibus_compute_cache_key,
+    print_cache_key_explanation,
     send_build_metrics,
     send_cache_miss_event,
     should_retry_bundle_install,
+    write_cache_key_manifest,
 )
 from tasks.libs.common.utils import gitlab_section, timed
 from tasks.libs.releasing.version import get_version, load_release_versions
@@ -261,11 +264,19 @@ def build(
             use_remote_cache = remote_cache_name is not None
             if use_remote_cache:
                 cache_state = None
-                cache_key = omnibus_compute_cache_key(ctx)
+                cache_key_manifest = omnibus_cache_key_manifest()
+                cache_key = omnibus_compute_cache_key(cache_key_manifest)
                 git_cache_url = f"s3://{os.environ['S3_OMNIBUS_CACHE_BUCKET']}/builds/{cache_key}/{remote_cache_name}"
+                # Inputs of the last uploaded cache, used to explain cache misses
+                manifest_url = f"s3://{os.environ['S3_OMNIBUS_CACHE_BUCKET']}/builds/manifests/{remote_cache_name}.json"
                 bundle_path = (
                     "/tmp/omnibus-git-cache-bundle" if sys.platform != 'win32' else "C:\\TEMP\\omnibus-git-cache-bundle"
                 )
+                manifest_path = (
+                    "/tmp/omnibus-cache-key-manifest.json"
+                    if sys.platform != 'win32'
+                    else "C:\\TEMP\\omnibus-cache-key-manifest.json"
+                )
                 with timed(quiet=True) as durations['Restoring omnibus cache']:
                     # Allow failure in case the cache was evicted
                     if ctx.run(f"{aws_cmd} s3 cp --only-show-errors {git_cache_url} {bundle_path}", warn=True):
@@ -278,6 +289,8 @@ def build(
                             cache_state = ctx.run(f"git -C {omnibus_cache_dir} tag -l").stdout
                     else:
                         print(f'Failed to restore cache from key {cache_key}')
+                        if ctx.run(f"{aws_cmd} s3 cp --only-show-errors {manifest_url} {manifest_path}", warn=True):
+                            print_cache_key_explanation(manifest_path, cache_key_manifest)
                         send_cache_miss_event(
                             ctx, os.environ.get('CI_PIPELINE_ID'), remote_cache_name, os.environ.get('CI_JOB_ID')
                         )
@@ -311,6 +324,8 @@ def build(
             if use_remote_cache and ctx.run(f"git -C {omnibus_cache_dir} tag -l").stdout != cache_state:
                 ctx.run(f"git -C {omnibus_cache_dir} bundle create {bundle_path} --tags")
                 ctx.run(f"{aws_cmd} s3 cp --only-show-errors {bundle_path} {git_cache_url}")
+                write_cache_key_manifest(cache_key_manifest, manifest_path)
+                ctx.run(f"{aws_cmd} s3 cp --only-show-errors {manifest_path} {manifest_url}")
 
     # Output duration information for different steps
     print("Build component timing:")
@@ -379,3 +394,19 @@ def manifest(
         omnibus_s3_cache=False,
         log_level=log_level,
     )
+
+
+@task
+def cache_key(_, output=None, previous=None):
+    """
+    Compute the omnibus cache key from the current tree.
+
+    - output: write the cache key inputs (manifest) to this file
+    - previous: explain which inputs changed compared to a previously written manifest
+    """
+    cache_key_manifest = omnibus_cache_key_manifest()
+    omnibus_compute_cache_key(cache_key_manifest)
+    if previous:
+        print_cache_key_explanation(previous, cache_key_manifest)
+    if output:
+        write_cache_key_manifest(cache_key_manifest, output)
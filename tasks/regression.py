@@ -0,0 +1,92 @@
+"""
+Local runs of the regression experiments of test/regression/cases, without the Single Machine Performance platform.
+"""
+
+import json
+
+from invoke import task
+from invoke.exceptions import Exit
+
+from tasks.libs.common.color import Color, color_message
+from tasks.libs.regression.case import REGRESSION_CASES_DIR, RegressionCase, list_cases
+from tasks.libs.regression.sampling import compare as compare_runs
+from tasks.libs.regression.sampling import run_case
+
+
+@task
+def list_experiments(_, cases_dir=REGRESSION_CASES_DIR):
+    """
+    List the regression cases with their optimization goal.
+    """
+    for name in list_cases(cases_dir):
+        print(f"{name}: {RegressionCase.load(name, cases_dir).optimization_goal}")
+
+
+@task(
+    help={
+        "case": "Name of the case, a directory of test/regression/cases",
+        "command": "Command of the target, {config_dir} and {conf_file} are replaced by the configuration of the case",
+        "duration": "Duration of the sampling, in seconds",
+        "warmup": "Time given to the target to start before sending traffic, in seconds",
+        "interval": "Interval between two samples of the target, in seconds",
+        "output": "JSON file to write the summary to",
+    }
+)
+def local_run(
+    _,
+    case,
+    command="bin/agent/agent run -c {config_dir}",
+    duration=60,
+    warmup=5,
+    interval=1.0,
+    output=None,
+    cases_dir=REGRESSION_CASES_DIR,
+):
+    """
+    Run a regression case locally: sample the CPU and memory of the target while the case generators send traffic.
+
+    Example: inv regression.local-run --case uds_dogstatsd_to_api --output baseline.json
+    """
+    try:
+        regression_case = RegressionCase.load(case, cases_dir)
+    except ValueError as e:
+        raise Exit(color_message(str(e), Color.RED), code=1) from e
+
+    summary = run_case(regression_case, command, float(duration), float(warmup), float(interval))
+    for line in summary.describe():
+        print(line)
+    if summary.generator_errors:
+        print(
+            color_message(
+                f"[WARN] {summary.generator_errors} payloads couldn't be sent, the target may not be listening",
+                Color.ORANGE,
+            )
+        )
+    if output:
+        with open(output, "w") as f:
+            json.dump(summary.to_dict(), f, indent=2)
+
+
+@task
+def compare(_, baseline, comparison, goal=None, cases_dir=REGRESSION_CASES_DIR):
+    """
+    Compare two summaries written by local-run, on the optimization goal of their case unless one is given.
+    """
+    with open(baseline) as f:
+        baseline_summary = json.load(f)
+    with open(comparison) as f:
+        comparison_summary = json.load(f)
+    if baseline_summary["case"] != comparison_summary["case"]:
+        print(
+            color_message(
+                f"[WARN] Comparing runs of different cases: {baseline_summary['case']} and {comparison_summary['case']}",
+                Color.ORANGE,
+            )
+        )
+    goal = goal or RegressionCase.load(baseline_summary["case"], cases_dir).optimization_goal
+
+    result = compare_runs(baseline_summary, comparison_summary, goal)
+    for metric, change in result["changes"].items():
+        relative = "n/a" if change["change"] is None else f"{100 * change['change']:+.2f}%"
+        line = f"{metric}: {change['baseline']:.2f} -> {change['comparison']:.2f} ({relative})"
+        print(color_message(line, Color.BOLD) if metric == result["metric"] else line)
@@ -629,23 +629,32 @@ def docker_functional_tests(
 
 
 @task
-def generate_cws_documentation(ctx, go_generate=False):
+def generate_cws_documentation(ctx, go_generate=False, no_cache=False):
+    """
+    Generate the CWS documentation. Only the sections whose inputs changed since the last generation are rendered,
+    unless no_cache is set.
+    """
     if go_generate:
         cws_go_generate(ctx)
 
+    flags = " --no-cache" if no_cache else ""
     # secl docs
     ctx.run(
         "python3 ./docs/cloud-workload-security/scripts/secl-doc-gen.py --input ./docs/cloud-workload-security/secl_linux.json --output ./docs/cloud-workload-security/linux_expressions.md --template ./linux_expressions.md"
+        + flags
     )
     ctx.run(
         "python3 ./docs/cloud-workload-security/scripts/secl-doc-gen.py --input ./docs/cloud-workload-security/secl_windows.json --output ./docs/cloud-workload-security/windows_expressions.md --template ./windows_expressions.md"
+        + flags
     )
     # backend event docs
     ctx.run(
         "python3 ./docs/cloud-workload-security/scripts/backend-doc-gen.py --input ./docs/cloud-workload-security/backend_linux.schema.json --output ./docs/cloud-workload-security/backend_linux.md --template ./backend_linux.md"
+        + flags
     )
     ctx.run(
         "python3 ./docs/cloud-workload-security/scripts/backend-doc-gen.py --input ./docs/cloud-workload-security/backend_windows.schema.json --output ./docs/cloud-workload-security/backend_windows.md --template ./backend_windows.md"
+        + flags
     )
 
 
@@ -232,7 +232,7 @@ def install_go_tools(ctx) -> SetupResult:
     message = ""
 
     try:
-        from tasks import install_tools
+        from tasks.install_tasks import install_tools
 
         install_tools(ctx)
     except Exception:
@@ -248,7 +248,7 @@ def install_protoc(ctx) -> SetupResult:
     message = ""
 
     try:
-        from tasks import install_protoc
+        from tasks.install_tasks import install_protoc
 
         install_protoc(ctx)
     except Exception as e:
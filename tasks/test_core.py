@@ -170,7 +170,7 @@ def process_input_args(
     sets default values for them & casts them to the expected types.
     """
     if only_modified_packages:
-        from tasks import get_modified_packages
+        from tasks.gotest import get_modified_packages
 
         if not build_tags:
             build_tags = []
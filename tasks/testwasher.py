@@ -3,6 +3,7 @@ from __future__ import annotations
 import copy
 import json
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 import yaml
 from invoke import task
@@ -10,6 +11,7 @@ from invoke import task
 from tasks.libs.ciproviders.gitlab_api import (
     get_full_gitlab_ci_configuration,
 )
+from tasks.libs.common.flake_store import FlakeStore, FlakyTestTrie
 from tasks.libs.common.utils import gitlab_section
 from tasks.test_core import ModuleTestResult
 
@@ -22,11 +24,13 @@ class TestWasher:
         test_output_json_file="module_test_output.json",
         flaky_test_indicator=FLAKY_TEST_INDICATOR,
         flakes_file_path="flakes.yaml",
+        flake_history_file=None,
     ):
         self.test_output_json_file = test_output_json_file
         self.flaky_test_indicator = flaky_test_indicator
         self.flakes_file_path = flakes_file_path
-        self.known_flaky_tests = defaultdict(set)
+        # When a history file is given, the outcome of the tests is recorded in it by process_module_results
+        self.flake_store = FlakeStore(flake_history_file)
 
         self.parse_flaky_file()
 
@@ -35,47 +39,46 @@ class TestWasher:
         Parse the test output json file and compute the failing tests and the one known flaky
         """
 
-        all_known_flakes = self.merge_known_flakes(flaky_marked_tests)
         non_flaky_failing_tests = defaultdict(set)
 
         for package, tests in failing_tests.items():
-            non_flaky_failing_tests_in_package = set()
-            known_flaky_tests_parents = self.get_tests_family_if_failing_tests(
-                all_known_flakes[package], failing_tests[package]
+            known_flaky_tests = self.flake_store.flaky_tests.get(package, FlakyTestTrie())
+            marked_flaky_tests = FlakyTestTrie(flaky_marked_tests.get(package, ()))
+            # Ancestors of a failing known flaky test fail along with it
+            known_flaky_tests_parents = self.get_tests_family(
+                [test for test in tests if test in known_flaky_tests or test in marked_flaky_tests]
             )
-            for failing_test in tests:
-                if not self.is_known_flaky_test(failing_test, all_known_flakes[package], known_flaky_tests_parents):
-                    non_flaky_failing_tests_in_package.add(failing_test)
+            non_flaky_failing_tests_in_package = {
+                test
+                for test in tests
+                if not (
+                    known_flaky_tests.is_flaky(test)
+                    or marked_flaky_tests.is_flaky(test)
+                    or test in known_flaky_tests_parents
+                )
+            }
             if non_flaky_failing_tests_in_package:
                 non_flaky_failing_tests[package] = non_flaky_failing_tests_in_package
         return non_flaky_failing_tests
 
-    def merge_known_flakes(self, marked_flakes):
-        """
-        Merge flakes marked in the go code and the ones from the flakes.yaml file
-        """
-        known_flakes = self.known_flaky_tests.copy()
-        for package, tests in marked_flakes.items():
-            if package in known_flakes:
-                known_flakes[package] = known_flakes[package].union(tests)
-            else:
-                known_flakes[package] = tests
-        return known_flakes
-
     def parse_flaky_file(self):
         """
-        Parse the flakes.yaml file and add the tests listed there to the kown flaky tests list
+        Parse the flakes.yaml file and add the tests listed there to the known flaky tests of the flake store
         """
-        with open(self.flakes_file_path) as f:
-            flakes = yaml.safe_load(f)
-            if not flakes:
-                return
-            for package, tests in flakes.items():
-                self.known_flaky_tests[f"github.com/DataDog/datadog-agent/{package}"].update(set(tests))
+        self.flake_store.load_flakes_file(self.flakes_file_path)
 
     def parse_test_results(self, module_path: str) -> tuple[dict, dict]:
+        failing_tests, flaky_marked_tests, _ = self.parse_test_output(module_path)
+        return failing_tests, flaky_marked_tests
+
+    def parse_test_output(self, module_path: str) -> tuple[dict, dict, dict]:
+        """
+        Parse the test output json file of a module.
+        Return the failing tests, the tests marked as flaky and the outcome of every test (True if it passed), by package
+        """
         failing_tests = defaultdict(set)
         flaky_marked_tests = defaultdict(set)
+        outcomes = defaultdict(dict)
 
         with open(f"{module_path}/{self.test_output_json_file}", encoding='utf-8') as f:
             for line in f:
@@ -84,28 +87,51 @@ class TestWasher:
                     continue
                 if test_result["Action"] == "fail":
                     failing_tests[test_result["Package"]].add(test_result["Test"])
+                    outcomes[test_result["Package"]][test_result["Test"]] = False
+                if test_result["Action"] == "pass":
+                    outcomes[test_result["Package"]][test_result["Test"]] = True
                 if test_result["Action"] == "success":
                     if test_result["Test"] in failing_tests[test_result["Package"]]:
                         failing_tests[test_result["Package"]].remove(test_result["Test"])
                 if "Output" in test_result and self.flaky_test_indicator in test_result["Output"]:
                     flaky_marked_tests[test_result["Package"]].add(test_result["Test"])
-        return failing_tests, flaky_marked_tests
+        return failing_tests, flaky_marked_tests, outcomes
 
-    def process_module_results(self, module_results: list[ModuleTestResult]):
+    def wash_module(self, module_path: str) -> tuple[dict, dict, dict]:
+        """
+        Return the failing tests, the failing tests not known to be flaky and the outcome of every test of a module
+        """
+        failing_tests, flaky_marked_tests, outcomes = self.parse_test_output(module_path)
+        non_flaky_failing_tests = self.get_non_flaky_failing_tests(
+            failing_tests=failing_tests, flaky_marked_tests=flaky_marked_tests
+        )
+        return failing_tests, non_flaky_failing_tests, outcomes
+
+    def process_module_results(self, module_results: list[ModuleTestResult], max_workers: int | None = None):
         """
         Process the module test results and decide whether we should succeed or not.
         If only known flaky tests are failing, we should succeed.
-        If failing, displays the failing tests that are not known to be flaky
+        If failing, displays the failing tests that are not known to be flaky, along with their failure rate
+        when the outcomes are recorded in a flake history file.
+        Modules are processed in parallel.
         """
 
+        module_paths = [module_result.path for module_result in module_results]
+        if len(module_paths) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(self,)) as executor:
+                washed_modules = list(executor.map(_wash_module, module_paths))
+        else:
+            washed_modules = [self.wash_module(path) for path in module_paths]
+
         should_succeed = True
         failed_tests = []
         failed_command_modules = []
-        for module_result in module_results:
-            failing_tests, flaky_marked_tests = self.parse_test_results(module_result.path)
-            non_flaky_failing_tests = self.get_non_flaky_failing_tests(
-                failing_tests=failing_tests, flaky_marked_tests=flaky_marked_tests
-            )
+        run_outcomes = defaultdict(dict)
+        for module_result, (failing_tests, non_flaky_failing_tests, outcomes) in zip(
+            module_results, washed_modules, strict=True
+        ):
+            for package, tests in outcomes.items():
+                run_outcomes[package].update(tests)
             if (
                 not failing_tests and module_result.failed
             ):  # In this case the Go test command failed on one of the modules but no test failed, it means that the test command itself failed (build errors,...)
@@ -114,10 +140,15 @@ class TestWasher:
             if non_flaky_failing_tests:
                 should_succeed = False
                 for package, tests in non_flaky_failing_tests.items():
-                    failed_tests.extend(f"- {package} {test}" for test in tests)
+                    failed_tests.extend((package, test) for test in tests)
+
+        if self.flake_store.history_file:
+            self.flake_store.record_run(run_outcomes)
+            self.flake_store.save_history()
+
         if failed_tests:
             print("The test command failed, the following tests failed and are not supposed to be flaky:")
-            print("\n".join(sorted(failed_tests)))
+            print("\n".join(self.describe_failed_test(package, test) for package, test in sorted(failed_tests)))
         if failed_command_modules:
             print("The test command failed, before test execution on the following modules:")
             print("\n".join(sorted(failed_command_modules)))
@@ -125,39 +156,14 @@ class TestWasher:
 
         return should_succeed
 
-    def is_known_flaky_test(self, failing_test, known_flaky_tests, known_flaky_tests_parents):
+    def describe_failed_test(self, package: str, test: str) -> str:
         """
-        Check if a test is known to be flaky
-        The method should be called with the following arguments:
-        - failing_test: the test that is failing
-        - known_flaky_tests: the set of tests that are known to be flaky
-        - known_flaky_tests_parents: the set of tests that are ancestors of a known flaky test, thus would fail when the flaky leaf test fails
-        If a test is a parent of a test that is known to be flaky, the test should be considered flaky
-        For example:
-        - if TestEKSSuite/TestCPU is known to be flaky, TestEKSSuite/TestCPU/TestCPUUtilization should be considered flaky
-        - if TestEKSSuite/TestCPU is known to be flaky, TestEKSSuite should be considered flaky unless TestEKSSuite/TestCPU is not failing
-        - if TestEKSSuite/TestCPU is known to be flaky, TestEKSSuite/TestMemory should not be considered flaky
+        Line listing a failing test, with its failure rate over the recorded runs if there's a flake history
         """
-
-        failing_test_parents = self.get_tests_family([failing_test])
-
-        if any(parent in known_flaky_tests for parent in failing_test_parents):
-            return True
-
-        return failing_test in known_flaky_tests_parents
-
-    def get_tests_family_if_failing_tests(self, test_name_list, failing_tests: set):
-        """
-        Get the parent tests of a list of tests only if the marked test is failing
-        For example with the test ["TestEKSSuite/TestCPU/TestCPUUtilization", "TestKindSuite/TestCPU"]
-        this method should return the set{"TestEKSSuite/TestCPU/TestCPUUtilization", "TestEKSSuite/TestCPU", "TestEKSSuite", "TestKindSuite/TestCPU", "TestKindSuite"}
-        if TestKindSuite/TestCPU and TestEKSSuite/TestCPU/TestCPUUtilization are failing
-        Another example, with the test ["TestEKSSuite/TestCPU/TestCPUUtilization", "TestKindSuite/TestCPU"]
-        if only TestKindSuite/TestCPU is failing, the method should return the set{"TestKindSuite/TestCPU", "TestKindSuite"}
-        """
-        test_name_set = set(test_name_list)
-        marked_tests_failing = failing_tests.intersection(test_name_set)
-        return self.get_tests_family(list(marked_tests_failing))
+        if not self.flake_store.history_file or self.flake_store.runs < 2:
+            return f"- {package} {test}"
+        rate = self.flake_store.flake_rate(package, test, recent=True)
+        return f"- {package} {test} (failed {rate:.0%} of its recent runs)"
 
     def get_tests_family(self, test_name_list):
         """
@@ -173,6 +179,19 @@ class TestWasher:
         return test_family
 
 
+# Test washer of the process, in process_module_results workers
+_worker_washer: TestWasher | None = None
+
+
+def _init_worker(washer: TestWasher):
+    global _worker_washer
+    _worker_washer = washer
+
+
+def _wash_module(module_path: str) -> tuple[dict, dict, dict]:
+    return _worker_washer.wash_module(module_path)
+
+
 @task
 def generate_flake_finder_pipeline(ctx, n=3):
     """
@@ -0,0 +1,91 @@
+import gzip
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SCRIPT = "pkg/aggregator/ckey/tests/generate_contexts.py"
+
+
+def decode_binary(data):
+    """
+    Decode the contexts encoded by encode_binary.
+    """
+    contexts = []
+    offset = 0
+    while offset < len(data):
+        (name_length,) = struct.unpack_from("<H", data, offset)
+        offset += 2
+        name = data[offset : offset + name_length].decode()
+        offset += name_length
+        (tag_count,) = struct.unpack_from("<B", data, offset)
+        offset += 1
+        tags = []
+        for _ in range(tag_count):
+            (tag_length,) = struct.unpack_from("<H", data, offset)
+            offset += 2
+            tags.append(data[offset : offset + tag_length].decode())
+            offset += tag_length
+        contexts.append((name, tags))
+    return contexts
+
+
+class TestGenerateContexts(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def generate(self, *args):
+        return subprocess.run(
+            [sys.executable, SCRIPT, "-n", "1000", "--shard-size", "300", "-j", "2", *args],
+            capture_output=True,
+            check=False,
+        )
+
+    def read(self, name):
+        with open(os.path.join(self.tmpdir.name, name), "rb") as f:
+            return f.read()
+
+    def test_binary_limits(self):
+        output = os.path.join(self.tmpdir.name, "contexts.bin")
+        for args, error in [
+            (["--tags-count", "1-256"], b"--tags-count can't exceed 255"),
+            (["--name-length", "65536"], b"--name-length and --tag-length can't exceed 65535"),
+            (["--tag-length", "1-65536"], b"--name-length and --tag-length can't exceed 65535"),
+        ]:
+            with self.subTest(args=args):
+                result = self.generate("--format", "binary", "-o", output, *args)
+                self.assertEqual(result.returncode, 2)
+                self.assertIn(error, result.stderr)
+                self.assertFalse(os.path.exists(output))
+
+        # The limits only apply to the binary format
+        result = self.generate("--tags-count", "256", "-o", os.path.join(self.tmpdir.name, "contexts.csv"))
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_binary_round_trip(self):
+        params = ["--seed", "42", "--tags-count", "1-5", "--tag-length", "1-40", "--duplicates", "0.1"]
+        for output_format in ("csv", "binary"):
+            result = self.generate(
+                *params, "--format", output_format, "-o", os.path.join(self.tmpdir.name, output_format)
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+
+        csv_contexts = []
+        for line in self.read("csv").decode().splitlines():
+            name, _, tags = line.partition(",")
+            csv_contexts.append((name, tags.split(" ") if tags else []))
+        self.assertEqual(len(csv_contexts), 1000)
+        self.assertEqual(decode_binary(self.read("binary")), csv_contexts)
+
+    def test_compressed_stdout(self):
+        result = self.generate("--format", "binary", "-o", os.path.join(self.tmpdir.name, "contexts.bin"))
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        result = self.generate("--format", "binary", "-o", "-", "--compress")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(gzip.decompress(result.stdout), self.read("contexts.bin"))
@@ -2,7 +2,7 @@ import os
 import shutil
 import tempfile
 import unittest
-from pathlib import Path
+from unittest import mock
 
 from tasks import components
 
@@ -19,6 +19,10 @@ class TestComponents(unittest.TestCase):
         classicComp = 'comp/classic/classicimpl'
         if classicComp not in components.components_classic_style:
             components.components_classic_style.append(classicComp)
+        self.cache_patcher = mock.patch.object(
+            components, 'COMPONENTS_CACHE_FILE', os.path.join(self.tmpdir, 'cache', 'components-index.json')
+        )
+        self.cache_patcher.start()
 
     def reset_component_src_in_tmpdir(self):
         shutil.copytree(
@@ -28,6 +32,7 @@ class TestComponents(unittest.TestCase):
         )
 
     def tearDown(self):
+        self.cache_patcher.stop()
         if self.tmpdir:
             shutil.rmtree(self.tmpdir)
         os.chdir(self.origDir)
@@ -52,15 +57,50 @@ class TestComponents(unittest.TestCase):
         self.assertEqual('comp/newstyle', comps[3].path)
 
     def test_locate_root(self):
-        root = components.locate_component_def(Path('comp/classic'))
+        index = components.get_component_index()
+        root = index.locate_component_def('comp/classic')
         self.assertEqual(1, root.version)
 
-        root = components.locate_component_def(Path('comp/multiple'))
+        root = index.locate_component_def('comp/multiple')
         self.assertEqual(2, root.version)
 
-        root = components.locate_component_def(Path('comp/newstyle'))
+        root = index.locate_component_def('comp/newstyle')
         self.assertEqual(2, root.version)
 
+    def test_index(self):
+        index = components.get_component_index()
+        self.assertEqual((['def', 'fx', 'impl-one', 'impl-two'], []), index.dirs['comp/multiple'])
+        info = index.files['comp/newstyle/def/component.go']
+        self.assertEqual('newstyle', info.package)
+        self.assertEqual('agent-shared-components', info.team)
+        self.assertIn('type Component interface{}', info.declarations)
+        self.assertIsNone(info.content)
+        self.assertTrue(index.files['comp/newstyle/fx/fx.go'].provides_component_constructor)
+        self.assertIsNotNone(index.files['comp/group/bundle.go'].content)
+        self.assertEqual(
+            ['comp/multiple/impl-one', 'comp/multiple/impl-two'],
+            index.locate_implementation_folders(index.locate_component_def('comp/multiple')),
+        )
+        self.assertEqual(['comp/newstyle/fx/fx.go'], index.locate_fx_source_files('comp/newstyle'))
+
+    def test_index_cache(self):
+        comps, bundles = components.get_components_and_bundles()
+
+        # Unchanged files are not read again
+        with mock.patch.object(components, 'read_file_content') as read:
+            cached_comps, cached_bundles = components.get_components_and_bundles()
+        read.assert_not_called()
+        self.assertEqual(comps, cached_comps)
+        self.assertEqual(bundles, cached_bundles)
+
+        # Modified files are
+        filename = os.path.join(comps[3].path, 'def/component.go')
+        replace_line(filename, '// team: agent-shared-components', '// team: agent-runtimes')
+        with mock.patch.object(components, 'read_file_content', wraps=components.read_file_content) as read:
+            comps, _ = components.get_components_and_bundles()
+        read.assert_called_once_with(filename)
+        self.assertEqual('agent-runtimes', comps[3].team)
+
     def test_validate_bundles(self):
         _, bundles = components.get_components_and_bundles()
         errs = components.validate_bundles(bundles)
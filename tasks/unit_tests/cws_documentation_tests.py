@@ -0,0 +1,113 @@
+import importlib.util
+import json
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+DOCS_DIR = "docs/cloud-workload-security"
+SCRIPTS_DIR = os.path.join(DOCS_DIR, "scripts")
+
+
+@unittest.skipUnless(importlib.util.find_spec("jinja2"), "jinja2 is required, see requirements-docs.txt")
+class TestIncrementalDocumentation(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmpdir.name, "cache")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def generate(self, script, input_file, template, cache=True, scripts_dir=SCRIPTS_DIR):
+        """
+        Run a documentation script, return its document, None if it was up to date.
+        """
+        output = os.path.join(self.tmpdir.name, template)
+        argv = [script, "--input", input_file, "--output", output, "--template", f"./{template}"]
+        argv += ["--cache-dir", self.cache_dir] if cache else ["--no-cache"]
+        with (
+            patch.object(sys, "argv", argv),
+            patch.object(sys, "path", [scripts_dir, *sys.path]),
+            # The common module of the scripts directory is imported by each run
+            patch.dict(sys.modules),
+        ):
+            sys.modules.pop("common", None)
+            try:
+                return runpy.run_path(os.path.join(scripts_dir, script), run_name="__main__")["document"]
+            except SystemExit as e:
+                self.assertEqual(e.code, 0)
+                return None
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_fixtures(self):
+        for script, input_file, template in [
+            ("secl-doc-gen.py", "secl_linux.json", "linux_expressions.md"),
+            ("secl-doc-gen.py", "secl_windows.json", "windows_expressions.md"),
+            ("backend-doc-gen.py", "backend_linux.schema.json", "backend_linux.md"),
+            ("backend-doc-gen.py", "backend_windows.schema.json", "backend_windows.md"),
+        ]:
+            with self.subTest(template=template):
+                self.generate(script, os.path.join(DOCS_DIR, input_file), template, cache=False)
+                self.assertEqual(
+                    self.read(os.path.join(self.tmpdir.name, template)), self.read(os.path.join(DOCS_DIR, template))
+                )
+
+    def test_incremental(self):
+        with open(os.path.join(DOCS_DIR, "secl_windows.json")) as f:
+            secl = json.load(f)
+        input_file = os.path.join(self.tmpdir.name, "secl.json")
+        output = os.path.join(self.tmpdir.name, "windows_expressions.md")
+
+        def generate(cache=True):
+            with open(input_file, "w") as f:
+                json.dump(secl, f)
+            return self.generate("secl-doc-gen.py", input_file, "windows_expressions.md", cache)
+
+        document = generate()
+        sections = len(document.fragments)
+        self.assertEqual(document.rendered, sections)
+        self.assertIsNone(generate())
+
+        # An event type is in the triggers table and has its own section, one of its properties changes as well
+        secl["event_types"][1]["definition"] = "Changed definition"
+        secl["properties_doc"][0]["definition"] = "Changed property"
+        document = generate()
+        self.assertEqual(document.rendered, 3)
+        self.assertEqual(len(document.fragments), sections)
+        incremental = self.read(output)
+        generate(cache=False)
+        self.assertEqual(incremental, self.read(output))
+        self.assertIn("Changed definition", incremental)
+
+        # The document is rendered again when modified
+        with open(output, "a") as f:
+            f.write("edit")
+        self.assertEqual(generate().rendered, 0)
+        self.assertEqual(self.read(output), incremental)
+
+    def test_generator_changed(self):
+        scripts_dir = os.path.join(self.tmpdir.name, "scripts")
+        shutil.copytree(SCRIPTS_DIR, scripts_dir)
+        input_file = os.path.join(DOCS_DIR, "backend_linux.schema.json")
+
+        def generate():
+            return self.generate("backend-doc-gen.py", input_file, "backend_linux.md", scripts_dir=scripts_dir)
+
+        document = generate()
+        sections = len(document.fragments)
+        self.assertIsNone(generate())
+
+        # The contexts of the templates may be built differently, every section is rendered again
+        for script in ("backend-doc-gen.py", "common.py"):
+            with open(os.path.join(scripts_dir, script), "a") as f:
+                f.write("# edited\n")
+            document = generate()
+            self.assertIsNotNone(document)
+            self.assertEqual(document.rendered, sections)
+            self.assertIsNone(generate())
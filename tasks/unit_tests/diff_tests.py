@@ -0,0 +1,107 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from invoke import Context
+
+from tasks.diff import compute_deps_diffs, deps_diff
+
+FAKE_GO = """#!/bin/sh
+if [ "$1" = "env" ]; then
+    echo /shared/gocache
+    echo /shared/gomodcache
+    exit 0
+fi
+echo "$(pwd) $GOOS $GOARCH $GOCACHE $GOMODCACHE" >> "$FAKE_GO_LOG"
+cat "deps_${GOOS}_${GOARCH}.txt" 2>/dev/null || cat deps.txt
+"""
+
+BINARIES = {
+    "agent": {"entrypoint": "cmd/agent", "platforms": ["linux/x64", "linux/arm64"]},
+    "dogstatsd": {"entrypoint": "cmd/dogstatsd", "platforms": ["linux/x64"]},
+}
+
+
+class TestDepsDiff(unittest.TestCase):
+    def test_deps_diff(self):
+        self.assertEqual(deps_diff(['a', 'b', 'c'], ['a', 'c', 'd']), '-b\n+d')
+        self.assertEqual(deps_diff(['a'], ['a']), '')
+
+
+class TestComputeDepsDiffs(unittest.TestCase):
+    def setUp(self):
+        self.orig_dir = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self.tmpdir.name, 'repo')
+        self.log = os.path.join(self.tmpdir.name, 'go.log')
+        bindir = os.path.join(self.tmpdir.name, 'bin')
+        os.makedirs(bindir)
+        with open(os.path.join(bindir, 'go'), 'w') as f:
+            f.write(FAKE_GO)
+        os.chmod(os.path.join(bindir, 'go'), 0o755)
+
+        os.makedirs(self.repo)
+        os.chdir(self.repo)
+        self._git('init', '-q')
+        self._write('go.mod', 'module github.com/DataDog/datadog-agent\n')
+        self._write('cmd/agent/deps.txt', 'fmt\nos\n')
+        self._write('cmd/dogstatsd/go.mod', 'module github.com/DataDog/datadog-agent/cmd/dogstatsd\n')
+        self._write('cmd/dogstatsd/deps.txt', 'net\n')
+        self.baseline = self._commit('baseline')
+        self._write('cmd/agent/deps.txt', 'fmt\nnet/http\n')
+        self._write('cmd/agent/deps_linux_arm64.txt', 'fmt\nos\nunsafe\n')
+        self.current = self._commit('current')
+
+        self.env_patcher = mock.patch.dict(
+            'os.environ', {'PATH': f"{bindir}{os.pathsep}{os.environ['PATH']}", 'FAKE_GO_LOG': self.log}
+        )
+        self.env_patcher.start()
+
+    def tearDown(self):
+        self.env_patcher.stop()
+        os.chdir(self.orig_dir)
+        self.tmpdir.cleanup()
+
+    def _git(self, *args):
+        return subprocess.run(['git', *args], check=True, capture_output=True, text=True).stdout.strip()
+
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _commit(self, message):
+        self._git('add', '-A')
+        self._git('-c', 'user.name=test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', message)
+        return self._git('rev-parse', 'HEAD')
+
+    def test_compute_deps_diffs(self):
+        # Checkout an older commit with local changes, which must be left untouched
+        self._git('checkout', '-q', self.baseline)
+        self._write('cmd/agent/deps.txt', 'local\n')
+
+        diffs = compute_deps_diffs(Context(), self.baseline, self.current, binaries=BINARIES, jobs=4)
+
+        self.assertEqual(
+            diffs,
+            {
+                'agent-linux-amd64': '+net/http\n-os',
+                'agent-linux-arm64': '+unsafe',
+            },
+        )
+
+        # Every target was listed once per worktree, with the shared caches
+        with open(self.log) as f:
+            calls = f.read().splitlines()
+        self.assertEqual(len(calls), 6)
+        self.assertEqual(len({call.split()[0] for call in calls}), 4)
+        for call in calls:
+            self.assertTrue(call.endswith('/shared/gocache /shared/gomodcache'))
+
+        # The developer checkout is untouched and the worktrees are removed
+        self.assertEqual(self._git('rev-parse', 'HEAD'), self.baseline)
+        with open('cmd/agent/deps.txt') as f:
+            self.assertEqual(f.read(), 'local\n')
+        self.assertEqual(len(self._git('worktree', 'list').splitlines()), 1)
@@ -1,9 +1,12 @@
 import shutil
+import tempfile
 import unittest
+import xml.etree.ElementTree as ET
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import tasks.libs.common.junit_upload_core as junit
+from tasks.flavor import AgentFlavor
 from tasks.libs.owners.parsing import read_owners
 
 
@@ -56,6 +59,110 @@ class TestSplitJUnitXML(unittest.TestCase):
         xml_file = Path("./tasks/unit_tests/testdata/secret.tar.gz/-go-src-datadog-agent-junit-out-base.xml")
         owners = read_owners(".github/CODEOWNERS")
         self.assertEqual(junit.split_junitxml(xml_file.parent, xml_file, owners, []), 27)
+        self.assertEqual([path.name for path in xml_file.parent.iterdir() if path.suffix == ".tmp"], [])
+
+
+SPLIT_REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites tests="3">
+\t<testsuite name="github.com/DataDog/datadog-agent/pkg/collector/corechecks/cluster" tests="1">
+\t\t<testcase classname="github.com/DataDog/datadog-agent/pkg/collector/corechecks/cluster" name="TestA"></testcase>
+\t</testsuite>
+\t<testsuite name="github.com/DataDog/datadog-agent/pkg/security" tests="2">
+\t\t<testcase classname="github.com/DataDog/datadog-agent/pkg/security" name="TestB">&lt;out&gt;</testcase>
+\t\t<testcase classname="github.com/DataDog/datadog-agent/pkg/security" name="TestC"/>
+\t</testsuite>
+\t<testsuite name="github.com/DataDog/datadog-agent/pkg/collector/corechecks/cluster/orchestrator" tests="0">
+\t</testsuite>
+\t<flavor>iot</flavor>
+</testsuites>
+"""
+
+
+class TestSplitJUnitXMLStream(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.owners = read_owners(".github/CODEOWNERS")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_report(self, name, content, folder=""):
+        path = self.root / folder / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(content)
+        return path
+
+    def test_split(self):
+        xml_file = self.write_report("report.xml", SPLIT_REPORT)
+        flaky = {"github.com/DataDog/datadog-agent/pkg/security/TestC"}
+        self.assertEqual(junit.split_junitxml(self.root, xml_file, self.owners, flaky), 3)
+        self.assertEqual(
+            sorted(path.name for path in self.root.iterdir()),
+            ["agent-security_iot", "container-app_iot", "container-integrations_iot", "report.xml"],
+        )
+        self.assertEqual(
+            (self.root / "agent-security_iot" / "report.xml").read_text(),
+            """<?xml version='1.0' encoding='UTF-8'?>
+<testsuites><testsuite name="github.com/DataDog/datadog-agent/pkg/security" tests="2">
+\t\t<testcase classname="github.com/DataDog/datadog-agent/pkg/security" name="TestB" agent_is_known_flaky="false">&lt;out&gt;</testcase>
+\t\t<testcase classname="github.com/DataDog/datadog-agent/pkg/security" name="TestC" agent_is_known_flaky="true" />
+\t</testsuite>
+\t</testsuites>""",
+        )
+        suites = ET.parse(self.root / "container-app_iot" / "report.xml").getroot()
+        self.assertEqual([suite.get("tests") for suite in suites], ["0"])
+
+    @patch.dict("os.environ", {"CI_PIPELINE_ID": "1515"})
+    @patch("tasks.libs.common.junit_upload_core.get_gitlab_repo", new=MagicMock())
+    def test_enriched_flavor(self):
+        # The folders are named after the flavor appended by enrich_junitxml, which gives the test.flavor tag
+        xml_file = self.write_report("report.xml", SPLIT_REPORT.replace("\t<flavor>iot</flavor>\n", ""))
+        junit.enrich_junitxml(str(xml_file), AgentFlavor.heroku)
+        self.assertEqual(junit.split_junitxml(self.root, xml_file, self.owners, set()), 3)
+        team_dir = self.root / "agent-security_heroku"
+        self.assertTrue((team_dir / "report.xml").is_file())
+        owner, flavor = team_dir.name.split("_")
+        self.assertIn("test.flavor:heroku", junit.set_tags(owner, flavor, "", {}, ""))
+
+    def test_kitchen_owner(self):
+        # The owner of suites that aren't paths is given by the file of the first test case, even a later one
+        xml_file = self.write_report(
+            "kitchen.xml",
+            """<testsuites>
+<testsuite name="empty-suite"></testsuite>
+<testsuite name="kitchen-suite">
+<testcase classname="spec" name="test" file="./pkg/security/probe.go"></testcase>
+</testsuite>
+</testsuites>""",
+        )
+        self.assertEqual(junit.split_junitxml(self.root, xml_file, self.owners, set()), 1)
+        suites = ET.parse(self.root / "agent-security_base" / "kitchen.xml").getroot()
+        self.assertEqual([suite.get("name") for suite in suites], ["empty-suite", "kitchen-suite"])
+
+    def test_split_many(self):
+        xml_files = [
+            self.write_report("report.xml", SPLIT_REPORT, "a"),
+            self.write_report("report.xml", SPLIT_REPORT.replace("TestB", "TestD"), "b"),
+            self.write_report("other.xml", SPLIT_REPORT.replace("<flavor>iot</flavor>", ""), "b"),
+        ]
+        self.assertEqual(junit.split_junitxmls(self.root, xml_files, self.owners, set(), max_workers=2), 9)
+        # Like when splitting one report after the other, the last report of the same name wins
+        self.assertIn("TestD", (self.root / "agent-security_iot" / "report.xml").read_text())
+        self.assertTrue((self.root / "agent-security_base" / "other.xml").is_file())
+
+
+class TestGetFlakyFromTestOutput(unittest.TestCase):
+    def test_global_output(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(Path(tmpdir, "test_output.json"), "w") as f:
+                f.write('{"Action":"output","Package":"pkg/a","Test":"TestA","Output":"ok\\n"}\n')
+                f.write(f'{{"Action":"output","Package":"pkg/a","Test":"TestB","Output":"{junit.FLAKE_MESSAGE}\\n"}}\n')
+                f.write(
+                    f'{{"Action":"output","Package":"pkg/b","Test":"TestC/sub","Output":"{junit.FLAKE_MESSAGE}"}}\n'
+                )
+            with patch("tasks.libs.common.junit_upload_core.Path", lambda *parts: Path(tmpdir, *parts)):
+                self.assertEqual(junit.get_flaky_from_test_output(), {"pkg/a/TestB", "pkg/b/TestC/sub"})
 
 
 class TestGroupPerTag(unittest.TestCase):
@@ -0,0 +1,77 @@
+import io
+import tarfile
+import tracemalloc
+import unittest
+
+from tasks.kernel_matrix_testing.ci import get_test_results_from_junit, get_test_results_from_tarfile
+
+REPORT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+    <testsuite name="pkg/a" tests="2">
+        <properties><property name="go.version" value="go1.22"/></properties>
+        <testcase classname="pkg/a" name="TestOk"></testcase>
+        <testcase classname="pkg/a" name="TestFail"><failure message="Failed">boom</failure></testcase>
+    </testsuite>
+    <testsuite name="pkg/b" tests="2">
+        <testcase classname="pkg/b" name="TestSkip"><skipped message="skip"/></testcase>
+        <testcase classname="pkg/b" name="TestOk"><system-out>ok</system-out></testcase>
+    </testsuite>
+</testsuites>
+"""
+
+
+def make_tarball(reports: dict[str, bytes]) -> bytes:
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w:gz") as tar:
+        for name, report in reports.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(report)
+            tar.addfile(info, io.BytesIO(report))
+    return data.getvalue()
+
+
+def make_report(suites: int, cases: int) -> bytes:
+    report = io.BytesIO()
+    report.write(b"<testsuites>")
+    for suite in range(suites):
+        report.write(f'<testsuite name="pkg/{suite}">'.encode())
+        for case in range(cases):
+            report.write(f'<testcase name="Test{case}"><system-out>{"x" * 100}</system-out></testcase>'.encode())
+        report.write(b"</testsuite>")
+    report.write(b"</testsuites>")
+    return report.getvalue()
+
+
+class TestGetTestResults(unittest.TestCase):
+    def test_report(self):
+        self.assertEqual(
+            get_test_results_from_junit(io.BytesIO(REPORT)),
+            {
+                "pkg/a:TestOk": True,
+                "pkg/a:TestFail": False,
+                "pkg/b:TestSkip": None,
+                "pkg/b:TestOk": True,
+            },
+        )
+
+    def test_tarfile_stream(self):
+        data = make_tarball({"junit/a.xml": REPORT, "junit/a.txt": b"not a report", "junit/b.xml": make_report(2, 1)})
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r|*") as tar:
+            results = get_test_results_from_tarfile(tar)
+
+        self.assertEqual(len(results), 6)
+        self.assertFalse(results["pkg/a:TestFail"])
+        self.assertTrue(results["pkg/1:Test0"])
+
+    def test_memory(self):
+        report = make_report(2000, 5)
+        tracemalloc.start()
+        try:
+            results = get_test_results_from_junit(io.BytesIO(report))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(len(results), 10000)
+        # The parsed elements are dropped as they're processed, only the results are kept
+        self.assertLess(peak, len(report))
@@ -0,0 +1,157 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from invoke import Collection, Context, task
+
+from tasks.custom_task.lazy_task import LazyTask, collection_spec, lazy_collection, load_namespace
+from tasks.invoke_unit_tests import LAZY_TASKS_IMPORTS, parse_import_time
+
+CALLS = []
+
+
+@task(
+    aliases=['fetch'],
+    default=True,
+    help={'target': 'What to get', 'verbose': 'Be verbose'},
+    iterable=['flavors'],
+    incrementable=['verbose'],
+    positional=['target'],
+)
+def get_thing(_, target, flavors=None, verbose=0, dry_run=False):
+    """
+    Get a thing
+    """
+    CALLS.append(('get_thing', target, flavors, verbose, dry_run))
+
+
+@task(pre=[get_thing])
+def write_thing(_, output=Path('/tmp/thing'), retries: int = 3):
+    CALLS.append(('write_thing', output, retries))
+
+
+def argument_fields(arg):
+    return (
+        arg.names,
+        arg.attr_name,
+        arg.kind,
+        arg.default,
+        arg.help,
+        arg.positional,
+        arg.optional,
+        arg.incrementable,
+    )
+
+
+def context_fields(contexts):
+    return [
+        (context.name, context.aliases, [argument_fields(arg) for arg in context.args.values()]) for context in contexts
+    ]
+
+
+def build_namespace():
+    sub = Collection('things', get_thing, write_thing)
+    sub.__doc__ = 'Things'
+    ns = Collection()
+    ns.add_task(write_thing)
+    ns.add_collection(sub)
+    ns.configure({'run': {'encoding': 'utf-8'}})
+    return ns
+
+
+class TestLazyCollection(unittest.TestCase):
+    def setUp(self):
+        CALLS.clear()
+        self.ns = build_namespace()
+        self.lazy = lazy_collection(collection_spec(self.ns))
+
+    def test_same_tree(self):
+        self.assertEqual(self.lazy.serialized(), self.ns.serialized())
+        self.assertEqual(self.lazy.configuration(), self.ns.configuration())
+        self.assertEqual(context_fields(self.lazy.to_contexts()), context_fields(self.ns.to_contexts()))
+
+    def test_help_not_consumed(self):
+        self.assertEqual(get_thing.help, {'target': 'What to get', 'verbose': 'Be verbose'})
+
+    def test_shared_task(self):
+        self.assertIs(self.lazy['write-thing'], self.lazy['things.write-thing'])
+        self.assertIs(self.lazy['things.fetch'], self.lazy['things'])
+
+    def test_call(self):
+        lazy_task = self.lazy['things.get-thing']
+        self.assertIsInstance(lazy_task, LazyTask)
+        lazy_task(Context(), 'a', flavors=['b'])
+        self.assertEqual(CALLS, [('get_thing', 'a', ['b'], 0, False)])
+        self.assertIs(lazy_task.load(), get_thing)
+
+    def test_pre(self):
+        self.assertEqual(self.lazy['write-thing'].pre, [get_thing])
+
+    def test_unsupported_default(self):
+        @task
+        def bad(_, sizes=(1, 2)):
+            CALLS.append(('bad', sizes))
+
+        globals()['bad'] = bad
+        try:
+            with self.assertRaises(ValueError):
+                collection_spec(Collection(bad))
+        finally:
+            del globals()['bad']
+
+
+class TestLoadNamespace(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmpdir.name, 'tasks')
+        os.makedirs(self.root)
+        self.source = os.path.join(self.root, 'things.py')
+        Path(self.source).write_text('')
+        self.manifest_file = os.path.join(self.tmpdir.name, 'manifest.json')
+        self.builds = 0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def build(self):
+        self.builds += 1
+        return build_namespace()
+
+    def load(self):
+        return load_namespace(self.build, self.root, self.manifest_file)
+
+    def test_manifest(self):
+        ns = self.load()
+        self.assertNotIsInstance(ns['write-thing'], LazyTask)
+        ns = self.load()
+        self.assertIsInstance(ns['write-thing'], LazyTask)
+        self.assertEqual(self.builds, 1)
+
+    def test_outdated_manifest(self):
+        self.load()
+        Path(self.source).write_text('# changed')
+        ns = self.load()
+        self.assertNotIsInstance(ns['write-thing'], LazyTask)
+        self.assertEqual(self.builds, 2)
+
+
+class TestImportTime(unittest.TestCase):
+    def test_tasks_not_imported(self):
+        with tempfile.TemporaryDirectory() as home:
+            env = dict(os.environ, HOME=home)
+            env.pop('INVOKE_EAGER_TASKS', None)
+            # Generate the manifest, then load the tree from it
+            subprocess.run([sys.executable, '-c', 'import tasks'], env=env, check=True, capture_output=True)
+            res = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', 'import tasks'],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        imports = parse_import_time(res.stderr)
+        self.assertIn('tasks', imports)
+        self.assertEqual([m for m in imports if m.startswith('tasks.') and m not in LAZY_TASKS_IMPORTS], [])
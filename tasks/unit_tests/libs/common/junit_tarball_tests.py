@@ -0,0 +1,80 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from tasks.libs.common.junit_tarball import (
+    count_members,
+    has_member,
+    inspect_tarball,
+    list_members,
+)
+from tasks.libs.notify.unit_tests import process_unit_tests_tarballs
+
+FIXTURE = "tasks/unit_tests/testdata/testjunit-tests_deb-x64-py3.tgz"
+
+REPORT = b"""<testsuites>
+    <testsuite name="pkg/a">
+        <testcase name="TestOk"></testcase>
+        <testcase name="TestFail"><failure message="Failed">boom</failure></testcase>
+        <testcase name="TestSkip"><skipped/></testcase>
+    </testsuite>
+    <testsuite name="pkg/b">
+        <testcase name="TestError"><error/></testcase>
+    </testsuite>
+</testsuites>
+"""
+
+
+class TestJUnitTarball(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_tarball(self, name, files):
+        path = os.path.join(self.tmpdir.name, name)
+        with tarfile.open(path, "w:gz") as tar:
+            for member, data in files.items():
+                info = tarfile.TarInfo(member)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        return path
+
+    def test_members(self):
+        tarball = self.make_tarball("junit-tests_a.tgz", {"a.xml": REPORT, "dir/b.xml": REPORT, "tags.txt": b""})
+        self.assertEqual(list_members(tarball), ["a.xml", "dir/b.xml", "tags.txt"])
+        self.assertTrue(has_member(tarball))
+        self.assertEqual(count_members(tarball), 1)
+        self.assertEqual(count_members(tarball, lambda member: member.name.endswith(".txt")), 1)
+
+    def test_inspect(self):
+        tarball = self.make_tarball("junit-tests_a.tgz", {"a.xml": REPORT, "b.xml": REPORT, "tags.txt": b""})
+        summary = inspect_tarball(tarball)
+        self.assertEqual(summary.job_name, "tests_a")
+        self.assertEqual(summary.reports, ["a.xml", "b.xml"])
+        self.assertEqual((summary.tests, summary.failures, summary.skipped), (8, 4, 2))
+        self.assertEqual(summary.failed_tests, ["pkg/a:TestFail", "pkg/b:TestError"] * 2)
+
+    def test_inspect_fixture(self):
+        summary = inspect_tarball(FIXTURE)
+        self.assertEqual(len(summary.reports), 70)
+        with tarfile.open(FIXTURE) as tar:
+            reports = [ET.parse(tar.extractfile(member)) for member in tar if member.name.endswith(".xml")]
+        self.assertEqual(summary.tests, sum(len(report.findall(".//testcase")) for report in reports))
+
+    def test_process_unit_tests_tarballs(self):
+        self.make_tarball("junit-tests_a.tgz", {"a.xml": REPORT})
+        self.make_tarball("junit-tests_b-repacked.tgz", {"tags.txt": b""})
+        self.make_tarball("junit-tests_c.tgz", {"dir/c.xml": REPORT})
+        # Only the presence of a report matters, it isn't parsed
+        self.make_tarball("junit-tests_d.tgz", {"d.xml": REPORT[:40]})
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            self.assertEqual(process_unit_tests_tarballs(None), ["tests_b", "tests_c"])
+        finally:
+            os.chdir(cwd)
@@ -1,6 +1,18 @@
+import json
+import os
+import tempfile
 import unittest
+from unittest import mock
 
-from tasks.licenses import is_valid_quote
+from tasks.licenses import (
+    CopyrightResolver,
+    Overrides,
+    copyright_cache_key,
+    find_copyright,
+    is_valid_quote,
+    read_vendored_modules,
+    resolve_copyrights,
+)
 
 
 class TestLicensesMethod(unittest.TestCase):
@@ -9,3 +21,157 @@ class TestLicensesMethod(unittest.TestCase):
 
     def test_invalid_quotes(self):
         self.assertFalse(is_valid_quote('""hello' '"""'))
+
+
+MODULES_TXT = """\
+# github.com/foo/bar v1.2.0
+## explicit; go 1.21
+github.com/foo/bar
+github.com/foo/bar/sub
+github.com/foo/bar/sub/deep
+# github.com/foo/bar/v2 v2.0.1
+## explicit; go 1.21
+github.com/foo/bar/v2
+# github.com/baz/qux v0.1.0 => github.com/fork/qux v0.1.1
+## explicit
+github.com/baz/qux
+# github.com/DataDog/datadog-agent/pkg/util => ./pkg/util
+github.com/DataDog/datadog-agent/pkg/util
+# github.com/overridden/pkg v1.0.0
+github.com/overridden/pkg
+"""
+
+
+class TestFindCopyright(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.vendor = os.path.join(self.tmpdir.name, 'vendor')
+        self.cache_file = os.path.join(self.tmpdir.name, 'cache', 'copyright.json')
+        self._write('modules.txt', MODULES_TXT)
+        self._write('github.com/foo/bar/LICENSE', 'MIT License\n\nCopyright (c) 2020 Foo Inc.\n')
+        self._write('github.com/foo/bar/sub/NOTICE', 'Copyright 2021 Sub Authors\n')
+        self._write('github.com/foo/bar/sub/deep/doc.go', 'package deep\n')
+        self._write('github.com/foo/bar/v2/LICENSE', 'Copyright 2022 Foo "v2" Inc.\n')
+        self._write('github.com/baz/qux/AUTHORS', '# This is the list of authors\n\nJane Doe\nJohn Doe\n')
+        self._write('github.com/DataDog/datadog-agent/pkg/util/LICENSE', 'Copyright 2016-present Datadog, Inc.\n')
+        self._write('github.com/overridden/pkg/LICENSE', 'Copyright 2000 Nobody\n')
+        self.overrides = Overrides({'github.com/overridden/*': 'Copyright 2023 Overridden'})
+        self.packages = [
+            'github.com/foo/bar',
+            'github.com/foo/bar/sub',
+            'github.com/foo/bar/sub/deep',
+            'github.com/foo/bar/v2',
+            'github.com/baz/qux',
+            'github.com/DataDog/datadog-agent/pkg/util',
+            'github.com/overridden/pkg',
+        ]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, path, content):
+        path = os.path.join(self.vendor, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _find_copyright(self, **kwargs):
+        licenses = [{'component': 'core', 'package': pkg, 'license': 'MIT'} for pkg in self.packages]
+        with mock.patch('tasks.licenses.read_overrides', return_value=self.overrides):
+            find_copyright(None, licenses, vendor_dir=self.vendor, cache_file=self.cache_file, **kwargs)
+        return {lic['package']: sorted(lic['copyright']) for lic in licenses}
+
+    def test_resolve(self):
+        resolver = CopyrightResolver(self.overrides, self.vendor)
+        self.assertEqual(
+            sorted(resolver.resolve('github.com/foo/bar/sub/deep')),
+            ['Copyright (c) 2020 Foo Inc', 'Copyright 2021 Sub Authors'],
+        )
+        self.assertEqual(
+            sorted(resolver.resolve('github.com/foo/bar/v2')),
+            ['"Copyright 2022 Foo ""v2"" Inc"', 'Copyright (c) 2020 Foo Inc'],
+        )
+        self.assertEqual(sorted(resolver.resolve('github.com/baz/qux')), ['Jane Doe', 'John Doe'])
+        self.assertEqual(resolver.resolve('github.com/overridden/pkg'), ['Copyright 2023 Overridden'])
+
+    def test_resolve_scans_directories_once(self):
+        resolver = CopyrightResolver(self.overrides, self.vendor)
+        with mock.patch('tasks.licenses._scan_copyright_files', return_value=[]) as scan:
+            for pkg in self.packages:
+                resolver.resolve(pkg)
+        scanned = [call.args[1] for call in scan.call_args_list]
+        self.assertEqual(len(scanned), len(set(scanned)))
+
+    def test_parallel_matches_serial(self):
+        serial = resolve_copyrights(self.packages, self.overrides, self.vendor, jobs=1)
+        parallel = resolve_copyrights(self.packages * 2, self.overrides, self.vendor, jobs=2)
+        self.assertEqual({k: sorted(v) for k, v in serial.items()}, {k: sorted(v) for k, v in parallel.items()})
+
+    def test_read_vendored_modules(self):
+        self.assertEqual(
+            read_vendored_modules(self.vendor),
+            {
+                'github.com/foo/bar': 'v1.2.0',
+                'github.com/foo/bar/v2': 'v2.0.1',
+                'github.com/baz/qux': 'v0.1.1',
+                'github.com/DataDog/datadog-agent/pkg/util': None,
+                'github.com/overridden/pkg': 'v1.0.0',
+            },
+        )
+
+    def test_cache_key(self):
+        modules = read_vendored_modules(self.vendor)
+        self.assertEqual(copyright_cache_key('github.com/foo/bar/sub', modules), 'github.com/foo/bar@v1.2.0')
+        self.assertEqual(
+            copyright_cache_key('github.com/foo/bar/v2', modules),
+            'github.com/foo/bar@v1.2.0 github.com/foo/bar/v2@v2.0.1',
+        )
+        self.assertIsNone(copyright_cache_key('github.com/DataDog/datadog-agent/pkg/util', modules))
+        self.assertIsNone(copyright_cache_key('github.com/unknown/pkg', modules))
+
+    def test_cached_run_is_identical(self):
+        first = self._find_copyright()
+        with open(self.cache_file) as f:
+            self.assertIn('github.com/foo/bar@v1.2.0', json.load(f)['modules'])
+
+        with mock.patch('tasks.licenses.resolve_copyrights', wraps=resolve_copyrights) as resolve:
+            second = self._find_copyright()
+        self.assertEqual(first, second)
+        # Only the package from a module replaced by a local directory is resolved again
+        self.assertEqual(resolve.call_args.args[0], ['github.com/DataDog/datadog-agent/pkg/util'])
+
+    def test_version_bump_invalidates_module(self):
+        self._find_copyright()
+        self._write('modules.txt', MODULES_TXT.replace('github.com/foo/bar/v2 v2.0.1', 'github.com/foo/bar/v2 v2.0.2'))
+        self._write('github.com/foo/bar/v2/LICENSE', 'Copyright 2024 Foo v2 Inc.\n')
+
+        with mock.patch('tasks.licenses.resolve_copyrights', wraps=resolve_copyrights) as resolve:
+            result = self._find_copyright()
+        self.assertEqual(
+            sorted(resolve.call_args.args[0]),
+            ['github.com/DataDog/datadog-agent/pkg/util', 'github.com/foo/bar/v2'],
+        )
+        self.assertEqual(result['github.com/foo/bar/v2'], ['Copyright (c) 2020 Foo Inc', 'Copyright 2024 Foo v2 Inc'])
+
+    def test_overrides_change_invalidates_cache(self):
+        self._find_copyright()
+        self.overrides = Overrides({'github.com/overridden/*': 'Copyright 2024 Overridden'})
+        with mock.patch('tasks.licenses.resolve_copyrights', wraps=resolve_copyrights) as resolve:
+            result = self._find_copyright()
+        self.assertEqual(len(resolve.call_args.args[0]), len(self.packages))
+        self.assertEqual(result['github.com/overridden/pkg'], ['Copyright 2024 Overridden'])
+
+    def test_heuristics_change_invalidates_cache(self):
+        self._find_copyright()
+        with (
+            mock.patch('tasks.licenses.COPYRIGHT_LOCATIONS', ['LICENSE']),
+            mock.patch('tasks.licenses.resolve_copyrights', wraps=resolve_copyrights) as resolve,
+        ):
+            result = self._find_copyright()
+        self.assertEqual(len(resolve.call_args.args[0]), len(self.packages))
+        # The NOTICE file is not searched anymore
+        self.assertEqual(result['github.com/foo/bar/sub'], ['Copyright (c) 2020 Foo Inc'])
+
+    def test_unknown_copyright(self):
+        self.packages = ['github.com/nothing/here']
+        self.assertEqual(self._find_copyright(), {'github.com/nothing/here': ['UNKNOWN']})
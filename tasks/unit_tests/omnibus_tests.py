@@ -1,5 +1,8 @@
+import hashlib
+import json
 import os
 import re
+import tempfile
 import unittest
 from unittest import mock
 
@@ -8,6 +11,12 @@ from invoke.exceptions import Exit, UnexpectedExit
 from invoke.runners import Result
 
 from tasks import omnibus
+from tasks.libs.common.omnibus import (
+    TreeHasher,
+    cache_key_from_manifest,
+    explain_cache_key_change,
+    omnibus_cache_key_manifest,
+)
 
 
 class MockContextRaising(MockContext):
@@ -203,3 +212,93 @@ class TestOmnibusInstall(unittest.TestCase):
         with self.assertRaises(Exit):
             omnibus.bundle_install_omnibus(self.mock_ctx)
         self.assertEqual(len(self.mock_ctx.run.mock_calls), max_try)
+
+
+@mock.patch.dict('os.environ', {'RELEASE_VERSION_7': 'nightly', 'PATH': '/usr/bin'}, clear=True)
+class TestOmnibusCacheKey(unittest.TestCase):
+    def setUp(self):
+        self.orig_dir = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmpdir.name)
+        self.memo_file = os.path.join(self.tmpdir.name, 'cache', 'hashes.json')
+        self._write('omnibus/omnibus.rb', 'use_git_caching true\n')
+        self._write('omnibus/lib/ostools.rb', 'def linux_target?\nend\n')
+        self._write('omnibus/config/software/jmxfetch.rb', "default_version ENV['JMXFETCH_VERSION']\n")
+        self._write('omnibus/config/projects/agent.rb', 'name "agent"\n')
+        self._write('.gitlab-ci.yml', 'variables:\n  DATADOG_AGENT_BUILDIMAGES: v1234-abcd\n  OTHER: value\n')
+        self._write_release_json(JMXFETCH_VERSION='0.49.3')
+
+    def tearDown(self):
+        os.chdir(self.orig_dir)
+        self.tmpdir.cleanup()
+
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _write_release_json(self, **entries):
+        nightly = {'OMNIBUS_RUBY_VERSION': 'abc', 'OMNIBUS_SOFTWARE_VERSION': 'def', 'MACOS_BUILD_VERSION': 'master'}
+        nightly.update(entries)
+        self._write('release.json', json.dumps({'nightly': nightly}))
+
+    def _manifest(self):
+        return omnibus_cache_key_manifest(self.memo_file)
+
+    def test_manifest(self):
+        manifest = self._manifest()
+        self.assertEqual(
+            sorted(manifest['files']),
+            [
+                'omnibus/config/projects/agent.rb',
+                'omnibus/config/software/jmxfetch.rb',
+                'omnibus/lib/ostools.rb',
+                'omnibus/omnibus.rb',
+            ],
+        )
+        # Only the release.json entries read by omnibus are part of the key
+        self.assertEqual(
+            manifest['release'],
+            {'JMXFETCH_VERSION': '0.49.3', 'OMNIBUS_RUBY_VERSION': 'abc', 'OMNIBUS_SOFTWARE_VERSION': 'def'},
+        )
+        self.assertEqual(manifest['build_images'], ['v1234-abcd'])
+        self.assertEqual(list(manifest['environment']), ['PATH'])
+
+    def test_key_is_stable(self):
+        key = cache_key_from_manifest(self._manifest())
+        self.assertEqual(key, cache_key_from_manifest(self._manifest()))
+
+        # Changes in unrelated release.json entries do not invalidate the cache
+        self._write_release_json(JMXFETCH_VERSION='0.49.3', MACOS_BUILD_VERSION='7.58.x')
+        self.assertEqual(key, cache_key_from_manifest(self._manifest()))
+
+    def test_explain_changes(self):
+        previous = self._manifest()
+        self._write('omnibus/lib/ostools.rb', 'def linux_target?\n  true\nend\n')
+        self._write('omnibus/config/software/new.rb', 'name "new"\n')
+        self._write_release_json(JMXFETCH_VERSION='0.50.0')
+        current = self._manifest()
+
+        self.assertNotEqual(cache_key_from_manifest(previous), cache_key_from_manifest(current))
+        self.assertEqual(
+            explain_cache_key_change(previous, current),
+            [
+                'files: omnibus/config/software/new.rb was added',
+                'files: omnibus/lib/ostools.rb changed',
+                'release: JMXFETCH_VERSION changed from 0.49.3 to 0.50.0',
+            ],
+        )
+        self.assertEqual(explain_cache_key_change(current, current), [])
+
+    def test_file_hashes_are_memoized(self):
+        hasher = TreeHasher(self.memo_file)
+        root = hasher.hash('omnibus')
+        hasher.save()
+
+        with mock.patch('hashlib.sha1', wraps=hashlib.sha1) as sha1:
+            self.assertEqual(root, TreeHasher(self.memo_file).hash('omnibus'))
+        # Only the directories are hashed again, the files come from the memo
+        self.assertEqual(sha1.call_count, len(['omnibus', 'config', 'projects', 'software', 'lib']))
+
+        self._write('omnibus/omnibus.rb', 'use_git_caching false\n')
+        self.assertNotEqual(root, TreeHasher(self.memo_file).hash('omnibus'))
@@ -1,6 +1,11 @@
+import os
+import random
+import tempfile
 import unittest
 
-from tasks.libs.owners.parsing import search_owners
+from codeowners import CodeOwners
+
+from tasks.libs.owners.parsing import OwnersIndex, read_owners, search_owners
 
 
 class TestSearchCodeOwners(unittest.TestCase):
@@ -20,3 +25,67 @@ class TestSearchCodeOwners(unittest.TestCase):
         self.assertListEqual(
             search_owners("tests_letters_314", self.JOBOWNERS_FILE), ["@DataDog/team-a", "@DataDog/team-b"]
         )
+
+
+class TestOwnersIndex(unittest.TestCase):
+    RULES = [
+        '*',
+        '*.md',
+        '/a/',
+        'a/**/b',
+        '**/c.go',
+        '/[ab]/c*',
+        'doc/',
+        '/x\\ y',
+        '/',
+        '?/b',
+        'a/b/',
+        '\\#foo',
+        '/pkg/a/b.go',
+        'pkg',
+    ]
+    SEGMENTS = ['a', 'b', 'c.go', 'x y', 'doc', 'foo.md', '#foo', '', 'x', 'pkg', 'b.go']
+
+    def random_path(self, rng, segments):
+        path = '/'.join(rng.choice(segments) for _ in range(rng.randint(1, 6)))
+        if rng.random() < 0.1:
+            path = '/' + path
+        if rng.random() < 0.1:
+            path += '/'
+        return path
+
+    def assert_same_owners(self, text, paths):
+        codeowners = CodeOwners(text)
+        index = OwnersIndex(text)
+        owners = index.owners_of_many(paths)
+        for path in paths:
+            self.assertEqual(index.matching_line(path), codeowners.matching_line(path), (text, path))
+            self.assertEqual(owners[path], codeowners.of(path), (text, path))
+
+    def test_random_rules(self):
+        rng = random.Random(42)
+        for _ in range(200):
+            text = '\n'.join(f'{rng.choice(self.RULES)} @DataDog/team-{i}' for i in range(rng.randint(1, 10)))
+            self.assert_same_owners(text, [self.random_path(rng, self.SEGMENTS) for _ in range(200)])
+
+    def test_repository_codeowners(self):
+        with open('.github/CODEOWNERS') as f:
+            text = f.read()
+        # Paths made of the segments of the rules
+        segments = {segment for line in text.splitlines() for segment in line.split(' ')[0].split('/')}
+        segments = sorted(segments) + self.SEGMENTS
+        rng = random.Random(42)
+        self.assert_same_owners(text, [self.random_path(rng, segments) for _ in range(5000)])
+
+    def test_read_owners_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            owners_file = os.path.join(tmpdir, 'CODEOWNERS')
+            with open(owners_file, 'w') as f:
+                f.write('/a/ @DataDog/team-a\n')
+            owners = read_owners(owners_file)
+            self.assertIs(read_owners(owners_file), owners)
+
+            with open(owners_file, 'w') as f:
+                f.write('/a/ @DataDog/team-b\n')
+            # The content changed along with the size
+            self.assertEqual(read_owners(owners_file).of('a/file'), [('TEAM', '@DataDog/team-b')])
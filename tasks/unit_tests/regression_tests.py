@@ -0,0 +1,351 @@
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+import urllib.request
+from collections import defaultdict
+from unittest.mock import patch
+
+import yaml
+
+from tasks.libs.regression.case import REGRESSION_CASES_DIR, RegressionCase, list_cases, parse_size
+from tasks.libs.regression.generators import (
+    FileTreeGenerator,
+    HttpBlackhole,
+    create_generator,
+    dogstatsd_payloads,
+    line_payloads,
+)
+from tasks.libs.regression.sampling import (
+    ProcessSampler,
+    RunSummary,
+    compare,
+    process_tree,
+    read_process,
+    run_case,
+)
+
+# Target reading the datagrams sent to a unix socket, and counting them in a file when it is terminated
+DUMMY_TARGET = """
+import signal, socket, sys
+
+sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+sock.bind(sys.argv[1])
+received = 0
+
+def stop(*_):
+    with open(sys.argv[2], "w") as f:
+        f.write(str(received))
+    sys.exit(0)
+
+signal.signal(signal.SIGTERM, stop)
+while True:
+    received += len(sock.recv(65536))
+"""
+
+
+class StubAgentCheck:
+    """
+    Stand-in for the AgentCheck of datadog_checks_base, recording the submissions.
+    """
+
+    def __init__(self, name, init_config, instances):
+        self.name = name
+        self.init_config = init_config
+        self.instances = instances
+        self.submissions = defaultdict(list)
+        self.persistent_cache = {}
+
+    def __getattr__(self, method):
+        if method not in ("gauge", "submit_histogram_bucket", "event", "service_check", "event_platform_event"):
+            raise AttributeError(method)
+        return lambda *args, **kwargs: self.submissions[method].append((args, kwargs))
+
+    def read_persistent_cache(self, key):
+        self.submissions["read_persistent_cache"].append(key)
+        return self.persistent_cache.get(key, "")
+
+    def write_persistent_cache(self, key, value):
+        self.persistent_cache[key] = value
+
+
+def load_check(case, instances, init_config=None):
+    """
+    Instantiate the check of a python check case, against a stub AgentCheck and datadog_agent module.
+    """
+    checks = types.ModuleType("datadog_checks.checks")
+    checks.AgentCheck = StubAgentCheck
+    datadog_agent = types.ModuleType("datadog_agent")
+    datadog_agent.config_reads = []
+    datadog_agent.get_config = datadog_agent.config_reads.append
+    modules = {"datadog_checks": types.ModuleType("datadog_checks"), "datadog_checks.checks": checks}
+    with patch.dict(sys.modules, {**modules, "datadog_agent": datadog_agent}):
+        path = os.path.join(REGRESSION_CASES_DIR, case, "datadog-agent", "checks.d", "my-check.py")
+        spec = importlib.util.spec_from_file_location(f"regression_{case}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.MyCheck("my-check", init_config or {}, instances), datadog_agent
+
+
+class TestRegressionCase(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual(parse_size("100 MiB"), 100 * 1024**2)
+        self.assertEqual(parse_size("50 Mb"), 50 * 1000**2)
+        self.assertEqual(parse_size("1.5KiB"), 1536)
+        self.assertEqual(parse_size(42), 42)
+        self.assertRaises(ValueError, parse_size, "12 parsecs")
+
+    def test_repository_cases(self):
+        cases = list_cases()
+        self.assertIn("uds_dogstatsd_to_api", cases)
+        for name in cases:
+            case = RegressionCase.load(name)
+            self.assertIn(case.optimization_goal, ("cpu", "memory", "ingress_throughput"))
+            for spec in case.generators:
+                self.assertEqual(len(spec), 1)
+
+    def test_materialize_config(self):
+        case = RegressionCase.load("uds_dogstatsd_to_api")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            conf_file = case.materialize_config(os.path.join(tmpdir, "etc"))
+            with open(conf_file) as f:
+                self.assertEqual(yaml.safe_load(f)["dogstatsd_socket"], "/tmp/dsd.socket")
+
+    def test_target_environment(self):
+        case = RegressionCase.load("pycheck_lots_of_tags")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_dir = os.path.join(tmpdir, "etc")
+            case.materialize_config(config_dir)
+            environment = case.target_environment(config_dir)
+            self.assertTrue(os.path.isfile(os.path.join(environment["DD_CONFD_PATH"], "my-check.d", "conf.yaml")))
+            self.assertTrue(os.path.isfile(os.path.join(environment["DD_ADDITIONAL_CHECKSD"], "my-check.py")))
+        self.assertEqual(environment["DD_HOSTNAME"], "smp-regression")
+
+
+class TestGenerators(unittest.TestCase):
+    def test_dogstatsd_payloads(self):
+        variant = {
+            "contexts": {"inclusive": {"min": 10, "max": 10}},
+            "tags_per_msg": {"inclusive": {"min": 2, "max": 2}},
+            "kind_weights": {"metric": 1, "event": 0, "service_check": 0},
+            "metric_weights": {"count": 0, "gauge": 1},
+        }
+        payloads = dogstatsd_payloads(random.Random(1), variant, 10000)
+        self.assertEqual(payloads, dogstatsd_payloads(random.Random(1), variant, 10000))
+        self.assertGreaterEqual(sum(map(len, payloads)), 10000)
+        contexts = set()
+        for payload in payloads:
+            name, rest = payload.decode().split(":", 1)
+            _, metric_type, tags = rest.split("|")
+            self.assertEqual(metric_type, "g")
+            self.assertEqual(len(tags[1:].split(",")), 2)
+            contexts.add((name, tags))
+        self.assertLessEqual(len(contexts), 10)
+
+    def test_line_payloads(self):
+        for variant in ("datadog_log", "syslog5424", "ascii"):
+            payloads = line_payloads(random.Random(1), variant, 1000)
+            self.assertTrue(all(payload.endswith(b"\n") and payload.count(b"\n") == 1 for payload in payloads))
+        self.assertTrue(line_payloads(random.Random(1), "syslog5424", 1000)[0].startswith(b"<"))
+
+    def test_unsupported_generator(self):
+        self.assertIsNone(create_generator({"http": {"target_uri": "http://127.0.0.1:4318"}}, "/tmp"))
+
+    def test_file_tree(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generator = FileTreeGenerator({"max_depth": 2, "rename_per_second": 100}, tmpdir)
+            generator.start()
+            time.sleep(0.2)
+            generator.stop()
+            self.assertGreater(generator.renames, 0)
+            folders = [os.path.join(root, name) for root, dirs, _ in os.walk(tmpdir) for name in dirs]
+            self.assertEqual(sorted(generator.folders), sorted(folders))
+
+    def test_http_blackhole(self):
+        blackhole = HttpBlackhole("127.0.0.1:0")
+        blackhole.start()
+        try:
+            request = urllib.request.Request(f"http://127.0.0.1:{blackhole.server_port}/api", data=b"x" * 100)
+            with urllib.request.urlopen(request) as response:
+                self.assertEqual(response.status, 202)
+        finally:
+            blackhole.stop()
+        self.assertEqual((blackhole.requests, blackhole.bytes_received), (1, 100))
+
+
+class TestSampling(unittest.TestCase):
+    def test_read_process(self):
+        cpu, rss = read_process(os.getpid())
+        self.assertGreater(cpu, 0)
+        self.assertGreater(rss, 0)
+        self.assertIsNone(read_process(2**22 + 1))
+
+    def test_process_tree(self):
+        # Children forked by another thread than the main one are listed in the children of that thread, while it runs
+        children = []
+        forked = threading.Event()
+        done = threading.Event()
+
+        def fork():
+            children.append(subprocess.Popen(["sleep", "10"]))
+            forked.set()
+            done.wait()
+
+        thread = threading.Thread(target=fork)
+        thread.start()
+        forked.wait()
+        try:
+            self.assertIn(children[0].pid, process_tree(os.getpid()))
+        finally:
+            done.set()
+            thread.join()
+            children[0].kill()
+            children[0].wait()
+
+    def test_sampler(self):
+        sampler = ProcessSampler(os.getpid(), interval=0.05)
+        sampler.start()
+        # Burn some CPU
+        deadline = time.monotonic() + 0.3
+        while time.monotonic() < deadline:
+            pass
+        sampler.stop()
+        summary = RunSummary.from_samples(
+            sampler.samples, case="", command="", ingress_bytes=0, egress_bytes=0, generator_errors=0, exit_code=None
+        )
+        self.assertGreater(len(sampler.samples), 3)
+        self.assertGreater(summary.cpu_percent, 10)
+        self.assertLessEqual(summary.rss_p50, summary.rss_max)
+        self.assertTrue(summary.describe()[0].startswith("CPU: "))
+
+    def test_compare(self):
+        baseline = {"cpu_percent": 50, "rss_mean": 100, "rss_max": 120, "ingress_bytes_per_second": 0}
+        comparison = {"cpu_percent": 55, "rss_mean": 80, "rss_max": 120, "ingress_bytes_per_second": 10}
+        result = compare(baseline, comparison, "memory")
+        self.assertEqual(result["metric"], "rss_mean")
+        self.assertEqual(next(iter(result["changes"])), "rss_mean")
+        self.assertAlmostEqual(result["changes"]["rss_mean"]["change"], -0.2)
+        self.assertAlmostEqual(result["changes"]["cpu_percent"]["change"], 0.1)
+        self.assertIsNone(result["changes"]["ingress_bytes_per_second"]["change"])
+
+    def test_run_case(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            socket_path = os.path.join(tmpdir, "dsd.socket")
+            case_dir = os.path.join(tmpdir, "cases", "dummy")
+            os.makedirs(os.path.join(case_dir, "lading"))
+            os.makedirs(os.path.join(case_dir, "datadog-agent"))
+            with open(os.path.join(case_dir, "experiment.yaml"), "w") as f:
+                yaml.safe_dump({"optimization_goal": "ingress_throughput", "target": {"environment": {"DD_X": 1}}}, f)
+            with open(os.path.join(case_dir, "lading", "lading.yaml"), "w") as f:
+                yaml.safe_dump(
+                    {
+                        "generator": [
+                            {
+                                "unix_datagram": {
+                                    "seed": [1, 2, 3],
+                                    "path": socket_path,
+                                    "variant": {"dogstatsd": {}},
+                                    "bytes_per_second": "100 KiB",
+                                    "maximum_prebuild_cache_size_bytes": "64 KiB",
+                                }
+                            }
+                        ],
+                        "blackhole": [{"http": {"binding_addr": "127.0.0.1:0"}}],
+                    },
+                    f,
+                )
+            with open(os.path.join(case_dir, "datadog-agent", "datadog.yaml"), "w") as f:
+                f.write(f"dogstatsd_socket: {socket_path}\n")
+            with open(os.path.join(tmpdir, "target.py"), "w") as f:
+                f.write(DUMMY_TARGET)
+
+            case = RegressionCase.load("dummy", os.path.join(tmpdir, "cases"))
+            received_file = os.path.join(tmpdir, "received")
+            command = f"{sys.executable} {tmpdir}/target.py {socket_path} {received_file}"
+            summary = run_case(case, command, duration=1, warmup=0.5, interval=0.1)
+
+            with open(received_file) as f:
+                received = int(f.read())
+
+        self.assertEqual(summary.case, "dummy")
+        self.assertEqual(summary.exit_code, 0)
+        self.assertGreater(summary.duration, 0.9)
+        self.assertGreater(summary.rss_max, 0)
+        self.assertGreater(summary.ingress_bytes, 10 * 1024)
+        self.assertEqual(summary.ingress_bytes, received)
+        self.assertEqual(summary.egress_bytes, 0)
+
+
+class TestPythonCheckCases(unittest.TestCase):
+    def load_case(self, case, init_config=None):
+        with open(os.path.join(REGRESSION_CASES_DIR, case, "datadog-agent", "conf.d", "my-check.d", "conf.yaml")) as f:
+            conf = yaml.safe_load(f)
+        self.assertIn(RegressionCase.load(case).optimization_goal, ("cpu", "memory"))
+        return [load_check(case, [instance], conf.get("init_config")) for instance in conf["instances"]]
+
+    def test_lots_of_tags(self):
+        (check, _), _ = self.load_case("pycheck_lots_of_tags")
+        tag_sets = check.tag_sets
+        check.check(check.instances[0])
+        check.check(check.instances[0])
+        self.assertIs(check.tag_sets, tag_sets)
+        self.assertEqual(len(check.submissions["gauge"]), 2 * 150)
+
+    def test_histogram_buckets(self):
+        (check, _), _ = self.load_case("pycheck_histogram_buckets")
+        check.check(check.instances[0])
+        check.check(check.instances[0])
+        buckets = check.submissions["submit_histogram_bucket"]
+        self.assertEqual(len(buckets), 2 * 10 * 50 * 20)
+        bucket_count = len(buckets) // 2
+        for (first, _), (second, _) in zip(buckets[:bucket_count], buckets[bucket_count:], strict=True):
+            name, value, lower_bound, upper_bound, monotonic, _, tags = first
+            self.assertEqual(second[0], name)
+            self.assertGreaterEqual(second[1], value)
+            self.assertLess(lower_bound, upper_bound)
+            self.assertTrue(monotonic)
+            self.assertEqual(len(tags), 10)
+        self.assertEqual(buckets[-1][0][3], float("inf"))
+
+    def test_events_service_checks(self):
+        (check, _), _ = self.load_case("pycheck_events_service_checks")
+        check.check(check.instances[0])
+        self.assertEqual(len(check.submissions["event"]), 500)
+        self.assertEqual(len(check.submissions["service_check"]), 1000)
+        event = check.submissions["event"][0][0][0]
+        self.assertEqual(len(event["msg_text"]), 500)
+        self.assertIn("timestamp", event)
+        self.assertTrue(all(0 <= args[1] <= 3 for args, _ in check.submissions["service_check"]))
+
+    def test_event_platform(self):
+        (check, _), _ = self.load_case("pycheck_event_platform")
+        check.check(check.instances[0])
+        events = check.submissions["event_platform_event"]
+        self.assertEqual(len(events), 1000)
+        raw_event, event_track_type = events[0][0]
+        self.assertEqual(event_track_type, "dbm-samples")
+        self.assertEqual(len(json.loads(raw_event)["db"]["statement"]), 1000)
+
+    def test_many_instances(self):
+        checks = self.load_case("pycheck_many_instances")
+        self.assertGreaterEqual(len(checks), 1000)
+        for check, _ in checks[:10]:
+            check.check(check.instances[0])
+        self.assertEqual(len({tuple(check.tags) for check, _ in checks}), len(checks))
+        self.assertEqual(checks[3][0].submissions["gauge"][0][1]["tags"], ["instance:3", "foo:bar"])
+
+    def test_config_cache(self):
+        (check, datadog_agent), _ = self.load_case("pycheck_config_cache")
+        check.check(check.instances[0])
+        self.assertEqual(len(datadog_agent.config_reads), 1000)
+        self.assertEqual(len(check.submissions["read_persistent_cache"]), 500)
+        self.assertEqual(len(check.persistent_cache), 10)
+        (_, size), _ = check.submissions["gauge"][0]
+        self.assertEqual(size, 500 * 1000)
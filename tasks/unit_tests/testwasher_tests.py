@@ -1,5 +1,12 @@
+import json
+import os
+import random
+import tempfile
 import unittest
+from unittest.mock import patch
 
+from tasks.libs.common.flake_store import FlakeStore, FlakyTestTrie
+from tasks.test_core import ModuleTestResult
 from tasks.testwasher import TestWasher
 
 
@@ -72,69 +79,6 @@ class TestUtils(unittest.TestCase):
         )
 
 
-class TestMergeKnownFlakes(unittest.TestCase):
-    def test_with_shared_keys(self):
-        test_washer = TestWasher()
-        marked_flakes = {
-            "nintendo": {"mario", "luigi"},
-            "sega": {"sonic"},
-        }
-        test_washer.known_flaky_tests = {
-            "nintendo": {"peach"},
-            "sony": {"crashbandicoot"},
-        }
-        merged_flakes = test_washer.merge_known_flakes(marked_flakes)
-        self.assertEqual(
-            merged_flakes,
-            {
-                "nintendo": {"mario", "luigi", "peach"},
-                "sega": {"sonic"},
-                "sony": {"crashbandicoot"},
-            },
-        )
-
-    def test_no_shared_keys(self):
-        test_washer = TestWasher()
-        marked_flakes = {
-            "nintendo": {"mario", "luigi"},
-        }
-        test_washer.known_flaky_tests = {
-            "sega": {"sonic"},
-        }
-        merged_flakes = test_washer.merge_known_flakes(marked_flakes)
-        self.assertEqual(
-            merged_flakes,
-            {
-                "nintendo": {"mario", "luigi"},
-                "sega": {"sonic"},
-            },
-        )
-
-    def test_empty_marked(self):
-        test_washer = TestWasher()
-        marked_flakes = {}
-        test_washer.known_flaky_tests = {
-            "sega": {"sonic"},
-        }
-        merged_flakes = test_washer.merge_known_flakes(marked_flakes)
-        self.assertEqual(
-            merged_flakes,
-            {"sega": {"sonic"}},
-        )
-
-    def test_empty_yaml(self):
-        test_washer = TestWasher()
-        marked_flakes = {
-            "nintendo": {"mario", "luigi"},
-        }
-        test_washer.known_flaky_tests = {}
-        merged_flakes = test_washer.merge_known_flakes(marked_flakes)
-        self.assertEqual(
-            merged_flakes,
-            {"nintendo": {"mario", "luigi"}},
-        )
-
-
 class TestGetTestParents(unittest.TestCase):
     def test_get_tests_parents(self):
         test_washer = TestWasher()
@@ -159,47 +103,158 @@ class TestGetTestParents(unittest.TestCase):
         )
 
 
-class TestIsKnownFlake(unittest.TestCase):
-    def test_known_flake(self):
+class TestNonFlakyFailingTests(unittest.TestCase):
+    def non_flaky_failing_tests(self, failing_tests, flaky_tests):
         test_washer = TestWasher()
-        is_known_flaky = test_washer.is_known_flaky_test(
-            "TestEKSSuite/mario", {"TestEKSSuite/mario"}, {"TestEKSSuite", "TestEKSSuite/mario"}
-        )
-        self.assertTrue(is_known_flaky)
+        for test in flaky_tests:
+            test_washer.flake_store.add_flaky_test("pkg", test)
+        return test_washer.get_non_flaky_failing_tests({"pkg": set(failing_tests)}, {}).get("pkg", set())
+
+    def test_known_flake(self):
+        non_flaky = self.non_flaky_failing_tests({"TestEKSSuite", "TestEKSSuite/mario"}, {"TestEKSSuite/mario"})
+        self.assertEqual(non_flaky, set())
 
     def test_known_flake_parent_failing(self):
-        test_washer = TestWasher()
-        is_known_flaky = test_washer.is_known_flaky_test(
-            "TestEKSSuite", {"TestEKSSuite/mario"}, {"TestEKSSuite", "TestEKSSuite/mario"}
+        non_flaky = self.non_flaky_failing_tests(
+            {"TestEKSSuite", "TestEKSSuite/mario", "TestEKSSuite/mario/luigi"}, {"TestEKSSuite/mario/luigi"}
         )
-        self.assertTrue(is_known_flaky)
+        self.assertEqual(non_flaky, set())
 
-    def test_known_flake_parent_failing_2(self):
-        test_washer = TestWasher()
-        is_known_flaky = test_washer.is_known_flaky_test(
-            "TestEKSSuite/mario",
-            {"TestEKSSuite/mario/luigi"},
-            {"TestEKSSuite", "TestEKSSuite/mario", "TestEKSSuite/mario/luigi"},
+    def test_known_flake_child_failing(self):
+        non_flaky = self.non_flaky_failing_tests(
+            {"TestEKSSuite", "TestEKSSuite/mario", "TestEKSSuite/mario/luigi"}, {"TestEKSSuite/mario"}
         )
-        self.assertTrue(is_known_flaky)
+        self.assertEqual(non_flaky, set())
 
     def test_not_known_flake(self):
-        test_washer = TestWasher()
-        is_known_flaky = test_washer.is_known_flaky_test(
-            "TestEKSSuite/luigi", {"TestEKSSuite/mario"}, {"TestEKSSuite", "TestEKSSuite/mario"}
+        non_flaky = self.non_flaky_failing_tests(
+            {"TestEKSSuite", "TestEKSSuite/mario", "TestEKSSuite/luigi"}, {"TestEKSSuite/mario"}
         )
-        self.assertFalse(is_known_flaky)
+        self.assertEqual(non_flaky, {"TestEKSSuite/luigi"})
+
+    def test_not_known_flake_parent_failing_alone(self):
+        non_flaky = self.non_flaky_failing_tests({"TestEKSSuite", "TestEKSSuite/luigi"}, {"TestEKSSuite/mario"})
+        self.assertEqual(non_flaky, {"TestEKSSuite", "TestEKSSuite/luigi"})
 
     def test_not_known_flake_ambiguous_start(self):
-        test_washer = TestWasher()
-        is_known_flaky = test_washer.is_known_flaky_test(
-            "TestEKSSuiteVM/mario", {"TestEKSSuite/mario"}, {"TestEKSSuite"}
-        )
-        self.assertFalse(is_known_flaky)
+        non_flaky = self.non_flaky_failing_tests({"TestEKSSuiteVM", "TestEKSSuiteVM/mario"}, {"TestEKSSuite/mario"})
+        self.assertEqual(non_flaky, {"TestEKSSuiteVM", "TestEKSSuiteVM/mario"})
 
     def test_not_known_flake_ambiguous_start_2(self):
-        test_washer = TestWasher()
-        is_known_flaky = test_washer.is_known_flaky_test(
-            "TestEKSSuite/mario", {"TestEKSSuiteVM/mario"}, {"TestEKSSuiteVM"}
-        )
-        self.assertFalse(is_known_flaky)
+        non_flaky = self.non_flaky_failing_tests({"TestEKSSuite", "TestEKSSuite/mario"}, {"TestEKSSuiteVM/mario"})
+        self.assertEqual(non_flaky, {"TestEKSSuite", "TestEKSSuite/mario"})
+
+
+class TestFlakyTestTrie(unittest.TestCase):
+    def test_is_flaky(self):
+        trie = FlakyTestTrie(["TestEKSSuite/TestCPU", "TestKindSuite"])
+        self.assertTrue(trie.is_flaky("TestEKSSuite/TestCPU"))
+        self.assertTrue(trie.is_flaky("TestEKSSuite/TestCPU/TestCPUUtilization"))
+        self.assertTrue(trie.is_flaky("TestKindSuite/TestCPU"))
+        self.assertFalse(trie.is_flaky("TestEKSSuite"))
+        self.assertFalse(trie.is_flaky("TestEKSSuite/TestMemory"))
+        self.assertFalse(trie.is_flaky("TestEKSSuiteVM/TestCPU"))
+
+    def test_contains(self):
+        trie = FlakyTestTrie(["TestEKSSuite/TestCPU"])
+        self.assertIn("TestEKSSuite/TestCPU", trie)
+        self.assertNotIn("TestEKSSuite", trie)
+        self.assertNotIn("TestEKSSuite/TestCPU/TestCPUUtilization", trie)
+        self.assertEqual(set(trie), {"TestEKSSuite/TestCPU"})
+
+
+class TestFlakeStore(unittest.TestCase):
+    def test_history(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history_file = os.path.join(tmpdir, "history.json")
+            store = FlakeStore(history_file)
+            store.record_run({"pkg": {"TestA": True, "TestB": True}})
+            store.record_run({"pkg": {"TestA": False, "TestB": True}})
+            store.save_history()
+
+            store = FlakeStore(history_file)
+            store.record_run({"pkg": {"TestA": True}})
+            self.assertEqual(store.runs, 3)
+            self.assertAlmostEqual(store.flake_rate("pkg", "TestA"), 1 / 3)
+            self.assertEqual(store.flake_rate("pkg", "TestB"), 0.0)
+            self.assertEqual(store.flake_rate("pkg", "TestC"), 0.0)
+            self.assertEqual(store.flaky_tests_from_history(), {"pkg": {"TestA"}})
+
+
+class TestProcessModuleResults(unittest.TestCase):
+    PACKAGE = "github.com/DataDog/datadog-agent/pkg/toto"
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.flakes_file = os.path.join(self.tmpdir.name, "flakes.yaml")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_module(self, name, results):
+        module_path = os.path.join(self.tmpdir.name, name)
+        os.makedirs(module_path)
+        with open(os.path.join(module_path, "module_test_output.json"), "w") as f:
+            for test, action in results:
+                f.write(json.dumps({"Action": action, "Package": self.PACKAGE, "Test": test}) + "\n")
+        module_result = ModuleTestResult(module_path)
+        module_result.failed = any(action == "fail" for _, action in results)
+        return module_result
+
+    def test_generated_results(self):
+        rng = random.Random(42)
+        tests = [f"Test{i // 100}/Sub{i // 10 % 10}/Case{i % 10}" for i in range(100000)]
+        flaky_tests = rng.sample(tests, 100) + [f"Test{i}" for i in range(5)]
+        with open(self.flakes_file, "w") as f:
+            f.write("pkg/toto:\n" + "".join(f"  - {test}\n" for test in flaky_tests))
+
+        results = [(test, "fail" if rng.random() < 0.01 else "pass") for test in tests]
+        modules = [self.write_module(f"module{i}", results[i::4]) for i in range(4)]
+        test_washer = TestWasher(flakes_file_path=self.flakes_file)
+
+        failing_tests = {test for test, action in results if action == "fail"}
+        # A failing test isn't flaky unless one of its ancestors is flaky or it's an ancestor of a failing flaky test
+        known_flaky_tests_parents = test_washer.get_tests_family(failing_tests.intersection(flaky_tests))
+        expected = {
+            test
+            for test in failing_tests
+            if not test_washer.get_tests_family([test]).intersection(flaky_tests)
+            and test not in known_flaky_tests_parents
+        }
+        self.assertTrue(expected)
+
+        non_flaky_failing_tests = set()
+        for module in modules:
+            _, non_flaky, _ = test_washer.wash_module(module.path)
+            non_flaky_failing_tests.update(non_flaky.get(self.PACKAGE, ()))
+        self.assertEqual(non_flaky_failing_tests, expected)
+        self.assertFalse(test_washer.process_module_results(modules, max_workers=2))
+
+    def test_known_flaky_failures(self):
+        with open(self.flakes_file, "w") as f:
+            f.write("pkg/toto:\n  - TestA\n")
+        history_file = os.path.join(self.tmpdir.name, "history.json")
+        modules = [
+            self.write_module("module0", [("TestA/Sub", "fail"), ("TestA", "fail"), ("TestB", "pass")]),
+            self.write_module("module1", [("TestC", "pass")]),
+        ]
+        test_washer = TestWasher(flakes_file_path=self.flakes_file, flake_history_file=history_file)
+        self.assertTrue(test_washer.process_module_results(modules, max_workers=2))
+
+        store = FlakeStore(history_file)
+        self.assertEqual(store.runs, 1)
+        self.assertEqual(store.flake_rate(self.PACKAGE, "TestA"), 1.0)
+        self.assertEqual(store.flake_rate(self.PACKAGE, "TestC"), 0.0)
+
+    def test_failure_rate(self):
+        with open(self.flakes_file, "w") as f:
+            f.write("pkg/toto:\n  - TestA\n")
+        history_file = os.path.join(self.tmpdir.name, "history.json")
+        for i, action in enumerate(["pass", "pass", "pass", "fail"]):
+            module = self.write_module(f"module{i}", [("TestB", action)])
+            test_washer = TestWasher(flakes_file_path=self.flakes_file, flake_history_file=history_file)
+            with patch("builtins.print") as mock_print:
+                self.assertEqual(test_washer.process_module_results([module]), action == "pass")
+
+        printed = "\n".join(str(call.args[0]) for call in mock_print.call_args_list)
+        self.assertIn(f"- {self.PACKAGE} TestB (failed 25% of its recent runs)", printed)
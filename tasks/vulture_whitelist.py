@@ -0,0 +1,26 @@
+"""
+Names vulture can't see being used, this module is only read by vulture along with the rest of the tasks.
+"""
+
+# ruff: noqa: B018
+
+from types import ModuleType
+
+import tasks
+from tasks.libs.regression.generators import _BlackholeHandler
+from tasks.unit_tests.regression_tests import StubAgentCheck
+
+# Called by Python on the missing attributes of the module
+tasks.__getattr__
+
+# Called by http.server for each request
+_BlackholeHandler.do_GET
+_BlackholeHandler.do_POST
+_BlackholeHandler.do_PUT
+_BlackholeHandler.log_message
+
+# Used by the checks of the regression cases, loaded against the stubs of load_check
+StubAgentCheck.read_persistent_cache
+StubAgentCheck.write_persistent_cache
+ModuleType("datadog_checks.checks").AgentCheck
+ModuleType("datadog_agent").get_config
@@ -0,0 +1,51 @@
+import random
+import string
+
+import datadog_agent
+from datadog_checks.checks import AgentCheck
+
+# Agent configuration options read by the check, scalars and nested settings
+CONFIG_KEYS = [
+    "hostname",
+    "dd_url",
+    "telemetry.enabled",
+    "telemetry.checks",
+    "check_runners",
+    "cloud_provider_metadata",
+    "process_config.process_dd_url",
+    "proxy",
+]
+
+
+class MyCheck(AgentCheck):
+    """
+    Read `num_config_reads` agent configuration options and `num_cache_reads` persistent cache entries per run,
+    rewriting `num_cache_writes` of the entries.
+    """
+
+    def __init__(self, name, init_config, instances):
+        super().__init__(name, init_config, instances)
+        instance = instances[0]
+
+        self.rng = random.Random(instance.get("seed", 11235813))
+        self.num_config_reads = instance.get("num_config_reads", 100)
+        self.num_cache_reads = instance.get("num_cache_reads", 100)
+        self.num_cache_writes = instance.get("num_cache_writes", 10)
+        value_length = instance.get("cache_value_length", 1000)
+        self.cache_keys = [f"key{i}" for i in range(instance.get("num_cache_keys", 10))]
+        self.cache_values = [
+            "".join(self.rng.choices(string.ascii_letters, k=value_length)) for _ in range(len(self.cache_keys))
+        ]
+        self.tags = [f"seed:{instance.get('seed', 11235813)}"]
+
+    def check(self, _instance):
+        for i in range(self.num_config_reads):
+            datadog_agent.get_config(CONFIG_KEYS[i % len(CONFIG_KEYS)])
+
+        for i in range(self.num_cache_writes):
+            self.write_persistent_cache(self.cache_keys[i % len(self.cache_keys)], self.rng.choice(self.cache_values))
+        size = 0
+        for i in range(self.num_cache_reads):
+            size += len(self.read_persistent_cache(self.cache_keys[i % len(self.cache_keys)]) or "")
+
+        self.gauge('persistent_cache.read_bytes', size, tags=self.tags)
@@ -0,0 +1,61 @@
+import json
+import random
+import string
+
+from datadog_checks.checks import AgentCheck
+
+
+def generate_tag_sets(rng, num_sets, tags_per_set, tag_length):
+    """
+    Generate `num_sets` tag sets of `tags_per_set` random `key:value` tags of `tag_length` characters.
+    """
+    alphabet = string.ascii_letters + string.digits
+    key_length = (tag_length - 1) // 2
+    value_length = tag_length - 1 - key_length
+    return [
+        [
+            f"{''.join(rng.choices(alphabet, k=key_length))}:{''.join(rng.choices(alphabet, k=value_length))}"
+            for _ in range(tags_per_set)
+        ]
+        for _ in range(num_sets)
+    ]
+
+
+class MyCheck(AgentCheck):
+    """
+    Submit `num_events` serialized events per run to the event platform, shaped like database monitoring samples.
+    """
+
+    def __init__(self, name, init_config, instances):
+        super().__init__(name, init_config, instances)
+        instance = instances[0]
+
+        self.rng = random.Random(instance.get("seed", 11235813))
+        tag_sets = generate_tag_sets(
+            self.rng,
+            instance.get("num_tagsets", 10),
+            instance.get("tags_per_set", 10),
+            instance.get("tag_length", 50),
+        )
+        self.event_track_type = instance.get("event_track_type", "dbm-samples")
+        statement_length = instance.get("statement_length", 1000)
+        # The events are serialized once, the check measures their submission only
+        self.raw_events = [
+            json.dumps(
+                {
+                    "host": "smp-regression",
+                    "ddsource": "regression",
+                    "ddtags": ",".join(self.rng.choice(tag_sets)),
+                    "db": {
+                        "statement": "".join(self.rng.choices(string.ascii_letters + " ", k=statement_length)),
+                        "query_signature": f"{self.rng.getrandbits(64):016x}",
+                    },
+                    "duration": self.rng.randrange(10**9),
+                }
+            )
+            for _ in range(instance.get("num_events", 100))
+        ]
+
+    def check(self, _instance):
+        for raw_event in self.raw_events:
+            self.event_platform_event(raw_event, self.event_track_type)
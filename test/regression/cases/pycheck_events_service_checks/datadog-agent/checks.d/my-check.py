@@ -0,0 +1,65 @@
+import random
+import string
+import time
+
+from datadog_checks.checks import AgentCheck
+
+
+def generate_tag_sets(rng, num_sets, tags_per_set, tag_length):
+    """
+    Generate `num_sets` tag sets of `tags_per_set` random `key:value` tags of `tag_length` characters.
+    """
+    alphabet = string.ascii_letters + string.digits
+    key_length = (tag_length - 1) // 2
+    value_length = tag_length - 1 - key_length
+    return [
+        [
+            f"{''.join(rng.choices(alphabet, k=key_length))}:{''.join(rng.choices(alphabet, k=value_length))}"
+            for _ in range(tags_per_set)
+        ]
+        for _ in range(num_sets)
+    ]
+
+
+class MyCheck(AgentCheck):
+    """
+    Submit `num_events` events and `num_service_checks` service checks per run.
+    """
+
+    def __init__(self, name, init_config, instances):
+        super().__init__(name, init_config, instances)
+        instance = instances[0]
+
+        self.rng = random.Random(instance.get("seed", 11235813))
+        self.tag_sets = generate_tag_sets(
+            self.rng,
+            instance.get("num_tagsets", 10),
+            instance.get("tags_per_set", 10),
+            instance.get("tag_length", 50),
+        )
+        text_length = instance.get("text_length", 500)
+        self.events = [
+            {
+                "event_type": "regression",
+                "msg_title": f"Event {i}",
+                "msg_text": "".join(self.rng.choices(string.ascii_letters + " ", k=text_length)),
+                "alert_type": self.rng.choice(["error", "warning", "info", "success"]),
+                "aggregation_key": f"aggregation-{i % 10}",
+                "source_type_name": "regression",
+                "tags": self.rng.choice(self.tag_sets),
+            }
+            for i in range(instance.get("num_events", 100))
+        ]
+        self.service_checks = [
+            (f"regression.service_check.{i % 10}", self.rng.randrange(4), self.rng.choice(self.tag_sets))
+            for i in range(instance.get("num_service_checks", 100))
+        ]
+        self.message = "".join(self.rng.choices(string.ascii_letters + " ", k=instance.get("message_length", 100)))
+
+    def check(self, _instance):
+        timestamp = int(time.time())
+        for event in self.events:
+            event["timestamp"] = timestamp
+            self.event(event)
+        for name, status, tags in self.service_checks:
+            self.service_check(name, status, tags=tags, message=self.message)
@@ -0,0 +1,57 @@
+import random
+import string
+
+from datadog_checks.checks import AgentCheck
+
+
+def generate_tag_sets(rng, num_sets, tags_per_set, tag_length):
+    """
+    Generate `num_sets` tag sets of `tags_per_set` random `key:value` tags of `tag_length` characters.
+    """
+    alphabet = string.ascii_letters + string.digits
+    key_length = (tag_length - 1) // 2
+    value_length = tag_length - 1 - key_length
+    return [
+        [
+            f"{''.join(rng.choices(alphabet, k=key_length))}:{''.join(rng.choices(alphabet, k=value_length))}"
+            for _ in range(tags_per_set)
+        ]
+        for _ in range(num_sets)
+    ]
+
+
+class MyCheck(AgentCheck):
+    """
+    Submit the buckets of `num_histograms` histograms for each tag set, like an OpenMetrics check with
+    `collect_histogram_buckets` enabled.
+    """
+
+    def __init__(self, name, init_config, instances):
+        super().__init__(name, init_config, instances)
+        instance = instances[0]
+
+        self.rng = random.Random(instance.get("seed", 11235813))
+        self.tag_sets = generate_tag_sets(
+            self.rng,
+            instance.get("num_tagsets", 10),
+            instance.get("tags_per_set", 10),
+            instance.get("tag_length", 50),
+        )
+        self.names = [f"histogram.bucket.{i}" for i in range(instance.get("num_histograms", 10))]
+        # Exponential bucket bounds, the last bucket being unbounded
+        num_buckets = instance.get("num_buckets", 20)
+        self.bounds = [(0.0, 1.0)] + [(2.0 ** (i - 1), 2.0**i) for i in range(1, num_buckets - 1)]
+        self.bounds.append((self.bounds[-1][1], float("inf")))
+        # The buckets are monotonic counters
+        self.counts = [0] * (len(self.names) * len(self.tag_sets) * len(self.bounds))
+
+    def check(self, _instance):
+        counter = 0
+        for name in self.names:
+            for tags in self.tag_sets:
+                for lower_bound, upper_bound in self.bounds:
+                    self.counts[counter] += self.rng.randrange(10)
+                    self.submit_histogram_bucket(
+                        name, self.counts[counter], lower_bound, upper_bound, True, "", tags, flush_first_value=True
+                    )
+                    counter += 1
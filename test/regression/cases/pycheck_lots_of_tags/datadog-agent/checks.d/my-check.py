@@ -60,20 +60,25 @@ def generate_tag_sets(rng, num_sets, tags_per_set, tag_length, unique_tagset_rat
 
 
 class MyCheck(AgentCheck):
-    def check(self, instance):
+    def __init__(self, name, init_config, instances):
+        super().__init__(name, init_config, instances)
+        instance = instances[0]
+
         seed = instance.get("seed", 11235813)
-        rng = random.Random()
-        rng.seed(seed)
+        self.rng = random.Random()
+        self.rng.seed(seed)
 
         num_tagsets = instance.get("num_tagsets", 10)
         tags_per_set = instance.get("tags_per_set", 10)
         tag_length = instance.get("tag_length", 100)
         unique_tagset_ratio = instance.get("unique_tagset_ratio", 0.11)
-        num_metrics = instance.get("num_metrics", 100)
-        tag_sets = generate_tag_sets(rng, num_tagsets, tags_per_set, tag_length, unique_tagset_ratio)
+        self.num_metrics = instance.get("num_metrics", 100)
+        # Generated once, so that the runs of the check only measure the submission of the metrics
+        self.tag_sets = generate_tag_sets(self.rng, num_tagsets, tags_per_set, tag_length, unique_tagset_ratio)
 
-        for _ in range(num_metrics):
+    def check(self, _instance):
+        for _ in range(self.num_metrics):
             # For each metric that gets submitted, choose a tagset at random
             # This will average out to
             # contexts = len(tag_sets) as long as num_metrics is greater than num_tagsets
-            self.gauge('hello.world', rng.random() * 1000, tags=rng.choice(tag_sets))
+            self.gauge('hello.world', self.rng.random() * 1000, tags=self.rng.choice(self.tag_sets))
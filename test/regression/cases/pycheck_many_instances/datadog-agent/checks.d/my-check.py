@@ -0,0 +1,16 @@
+from datadog_checks.checks import AgentCheck
+
+
+class MyCheck(AgentCheck):
+    """
+    Trivial check, configured with thousands of instances to measure the per-instance cost of the python checks.
+    """
+
+    def __init__(self, name, init_config, instances):
+        super().__init__(name, init_config, instances)
+        instance = instances[0]
+
+        self.tags = [f"instance:{instance.get('id', 0)}"] + list((init_config or {}).get("tags", []))
+
+    def check(self, _instance):
+        self.gauge('hello.world', 1.23, tags=self.tags)